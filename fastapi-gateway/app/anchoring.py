@@ -0,0 +1,369 @@
+"""
+Merkle-batched anchoring of contract changes
+
+In "merkle" anchoring mode the gateway does not write each contract
+change to the ledger. Each change is stored as a leaf holding the
+canonical hash of the contract state. A background task seals the
+leaves of every window into a Merkle tree and commits only the root
+through the FabricClient.
+
+Each leaf stores its own inclusion proof (the sibling hashes up to the
+root) when its window is sealed, so serving a proof reads O(log n)
+hashes instead of the whole tree.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .database import SessionLocal
+from .merkle import build_tree, inclusion_proof, leaf_hash, merkle_root, verify_proof
+from .models import Contract, MerkleAnchor, MerkleAnchorStatus, MerkleLeaf
+
+logger = logging.getLogger(__name__)
+
+OPERATION_ACTIONS = {
+    "create_contract": "CREATE",
+    "verify_contract": "VERIFY",
+    "submit_contract": "SUBMIT",
+    "record_payment": "PAYMENT"
+}
+
+
+def anchoring_enabled() -> bool:
+    """Check whether contract changes are anchored in Merkle batches"""
+    return settings.ledger_anchoring_mode == "merkle"
+
+
+def contract_snapshot(contract: Contract) -> Dict[str, Any]:
+    """
+    Canonical view of the contract fields covered by anchoring
+
+    Database-generated fields (ids, timestamps, remaining_amount) are
+    left out so the hash does not depend on the database round trip.
+
+    Args:
+        contract: Contract model
+
+    Returns:
+        JSON-compatible contract state
+    """
+    return {
+        "contract_id": contract.contract_id,
+        "vendor_id": contract.vendor.vendor_id if contract.vendor else None,
+        "contract_type": contract.contract_type.value if contract.contract_type else None,
+        "status": contract.status.value if contract.status else None,
+        "description": contract.description,
+        "total_value": contract.total_value,
+        "paid_amount": contract.paid_amount or 0,
+        "payment_history": contract.payment_history or [],
+        "expiry_date": contract.expiry_date.isoformat() if contract.expiry_date else None,
+        "document_hash": contract.document_hash,
+        "created_by": contract.created_by,
+        "verified_by": contract.verified_by,
+        "submitted_by": contract.submitted_by
+    }
+
+
+def contract_hash(contract: Contract) -> str:
+    """Leaf hash of the current contract state"""
+    return leaf_hash(contract_snapshot(contract))
+
+
+def record_contract_change(db: Session, contract: Contract, action: str) -> MerkleLeaf:
+    """
+    Add a leaf for a contract change to the session
+
+    The session is flushed first so column defaults of a new contract
+    are part of the hashed state.
+
+    Args:
+        db: Database session
+        contract: Changed contract
+        action: Change action (CREATE, VERIFY, SUBMIT, PAYMENT, UPDATE)
+
+    Returns:
+        Unsealed MerkleLeaf
+    """
+    db.flush()
+    leaf = MerkleLeaf(
+        contract=contract,
+        action=action,
+        leaf_hash=contract_hash(contract)
+    )
+    db.add(leaf)
+    return leaf
+
+
+def get_contract_proof(db: Session, contract: Contract) -> Optional[Dict[str, Any]]:
+    """
+    Build the inclusion proof for a contract's latest anchored change
+
+    Args:
+        db: Database session
+        contract: Contract model
+
+    Returns:
+        Proof details, None if no change of the contract is anchored yet
+    """
+    leaf = db.query(MerkleLeaf).join(MerkleAnchor).filter(
+        MerkleLeaf.contract_id == contract.id,
+        MerkleAnchor.status == MerkleAnchorStatus.ANCHORED
+    ).order_by(MerkleLeaf.id.desc()).first()
+
+    if not leaf:
+        return None
+
+    anchor = leaf.anchor
+    pending_changes = db.query(MerkleLeaf).filter(
+        MerkleLeaf.contract_id == contract.id,
+        MerkleLeaf.id > leaf.id
+    ).count()
+    current_hash = contract_hash(contract)
+
+    return {
+        "contract_id": contract.contract_id,
+        "action": leaf.action,
+        "leaf_hash": leaf.leaf_hash,
+        "leaf_index": leaf.leaf_index,
+        "proof": leaf.proof,
+        "root_hash": anchor.root_hash,
+        "leaf_count": anchor.leaf_count,
+        "blockchain_tx_id": anchor.blockchain_tx_id,
+        "anchored_at": anchor.anchored_at,
+        "verified": verify_proof(leaf.leaf_hash, leaf.proof, anchor.root_hash),
+        "current_hash": current_hash,
+        "matches_current_state": current_hash == leaf.leaf_hash,
+        "pending_changes": pending_changes
+    }
+
+
+class MerkleAnchorer:
+    """
+    Background task that seals and anchors one Merkle tree per window
+
+    Leaves are claimed with FOR UPDATE SKIP LOCKED, so anchorers in
+    several processes seal disjoint batches. Pending roots are claimed
+    the same way and leased while their ledger write runs, so each root
+    is committed by one anchorer. Roots whose ledger write failed stay
+    PENDING and are retried on the next window.
+    """
+
+    def __init__(self, window_seconds: float = 60.0, max_leaves: int = 100000, lease_seconds: int = 120):
+        """
+        Initialize anchorer
+
+        Args:
+            window_seconds: Length of an anchoring window
+            max_leaves: Maximum leaves sealed into one tree
+            lease_seconds: Seconds before a claimed root another anchorer abandoned is reclaimed
+        """
+        self.window_seconds = window_seconds
+        self.max_leaves = max_leaves
+        self.lease_seconds = lease_seconds
+        self._task: Optional[asyncio.Task] = None
+        self._stopped = asyncio.Event()
+
+    def start(self):
+        """Start the anchoring loop"""
+        if self._task is None:
+            self._stopped.clear()
+            self._task = asyncio.create_task(self._run())
+            logger.info("Merkle anchorer started with %ss windows", self.window_seconds)
+
+    async def stop(self):
+        """Stop the anchoring loop, sealing the current window first"""
+        self._stopped.set()
+        if self._task:
+            await self._task
+            self._task = None
+            logger.info("Merkle anchorer stopped")
+
+    async def _run(self):
+        """Anchoring loop"""
+        while True:
+            try:
+                await asyncio.wait_for(self._stopped.wait(), timeout=self.window_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+            try:
+                await self.anchor_window()
+            except Exception as e:
+                logger.error("Merkle anchoring failed: %s", e)
+
+            if self._stopped.is_set():
+                break
+
+    async def anchor_window(self) -> List[int]:
+        """
+        Seal unsealed leaves and commit every pending root
+
+        Returns:
+            IDs of anchors committed to the ledger
+        """
+        from .fabric_client import call_ledger
+
+        await asyncio.to_thread(self._seal_window)
+
+        anchored = []
+        for anchor in await asyncio.to_thread(self._claim_pending_anchors):
+            try:
+                tx_id = await call_ledger(
+                    "anchor_root",
+                    root_hash=anchor["root_hash"],
+                    leaf_count=anchor["leaf_count"],
+                    window_end=anchor["window_end"]
+                )
+            except Exception as e:
+                logger.warning("Failed to anchor Merkle root %s: %s", anchor['root_hash'], e)
+                tx_id = None
+
+            if tx_id:
+                await asyncio.to_thread(self._mark_anchored, anchor["id"], tx_id)
+                anchored.append(anchor["id"])
+            else:
+                await asyncio.to_thread(self._release, anchor["id"])
+        return anchored
+
+    def _seal_window(self) -> Optional[int]:
+        """
+        Build a tree over unsealed leaves and store it as a pending anchor
+
+        Returns:
+            Anchor ID, None if there were no leaves
+        """
+        db = SessionLocal()
+        try:
+            leaves = db.query(MerkleLeaf).filter(
+                MerkleLeaf.anchor_id.is_(None)
+            ).order_by(MerkleLeaf.id).limit(
+                self.max_leaves
+            ).with_for_update(skip_locked=True).all()
+
+            if not leaves:
+                db.rollback()
+                return None
+
+            levels = build_tree([leaf.leaf_hash for leaf in leaves])
+            anchor = MerkleAnchor(
+                root_hash=merkle_root(levels),
+                leaf_count=len(leaves),
+                status=MerkleAnchorStatus.PENDING,
+                window_start=min(leaf.created_at for leaf in leaves),
+                window_end=datetime.utcnow()
+            )
+            db.add(anchor)
+            for index, leaf in enumerate(leaves):
+                leaf.anchor = anchor
+                leaf.leaf_index = index
+                leaf.proof = inclusion_proof(levels, index)
+
+            db.commit()
+            logger.info("Sealed Merkle root %s over %s contract changes", anchor.root_hash, len(leaves))
+            return anchor.id
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _claim_pending_anchors(self) -> List[Dict[str, Any]]:
+        """
+        Lease the sealed roots that are not committed to the ledger yet
+
+        Roots leased by another anchorer are skipped until their lease expires.
+        """
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            anchors = db.query(MerkleAnchor).filter(
+                MerkleAnchor.status == MerkleAnchorStatus.PENDING,
+                or_(MerkleAnchor.locked_until.is_(None), MerkleAnchor.locked_until < now)
+            ).order_by(MerkleAnchor.id).with_for_update(skip_locked=True).all()
+            claimed = []
+            for anchor in anchors:
+                anchor.locked_until = now + timedelta(seconds=self.lease_seconds)
+                claimed.append({
+                    "id": anchor.id,
+                    "root_hash": anchor.root_hash,
+                    "leaf_count": anchor.leaf_count,
+                    "window_end": anchor.window_end.isoformat()
+                })
+            db.commit()
+            return claimed
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _release(self, anchor_id: int):
+        """Give up the lease on a root whose ledger write failed, for the next window"""
+        db = SessionLocal()
+        try:
+            db.query(MerkleAnchor).filter(
+                MerkleAnchor.id == anchor_id,
+                MerkleAnchor.status == MerkleAnchorStatus.PENDING
+            ).update({MerkleAnchor.locked_until: None}, synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _mark_anchored(self, anchor_id: int, tx_id: str):
+        """Record the ledger transaction for a committed root"""
+        db = SessionLocal()
+        try:
+            anchor = db.query(MerkleAnchor).filter(MerkleAnchor.id == anchor_id).first()
+            if anchor and anchor.status == MerkleAnchorStatus.PENDING:
+                anchor.status = MerkleAnchorStatus.ANCHORED
+                anchor.blockchain_tx_id = tx_id
+                anchor.anchored_at = datetime.utcnow()
+                anchor.locked_until = None
+                db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+# Global anchorer instance
+merkle_anchorer: Optional[MerkleAnchorer] = None
+
+
+def start_merkle_anchorer() -> MerkleAnchorer:
+    """
+    Start the Merkle anchorer for this process
+
+    Returns:
+        MerkleAnchorer instance
+    """
+    global merkle_anchorer
+
+    if merkle_anchorer is None:
+        merkle_anchorer = MerkleAnchorer(
+            window_seconds=settings.anchor_window_seconds,
+            max_leaves=settings.anchor_max_leaves,
+            lease_seconds=settings.anchor_lease_seconds
+        )
+        merkle_anchorer.start()
+
+    return merkle_anchorer
+
+
+async def stop_merkle_anchorer():
+    """Stop the Merkle anchorer"""
+    global merkle_anchorer
+
+    if merkle_anchorer:
+        await merkle_anchorer.stop()
+        merkle_anchorer = None
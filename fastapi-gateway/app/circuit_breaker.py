@@ -0,0 +1,322 @@
+"""
+Circuit breakers with adaptive timeouts for ledger operations
+"""
+
+import asyncio
+import enum
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(str, enum.Enum):
+    """Circuit breaker state enumeration"""
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit '{name}' is open, retry in {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class LedgerTimeoutError(Exception):
+    """Raised when a ledger call exceeds its adaptive deadline"""
+
+    def __init__(self, name: str, timeout: float):
+        super().__init__(f"Ledger operation '{name}' timed out after {timeout:.2f}s")
+        self.name = name
+        self.timeout = timeout
+
+
+class _CallDeadline:
+    """Deadline of one queued breaker call, applied once the call reaches the ledger"""
+
+    __slots__ = ("name", "timeout", "clock", "latency")
+
+    def __init__(self, name: str, timeout: float, clock: Callable[[], float]):
+        self.name = name
+        self.timeout = timeout
+        self.clock = clock
+        # Longest ledger round trip of the call, None until the ledger is reached
+        self.latency: Optional[float] = None
+
+
+# Deadline of the queued breaker call running in this task
+_current_deadline: ContextVar[Optional[_CallDeadline]] = ContextVar("ledger_call_deadline", default=None)
+
+
+async def ledger_deadline(awaitable: Awaitable[Any]) -> Any:
+    """
+    Run a ledger round trip under the deadline of the enclosing queued breaker call
+
+    Clients that wait for a write lane or an in-flight slot wrap only the
+    channel call, so time spent queued in the gateway neither times the call
+    out nor feeds the latency estimate. Outside a queued call the awaitable
+    runs as is.
+
+    Args:
+        awaitable: The ledger round trip
+
+    Returns:
+        Result of the awaitable
+
+    Raises:
+        LedgerTimeoutError: If the round trip exceeds the deadline
+    """
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return await awaitable
+
+    started = deadline.clock()
+    try:
+        return await asyncio.wait_for(awaitable, timeout=deadline.timeout)
+    except asyncio.TimeoutError:
+        raise LedgerTimeoutError(deadline.name, deadline.timeout)
+    finally:
+        elapsed = deadline.clock() - started
+        deadline.latency = elapsed if deadline.latency is None else max(deadline.latency, elapsed)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for a single ledger operation type
+
+    The deadline for each call adapts to observed latency using the same
+    smoothed-latency plus variance estimate TCP uses for retransmission
+    timeouts, clamped between ``min_timeout`` and ``max_timeout``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        min_timeout: float = 0.5,
+        max_timeout: float = 10.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize circuit breaker
+
+        Args:
+            name: Operation name the breaker protects
+            failure_threshold: Consecutive failures before the circuit opens
+            reset_timeout: Seconds to stay open before probing again
+            half_open_max_calls: Concurrent probe calls allowed when half-open
+            min_timeout: Lower bound for the adaptive deadline in seconds
+            max_timeout: Upper bound for the adaptive deadline in seconds
+            clock: Monotonic clock, injectable for tests
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self._clock = clock
+
+        self._state = CircuitState.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+
+        # Latency estimate (seconds), None until the first success
+        self._smoothed_latency: Optional[float] = None
+        self._latency_variance = 0.0
+
+        # Counters
+        self._total_calls = 0
+        self._total_failures = 0
+        self._total_timeouts = 0
+        self._total_rejected = 0
+
+    @property
+    def state(self) -> CircuitState:
+        """Current state, moving OPEN to HALF_OPEN once the reset timeout elapses"""
+        if (
+            self._state == CircuitState.OPEN
+            and self._clock() - self._opened_at >= self.reset_timeout
+        ):
+            self._state = CircuitState.HALF_OPEN
+            self._half_open_in_flight = 0
+            logger.info("Circuit '%s' half-open, probing ledger", self.name)
+        return self._state
+
+    @property
+    def timeout(self) -> float:
+        """Current adaptive deadline in seconds"""
+        if self._smoothed_latency is None:
+            return self.max_timeout
+        estimate = self._smoothed_latency + 4 * self._latency_variance
+        return min(self.max_timeout, max(self.min_timeout, estimate))
+
+    def retry_after(self) -> float:
+        """Seconds until the circuit will accept a probe call"""
+        if self.state != CircuitState.OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+
+    async def call(
+        self,
+        func: Callable[..., Awaitable[Any]],
+        *args,
+        queued: bool = False,
+        **kwargs
+    ) -> Any:
+        """
+        Run a ledger call through the breaker
+
+        Args:
+            func: Coroutine function performing the ledger call
+            *args: Positional arguments for func
+            queued: func waits for capacity before reaching the ledger and
+                wraps its round trips in ledger_deadline, which applies the
+                deadline; otherwise the whole call is timed
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Result of the ledger call
+
+        Raises:
+            CircuitOpenError: If the circuit is open or probes are exhausted
+            LedgerTimeoutError: If the call exceeds the adaptive deadline
+        """
+        state = self.state
+        if state == CircuitState.OPEN:
+            self._total_rejected += 1
+            raise CircuitOpenError(self.name, self.retry_after())
+        if state == CircuitState.HALF_OPEN:
+            if self._half_open_in_flight >= self.half_open_max_calls:
+                self._total_rejected += 1
+                raise CircuitOpenError(self.name, self.reset_timeout)
+            self._half_open_in_flight += 1
+
+        self._total_calls += 1
+        timeout = self.timeout
+        deadline = _CallDeadline(self.name, timeout, self._clock) if queued else None
+        token = _current_deadline.set(deadline)
+        started = self._clock()
+        try:
+            if queued:
+                result = await func(*args, **kwargs)
+            else:
+                result = await asyncio.wait_for(func(*args, **kwargs), timeout=timeout)
+        except (asyncio.TimeoutError, LedgerTimeoutError):
+            self._total_timeouts += 1
+            self._record_failure()
+            raise LedgerTimeoutError(self.name, timeout)
+        except Exception:
+            self._record_failure()
+            raise
+        finally:
+            _current_deadline.reset(token)
+            if state == CircuitState.HALF_OPEN:
+                self._half_open_in_flight -= 1
+
+        self._record_success(deadline.latency if queued else self._clock() - started)
+        return result
+
+    def _record_success(self, latency: Optional[float]):
+        """Update latency estimate and close the circuit"""
+        # None when a queued call was answered without reaching the ledger
+        if latency is not None:
+            if self._smoothed_latency is None:
+                self._smoothed_latency = latency
+                self._latency_variance = latency / 2
+            else:
+                self._latency_variance = (
+                    0.75 * self._latency_variance
+                    + 0.25 * abs(self._smoothed_latency - latency)
+                )
+                self._smoothed_latency = 0.875 * self._smoothed_latency + 0.125 * latency
+
+        self._consecutive_failures = 0
+        if self._state != CircuitState.CLOSED:
+            logger.info("Circuit '%s' closed, ledger recovered", self.name)
+        self._state = CircuitState.CLOSED
+
+    def _record_failure(self):
+        """Count a failure and open the circuit when needed"""
+        self._total_failures += 1
+        self._consecutive_failures += 1
+
+        if (
+            self._state == CircuitState.HALF_OPEN
+            or self._consecutive_failures >= self.failure_threshold
+        ):
+            if self._state != CircuitState.OPEN:
+                logger.warning(
+                    "Circuit '%s' opened after %s consecutive failures",
+                    self.name, self._consecutive_failures
+                )
+            self._state = CircuitState.OPEN
+            self._opened_at = self._clock()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get breaker state for health reporting
+
+        Returns:
+            Dictionary with state, timeout and counters
+        """
+        return {
+            "state": self.state.value,
+            "timeout_seconds": round(self.timeout, 3),
+            "smoothed_latency_seconds": (
+                round(self._smoothed_latency, 4)
+                if self._smoothed_latency is not None else None
+            ),
+            "consecutive_failures": self._consecutive_failures,
+            "retry_after_seconds": round(self.retry_after(), 1),
+            "total_calls": self._total_calls,
+            "total_failures": self._total_failures,
+            "total_timeouts": self._total_timeouts,
+            "total_rejected": self._total_rejected
+        }
+
+
+# Breakers keyed by ledger operation name
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(operation: str) -> CircuitBreaker:
+    """
+    Get or create the circuit breaker for a ledger operation
+
+    Args:
+        operation: Ledger operation name (e.g. "create_contract")
+
+    Returns:
+        CircuitBreaker instance
+    """
+    breaker = _circuit_breakers.get(operation)
+
+    if breaker is None:
+        from .config import settings
+
+        breaker = CircuitBreaker(
+            name=operation,
+            failure_threshold=settings.ledger_breaker_failure_threshold,
+            reset_timeout=settings.ledger_breaker_reset_timeout,
+            half_open_max_calls=settings.ledger_breaker_half_open_max_calls,
+            min_timeout=settings.ledger_timeout_min,
+            max_timeout=settings.ledger_timeout_max
+        )
+        _circuit_breakers[operation] = breaker
+
+    return breaker
+
+
+def get_circuit_breakers() -> Dict[str, CircuitBreaker]:
+    """Get all circuit breakers created so far"""
+    return dict(_circuit_breakers)
@@ -0,0 +1,185 @@
+"""
+Response compression above a size threshold
+
+Compresses JSON and text responses larger than ``minimum_size`` bytes with
+brotli when the client accepts it and the ``brotli`` package is installed,
+and with gzip otherwise. Small responses go out as they are, since
+compressing them costs more CPU than it saves on the wire.
+
+The ETag of a compressed response gets a ``-br`` or ``-gzip`` suffix, so
+each encoding keeps a distinct strong tag; ``app.etags`` strips it again
+when comparing If-None-Match.
+"""
+
+import gzip
+import zlib
+from typing import List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = (b"application/json", b"text/")
+
+
+def accepted_encoding(accept_encoding: str, brotli_available: bool) -> Optional[str]:
+    """
+    Best encoding accepted by the client
+
+    Args:
+        accept_encoding: Accept-Encoding request header
+        brotli_available: Whether brotli can be used
+
+    Returns:
+        "br", "gzip" or None
+    """
+    accepted = set()
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(coding.strip())
+    if brotli_available and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    """Streaming compressor for one encoding"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+            self._zlib = None
+        else:
+            self._brotli = None
+            # wbits 31 writes a gzip header and trailer
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.process(data)
+        return self._zlib.compress(data)
+
+    def finish(self) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+def compress(data: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 4) -> bytes:
+    """Compress a complete body"""
+    if encoding == "br":
+        return brotli.compress(data, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing large JSON and text responses"""
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        """
+        Initialize middleware
+
+        Args:
+            app: ASGI application
+            minimum_size: Smallest body, in bytes, that is compressed
+            gzip_level: gzip compression level, 1-9
+            brotli_quality: brotli quality, 0-11
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for name, value in scope.get("headers") or ():
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = accepted_encoding(accept_encoding, brotli is not None)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressingSender(send, encoding, self)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingSender:
+    """Buffers the start of a response until its size is known to be worth compressing"""
+
+    def __init__(self, send, encoding: str, options: CompressionMiddleware):
+        self._send = send
+        self.encoding = encoding
+        self.options = options
+        self.start: Optional[dict] = None
+        self.passthrough = False
+        self.compressor: Optional[_Compressor] = None
+
+    def _headers(self, body_length: Optional[int]) -> List[Tuple[bytes, bytes]]:
+        headers = []
+        for name, value in self.start.get("headers", []):
+            if name == b"content-length":
+                continue
+            if name == b"etag" and value.endswith(b'"'):
+                value = value[:-1] + f'-{self.encoding}"'.encode("latin-1")
+            headers.append((name, value))
+        headers.append((b"content-encoding", self.encoding.encode("latin-1")))
+        headers.append((b"vary", b"Accept-Encoding"))
+        if body_length is not None:
+            headers.append((b"content-length", str(body_length).encode("latin-1")))
+        return headers
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            headers = dict(message.get("headers", []))
+            content_type = headers.get(b"content-type", b"")
+            if (
+                message["status"] < 200
+                or message["status"] in (204, 304)
+                or b"content-encoding" in headers
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            ):
+                self.passthrough = True
+                await self._send(message)
+            else:
+                self.start = message
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            if not more_body:
+                if len(body) < self.options.minimum_size:
+                    self.start["headers"] = list(self.start.get("headers", [])) + [(b"vary", b"Accept-Encoding")]
+                    await self._send(self.start)
+                    await self._send(message)
+                    return
+                compressed = compress(body, self.encoding, self.options.gzip_level, self.options.brotli_quality)
+                self.start["headers"] = self._headers(len(compressed))
+                await self._send(self.start)
+                await self._send({"type": "http.response.body", "body": compressed})
+                return
+            # Streaming response: compress chunk by chunk
+            self.compressor = _Compressor(self.encoding, self.options.gzip_level, self.options.brotli_quality)
+            self.start["headers"] = self._headers(None)
+            await self._send(self.start)
+
+        chunk = self.compressor.compress(body)
+        if not more_body:
+            chunk += self.compressor.finish()
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
@@ -23,6 +23,16 @@ class Settings(BaseSettings):
     db_pool_size: int = 20
     db_max_overflow: int = 40
     db_pool_timeout: int = 30
+    # Connections all gateway workers together may open; split between workers
+    db_connection_budget: int = 60
+    web_concurrency: int = int(os.getenv("WEB_CONCURRENCY", "1"))
+    # Seconds between background pings of idle connections; 0 pings on every checkout instead
+    db_pool_liveness_interval: float = 30.0
+    # Comma-separated read replica URLs; reads stay on the primary when empty
+    database_replica_urls: str = os.getenv("DATABASE_REPLICA_URLS", "")
+    db_replica_check_interval: float = 1.0  # seconds
+    db_replica_max_lag: float = 30.0  # seconds
+    db_consistency_window: float = 5.0  # seconds a token without a WAL position pins reads
     
     # Fabric Network
     fabric_peer_endpoint: str = os.getenv(
@@ -45,24 +55,135 @@ class Settings(BaseSettings):
         "FABRIC_CHAINCODE_NAME",
         "vendor-contract"
     )
+    # Comma-separated "channel[:chaincode]" shards; empty uses fabric_channel_name only
+    fabric_channels: str = os.getenv("FABRIC_CHANNELS", "")
+    fabric_channel_max_concurrency: int = 32  # in-flight calls per channel
+    fabric_conflict_retries: int = 2  # retries of a write that lost an MVCC conflict
+    # Stand-in ledger state: "memory" (per process), "sqlite" (shared by all workers)
+    # or "snapshot" (one process, survives restarts; fabric_state_path is a directory)
+    fabric_state_backend: str = os.getenv("FABRIC_STATE_BACKEND", "memory")
+    fabric_state_path: str = os.getenv("FABRIC_STATE_PATH", "/tmp/vendorchain-ledger-state.db")
+    fabric_state_cache_size: int = 10000  # contracts kept decoded in memory
+    fabric_state_snapshot_every: int = 10000  # log records between snapshots
+    # Block-cutting simulator for the stand-in ledger (latencies in seconds)
+    fabric_simulator_enabled: bool = False
+    fabric_endorsement_latency: str = "lognormal:0.03,0.4"  # fixed/uniform/normal/lognormal/exponential
+    fabric_query_latency: str = "uniform:0.005,0.02"
+    fabric_batch_timeout: float = 2.0
+    fabric_max_message_count: int = 10
+    fabric_block_validation_cost: float = 0.005  # per block
+    fabric_tx_validation_cost: float = 0.001  # per transaction
+    fabric_simulator_seed: Optional[int] = None
+    # URL of a standalone stand-in service (python -m app.fabric_standin); empty uses the in-process mock
+    fabric_standin_url: str = os.getenv("FABRIC_STANDIN_URL", "")
+    fabric_standin_timeout: float = 30.0  # seconds
+    # Unix socket of the ledger sidecar (python -m app.ledger_sidecar); empty gives each worker its own client
+    ledger_sidecar_socket: str = os.getenv("LEDGER_SIDECAR_SOCKET", "")
     fabric_msp_id: str = "Org1MSP"
     fabric_wallet_path: str = "/app/fabric-config/wallet"
     fabric_connection_profile: str = "/app/fabric-config/connection-profile.json"
     
+    # Ledger Circuit Breaker
+    ledger_breaker_failure_threshold: int = 5
+    ledger_breaker_reset_timeout: float = 30.0  # seconds
+    ledger_breaker_half_open_max_calls: int = 1
+    ledger_timeout_min: float = 0.5  # seconds
+    ledger_timeout_max: float = 10.0  # seconds
+    
+    # Deferred Ledger Operations
+    ledger_worker_enabled: bool = True
+    ledger_worker_concurrency: int = 4
+    ledger_worker_poll_interval: float = 1.0  # seconds
+    ledger_operation_max_wait: int = 30  # seconds, long-poll limit
+    ledger_operation_lease: int = 120  # seconds before a stuck operation is reclaimed
+    ledger_retry_max_attempts: int = 8  # ledger calls; open-breaker rejections are not counted
+    ledger_retry_base_delay: float = 2.0  # seconds
+    ledger_retry_max_delay: float = 300.0  # seconds
+    
+    # Merkle Anchoring
+    # "direct" writes every change to the ledger; "merkle" anchors one root per window
+    ledger_anchoring_mode: str = os.getenv("LEDGER_ANCHORING_MODE", "direct")
+    anchor_window_seconds: float = 60.0
+    anchor_max_leaves: int = 100000
+    anchor_lease_seconds: int = 120  # seconds an anchorer holds a pending root it is writing
+    
+    # Metrics
+    metrics_enabled: bool = True  # /metrics endpoint and request latency histograms
+    
+    # Tracing
+    tracing_enabled: bool = False
+    # OTLP/JSON lines file, one line per batch of spans (OpenTelemetry Collector file format)
+    tracing_export_path: str = os.getenv("TRACING_EXPORT_PATH", "/tmp/vendorchain-traces.jsonl")
+    tracing_sample_rate: float = 1.0  # share of untraced requests starting a new trace
+    tracing_service_name: str = "vendorchain-gateway"
+    
+    # Slow Query Log
+    slow_query_log_enabled: bool = False
+    slow_query_threshold_ms: float = 200.0
+    slow_query_explain_sample_rate: float = 0.1  # share of slow SELECTs re-run under EXPLAIN ANALYZE
+    slow_query_explain_interval: float = 300.0  # seconds between EXPLAINs of one fingerprint
+    slow_query_max_fingerprints: int = 500
+    
+    # Request Profiling
+    profiling_enabled: bool = True  # X-Profile: <admin token> profiles one request
+    profiling_sample_rate: float = 0.0  # share of all requests profiled
+    profiling_interval: float = 0.005  # seconds between samples
+    
+    # Event Loop Monitor
+    loop_monitor_enabled: bool = True
+    loop_monitor_interval: float = 0.05  # seconds between lag measurements
+    loop_stall_threshold: float = 0.1  # lag in seconds that captures the blocking stack
+    loop_stall_history: int = 50
+    
     # Security
     api_key_enabled: bool = False
     api_key_header: str = "X-API-Key"
+    # X-Admin-Token for /api/v1/admin diagnostics; empty disables them
+    admin_token: str = os.getenv("ADMIN_TOKEN", "")
     cors_origins: list = ["http://localhost:8069", "http://odoo:8069"]
     
     # Logging
     log_level: str = "INFO"
     log_format: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    log_json: bool = True
+    log_sample_rates: str = os.getenv("LOG_SAMPLE_RATES", "")
+    access_log_enabled: bool = True
+    
+    # Health Probing (health endpoints serve the last probe's cached result)
+    health_probe_interval: float = 5.0  # seconds
+    health_probe_timeout: float = 2.0  # seconds per dependency check
+    health_queue_backlog_threshold: int = 1000  # ledger queue depth reported as degraded
+    
+    # Response Compression (brotli when installed and accepted, gzip otherwise)
+    compression_enabled: bool = True
+    compression_minimum_size: int = 1024  # bytes
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
     
     # Rate Limiting
     rate_limit_enabled: bool = False
     rate_limit_requests: int = 100
     rate_limit_period: int = 60  # seconds
-    
+    # Batch traffic: API keys listed here, or requests sent with "X-Priority: batch"
+    rate_limit_batch_requests: int = 20
+    rate_limit_batch_api_keys: str = os.getenv("RATE_LIMIT_BATCH_API_KEYS", "")
+    # "memory" (each worker enforces its share of the limits) or "sqlite" (shared by all workers)
+    rate_limit_backend: str = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    rate_limit_path: str = os.getenv("RATE_LIMIT_PATH", "/tmp/vendorchain-rate-limit.db")
+    # Shed batch requests with 503 + Retry-After while the database or ledger queue is saturated
+    load_shed_enabled: bool = False
+    load_shed_pool_wait: float = 0.25  # seconds, smoothed DB pool checkout wait
+    load_shed_queue_depth: int = 1000  # pending + running ledger operations
+    load_shed_check_interval: float = 1.0  # seconds
+    load_shed_retry_after: int = 5  # seconds
+
+    # Startup (schema version check and pre-warming before the gateway reports ready)
+    # Create tables from the models when the database has no schema_version table; development only,
+    # other databases are migrated with scripts/apply-migrations.sh (docker-compose turns this on)
+    db_schema_auto_create: bool = False
+    db_pool_prewarm: int = -1  # connections opened at startup; -1 fills the pool, 0 opens none
+    startup_budget_seconds: float = 10.0  # startup slower than this logs a warning
+
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -2,26 +2,211 @@
 Database connection and session management
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import NullPool, QueuePool
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import logging
-from typing import Generator
+import time
+import threading
+from typing import Any, Dict, Generator, NamedTuple, Optional
 from .config import settings
+from .metrics import DB_POOL_LIVENESS_CHECKS, DB_POOL_TIMEOUTS, DB_POOL_WAIT
+from .slow_queries import install_slow_query_log
 
 logger = logging.getLogger(__name__)
 
+
+class PoolSizing(NamedTuple):
+    """Per-worker pool limits derived from the global connection budget"""
+    workers: int
+    budget: int
+    pool_size: int
+    max_overflow: int
+
+
+def size_pool(budget: int, workers: int, pool_size: int, max_overflow: int) -> PoolSizing:
+    """
+    Split a connection budget between worker processes
+
+    Each worker gets an equal share of the budget. The configured pool size
+    and overflow are upper bounds within that share, so all workers at full
+    overflow never open more than the budget.
+
+    Args:
+        budget: Connections all workers together may open
+        workers: Worker processes sharing the budget
+        pool_size: Configured persistent connections per worker
+        max_overflow: Configured burst connections per worker
+
+    Returns:
+        PoolSizing for one worker
+    """
+    workers = max(1, workers)
+    share = max(1, budget // workers)
+    size = max(1, min(pool_size, share))
+    overflow = max(0, min(max_overflow, share - size))
+    return PoolSizing(workers, budget, size, overflow)
+
+
+# Set while the liveness checker borrows connections, so its checkouts stay out of the wait metrics
+_background_checkout = threading.local()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool recording how long each checkout waits for a connection"""
+
+    peak_checked_out = 0
+    # Smoothed checkout wait in seconds, read by load shedding
+    wait_ewma = 0.0
+
+    def _do_get(self):
+        if getattr(_background_checkout, "active", False):
+            return super()._do_get()
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            DB_POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            DB_POOL_WAIT.observe(waited)
+            self.wait_ewma += 0.2 * (waited - self.wait_ewma)
+        checked_out = self.checkedout()
+        if checked_out > self.peak_checked_out:
+            self.peak_checked_out = checked_out
+        return connection
+
+
+class PoolLivenessChecker:
+    """
+    Pings idle pooled connections from a background thread
+
+    Replaces pool_pre_ping, which costs a round trip on every checkout.
+    Each round borrows the idle connections one at a time, runs SELECT 1
+    on the raw DBAPI connection and invalidates the ones that fail, so a
+    request rarely gets a connection the server has dropped. A connection
+    that dies between rounds still fails its statement; SQLAlchemy then
+    invalidates the whole pool, as it would with pre-ping.
+    """
+
+    def __init__(self, pool: QueuePool, interval: float = 30.0):
+        """
+        Initialize checker
+
+        Args:
+            pool: Pool whose idle connections are checked
+            interval: Seconds between rounds
+        """
+        self.pool = pool
+        self.interval = interval
+        self.rounds = 0
+        self.checked = 0
+        self.invalidated = 0
+        self.last_round_at: Optional[float] = None
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start the checker thread"""
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="db-pool-liveness", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the checker thread"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.check_idle()
+            except Exception as e:
+                logger.warning("Pool liveness round failed: %s", e)
+
+    def check_idle(self) -> int:
+        """
+        Ping every idle connection once
+
+        Connections are borrowed one at a time and only while idle ones
+        are available, so a round never makes a request wait.
+
+        Returns:
+            Connections invalidated
+        """
+        invalidated = 0
+        _background_checkout.active = True
+        try:
+            # The pool hands out idle connections in FIFO order, so each one is borrowed once
+            for _ in range(self.pool.checkedin()):
+                if self._stopped.is_set() or self.pool.checkedin() == 0:
+                    break
+                connection = self.pool.connect()
+                try:
+                    cursor = connection.cursor()
+                    try:
+                        cursor.execute("SELECT 1")
+                    finally:
+                        cursor.close()
+                    DB_POOL_LIVENESS_CHECKS.inc("ok")
+                except Exception as e:
+                    connection.invalidate(e)
+                    invalidated += 1
+                    DB_POOL_LIVENESS_CHECKS.inc("invalidated")
+                    logger.warning("Invalidated dead pooled connection: %s", e)
+                finally:
+                    connection.close()
+                self.checked += 1
+        finally:
+            _background_checkout.active = False
+        self.rounds += 1
+        self.invalidated += invalidated
+        self.last_round_at = time.time()
+        return invalidated
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "interval_seconds": self.interval,
+            "rounds": self.rounds,
+            "checked": self.checked,
+            "invalidated": self.invalidated,
+            "last_round_at": self.last_round_at
+        }
+
+
+# Size this worker's pool from its share of the connection budget
+pool_sizing = size_pool(
+    settings.db_connection_budget,
+    settings.web_concurrency,
+    settings.db_pool_size,
+    settings.db_max_overflow
+)
+
 # Create database engine
 engine = create_engine(
     settings.database_url,
-    pool_size=settings.db_pool_size,
-    max_overflow=settings.db_max_overflow,
+    poolclass=InstrumentedQueuePool,
+    pool_size=pool_sizing.pool_size,
+    max_overflow=pool_sizing.max_overflow,
     pool_timeout=settings.db_pool_timeout,
-    pool_pre_ping=True,  # Verify connections before using
+    # Idle connections are pinged in the background instead, unless that is turned off
+    pool_pre_ping=settings.db_pool_liveness_interval <= 0,
     echo=settings.debug  # Log SQL statements if debug mode
 )
 
+# Time statements and sample EXPLAIN plans of slow ones
+if settings.slow_query_log_enabled:
+    install_slow_query_log(engine)
+
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -29,6 +214,74 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def get_pool_status() -> Dict[str, Any]:
+    """
+    Live connection pool usage
+
+    Returns:
+        Dictionary with pool size, idle, checked-out and overflow connections
+    """
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"pool_class": pool.__class__.__name__}
+    capacity = pool.size() + pool_sizing.max_overflow
+    checked_out = pool.checkedout()
+    status = {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": checked_out,
+        # Negative while the pool has not yet opened pool_size connections
+        "overflow": pool.overflow(),
+        "max_overflow": pool_sizing.max_overflow,
+        "capacity": capacity,
+        "saturation": round(checked_out / capacity, 4) if capacity else 0.0,
+        "workers": pool_sizing.workers,
+        "connection_budget": pool_sizing.budget
+    }
+    if isinstance(pool, InstrumentedQueuePool):
+        status["peak_saturation"] = round(pool.peak_checked_out / capacity, 4) if capacity else 0.0
+    if _liveness_checker is not None:
+        status["liveness"] = _liveness_checker.snapshot()
+    return status
+
+
+def reset_peak_saturation():
+    """Start a new peak saturation window, after each metrics scrape"""
+    pool = engine.pool
+    if isinstance(pool, InstrumentedQueuePool):
+        pool.peak_checked_out = pool.checkedout()
+
+
+# Global pool liveness checker instance
+_liveness_checker: Optional[PoolLivenessChecker] = None
+
+
+def start_pool_liveness_checker() -> Optional[PoolLivenessChecker]:
+    """
+    Start background pings of idle connections
+
+    Returns:
+        Running PoolLivenessChecker, None when checks run on checkout
+    """
+    global _liveness_checker
+
+    if settings.db_pool_liveness_interval <= 0 or not isinstance(engine.pool, QueuePool):
+        return None
+    if _liveness_checker is None:
+        _liveness_checker = PoolLivenessChecker(engine.pool, settings.db_pool_liveness_interval)
+        _liveness_checker.start()
+    return _liveness_checker
+
+
+def stop_pool_liveness_checker():
+    """Stop background pings of idle connections"""
+    global _liveness_checker
+
+    if _liveness_checker is not None:
+        _liveness_checker.stop()
+        _liveness_checker = None
+
+
 def get_db() -> Generator[Session, None, None]:
     """
     Dependency to get database session.
@@ -41,27 +294,146 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+def _ping_database():
+    """Run SELECT 1 on a pooled connection"""
+    db = SessionLocal()
+    try:
+        db.execute(text("SELECT 1"))
+    finally:
+        db.close()
+
+
 async def check_database_connection() -> bool:
     """
     Check if database is accessible
+    
+    The query runs in a worker thread so a slow database cannot block
+    the event loop.
     """
     try:
-        db = SessionLocal()
-        db.execute("SELECT 1")
-        db.close()
+        await asyncio.to_thread(_ping_database)
         return True
     except Exception as e:
-        logger.error(f"Database connection check failed: {str(e)}")
+        logger.error("Database connection check failed: %s", e)
         return False
 
 
+class SchemaVersionError(RuntimeError):
+    """The database schema is older than this gateway needs"""
+
+
+# Latest version in scripts/migrations; bump with every new migration
+SCHEMA_VERSION = 4
+
+# Result of the startup schema check, reported by health checks
+_schema_status: Optional[Dict[str, Any]] = None
+
+
+def check_schema_version(required: int = SCHEMA_VERSION, auto_create: bool = False) -> Dict[str, Any]:
+    """
+    Check the applied migrations once at startup instead of running create_all
+
+    Migrations record themselves in the schema_version table, so one query
+    tells whether the database is recent enough. A database without that
+    table has not been migrated; with auto_create its tables are created
+    from the models instead, which suits development databases.
+
+    Args:
+        required: Lowest schema version the gateway works with
+        auto_create: Create tables from the models if schema_version is missing
+
+    Returns:
+        Applied version, required version and whether tables were created
+
+    Raises:
+        SchemaVersionError: If the schema is older than required or unmigrated
+    """
+    global _schema_status
+
+    with engine.connect() as connection:
+        migrated = inspect(connection).has_table("schema_version")
+        version = None
+        if migrated:
+            version = connection.execute(text("SELECT max(version) FROM schema_version")).scalar()
+
+    status = {"version": version, "required": required, "created": False, "ok": True}
+    if not migrated and auto_create:
+        Base.metadata.create_all(bind=engine)
+        status["created"] = True
+    elif version is None or version < required:
+        status["ok"] = False
+        status["error"] = (
+            f"Database schema is at version {version}, gateway needs {required}; "
+            "run scripts/apply-migrations.sh"
+        )
+        if not migrated:
+            status["error"] += " (or set DB_SCHEMA_AUTO_CREATE=true on a development database)"
+    _schema_status = status
+    if not status["ok"]:
+        raise SchemaVersionError(status["error"])
+    return status
+
+
+def get_schema_status() -> Optional[Dict[str, Any]]:
+    """Result of the startup schema check, None before it ran"""
+    return _schema_status
+
+
+def _open_background_connection():
+    _background_checkout.active = True
+    try:
+        return engine.connect()
+    finally:
+        _background_checkout.active = False
+
+
+def prewarm_pool(count: int) -> int:
+    """
+    Open pooled connections before the first request needs them
+
+    Connections are opened concurrently and returned to the pool idle, so
+    the first burst of requests does not wait for connection setup.
+
+    Args:
+        count: Connections to open, at most the pool size
+
+    Returns:
+        Connections opened
+    """
+    pool = engine.pool
+    if isinstance(pool, QueuePool):
+        count = min(count, pool.size())
+    if count <= 0:
+        return 0
+    opened = []
+    error = None
+    with ThreadPoolExecutor(max_workers=count, thread_name_prefix="db-prewarm") as executor:
+        for future in [executor.submit(_open_background_connection) for _ in range(count)]:
+            try:
+                opened.append(future.result())
+            except Exception as e:
+                error = e
+    for connection in opened:
+        connection.close()
+    if error is not None and not opened:
+        raise error
+    return len(opened)
+
+
 def init_database():
     """
-    Initialize database tables
+    Check the database schema version
     """
     try:
-        Base.metadata.create_all(bind=engine)
-        logger.info("Database tables initialized successfully")
+        status = check_schema_version(auto_create=settings.db_schema_auto_create)
+        if status["created"]:
+            logger.info("Database tables created from the models (no schema_version table)")
+        else:
+            logger.info("Database schema at version %s", status["version"])
+        logger.info(
+            "Database pool: %s connections + %s overflow, %s-connection budget across %s workers",
+            pool_sizing.pool_size, pool_sizing.max_overflow, pool_sizing.budget, pool_sizing.workers
+        )
     except Exception as e:
-        logger.error(f"Failed to initialize database: {str(e)}")
-        raise
\ No newline at end of file
+        logger.error("Failed to initialize database: %s", e)
+        raise
@@ -0,0 +1,115 @@
+"""
+Strong ETags for conditional GETs of contracts and vendors
+
+An entity tag is a digest of the version columns of every row a response
+is built from: the primary key, ``updated_at`` and, on PostgreSQL, the
+row's ``xmin`` (the ID of the transaction that last wrote it, which also
+changes on writes that leave ``updated_at`` alone). List tags cover every
+row on the page, so additions, changes and deletions all change them.
+
+When the request carries ``If-None-Match``, endpoints first read only the
+version columns and answer 304 if the tag matches, without loading JSON
+columns or serializing the response.
+"""
+
+import hashlib
+from typing import Iterable, List, Optional, Sequence
+
+from fastapi import Response
+from sqlalchemy import literal_column, null
+from sqlalchemy.orm import Session
+
+from .config import settings
+
+# Suffixes the compression middleware adds to the tags of encoded responses
+ENCODING_SUFFIXES = ("-br", "-gzip")
+
+
+def version_columns(db: Session, *models) -> List:
+    """
+    Columns identifying the current version of rows of the given models
+
+    Args:
+        db: Session the query runs on
+        models: Mapped classes joined in the query
+
+    Returns:
+        Primary key, updated_at and row version columns of each model
+    """
+    postgres = db.get_bind().dialect.name == "postgresql"
+    columns = []
+    for model in models:
+        columns.append(model.id)
+        columns.append(model.updated_at)
+        columns.append(
+            literal_column(f"{model.__tablename__}.xmin::text") if postgres else null()
+        )
+    return columns
+
+
+def compute_etag(versions: Iterable[Sequence]) -> str:
+    """
+    Strong entity tag of a response built from rows with these versions
+
+    Args:
+        versions: Version column values of each row, in response order
+
+    Returns:
+        Quoted entity tag
+    """
+    digest = hashlib.sha256(settings.app_version.encode())
+    for version in versions:
+        digest.update(repr(tuple(version)).encode())
+        digest.update(b"\n")
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def matching_etag(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """
+    Tag of an If-None-Match header that matches an entity tag
+
+    Uses the weak comparison RFC 9110 prescribes for If-None-Match, and
+    ignores the suffix of compressed representations.
+
+    Args:
+        if_none_match: If-None-Match request header
+        etag: Entity tag of the current state
+
+    Returns:
+        Matching tag with the encoding suffix the client sent, etag for
+        "*", None if nothing matches
+    """
+    if not if_none_match:
+        return None
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return etag
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        for suffix in ENCODING_SUFFIXES:
+            if candidate.endswith(suffix + '"'):
+                if candidate[: -len(suffix) - 1] + '"' == etag:
+                    return candidate
+                break
+        if candidate == etag:
+            return candidate
+    return None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches an entity tag"""
+    return matching_etag(if_none_match, etag) is not None
+
+
+def not_modified(etag: str, if_none_match: Optional[str] = None) -> Response:
+    """
+    304 response for a matching entity tag
+
+    Names the representation the client holds: a compressed copy is
+    validated with the suffixed tag its 200 response carried.
+    """
+    headers = {"ETag": matching_etag(if_none_match, etag) or etag}
+    if settings.compression_enabled:
+        headers["Vary"] = "Accept-Encoding"
+    return Response(status_code=304, headers=headers)
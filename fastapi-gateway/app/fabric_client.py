@@ -5,11 +5,19 @@ Hyperledger Fabric SDK client for blockchain operations
 import json
 import logging
 import asyncio
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Set, Tuple
 from datetime import datetime
 import hashlib
+import time
 from pathlib import Path
 
+from .circuit_breaker import ledger_deadline
+from .keyed_executor import KeyedExecutor
+from .ledger_simulator import VALID, LatencyProfile, LedgerSimulator
+from .ledger_state import create_state_backend
+from .metrics import LEDGER_CALL_DURATION, LEDGER_CALL_ERRORS, LEDGER_CALL_REJECTED
+from .tracing import CLIENT, current_traceparent, start_span
+
 logger = logging.getLogger(__name__)
 
 
@@ -33,8 +41,23 @@ class FabricClient:
         self.msp_id = config.get('msp_id', 'Org1MSP')
         self.connected = False
         
-        # In-memory store for MVP demo (simulates blockchain state)
-        self._blockchain_state = {}
+        # Stand-in for blockchain state; "sqlite" shares it across worker processes
+        state_backend = config.get('state_backend', 'memory')
+        state_options = {
+            'path': config.get('state_path'),
+            'cache_size': config.get('state_cache_size', 10000),
+            'snapshot_every': config.get('state_snapshot_every', 10000)
+        }
+        self._blockchain_state = create_state_backend(state_backend, f"{self.channel_name}/contracts", **state_options)
+        self._anchors = create_state_backend(state_backend, f"{self.channel_name}/anchors", **state_options)
+        
+        # Optional block-cutting simulator replacing the fixed sleeps
+        profile = config.get('simulator')
+        self._simulator = LedgerSimulator(profile) if profile else None
+        
+        # Writes rejected because the contract changed after it was read
+        self.conflicts = 0
+        self._conflicted_keys: Set[str] = set()
         
     async def connect(self) -> bool:
         """
@@ -47,15 +70,17 @@ class FabricClient:
             # Simulate connection establishment
             await asyncio.sleep(0.1)
             self.connected = True
-            logger.info(f"Connected to Fabric network at {self.peer_endpoint}")
+            logger.info("Connected to Fabric network at %s", self.peer_endpoint)
             return True
         except Exception as e:
-            logger.error(f"Failed to connect to Fabric network: {str(e)}")
+            logger.error("Failed to connect to Fabric network: %s", e)
             return False
     
     async def disconnect(self):
         """Disconnect from Fabric network"""
         self.connected = False
+        await self._blockchain_state.close_async()
+        await self._anchors.close_async()
         logger.info("Disconnected from Fabric network")
     
     async def query_contract(self, contract_id: str) -> Optional[Dict[str, Any]]:
@@ -70,15 +95,12 @@ class FabricClient:
         """
         try:
             # Simulate blockchain query
-            await asyncio.sleep(0.05)
+            await self._query_delay()
             
-            if contract_id in self._blockchain_state:
-                return self._blockchain_state[contract_id]
-            
-            return None
+            return await self._blockchain_state.get_async(contract_id)
             
         except Exception as e:
-            logger.error(f"Failed to query contract {contract_id}: {str(e)}")
+            logger.error("Failed to query contract %s: %s", contract_id, e)
             return None
     
     async def create_contract(
@@ -86,7 +108,8 @@ class FabricClient:
         contract_id: str,
         vendor_id: str,
         contract_data: Dict[str, Any],
-        created_by: str
+        created_by: str,
+        idempotency_key: Optional[str] = None
     ) -> Optional[str]:
         """
         Create new contract on blockchain
@@ -96,19 +119,22 @@ class FabricClient:
             vendor_id: Vendor identifier
             contract_data: Contract details
             created_by: User creating the contract
+            idempotency_key: Request key; a replayed request returns the committed transaction ID
             
         Returns:
             Transaction ID if successful, None otherwise
         """
         try:
-            # Simulate blockchain transaction
-            await asyncio.sleep(0.1)
+            existing = await self._blockchain_state.get_async(contract_id)
+            earlier = self._earlier_tx(existing, idempotency_key)
+            if earlier:
+                return earlier
             
             # Generate transaction ID
             tx_id = self._generate_tx_id(contract_id, "CREATE")
             
             # Store in blockchain state
-            self._blockchain_state[contract_id] = {
+            record = {
                 "contractId": contract_id,
                 "vendorId": vendor_id,
                 "status": "CREATED",
@@ -117,120 +143,176 @@ class FabricClient:
                 "data": contract_data,
                 "txId": tx_id
             }
+            self._remember_key(record, idempotency_key, tx_id)
+            
+            def apply(contract):
+                if self._earlier_tx(contract, idempotency_key):
+                    return None
+                return record
             
-            logger.info(f"Created contract {contract_id} on blockchain, tx: {tx_id}")
+            if not await self._write(contract_id, existing, apply):
+                earlier = self._earlier_tx(await self._blockchain_state.get_async(contract_id), idempotency_key)
+                if earlier:
+                    return earlier
+                logger.error("Contract %s changed during creation", contract_id)
+                return None
+            
+            logger.info("Created contract %s on blockchain, tx: %s", contract_id, tx_id)
             return tx_id
             
         except Exception as e:
-            logger.error(f"Failed to create contract {contract_id}: {str(e)}")
+            logger.error("Failed to create contract %s: %s", contract_id, e)
             return None
     
     async def verify_contract(
         self,
         contract_id: str,
         verified_by: str,
-        notes: Optional[str] = None
+        notes: Optional[str] = None,
+        idempotency_key: Optional[str] = None
     ) -> Optional[str]:
         """
         Verify contract on blockchain (transition to VERIFIED status)
         
+        For a keyed request, a contract already past the transition counts
+        as verified, returning the transaction that made it.
+        
         Args:
             contract_id: Contract identifier
             verified_by: User verifying the contract
             notes: Optional verification notes
+            idempotency_key: Request key; a replayed request returns the committed transaction ID
             
         Returns:
             Transaction ID if successful
         """
         try:
             # Check if contract exists
-            if contract_id not in self._blockchain_state:
-                logger.error(f"Contract {contract_id} not found on blockchain")
+            contract = await self._blockchain_state.get_async(contract_id)
+            if contract is None:
+                logger.error("Contract %s not found on blockchain", contract_id)
                 return None
             
-            contract = self._blockchain_state[contract_id]
+            earlier = self._earlier_tx(contract, idempotency_key, ("VERIFIED", "SUBMITTED"), "verifyTxId")
+            if earlier:
+                logger.info("Contract %s already verified, tx: %s", contract_id, earlier)
+                return earlier
             
             # Check current status
             if contract["status"] != "CREATED":
-                logger.error(f"Cannot verify contract {contract_id} with status {contract['status']}")
+                logger.error("Cannot verify contract %s with status %s", contract_id, contract['status'])
                 return None
             
-            # Simulate blockchain transaction
-            await asyncio.sleep(0.1)
-            
             # Generate transaction ID
             tx_id = self._generate_tx_id(contract_id, "VERIFY")
             
-            # Update blockchain state
-            contract["status"] = "VERIFIED"
-            contract["verifiedBy"] = verified_by
-            contract["verifiedAt"] = datetime.utcnow().isoformat()
-            if notes:
-                contract["verificationNotes"] = notes
-            contract["lastTxId"] = tx_id
+            # Update blockchain state, rechecking the status another worker may have changed
+            def apply(contract):
+                if contract is None or contract["status"] != "CREATED":
+                    return None
+                contract["status"] = "VERIFIED"
+                contract["verifiedBy"] = verified_by
+                contract["verifiedAt"] = datetime.utcnow().isoformat()
+                if notes:
+                    contract["verificationNotes"] = notes
+                contract["verifyTxId"] = tx_id
+                contract["lastTxId"] = tx_id
+                self._remember_key(contract, idempotency_key, tx_id)
+                return contract
+            
+            if not await self._write(contract_id, contract, apply):
+                earlier = self._earlier_tx(
+                    await self._blockchain_state.get_async(contract_id), idempotency_key, ("VERIFIED", "SUBMITTED"), "verifyTxId"
+                )
+                if earlier:
+                    return earlier
+                logger.error("Contract %s changed during verification", contract_id)
+                return None
             
-            logger.info(f"Verified contract {contract_id} on blockchain, tx: {tx_id}")
+            logger.info("Verified contract %s on blockchain, tx: %s", contract_id, tx_id)
             return tx_id
             
         except Exception as e:
-            logger.error(f"Failed to verify contract {contract_id}: {str(e)}")
+            logger.error("Failed to verify contract %s: %s", contract_id, e)
             return None
     
     async def submit_contract(
         self,
         contract_id: str,
         submitted_by: str,
-        notes: Optional[str] = None
+        notes: Optional[str] = None,
+        idempotency_key: Optional[str] = None
     ) -> Optional[str]:
         """
         Submit contract on blockchain (transition to SUBMITTED status)
         
+        For a keyed request, a contract already past the transition counts
+        as submitted, returning the transaction that made it.
+        
         Args:
             contract_id: Contract identifier
             submitted_by: User submitting the contract
             notes: Optional submission notes
+            idempotency_key: Request key; a replayed request returns the committed transaction ID
             
         Returns:
             Transaction ID if successful
         """
         try:
             # Check if contract exists
-            if contract_id not in self._blockchain_state:
-                logger.error(f"Contract {contract_id} not found on blockchain")
+            contract = await self._blockchain_state.get_async(contract_id)
+            if contract is None:
+                logger.error("Contract %s not found on blockchain", contract_id)
                 return None
             
-            contract = self._blockchain_state[contract_id]
+            earlier = self._earlier_tx(contract, idempotency_key, ("SUBMITTED",), "submitTxId")
+            if earlier:
+                logger.info("Contract %s already submitted, tx: %s", contract_id, earlier)
+                return earlier
             
             # Check current status
             if contract["status"] != "VERIFIED":
-                logger.error(f"Cannot submit contract {contract_id} with status {contract['status']}")
+                logger.error("Cannot submit contract %s with status %s", contract_id, contract['status'])
                 return None
             
-            # Simulate blockchain transaction
-            await asyncio.sleep(0.1)
-            
             # Generate transaction ID
             tx_id = self._generate_tx_id(contract_id, "SUBMIT")
             
-            # Update blockchain state
-            contract["status"] = "SUBMITTED"
-            contract["submittedBy"] = submitted_by
-            contract["submittedAt"] = datetime.utcnow().isoformat()
-            if notes:
-                contract["submissionNotes"] = notes
-            contract["lastTxId"] = tx_id
+            # Update blockchain state, rechecking the status another worker may have changed
+            def apply(contract):
+                if contract is None or contract["status"] != "VERIFIED":
+                    return None
+                contract["status"] = "SUBMITTED"
+                contract["submittedBy"] = submitted_by
+                contract["submittedAt"] = datetime.utcnow().isoformat()
+                if notes:
+                    contract["submissionNotes"] = notes
+                contract["submitTxId"] = tx_id
+                contract["lastTxId"] = tx_id
+                self._remember_key(contract, idempotency_key, tx_id)
+                return contract
+            
+            if not await self._write(contract_id, contract, apply):
+                earlier = self._earlier_tx(
+                    await self._blockchain_state.get_async(contract_id), idempotency_key, ("SUBMITTED",), "submitTxId"
+                )
+                if earlier:
+                    return earlier
+                logger.error("Contract %s changed during submission", contract_id)
+                return None
             
-            logger.info(f"Submitted contract {contract_id} on blockchain, tx: {tx_id}")
+            logger.info("Submitted contract %s on blockchain, tx: %s", contract_id, tx_id)
             return tx_id
             
         except Exception as e:
-            logger.error(f"Failed to submit contract {contract_id}: {str(e)}")
+            logger.error("Failed to submit contract %s: %s", contract_id, e)
             return None
     
     async def record_payment(
         self,
         contract_id: str,
-        payment_data: Dict[str, Any]
+        payment_data: Dict[str, Any],
+        idempotency_key: Optional[str] = None
     ) -> Optional[str]:
         """
         Record payment for contract on blockchain
@@ -238,41 +320,53 @@ class FabricClient:
         Args:
             contract_id: Contract identifier
             payment_data: Payment details
+            idempotency_key: Request key; a replayed request returns the committed
+                transaction ID instead of recording the payment twice
             
         Returns:
             Transaction ID if successful
         """
         try:
             # Check if contract exists
-            if contract_id not in self._blockchain_state:
-                logger.error(f"Contract {contract_id} not found on blockchain")
+            contract = await self._blockchain_state.get_async(contract_id)
+            if contract is None:
+                logger.error("Contract %s not found on blockchain", contract_id)
                 return None
             
-            contract = self._blockchain_state[contract_id]
-            
-            # Simulate blockchain transaction
-            await asyncio.sleep(0.1)
+            earlier = self._earlier_tx(contract, idempotency_key)
+            if earlier:
+                return earlier
             
             # Generate transaction ID
             tx_id = self._generate_tx_id(contract_id, "PAYMENT")
             
-            # Update payment history
-            if "payments" not in contract:
-                contract["payments"] = []
-            
             payment_record = {
                 **payment_data,
                 "txId": tx_id,
                 "recordedAt": datetime.utcnow().isoformat()
             }
-            contract["payments"].append(payment_record)
-            contract["lastTxId"] = tx_id
             
-            logger.info(f"Recorded payment for contract {contract_id}, tx: {tx_id}")
+            # Append to payment history in one atomic update
+            def apply(contract):
+                if contract is None or self._earlier_tx(contract, idempotency_key):
+                    return None
+                contract.setdefault("payments", []).append(payment_record)
+                contract["lastTxId"] = tx_id
+                self._remember_key(contract, idempotency_key, tx_id)
+                return contract
+            
+            if not await self._write(contract_id, contract, apply):
+                earlier = self._earlier_tx(await self._blockchain_state.get_async(contract_id), idempotency_key)
+                if earlier:
+                    return earlier
+                logger.error("Contract %s changed while recording payment", contract_id)
+                return None
+            
+            logger.info("Recorded payment for contract %s, tx: %s", contract_id, tx_id)
             return tx_id
             
         except Exception as e:
-            logger.error(f"Failed to record payment for contract {contract_id}: {str(e)}")
+            logger.error("Failed to record payment for contract %s: %s", contract_id, e)
             return None
     
     async def get_contract_history(self, contract_id: str) -> List[Dict[str, Any]]:
@@ -287,13 +381,13 @@ class FabricClient:
         """
         try:
             # Simulate blockchain query
-            await asyncio.sleep(0.05)
+            await self._query_delay()
             
-            if contract_id not in self._blockchain_state:
+            contract = await self._blockchain_state.get_async(contract_id)
+            if contract is None:
                 return []
             
             # Generate mock history based on current state
-            contract = self._blockchain_state[contract_id]
             history = []
             
             # Created transaction
@@ -334,9 +428,61 @@ class FabricClient:
             return history
             
         except Exception as e:
-            logger.error(f"Failed to get history for contract {contract_id}: {str(e)}")
+            logger.error("Failed to get history for contract %s: %s", contract_id, e)
             return []
     
+    async def anchor_root(
+        self,
+        root_hash: str,
+        leaf_count: int,
+        window_end: str
+    ) -> Optional[str]:
+        """
+        Commit a Merkle root covering a batch of contract changes
+        
+        Args:
+            root_hash: Hex-encoded Merkle root
+            leaf_count: Number of contract changes under the root
+            window_end: ISO timestamp closing the anchoring window
+            
+        Returns:
+            Transaction ID if successful
+        """
+        try:
+            # Simulate blockchain transaction
+            await asyncio.sleep(0.1)
+            
+            # Generate transaction ID
+            tx_id = self._generate_tx_id(root_hash, "ANCHOR")
+            
+            await self._anchors.put_async(root_hash, {
+                "rootHash": root_hash,
+                "leafCount": leaf_count,
+                "windowEnd": window_end,
+                "anchoredAt": datetime.utcnow().isoformat(),
+                "txId": tx_id
+            })
+            
+            logger.info("Anchored Merkle root %s (%s changes), tx: %s", root_hash, leaf_count, tx_id)
+            return tx_id
+            
+        except Exception as e:
+            logger.error("Failed to anchor Merkle root %s: %s", root_hash, e)
+            return None
+    
+    async def query_anchor(self, root_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Query an anchored Merkle root
+        
+        Args:
+            root_hash: Hex-encoded Merkle root
+            
+        Returns:
+            Anchor record if found, None otherwise
+        """
+        await self._query_delay()
+        return await self._anchors.get_async(root_hash)
+    
     async def check_connection(self) -> bool:
         """
         Check if connection to Fabric network is active
@@ -351,6 +497,97 @@ class FabricClient:
         except Exception:
             return False
     
+    async def _query_delay(self):
+        """Wait for a simulated peer query"""
+        if self._simulator:
+            await self._simulator.query()
+        else:
+            await asyncio.sleep(0.05)
+    
+    async def _write(self, key: str, read_value: Optional[Dict[str, Any]], apply) -> bool:
+        """
+        Commit a write to contract state
+        
+        Args:
+            key: Contract identifier
+            read_value: Contract state the write was endorsed against
+            apply: Function producing the new state from the committed one,
+                returning None to abort
+            
+        Returns:
+            bool: True if the write was committed
+        """
+        if self._simulator:
+            code = await self._simulator.submit(self._blockchain_state, key, read_value, apply)
+            committed = code == VALID
+        else:
+            # Simulate blockchain transaction
+            await asyncio.sleep(0.1)
+            committed = await self._blockchain_state.update_async(key, apply) is not None
+        
+        if not committed:
+            self.conflicts += 1
+            self._conflicted_keys.add(key)
+        return committed
+    
+    @staticmethod
+    def _earlier_tx(
+        contract: Optional[Dict[str, Any]],
+        idempotency_key: Optional[str],
+        done_statuses: Tuple[str, ...] = (),
+        tx_field: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Transaction ID to return instead of writing again
+        
+        Keyed requests come from the gateway, which may retry a call that
+        committed after timing out, so for them a contract already past
+        the transition also counts as done. Unkeyed calls are rejected.
+        
+        Args:
+            contract: Current contract state
+            idempotency_key: Key of the request, None if it has none
+            done_statuses: Statuses the requested transition has already reached
+            tx_field: Field holding the transition's transaction ID
+            
+        Returns:
+            Transaction ID of the earlier write, None if the write is still to be made
+        """
+        if contract is None:
+            return None
+        if not idempotency_key:
+            return None
+        if idempotency_key in contract.get("idempotencyKeys", {}):
+            return contract["idempotencyKeys"][idempotency_key]
+        if contract.get("status") in done_statuses:
+            return contract.get(tx_field) or contract.get("lastTxId")
+        return None
+    
+    @staticmethod
+    def _remember_key(contract: Dict[str, Any], idempotency_key: Optional[str], tx_id: str):
+        """Record the transaction a request key committed, in the same write"""
+        if idempotency_key:
+            contract.setdefault("idempotencyKeys", {})[idempotency_key] = tx_id
+    
+    def take_conflict(self, key: str) -> bool:
+        """
+        Check and clear whether the last failed write to a key was a conflict
+        
+        Args:
+            key: Contract identifier
+            
+        Returns:
+            bool: True if the write failed because the contract changed
+        """
+        if key in self._conflicted_keys:
+            self._conflicted_keys.discard(key)
+            return True
+        return False
+    
+    def simulator_status(self) -> Optional[Dict[str, Any]]:
+        """Block and MVCC conflict counters, None when not simulating"""
+        return self._simulator.snapshot() if self._simulator else None
+    
     def _generate_tx_id(self, contract_id: str, action: str) -> str:
         """
         Generate a mock transaction ID
@@ -367,36 +604,600 @@ class FabricClient:
         return hashlib.sha256(data.encode()).hexdigest()[:64]
 
 
+class RemoteFabricClient:
+    """
+    Fabric client for the standalone stand-in service (app.fabric_standin)
+    
+    Has the same interface as FabricClient. Rejected transactions return
+    None; transport errors and 5xx responses raise, so the circuit
+    breaker and the retry queue treat them as an unavailable ledger.
+    """
+    
+    def __init__(self, config: Dict[str, Any]):
+        """
+        Initialize remote client
+        
+        Args:
+            config: Configuration dictionary with the stand-in URL and channel
+        """
+        self.standin_url = config['standin_url'].rstrip('/')
+        self.peer_endpoint = self.standin_url
+        self.channel_name = config.get('channel_name', 'vendorcontract')
+        self.chaincode_name = config.get('chaincode_name', 'vendor-contract')
+        self.timeout = config.get('standin_timeout', 30.0)
+        self.connected = False
+        self.conflicts = 0
+        # httpx.AsyncClient, opened by connect()
+        self._http = None
+    
+    async def connect(self) -> bool:
+        """
+        Open the HTTP connection pool and check the service
+        
+        Returns:
+            bool: True if the stand-in is reachable
+        """
+        if self._http is None:
+            # Imported here so the in-process client works without httpx installed
+            import httpx
+            
+            self._http = httpx.AsyncClient(base_url=self.standin_url, timeout=self.timeout)
+        self.connected = await self.check_connection()
+        if self.connected:
+            logger.info("Connected to Fabric stand-in at %s", self.standin_url)
+        else:
+            logger.error("Fabric stand-in at %s is not reachable", self.standin_url)
+        return self.connected
+    
+    async def disconnect(self):
+        """Close the HTTP connection pool"""
+        self.connected = False
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+        logger.info("Disconnected from Fabric stand-in")
+    
+    async def _call(self, kind: str, function: str, **args) -> Optional[Dict[str, Any]]:
+        """
+        Submit or evaluate a chaincode function
+        
+        Args:
+            kind: "submit" or "evaluate"
+            function: Chaincode function name
+            **args: Function arguments
+            
+        Returns:
+            Response body, None if the transaction was rejected
+        """
+        if self._http is None:
+            await self.connect()
+        traceparent = current_traceparent()
+        response = await self._http.post(
+            f"/channels/{self.channel_name}/chaincodes/{self.chaincode_name}/{kind}",
+            json={"function": function, "args": args},
+            headers={"traceparent": traceparent} if traceparent else None
+        )
+        if response.status_code in (404, 409):
+            logger.error("Fabric stand-in rejected %s: %s", function, response.json().get('detail'))
+            return None
+        response.raise_for_status()
+        return response.json()
+    
+    async def _submit(self, function: str, **args) -> Optional[str]:
+        """Submit a transaction, returning its ID"""
+        body = await self._call("submit", function, **args)
+        return body["tx_id"] if body else None
+    
+    async def _evaluate(self, function: str, **args) -> Any:
+        """Evaluate a query, returning its result"""
+        body = await self._call("evaluate", function, **args)
+        return body["result"] if body else None
+    
+    async def query_contract(self, contract_id: str) -> Optional[Dict[str, Any]]:
+        """Query contract from the stand-in ledger"""
+        return await self._evaluate("queryContract", contract_id=contract_id)
+    
+    async def create_contract(
+        self,
+        contract_id: str,
+        vendor_id: str,
+        contract_data: Dict[str, Any],
+        created_by: str,
+        idempotency_key: Optional[str] = None
+    ) -> Optional[str]:
+        """Create new contract on the stand-in ledger"""
+        return await self._submit(
+            "createContract",
+            contract_id=contract_id,
+            vendor_id=vendor_id,
+            contract_data=contract_data,
+            created_by=created_by,
+            idempotency_key=idempotency_key
+        )
+    
+    async def verify_contract(
+        self,
+        contract_id: str,
+        verified_by: str,
+        notes: Optional[str] = None,
+        idempotency_key: Optional[str] = None
+    ) -> Optional[str]:
+        """Verify contract on the stand-in ledger"""
+        return await self._submit(
+            "verifyContract",
+            contract_id=contract_id, verified_by=verified_by, notes=notes, idempotency_key=idempotency_key
+        )
+    
+    async def submit_contract(
+        self,
+        contract_id: str,
+        submitted_by: str,
+        notes: Optional[str] = None,
+        idempotency_key: Optional[str] = None
+    ) -> Optional[str]:
+        """Submit contract on the stand-in ledger"""
+        return await self._submit(
+            "submitContract",
+            contract_id=contract_id, submitted_by=submitted_by, notes=notes, idempotency_key=idempotency_key
+        )
+    
+    async def record_payment(
+        self,
+        contract_id: str,
+        payment_data: Dict[str, Any],
+        idempotency_key: Optional[str] = None
+    ) -> Optional[str]:
+        """Record payment for contract on the stand-in ledger"""
+        return await self._submit(
+            "recordPayment",
+            contract_id=contract_id, payment_data=payment_data, idempotency_key=idempotency_key
+        )
+    
+    async def get_contract_history(self, contract_id: str) -> List[Dict[str, Any]]:
+        """Get transaction history for a contract"""
+        return await self._evaluate("getContractHistory", contract_id=contract_id) or []
+    
+    async def anchor_root(
+        self,
+        root_hash: str,
+        leaf_count: int,
+        window_end: str
+    ) -> Optional[str]:
+        """Commit a Merkle root on the stand-in ledger"""
+        return await self._submit("anchorRoot", root_hash=root_hash, leaf_count=leaf_count, window_end=window_end)
+    
+    async def query_anchor(self, root_hash: str) -> Optional[Dict[str, Any]]:
+        """Query an anchored Merkle root"""
+        return await self._evaluate("queryAnchor", root_hash=root_hash)
+    
+    async def check_connection(self) -> bool:
+        """
+        Check if the stand-in answers health checks
+        
+        Returns:
+            bool: True if reachable
+        """
+        try:
+            response = await self._http.get("/health")
+            return response.status_code == 200
+        except Exception:
+            return False
+    
+    def simulator_status(self) -> Optional[Dict[str, Any]]:
+        """Simulator counters live in the stand-in process"""
+        return None
+    
+    def take_conflict(self, key: str) -> bool:
+        """The stand-in reports conflicts as plain rejections"""
+        return False
+
+
+class ShardedFabricClient:
+    """
+    Routes contracts across several Fabric channels
+    
+    Each contract lives on the channel chosen by a stable hash of its
+    vendor ID, so one vendor's contracts share a channel while different
+    vendors spread across channels. Every channel has its own client and
+    in-flight limit, so channels order and validate in parallel. Lookups
+    that do not know the vendor scatter to all channels and gather.
+    """
+    
+    def __init__(self, clients: List[FabricClient], max_concurrency: int = 32, conflict_retries: int = 2):
+        """
+        Initialize sharded client
+        
+        Args:
+            clients: One FabricClient or RemoteFabricClient per channel, in shard order
+            max_concurrency: Maximum in-flight calls per channel
+            conflict_retries: Retries of a write that conflicted with another writer
+        """
+        if not clients:
+            raise ValueError("At least one channel client is required")
+        
+        self.clients = clients
+        self._semaphores = [asyncio.Semaphore(max_concurrency) for _ in clients]
+        # Contract ID -> shard index for contracts seen by this process
+        self._contract_shards: Dict[str, int] = {}
+        # Writes to one contract run in order; different contracts in parallel
+        self._lanes = KeyedExecutor()
+        self.conflict_retries = conflict_retries
+    
+    @property
+    def connected(self) -> bool:
+        """True if every channel client is connected"""
+        return all(client.connected for client in self.clients)
+    
+    @staticmethod
+    def shard_index(vendor_id: str, shard_count: int) -> int:
+        """
+        Stable shard index for a vendor
+        
+        Args:
+            vendor_id: Vendor identifier
+            shard_count: Number of channels
+            
+        Returns:
+            Shard index in range(shard_count)
+        """
+        digest = hashlib.sha256(vendor_id.encode()).digest()
+        return int.from_bytes(digest[:8], "big") % shard_count
+    
+    def client_for_vendor(self, vendor_id: str) -> FabricClient:
+        """Get the channel client that owns a vendor's contracts"""
+        return self.clients[self.shard_index(vendor_id, len(self.clients))]
+    
+    async def connect(self) -> bool:
+        """
+        Connect all channel clients
+        
+        Returns:
+            bool: True if every channel connected
+        """
+        results = await asyncio.gather(*(client.connect() for client in self.clients))
+        return all(results)
+    
+    async def disconnect(self):
+        """Disconnect all channel clients"""
+        await asyncio.gather(*(client.disconnect() for client in self.clients))
+    
+    async def _locate(self, contract_id: str, vendor_id: Optional[str] = None) -> Optional[int]:
+        """
+        Find the shard holding a contract
+        
+        Args:
+            contract_id: Contract identifier
+            vendor_id: Vendor identifier if known
+            
+        Returns:
+            Shard index, None if no channel has the contract
+        """
+        if contract_id in self._contract_shards:
+            return self._contract_shards[contract_id]
+        
+        if vendor_id is not None:
+            return self.shard_index(vendor_id, len(self.clients))
+        
+        if len(self.clients) == 1:
+            return 0
+        
+        results = await asyncio.gather(
+            *(self._call(index, "query_contract", contract_id) for index in range(len(self.clients)))
+        )
+        for index, result in enumerate(results):
+            if result is not None:
+                self._contract_shards[contract_id] = index
+                return index
+        return None
+    
+    async def _call(self, index: int, operation: str, *args, **kwargs) -> Any:
+        """Call a channel client within its in-flight limit, timing only the channel call"""
+        client = self.clients[index]
+        attributes = {"fabric.channel": client.channel_name, "fabric.operation": operation}
+        with start_span(f"fabric {operation}", CLIENT, attributes):
+            async with self._semaphores[index]:
+                return await ledger_deadline(getattr(client, operation)(*args, **kwargs))
+    
+    async def _write(self, index: int, key: str, operation: str, **kwargs) -> Optional[str]:
+        """
+        Run a write in the contract's lane, retrying conflicts
+        
+        Args:
+            index: Shard index
+            key: Contract identifier (the lane key)
+            operation: FabricClient method name
+            **kwargs: Arguments for the method
+            
+        Returns:
+            Transaction ID if successful
+        """
+        async def attempt():
+            client = self.clients[index]
+            for retry in range(self.conflict_retries + 1):
+                tx_id = await self._call(index, operation, **kwargs)
+                if tx_id or not client.take_conflict(key):
+                    return tx_id
+                self._lanes.record_conflict(key, retried=retry < self.conflict_retries)
+            return None
+        
+        return await self._lanes.run(key, attempt)
+    
+    async def query_contract(self, contract_id: str, vendor_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Query contract from the channel that owns it"""
+        index = await self._locate(contract_id, vendor_id)
+        if index is None:
+            return None
+        return await self._call(index, "query_contract", contract_id)
+    
+    async def create_contract(
+        self,
+        contract_id: str,
+        vendor_id: str,
+        contract_data: Dict[str, Any],
+        created_by: str,
+        idempotency_key: Optional[str] = None
+    ) -> Optional[str]:
+        """Create contract on the vendor's channel"""
+        index = self.shard_index(vendor_id, len(self.clients))
+        tx_id = await self._write(
+            index, contract_id, "create_contract",
+            contract_id=contract_id,
+            vendor_id=vendor_id,
+            contract_data=contract_data,
+            created_by=created_by,
+            idempotency_key=idempotency_key
+        )
+        if tx_id:
+            self._contract_shards[contract_id] = index
+        return tx_id
+    
+    async def verify_contract(
+        self,
+        contract_id: str,
+        verified_by: str,
+        notes: Optional[str] = None,
+        vendor_id: Optional[str] = None,
+        idempotency_key: Optional[str] = None
+    ) -> Optional[str]:
+        """Verify contract on the channel that owns it"""
+        index = await self._locate(contract_id, vendor_id)
+        if index is None:
+            logger.error("Contract %s not found on any channel", contract_id)
+            return None
+        return await self._write(
+            index, contract_id, "verify_contract",
+            contract_id=contract_id, verified_by=verified_by, notes=notes, idempotency_key=idempotency_key
+        )
+    
+    async def submit_contract(
+        self,
+        contract_id: str,
+        submitted_by: str,
+        notes: Optional[str] = None,
+        vendor_id: Optional[str] = None,
+        idempotency_key: Optional[str] = None
+    ) -> Optional[str]:
+        """Submit contract on the channel that owns it"""
+        index = await self._locate(contract_id, vendor_id)
+        if index is None:
+            logger.error("Contract %s not found on any channel", contract_id)
+            return None
+        return await self._write(
+            index, contract_id, "submit_contract",
+            contract_id=contract_id, submitted_by=submitted_by, notes=notes, idempotency_key=idempotency_key
+        )
+    
+    async def record_payment(
+        self,
+        contract_id: str,
+        payment_data: Dict[str, Any],
+        vendor_id: Optional[str] = None,
+        idempotency_key: Optional[str] = None
+    ) -> Optional[str]:
+        """Record payment on the channel that owns the contract"""
+        index = await self._locate(contract_id, vendor_id)
+        if index is None:
+            logger.error("Contract %s not found on any channel", contract_id)
+            return None
+        return await self._write(
+            index, contract_id, "record_payment",
+            contract_id=contract_id, payment_data=payment_data, idempotency_key=idempotency_key
+        )
+    
+    async def get_contract_history(self, contract_id: str, vendor_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get transaction history from the channel that owns the contract"""
+        index = await self._locate(contract_id, vendor_id)
+        if index is None:
+            return []
+        return await self._call(index, "get_contract_history", contract_id)
+    
+    async def anchor_root(self, root_hash: str, leaf_count: int, window_end: str) -> Optional[str]:
+        """Commit a Merkle root on the first channel, which holds all anchors"""
+        return await self._call(
+            0, "anchor_root",
+            root_hash=root_hash, leaf_count=leaf_count, window_end=window_end
+        )
+    
+    async def query_anchor(self, root_hash: str) -> Optional[Dict[str, Any]]:
+        """Query an anchored Merkle root from the first channel"""
+        return await self._call(0, "query_anchor", root_hash)
+    
+    async def check_connection(self) -> bool:
+        """
+        Check connections to all channels
+        
+        Returns:
+            bool: True if every channel is reachable
+        """
+        results = await asyncio.gather(*(client.check_connection() for client in self.clients))
+        return all(results)
+    
+    def channel_status(self) -> List[Dict[str, Any]]:
+        """Channel names, chaincodes and connection flags for health reporting"""
+        return [
+            {
+                "channel": client.channel_name,
+                "chaincode": client.chaincode_name,
+                "connected": client.connected,
+                "conflicts": client.conflicts,
+                "simulator": client.simulator_status()
+            }
+            for client in self.clients
+        ]
+    
+    def lane_status(self) -> Dict[str, Any]:
+        """Per-contract lane and conflict-retry counters for health reporting"""
+        return self._lanes.snapshot()
+    
+    def cache_status(self) -> Dict[str, int]:
+        """Entries held by in-process caches"""
+        return {"contract_routes": len(self._contract_shards)}
+
+
+def parse_channels(channels: str, default_chaincode: str) -> List[Dict[str, str]]:
+    """
+    Parse the channel list setting
+    
+    Args:
+        channels: Comma-separated "channel" or "channel:chaincode" entries
+        default_chaincode: Chaincode for entries without one
+        
+    Returns:
+        List of channel/chaincode pairs in shard order
+    """
+    parsed = []
+    for entry in channels.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        channel, _, chaincode = entry.partition(":")
+        parsed.append({
+            "channel_name": channel.strip(),
+            "chaincode_name": chaincode.strip() or default_chaincode
+        })
+    return parsed
+
+
+def build_fabric_client() -> ShardedFabricClient:
+    """
+    Build the channel clients configured in settings
+    
+    Returns:
+        ShardedFabricClient routing across the configured channels
+    """
+    from .config import settings
+    
+    channels = parse_channels(
+        settings.fabric_channels or settings.fabric_channel_name,
+        settings.fabric_chaincode_name
+    )
+    simulator_profile = None
+    if settings.fabric_simulator_enabled:
+        simulator_profile = LatencyProfile(
+            endorsement_latency=settings.fabric_endorsement_latency,
+            query_latency=settings.fabric_query_latency,
+            batch_timeout=settings.fabric_batch_timeout,
+            max_message_count=settings.fabric_max_message_count,
+            block_validation_cost=settings.fabric_block_validation_cost,
+            tx_validation_cost=settings.fabric_tx_validation_cost,
+            seed=settings.fabric_simulator_seed
+        )
+    client_class = RemoteFabricClient if settings.fabric_standin_url else FabricClient
+    clients = [
+        client_class({
+            'peer_endpoint': settings.fabric_peer_endpoint,
+            'orderer_endpoint': settings.fabric_orderer_endpoint,
+            'channel_name': channel['channel_name'],
+            'chaincode_name': channel['chaincode_name'],
+            'msp_id': settings.fabric_msp_id,
+            'state_backend': settings.fabric_state_backend,
+            'state_path': settings.fabric_state_path,
+            'state_cache_size': settings.fabric_state_cache_size,
+            'state_snapshot_every': settings.fabric_state_snapshot_every,
+            'simulator': simulator_profile,
+            'standin_url': settings.fabric_standin_url,
+            'standin_timeout': settings.fabric_standin_timeout
+        })
+        for channel in channels
+    ]
+    
+    return ShardedFabricClient(
+        clients,
+        max_concurrency=settings.fabric_channel_max_concurrency,
+        conflict_retries=settings.fabric_conflict_retries
+    )
+
+
 # Global Fabric client instance
-fabric_client: Optional[FabricClient] = None
+fabric_client: Optional[ShardedFabricClient] = None
 
 
-async def get_fabric_client() -> FabricClient:
+async def get_fabric_client() -> ShardedFabricClient:
     """
     Get or create Fabric client instance
     
     Returns:
-        FabricClient instance
+        ShardedFabricClient routing across the configured channels, or a
+        SidecarFabricClient when a ledger sidecar socket is configured
     """
     global fabric_client
     
     if fabric_client is None:
         from .config import settings
         
-        fabric_config = {
-            'peer_endpoint': settings.fabric_peer_endpoint,
-            'orderer_endpoint': settings.fabric_orderer_endpoint,
-            'channel_name': settings.fabric_channel_name,
-            'chaincode_name': settings.fabric_chaincode_name,
-            'msp_id': settings.fabric_msp_id
-        }
-        
-        fabric_client = FabricClient(fabric_config)
+        if settings.ledger_sidecar_socket:
+            from .ledger_sidecar import SidecarFabricClient
+            fabric_client = SidecarFabricClient(settings.ledger_sidecar_socket)
+        else:
+            fabric_client = build_fabric_client()
         await fabric_client.connect()
     
     return fabric_client
 
 
+# Operations where None means "not found" rather than a rejected transaction
+LEDGER_QUERY_OPERATIONS = {"query_contract", "get_contract_history", "query_anchor"}
+
+
+async def call_ledger(operation: str, **kwargs) -> Any:
+    """
+    Call a FabricClient operation through its circuit breaker
+
+    Args:
+        operation: FabricClient method name (e.g. "create_contract")
+        **kwargs: Arguments for the operation
+
+    Returns:
+        Result of the operation
+
+    Raises:
+        CircuitOpenError: If the ledger is degraded and the call was rejected
+        LedgerTimeoutError: If a ledger round trip exceeded its adaptive deadline
+    """
+    from .circuit_breaker import get_circuit_breaker
+
+    client = await get_fabric_client()
+    # Lane and in-flight slot waits are gateway queueing, not ledger latency:
+    # the sharded client applies the deadline to each channel call instead
+    queued = isinstance(client, ShardedFabricClient)
+
+    started = time.perf_counter()
+    try:
+        with start_span(f"ledger {operation}", attributes={"ledger.operation": operation}):
+            result = await get_circuit_breaker(operation).call(
+                getattr(client, operation), queued=queued, **kwargs
+            )
+    except Exception as e:
+        LEDGER_CALL_ERRORS.inc(operation, e.__class__.__name__)
+        raise
+    finally:
+        LEDGER_CALL_DURATION.observe(time.perf_counter() - started, operation)
+
+    if result is None and operation not in LEDGER_QUERY_OPERATIONS:
+        LEDGER_CALL_REJECTED.inc(operation)
+    return result
+
+
 async def close_fabric_client():
     """Close Fabric client connection"""
     global fabric_client
@@ -0,0 +1,257 @@
+"""
+Standalone stand-in for a Fabric peer and orderer
+
+Serves the mock FabricClient over HTTP so gateways in other processes
+(uvicorn workers, load generators, integration tests) share one ledger
+without the Docker Fabric network. Transactions are submitted and
+evaluated per channel and chaincode, like the Fabric Gateway API, and
+latency and faults can be injected at runtime through /faults.
+
+Usage:
+    python -m app.fabric_standin --port 7060 --state-backend sqlite --simulate
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel, Field
+
+from .fabric_client import FabricClient
+from .ledger_simulator import LatencyProfile, parse_distribution
+from .tracing import TracingMiddleware, start_tracing, stop_tracing
+
+logger = logging.getLogger(__name__)
+
+# Chaincode function name -> FabricClient method
+SUBMIT_FUNCTIONS = {
+    "createContract": "create_contract",
+    "verifyContract": "verify_contract",
+    "submitContract": "submit_contract",
+    "recordPayment": "record_payment",
+    "anchorRoot": "anchor_root"
+}
+EVALUATE_FUNCTIONS = {
+    "queryContract": "query_contract",
+    "getContractHistory": "get_contract_history",
+    "queryAnchor": "query_anchor"
+}
+
+
+class TransactionRequest(BaseModel):
+    function: str
+    args: Dict[str, Any] = Field(default_factory=dict)
+
+
+class FaultConfig(BaseModel):
+    error_rate: float = Field(0.0, ge=0, le=1)  # share of calls failing with 503
+    timeout_rate: float = Field(0.0, ge=0, le=1)  # share of calls hanging for hang_seconds
+    hang_seconds: float = Field(30.0, ge=0)
+    extra_latency: str = "fixed:0"  # distribution spec, see ledger_simulator.parse_distribution
+    functions: List[str] = Field(default_factory=list)  # empty applies to every function
+
+
+def create_app(client_config: Optional[Dict[str, Any]] = None, seed: Optional[int] = None) -> FastAPI:
+    """
+    Create the stand-in service
+
+    Args:
+        client_config: FabricClient configuration shared by every channel
+        seed: Random seed for reproducible fault injection
+
+    Returns:
+        FastAPI application
+    """
+    client_config = client_config or {}
+    clients: Dict[str, FabricClient] = {}
+    client_locks: Dict[str, asyncio.Lock] = {}
+    rng = random.Random(seed)
+    faults = {"config": FaultConfig(), "latency": parse_distribution("fixed:0")}
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        yield
+        for client in clients.values():
+            await client.disconnect()
+
+    app = FastAPI(title="VendorChain Fabric Stand-in", lifespan=lifespan)
+
+    async def get_client(channel: str, chaincode: str) -> FabricClient:
+        """Channel client, created the first time a channel is used"""
+        client = clients.get(channel)
+        if client is None:
+            # Concurrent first calls must share one client, or writes through the other are lost
+            async with client_locks.setdefault(channel, asyncio.Lock()):
+                client = clients.get(channel)
+                if client is None:
+                    client = FabricClient({**client_config, "channel_name": channel, "chaincode_name": chaincode})
+                    await client.connect()
+                    clients[channel] = client
+        if client.chaincode_name != chaincode:
+            raise HTTPException(status_code=404, detail=f"Chaincode {chaincode} not installed on {channel}")
+        return client
+
+    async def inject_faults(function: str):
+        """Apply the configured latency and faults to a call"""
+        config = faults["config"]
+        if config.functions and function not in config.functions:
+            return
+
+        await asyncio.sleep(faults["latency"]())
+        roll = rng.random()
+        if roll < config.error_rate:
+            raise HTTPException(status_code=503, detail="Injected endorsement failure")
+        if roll < config.error_rate + config.timeout_rate:
+            await asyncio.sleep(config.hang_seconds)
+            raise HTTPException(status_code=504, detail="Injected timeout")
+
+    @app.post("/channels/{channel}/chaincodes/{chaincode}/submit")
+    async def submit(channel: str, chaincode: str, request: TransactionRequest) -> Dict[str, Any]:
+        """Endorse, order and commit a transaction"""
+        method = SUBMIT_FUNCTIONS.get(request.function)
+        if method is None:
+            raise HTTPException(status_code=404, detail=f"Unknown transaction {request.function}")
+
+        client = await get_client(channel, chaincode)
+        await inject_faults(request.function)
+        try:
+            tx_id = await getattr(client, method)(**request.args)
+        except TypeError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        if tx_id is None:
+            raise HTTPException(status_code=409, detail=f"Transaction {request.function} was rejected")
+        return {"tx_id": tx_id, "channel": channel}
+
+    @app.post("/channels/{channel}/chaincodes/{chaincode}/evaluate")
+    async def evaluate(channel: str, chaincode: str, request: TransactionRequest) -> Dict[str, Any]:
+        """Evaluate a query against the channel state"""
+        method = EVALUATE_FUNCTIONS.get(request.function)
+        if method is None:
+            raise HTTPException(status_code=404, detail=f"Unknown query {request.function}")
+
+        client = await get_client(channel, chaincode)
+        await inject_faults(request.function)
+        try:
+            result = await getattr(client, method)(**request.args)
+        except TypeError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"result": result}
+
+    @app.get("/faults", response_model=FaultConfig)
+    async def get_faults() -> FaultConfig:
+        """Current fault injection settings"""
+        return faults["config"]
+
+    @app.put("/faults", response_model=FaultConfig)
+    async def set_faults(config: FaultConfig) -> FaultConfig:
+        """Replace the fault injection settings"""
+        try:
+            latency = parse_distribution(config.extra_latency, rng)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        faults.update(config=config, latency=latency)
+        logger.info("Fault injection updated: %s", config.model_dump())
+        return config
+
+    @app.get("/health")
+    async def health() -> Dict[str, Any]:
+        """Liveness and per-channel simulator counters"""
+        return {
+            "status": "healthy",
+            "channels": {
+                channel: client.simulator_status()
+                for channel, client in clients.items()
+            }
+        }
+
+    return app
+
+
+def start_standin_process(port: int, *args: str, cwd: Optional[str] = None) -> subprocess.Popen:
+    """
+    Start the stand-in as a separate local process
+
+    Args:
+        port: Port to listen on
+        *args: Extra command line arguments
+        cwd: Directory containing the app package
+
+    Returns:
+        Running process
+    """
+    return subprocess.Popen(
+        [sys.executable, "-m", "app.fabric_standin", "--port", str(port), *args],
+        cwd=cwd
+    )
+
+
+def wait_until_ready(url: str, timeout: float = 15.0) -> bool:
+    """
+    Wait for the stand-in to answer health checks
+
+    Args:
+        url: Base URL of the stand-in
+        timeout: Seconds to wait
+
+    Returns:
+        bool: True if the service became ready in time
+    """
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/health", timeout=1.0).status_code == 200:
+                return True
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    return False
+
+
+def main():
+    """Run the stand-in service"""
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="VendorChain Fabric stand-in service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7060)
+    parser.add_argument("--state-backend", default="memory", choices=["memory", "sqlite", "snapshot"])
+    parser.add_argument("--state-path", default=None)
+    parser.add_argument("--simulate", action="store_true", help="Use the block-cutting simulator")
+    parser.add_argument("--endorsement-latency", default=LatencyProfile.endorsement_latency)
+    parser.add_argument("--batch-timeout", type=float, default=LatencyProfile.batch_timeout)
+    parser.add_argument("--max-message-count", type=int, default=LatencyProfile.max_message_count)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--trace-file", default=None, help="Export spans as OTLP/JSON lines")
+    args = parser.parse_args()
+
+    client_config = {"state_backend": args.state_backend, "state_path": args.state_path}
+    if args.simulate:
+        client_config["simulator"] = LatencyProfile(
+            endorsement_latency=args.endorsement_latency,
+            batch_timeout=args.batch_timeout,
+            max_message_count=args.max_message_count,
+            seed=args.seed
+        )
+
+    app = create_app(client_config, seed=args.seed)
+    if args.trace_file:
+        start_tracing(args.trace_file, "vendorchain-fabric-standin")
+        app.add_middleware(TracingMiddleware)
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level=args.log_level)
+    stop_tracing()
+
+
+if __name__ == "__main__":
+    main()
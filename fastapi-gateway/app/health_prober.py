@@ -0,0 +1,228 @@
+"""
+Background health prober with a cached aggregate state
+
+Probing the database and the ledger on every request lets a fleet of
+orchestrator probes add real load to the connection pool. Instead, one
+task per worker checks PostgreSQL, the ledger and the ledger queue
+backlog every ``interval`` seconds, concurrently and each with a timeout,
+and caches the result. Health endpoints serve the cached state.
+
+Without the background task (it starts with the application), the first
+request probes inline and later requests reuse the result until it is
+``interval`` seconds old; concurrent requests share one probe.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+HEALTHY = "healthy"
+DEGRADED = "degraded"
+UNHEALTHY = "unhealthy"
+
+
+def _check_database() -> Dict[str, Any]:
+    """Server version, schema version, pool usage and replica state"""
+    from .database import SessionLocal, get_pool_status, get_schema_status
+    from .replicas import get_replica_router
+
+    schema = get_schema_status()
+    if schema is not None and not schema["ok"]:
+        raise RuntimeError(schema["error"])
+    db = SessionLocal()
+    try:
+        version = db.execute(text("SELECT version()")).scalar()
+    finally:
+        db.close()
+    replica_router = get_replica_router()
+    return {
+        "version": version,
+        "schema": schema,
+        "pool": get_pool_status(),
+        "replicas": replica_router.status() if replica_router is not None else []
+    }
+
+
+def _check_ledger_queue() -> Dict[str, Any]:
+    """Ledger operation counts and oldest pending age"""
+    from .database import SessionLocal
+    from .ledger_queue import get_queue_stats
+
+    db = SessionLocal()
+    try:
+        return get_queue_stats(db)
+    finally:
+        db.close()
+
+
+class HealthProber:
+    """Periodically probes dependencies and caches the aggregate state"""
+
+    def __init__(self, interval: float = 5.0, timeout: float = 2.0, backlog_threshold: int = 1000):
+        """
+        Initialize prober
+
+        Args:
+            interval: Seconds between probes, and the age at which a cached state is stale
+            timeout: Seconds each check may take before it counts as failed
+            backlog_threshold: Ledger queue depth above which the gateway is degraded
+        """
+        self.interval = interval
+        self.timeout = timeout
+        self.backlog_threshold = backlog_threshold
+        self.state: Optional[Dict[str, Any]] = None
+        self.probed_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._probing: Optional[asyncio.Future] = None
+
+    async def _timed(self, name: str, check) -> Dict[str, Any]:
+        """Run one check, turning failures and timeouts into a failed result"""
+        started = time.perf_counter()
+        try:
+            details = await asyncio.wait_for(check, self.timeout)
+            result = {"ok": True, "details": details}
+        except asyncio.TimeoutError:
+            result = {"ok": False, "details": {"error": f"Timed out after {self.timeout}s"}}
+        except Exception as e:
+            result = {"ok": False, "details": {"error": str(e)}}
+        result["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        if not result["ok"]:
+            logger.warning("Health check %s failed: %s", name, result["details"]["error"])
+        return result
+
+    async def _check_blockchain(self) -> Dict[str, Any]:
+        from .circuit_breaker import get_circuit_breakers
+        from .config import settings
+        from .fabric_client import get_fabric_client
+
+        fabric_client = await get_fabric_client()
+        if not await fabric_client.check_connection():
+            raise ConnectionError("Connection check failed")
+        return {
+            "peer": settings.fabric_peer_endpoint,
+            "channels": fabric_client.channel_status(),
+            "lanes": fabric_client.lane_status(),
+            "circuit_breakers": {
+                name: breaker.snapshot() for name, breaker in get_circuit_breakers().items()
+            }
+        }
+
+    async def probe(self) -> Dict[str, Any]:
+        """
+        Check every dependency now and cache the result
+
+        Returns:
+            Aggregate health state
+        """
+        from .circuit_breaker import CircuitState
+        from .config import settings
+
+        checks = [
+            self._timed("database", asyncio.to_thread(_check_database)),
+            self._timed("blockchain", self._check_blockchain())
+        ]
+        if settings.ledger_worker_enabled:
+            checks.append(self._timed("ledger_queue", asyncio.to_thread(_check_ledger_queue)))
+        database, blockchain, *queue = await asyncio.gather(*checks)
+        ledger_queue = queue[0] if queue else None
+
+        status = HEALTHY
+        if blockchain["ok"]:
+            breakers = blockchain["details"]["circuit_breakers"].values()
+            if any(breaker["state"] != CircuitState.CLOSED.value for breaker in breakers):
+                status = DEGRADED
+        if ledger_queue is not None:
+            if not ledger_queue["ok"] or ledger_queue["details"]["depth"] > self.backlog_threshold:
+                status = DEGRADED
+        if not database["ok"] or not blockchain["ok"]:
+            status = UNHEALTHY
+
+        self.state = {
+            "status": status,
+            "ready": database["ok"] and blockchain["ok"],
+            "checked_at": datetime.utcnow(),
+            "database": database,
+            "blockchain": blockchain,
+            "ledger_queue": ledger_queue
+        }
+        self.probed_at = time.monotonic()
+        return self.state
+
+    async def current(self) -> Dict[str, Any]:
+        """
+        Cached state, probing first if there is none or it is stale
+
+        Returns:
+            Aggregate health state
+        """
+        if self.state is not None and time.monotonic() - self.probed_at < self.interval * 2:
+            return self.state
+        if self._probing is None:
+            self._probing = asyncio.ensure_future(self.probe())
+            self._probing.add_done_callback(self._probe_done)
+        return await asyncio.shield(self._probing)
+
+    def _probe_done(self, future: asyncio.Future):
+        self._probing = None
+
+    def stale(self) -> bool:
+        """Whether the background task has stopped refreshing the state"""
+        return self._task is not None and time.monotonic() - self.probed_at > self.interval * 3
+
+    def start(self):
+        """Start probing in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop probing"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.probe()
+            except Exception as e:
+                logger.error("Health probe failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+
+# Global health prober instance
+_health_prober: Optional[HealthProber] = None
+
+
+def get_health_prober() -> HealthProber:
+    """Shared health prober, created on first use"""
+    global _health_prober
+
+    if _health_prober is None:
+        from .config import settings
+
+        _health_prober = HealthProber(
+            interval=settings.health_probe_interval,
+            timeout=settings.health_probe_timeout,
+            backlog_threshold=settings.health_queue_backlog_threshold
+        )
+    return _health_prober
+
+
+def start_health_prober() -> HealthProber:
+    """Start probing dependencies in the background"""
+    prober = get_health_prober()
+    prober.start()
+    return prober
+
+
+async def stop_health_prober():
+    """Stop background probing"""
+    if _health_prober is not None:
+        await _health_prober.stop()
@@ -0,0 +1,97 @@
+"""
+Keyed executor: ordered execution lanes for ledger operations
+
+Operations sharing a key (a contract ID) run one at a time in arrival
+order, while operations on different keys run fully in parallel. This
+keeps concurrent writes to one contract from being endorsed against the
+same state and failing as MVCC conflicts.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class _Lane:
+    """Lock and queue depth of one key"""
+
+    __slots__ = ("lock", "depth")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.depth = 0
+
+
+class KeyedExecutor:
+    """Serializes coroutines per key; lanes exist only while in use"""
+
+    def __init__(self):
+        self._lanes: Dict[str, _Lane] = {}
+        self.executed = 0
+        self.queued = 0
+        self.max_depth = 0
+        self.conflicts = 0
+        self.conflict_retries = 0
+        self.conflicts_exhausted = 0
+
+    async def run(self, key: str, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """
+        Run a coroutine function in the lane of a key
+
+        asyncio.Lock wakes waiters first-in first-out, so operations on a
+        key execute in the order they were submitted.
+
+        Args:
+            key: Lane key
+            func: Coroutine function to run
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Result of func
+        """
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = self._lanes[key] = _Lane()
+        lane.depth += 1
+        self.max_depth = max(self.max_depth, lane.depth)
+        if lane.depth > 1:
+            self.queued += 1
+
+        try:
+            async with lane.lock:
+                self.executed += 1
+                return await func(*args, **kwargs)
+        finally:
+            lane.depth -= 1
+            if lane.depth == 0:
+                del self._lanes[key]
+
+    def record_conflict(self, key: str, retried: bool):
+        """
+        Count a conflicting write
+
+        Args:
+            key: Lane key the conflict happened on
+            retried: Whether the write will be attempted again
+        """
+        self.conflicts += 1
+        if retried:
+            self.conflict_retries += 1
+        else:
+            self.conflicts_exhausted += 1
+            logger.warning("Giving up on %s after repeated ledger conflicts", key)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Lane and conflict counters for health reporting"""
+        return {
+            "active_lanes": len(self._lanes),
+            "executed": self.executed,
+            "queued": self.queued,
+            "max_depth": self.max_depth,
+            "conflicts": self.conflicts,
+            "conflict_retries": self.conflict_retries,
+            "conflicts_exhausted": self.conflicts_exhausted
+        }
@@ -0,0 +1,659 @@
+"""
+Deferred ledger operations: Postgres-backed work queue and background workers
+"""
+
+import asyncio
+import logging
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from fastapi.responses import JSONResponse
+from sqlalchemy import and_, exists, func, or_
+from sqlalchemy.orm import Session, aliased
+
+from .anchoring import OPERATION_ACTIONS, anchoring_enabled, record_contract_change
+from .circuit_breaker import CircuitOpenError
+from .database import SessionLocal
+from .models import Contract, LedgerOperation, LedgerOperationStatus, WorkflowLog
+from .schemas import LedgerOperationResponse
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = (LedgerOperationStatus.SUCCEEDED, LedgerOperationStatus.DEAD_LETTER)
+ACTIVE_STATUSES = (LedgerOperationStatus.PENDING, LedgerOperationStatus.RUNNING)
+
+# Contract writes that take an idempotency key: a call that timed out may
+# still have committed, so its retry must not record the change twice
+IDEMPOTENT_OPERATIONS = {"create_contract", "verify_contract", "submit_contract", "record_payment"}
+
+# Completion events for long-polling clients in this process,
+# keyed by operation ID with the number of waiting requests
+_completion_events: Dict[str, List[Any]] = {}
+
+
+def wants_async(prefer: Optional[str]) -> bool:
+    """
+    Check whether the client opted in to asynchronous ledger writes
+
+    Args:
+        prefer: Value of the HTTP Prefer header (RFC 7240)
+
+    Returns:
+        True if the client sent "Prefer: respond-async" and changes are
+        written to the ledger directly rather than in Merkle batches
+    """
+    if anchoring_enabled():
+        return False
+    return prefer is not None and "respond-async" in prefer.lower()
+
+
+def enqueue_ledger_operation(
+    db: Session,
+    operation: str,
+    payload: Dict[str, Any],
+    contract: Optional[Contract] = None,
+    workflow_log: Optional[WorkflowLog] = None,
+    attempts: int = 0,
+    error_message: Optional[str] = None,
+    operation_id: Optional[str] = None
+) -> LedgerOperation:
+    """
+    Add a ledger operation to the session
+
+    The operation is committed together with the business change, so the
+    ledger write is never lost once the API has acknowledged it. Contract
+    writes carry the operation ID as their idempotency key.
+
+    Args:
+        db: Database session
+        operation: FabricClient method name
+        payload: Keyword arguments for the FabricClient method
+        contract: Contract the operation belongs to
+        workflow_log: Workflow log entry that receives the transaction ID
+        attempts: Attempts already made (non-zero when queueing a retry)
+        error_message: Error from the last attempt
+        operation_id: ID of the operation, and its idempotency key; generated if not given
+
+    Returns:
+        Pending LedgerOperation
+    """
+    now = datetime.utcnow()
+    operation_id = operation_id or str(uuid.uuid4())
+    if operation in IDEMPOTENT_OPERATIONS:
+        payload = {**payload, "idempotency_key": operation_id}
+    ledger_operation = LedgerOperation(
+        id=operation_id,
+        operation=operation,
+        payload=payload,
+        contract=contract,
+        workflow_log=workflow_log,
+        status=LedgerOperationStatus.PENDING,
+        attempts=attempts,
+        error_message=error_message,
+        next_attempt_at=now + retry_delay(attempts) if attempts else now,
+        created_at=now
+    )
+    db.add(ledger_operation)
+    return ledger_operation
+
+
+async def sync_ledger_operation(
+    db: Session,
+    operation: str,
+    payload: Dict[str, Any],
+    contract: Optional[Contract] = None,
+    workflow_log: Optional[WorkflowLog] = None
+) -> Optional[str]:
+    """
+    Call the ledger now, queueing a retry if the call fails
+
+    The retry is added to the session, so it is committed with the
+    business change and drained later by the ledger workers. In Merkle
+    anchoring mode the change is recorded as a leaf for the next anchored
+    root instead.
+
+    Args:
+        db: Database session
+        operation: FabricClient method name
+        payload: Keyword arguments for the FabricClient method
+        contract: Contract the operation belongs to
+        workflow_log: Workflow log entry that receives the transaction ID
+
+    Returns:
+        Transaction ID if the ledger call succeeded, None if it was queued
+    """
+    from .fabric_client import call_ledger
+
+    if contract is not None and anchoring_enabled():
+        record_contract_change(db, contract, OPERATION_ACTIONS.get(operation, operation.upper()))
+        return None
+
+    if contract is not None and contract.id is not None and _has_active_operations(db, contract.id):
+        # Keep ledger writes for this contract in order behind the queued ones
+        enqueue_ledger_operation(
+            db, operation, payload,
+            contract=contract, workflow_log=workflow_log
+        )
+        return None
+
+    # The queued retry reuses this key, so a call that committed after timing out is not repeated
+    operation_id = str(uuid.uuid4())
+    kwargs = {**payload, "idempotency_key": operation_id} if operation in IDEMPOTENT_OPERATIONS else payload
+    rejected = False
+    retry_after = None
+    try:
+        tx_id = await call_ledger(operation, **kwargs)
+        if tx_id:
+            return tx_id
+        error = "Ledger rejected the operation"
+        rejected = True
+    except CircuitOpenError as e:
+        error = str(e)
+        retry_after = e.retry_after
+    except Exception as e:
+        error = str(e) or e.__class__.__name__
+
+    ledger_operation = enqueue_ledger_operation(
+        db, operation, payload,
+        contract=contract, workflow_log=workflow_log,
+        attempts=0 if retry_after is not None else 1,
+        error_message=error, operation_id=operation_id
+    )
+    if retry_after is not None:
+        # The ledger was never called; wait for the breaker without using up an attempt
+        ledger_operation.next_attempt_at = ledger_operation.created_at + timedelta(seconds=retry_after)
+        logger.warning("Ledger circuit open, queued %s for %.1fs: %s", operation, retry_after, error)
+    elif rejected:
+        # The same request would be rejected again; keep it for a manual retry
+        ledger_operation.status = LedgerOperationStatus.DEAD_LETTER
+        ledger_operation.completed_at = ledger_operation.created_at
+        logger.warning("Ledger rejected %s, dead-lettered", operation)
+    else:
+        logger.warning("Failed to sync %s to blockchain, queued for retry: %s", operation, error)
+    return None
+
+
+def _has_active_operations(db: Session, contract_id: int) -> bool:
+    """Check whether a contract has queued ledger operations"""
+    return db.query(
+        exists().where(
+            LedgerOperation.contract_id == contract_id,
+            LedgerOperation.status.in_(ACTIVE_STATUSES)
+        )
+    ).scalar()
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """
+    Exponential backoff with jitter for the next attempt
+
+    Args:
+        attempts: Attempts made so far
+
+    Returns:
+        Delay before the next attempt
+    """
+    from .config import settings
+
+    delay = min(
+        settings.ledger_retry_max_delay,
+        settings.ledger_retry_base_delay * (2 ** max(0, attempts - 1))
+    )
+    return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+def get_queue_stats(db: Session) -> Dict[str, Any]:
+    """
+    Get ledger queue depth and age
+
+    Args:
+        db: Database session
+
+    Returns:
+        Dictionary with operation counts by status and oldest pending age
+    """
+    counts = {status.value.lower(): 0 for status in LedgerOperationStatus}
+    rows = db.query(
+        LedgerOperation.status, func.count(LedgerOperation.id)
+    ).filter(
+        LedgerOperation.status != LedgerOperationStatus.SUCCEEDED
+    ).group_by(LedgerOperation.status).all()
+    for status, count in rows:
+        counts[LedgerOperationStatus(status).value.lower()] = count
+    counts.pop(LedgerOperationStatus.SUCCEEDED.value.lower())
+
+    oldest = db.query(func.min(LedgerOperation.created_at)).filter(
+        LedgerOperation.status.in_(ACTIVE_STATUSES)
+    ).scalar()
+    oldest_age = None
+    if oldest is not None:
+        if oldest.tzinfo is not None:
+            oldest = oldest.replace(tzinfo=None) - oldest.utcoffset()
+        oldest_age = max(0.0, (datetime.utcnow() - oldest).total_seconds())
+
+    return {
+        "depth": counts["pending"] + counts["running"],
+        **counts,
+        "oldest_pending_age_seconds": oldest_age
+    }
+
+
+def accepted_response(ledger_operation: LedgerOperation) -> JSONResponse:
+    """
+    Build the 202 Accepted response for a deferred ledger operation
+
+    Args:
+        ledger_operation: Committed ledger operation
+
+    Returns:
+        JSONResponse pointing at the status endpoint
+    """
+    status_url = f"/api/v1/ledger-operations/{ledger_operation.id}"
+    body = LedgerOperationResponse.model_validate(ledger_operation)
+    return JSONResponse(
+        status_code=202,
+        content=body.model_dump(mode="json"),
+        headers={
+            "Location": status_url,
+            "Preference-Applied": "respond-async"
+        }
+    )
+
+
+async def wait_for_ledger_operation(operation_id: str, timeout: float):
+    """
+    Wait until the local worker completes an operation or the timeout expires
+
+    Operations completed by another process are not signalled here, so
+    callers should re-check the database after each wait.
+
+    Args:
+        operation_id: Ledger operation identifier
+        timeout: Maximum seconds to wait
+    """
+    entry = _completion_events.setdefault(operation_id, [asyncio.Event(), 0])
+    entry[1] += 1
+    try:
+        await asyncio.wait_for(entry[0].wait(), timeout=timeout)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0 and _completion_events.get(operation_id) is entry:
+            del _completion_events[operation_id]
+
+
+def get_waiter_count() -> int:
+    """Number of operations with long-polling clients in this process"""
+    return len(_completion_events)
+
+
+def _notify_completion(operation_id: str):
+    """Wake up long-polling clients waiting on an operation"""
+    entry = _completion_events.pop(operation_id, None)
+    if entry:
+        entry[0].set()
+
+
+def _apply_result(db: Session, ledger_operation: LedgerOperation, tx_id: str):
+    """
+    Write a ledger transaction ID back to the records it belongs to
+
+    Args:
+        db: Database session
+        ledger_operation: Completed ledger operation
+        tx_id: Blockchain transaction ID
+    """
+    contract = ledger_operation.contract
+    workflow_log = ledger_operation.workflow_log
+
+    if workflow_log:
+        workflow_log.blockchain_tx_id = tx_id
+
+    if contract is None:
+        return
+
+    if ledger_operation.operation == "create_contract":
+        contract.blockchain_tx_id = tx_id
+    elif ledger_operation.operation == "record_payment":
+        payment_data = ledger_operation.payload.get("payment_data", {})
+        payment_history = []
+        for entry in contract.payment_history or []:
+            if (
+                entry.get("recorded_at") == payment_data.get("recorded_at")
+                and entry.get("reference") == payment_data.get("reference")
+            ):
+                entry = {**entry, "blockchain_tx_id": tx_id}
+            payment_history.append(entry)
+        # Reassign so SQLAlchemy detects the JSON change
+        contract.payment_history = payment_history
+
+
+class LedgerOperationWorker:
+    """
+    Background workers that drain the ledger operation queue
+
+    Operations are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so
+    several workers in every uvicorn process can drain the same table
+    concurrently. Failed operations are retried with exponential backoff
+    and dead-lettered after the configured number of attempts; operations
+    the ledger rejected are dead-lettered at once, as a retry would be
+    rejected too. Calls refused by an open circuit breaker never reached
+    the ledger, so they wait for the breaker without using up an attempt,
+    however long the outage lasts. Outcomes are fenced on the claimed attempt, so a worker
+    whose lease expired cannot overwrite the attempt that reclaimed it.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 1,
+        poll_interval: float = 1.0,
+        max_attempts: int = 8,
+        lease_seconds: int = 120
+    ):
+        """
+        Initialize worker
+
+        Args:
+            concurrency: Number of concurrent worker tasks
+            poll_interval: Seconds to sleep when the queue is empty
+            max_attempts: Attempts before an operation is dead-lettered
+            lease_seconds: Seconds before a RUNNING operation is reclaimed
+        """
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._running = False
+
+    def start(self):
+        """Start the worker tasks"""
+        if not self._tasks:
+            self._running = True
+            self._tasks = [
+                asyncio.create_task(self._run())
+                for _ in range(self.concurrency)
+            ]
+            logger.info("Ledger operation worker started with %s tasks", self.concurrency)
+
+    async def stop(self):
+        """Stop the worker tasks"""
+        self._running = False
+        self._wakeup.set()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks = []
+            logger.info("Ledger operation worker stopped")
+
+    def notify(self):
+        """Wake the workers after new operations were committed"""
+        self._wakeup.set()
+
+    async def _run(self):
+        """Worker loop"""
+        while self._running:
+            try:
+                processed = await self.process_next()
+            except Exception as e:
+                logger.error("Ledger operation worker error: %s", e)
+                processed = False
+
+            if not processed and self._running:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+    async def process_next(self) -> bool:
+        """
+        Claim and execute one due operation
+
+        Returns:
+            bool: True if an operation was processed
+        """
+        from .fabric_client import call_ledger
+
+        claimed = await asyncio.to_thread(self._claim_next)
+        if claimed is None:
+            return False
+
+        tx_id = None
+        error = None
+        retry = True
+        try:
+            tx_id = await call_ledger(claimed["operation"], **claimed["payload"])
+            if not tx_id:
+                error = "Ledger rejected the operation"
+                retry = False
+        except CircuitOpenError as e:
+            await asyncio.to_thread(self._defer, claimed["id"], claimed["attempts"], e.retry_after, str(e))
+            return True
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+
+        completed = await asyncio.to_thread(
+            self._complete, claimed["id"], claimed["attempts"], tx_id, error, retry
+        )
+        if completed:
+            _notify_completion(claimed["id"])
+        return True
+
+    def _claim_next(self) -> Optional[Dict[str, Any]]:
+        """
+        Lock the next due operation and mark it running
+
+        An operation is due when it is pending and its retry time has
+        passed, or when it is running and its lease expired because the
+        worker holding it died. Operations wait for older active
+        operations on the same contract so ledger writes stay ordered.
+
+        Returns:
+            Claimed operation details, None if nothing is due
+        """
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            older = aliased(LedgerOperation)
+            ledger_operation = db.query(LedgerOperation).filter(
+                or_(
+                    and_(
+                        LedgerOperation.status == LedgerOperationStatus.PENDING,
+                        LedgerOperation.next_attempt_at <= now
+                    ),
+                    and_(
+                        LedgerOperation.status == LedgerOperationStatus.RUNNING,
+                        LedgerOperation.locked_until < now
+                    )
+                ),
+                ~exists().where(
+                    older.contract_id == LedgerOperation.contract_id,
+                    older.status.in_(ACTIVE_STATUSES),
+                    older.created_at < LedgerOperation.created_at
+                )
+            ).order_by(
+                LedgerOperation.next_attempt_at
+            ).with_for_update(skip_locked=True).first()
+
+            if not ledger_operation:
+                db.rollback()
+                return None
+
+            # Conditional on the attempt count, so databases without
+            # SKIP LOCKED still never hand one operation to two workers
+            attempts = ledger_operation.attempts or 0
+            updated = db.query(LedgerOperation).filter(
+                LedgerOperation.id == ledger_operation.id,
+                LedgerOperation.attempts == attempts
+            ).update({
+                "status": LedgerOperationStatus.RUNNING,
+                "attempts": attempts + 1,
+                "locked_until": now + timedelta(seconds=self.lease_seconds),
+                "updated_at": now
+            }, synchronize_session=False)
+            claimed = {
+                "id": ledger_operation.id,
+                "operation": ledger_operation.operation,
+                "payload": ledger_operation.payload,
+                "attempts": attempts + 1
+            }
+            db.commit()
+            return claimed if updated else None
+        finally:
+            db.close()
+
+    def _defer(self, operation_id: str, attempts: int, retry_after: float, error: str):
+        """
+        Put back an operation the circuit breaker refused, without counting the attempt
+
+        Args:
+            operation_id: Ledger operation identifier
+            attempts: Attempt count set when the operation was claimed
+            retry_after: Seconds until the breaker lets a call through
+            error: Breaker error message
+        """
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            # Fenced on the claim like _complete
+            db.query(LedgerOperation).filter(
+                LedgerOperation.id == operation_id,
+                LedgerOperation.status == LedgerOperationStatus.RUNNING,
+                LedgerOperation.attempts == attempts
+            ).update({
+                "status": LedgerOperationStatus.PENDING,
+                "attempts": attempts - 1,
+                "error_message": error,
+                "next_attempt_at": now + timedelta(seconds=retry_after * random.uniform(1.0, 1.5)),
+                "locked_until": None,
+                "updated_at": now
+            }, synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _complete(
+        self,
+        operation_id: str,
+        attempts: int,
+        tx_id: Optional[str],
+        error: Optional[str],
+        retry: bool = True
+    ) -> bool:
+        """
+        Record the outcome of an attempt
+
+        The outcome is dropped if the operation is no longer running under
+        this attempt, because its lease expired and another worker
+        reclaimed it.
+
+        Args:
+            operation_id: Ledger operation identifier
+            attempts: Attempt count set when the operation was claimed
+            tx_id: Blockchain transaction ID if successful
+            error: Error message if failed
+            retry: Whether a failed attempt may be retried
+
+        Returns:
+            bool: True if the operation reached a terminal status
+        """
+        db = SessionLocal()
+        try:
+            ledger_operation = db.query(LedgerOperation).filter(
+                LedgerOperation.id == operation_id,
+                LedgerOperation.status == LedgerOperationStatus.RUNNING,
+                LedgerOperation.attempts == attempts
+            ).with_for_update().first()
+            if not ledger_operation:
+                logger.warning(
+                    "Ledger operation %s attempt %s lost its lease, outcome dropped",
+                    operation_id, attempts
+                )
+                db.rollback()
+                return False
+
+            now = datetime.utcnow()
+            ledger_operation.updated_at = now
+            ledger_operation.locked_until = None
+
+            if tx_id:
+                ledger_operation.status = LedgerOperationStatus.SUCCEEDED
+                ledger_operation.blockchain_tx_id = tx_id
+                ledger_operation.error_message = None
+                ledger_operation.completed_at = now
+                _apply_result(db, ledger_operation, tx_id)
+                logger.info("Ledger operation %s succeeded, tx: %s", operation_id, tx_id)
+            elif not retry or ledger_operation.attempts >= self.max_attempts:
+                ledger_operation.status = LedgerOperationStatus.DEAD_LETTER
+                ledger_operation.error_message = error
+                ledger_operation.completed_at = now
+                logger.error(
+                    "Ledger operation %s dead-lettered after %s attempts: %s",
+                    operation_id, ledger_operation.attempts, error
+                )
+            else:
+                ledger_operation.status = LedgerOperationStatus.PENDING
+                ledger_operation.error_message = error
+                ledger_operation.next_attempt_at = now + retry_delay(ledger_operation.attempts)
+                logger.warning(
+                    "Ledger operation %s attempt %s failed, retrying: %s",
+                    operation_id, ledger_operation.attempts, error
+                )
+
+            terminal = ledger_operation.status in TERMINAL_STATUSES
+            db.commit()
+            return terminal
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+# Global worker instance
+ledger_worker: Optional[LedgerOperationWorker] = None
+
+
+def start_ledger_worker() -> LedgerOperationWorker:
+    """
+    Start the ledger operation worker for this process
+
+    Returns:
+        LedgerOperationWorker instance
+    """
+    global ledger_worker
+
+    if ledger_worker is None:
+        from .config import settings
+
+        ledger_worker = LedgerOperationWorker(
+            concurrency=settings.ledger_worker_concurrency,
+            poll_interval=settings.ledger_worker_poll_interval,
+            max_attempts=settings.ledger_retry_max_attempts,
+            lease_seconds=settings.ledger_operation_lease
+        )
+        ledger_worker.start()
+
+    return ledger_worker
+
+
+def notify_ledger_worker():
+    """Wake the local worker after committing new operations"""
+    if ledger_worker:
+        ledger_worker.notify()
+
+
+async def stop_ledger_worker():
+    """Stop the ledger operation worker"""
+    global ledger_worker
+
+    if ledger_worker:
+        await ledger_worker.stop()
+        ledger_worker = None
@@ -0,0 +1,392 @@
+"""
+Ledger sidecar: one process owning the Fabric connections for all workers
+
+Gateway workers send ledger calls over a Unix domain socket instead of
+each building its own FabricClient, so channel connections, block
+batching and the contract routing cache are shared as if the gateway
+ran in one process.
+
+Every frame is a fixed binary header followed by a UTF-8 JSON payload:
+
+    request id (uint32) | message type (uint8) | payload length (uint32)
+
+Requests carry an ID so one connection per worker multiplexes any
+number of concurrent calls; responses may arrive in any order.
+
+Usage:
+    python -m app.ledger_sidecar --socket /run/vendorchain/ledger.sock
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import signal
+import struct
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .logging_config import configure_logging
+from .tracing import SERVER, current_traceparent, start_span, start_tracing, stop_tracing
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct("!IBI")
+MAX_PAYLOAD = 16 * 1024 * 1024
+
+# Message types
+CALL = 1
+RESULT = 2
+ERROR = 3
+
+# Operations workers may invoke; "status" reports connection and channels
+OPERATIONS = {
+    "query_contract", "create_contract", "verify_contract", "submit_contract",
+    "record_payment", "get_contract_history", "anchor_root", "query_anchor", "status"
+}
+
+
+class LedgerSidecarError(Exception):
+    """Error raised by a ledger operation inside the sidecar"""
+
+    def __init__(self, error_type: str, message: str):
+        self.error_type = error_type
+        super().__init__(f"{error_type}: {message}")
+
+
+def encode_frame(request_id: int, message_type: int, payload: Any) -> bytes:
+    """
+    Encode one frame
+
+    Args:
+        request_id: Request the frame belongs to
+        message_type: CALL, RESULT or ERROR
+        payload: JSON-compatible payload
+
+    Returns:
+        Header and payload bytes
+    """
+    body = json.dumps(payload, separators=(",", ":"), default=str).encode()
+    if len(body) > MAX_PAYLOAD:
+        raise ValueError(f"Sidecar payload of {len(body)} bytes exceeds {MAX_PAYLOAD}")
+    return HEADER.pack(request_id, message_type, len(body)) + body
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Tuple[int, int, Any]:
+    """
+    Read one frame
+
+    Args:
+        reader: Stream to read from
+
+    Returns:
+        Request ID, message type and decoded payload
+
+    Raises:
+        asyncio.IncompleteReadError: If the peer closed the connection
+        ValueError: If the frame is larger than MAX_PAYLOAD
+    """
+    request_id, message_type, length = HEADER.unpack(await reader.readexactly(HEADER.size))
+    if length > MAX_PAYLOAD:
+        raise ValueError(f"Sidecar frame of {length} bytes exceeds {MAX_PAYLOAD}")
+    return request_id, message_type, json.loads(await reader.readexactly(length))
+
+
+class LedgerSidecar:
+    """Unix socket server executing ledger calls on one shared client"""
+
+    def __init__(self, client, socket_path: str):
+        """
+        Initialize sidecar
+
+        Args:
+            client: ShardedFabricClient owning the Fabric connections
+            socket_path: Unix socket to listen on
+        """
+        self.client = client
+        self.socket_path = socket_path
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Set[asyncio.StreamWriter] = set()
+
+    async def start(self):
+        """Connect the ledger client and start listening"""
+        await self.client.connect()
+        if os.path.exists(self.socket_path):
+            # Stale socket from a previous run
+            os.unlink(self.socket_path)
+        self._server = await asyncio.start_unix_server(self._handle_connection, path=self.socket_path)
+        os.chmod(self.socket_path, 0o660)
+        logger.info("Ledger sidecar listening on %s", self.socket_path)
+
+    async def stop(self):
+        """Stop listening and disconnect the ledger client"""
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._connections):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        await self.client.disconnect()
+        logger.info("Ledger sidecar stopped")
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve one worker connection"""
+        self._connections.add(writer)
+        tasks: Set[asyncio.Task] = set()
+        try:
+            while True:
+                request_id, message_type, payload = await read_frame(reader)
+                if message_type != CALL:
+                    continue
+                task = asyncio.create_task(self._dispatch(request_id, payload, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            logger.error("Closing sidecar connection after protocol error: %s", e)
+        finally:
+            for task in tasks:
+                task.cancel()
+            self._connections.discard(writer)
+            writer.close()
+
+    async def _dispatch(self, request_id: int, payload: Dict[str, Any], writer: asyncio.StreamWriter):
+        """Run one call and write its response"""
+        operation = payload.get("op")
+        try:
+            with start_span(f"sidecar {operation}", SERVER, traceparent=payload.get("traceparent")):
+                result = await self._execute(operation, payload)
+            frame = encode_frame(request_id, RESULT, result)
+        except Exception as e:
+            frame = encode_frame(request_id, ERROR, {"type": e.__class__.__name__, "message": str(e)})
+
+        if not writer.is_closing():
+            writer.write(frame)
+            await writer.drain()
+
+    async def _execute(self, operation: str, payload: Dict[str, Any]) -> Any:
+        """Run one operation on the shared client"""
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown ledger operation {operation}")
+        if operation == "status":
+            return {
+                "connected": await self.client.check_connection(),
+                "channels": self.client.channel_status(),
+                "lanes": self.client.lane_status()
+            }
+        return await getattr(self.client, operation)(**payload.get("kwargs", {}))
+
+
+class SidecarFabricClient:
+    """
+    Worker-side client forwarding ledger calls to the sidecar
+
+    Has the interface of ShardedFabricClient used by call_ledger and the
+    health checks. The connection is opened lazily and re-opened after
+    the sidecar restarts; calls in flight when it drops fail with
+    ConnectionError, so the circuit breaker and retry queue take over.
+    """
+
+    def __init__(self, socket_path: str):
+        """
+        Initialize sidecar client
+
+        Args:
+            socket_path: Unix socket of the sidecar
+        """
+        self.socket_path = socket_path
+        self.connected = False
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._request_ids = itertools.count(1)
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._channels: List[Dict[str, Any]] = []
+        self._lanes: Dict[str, Any] = {}
+
+    async def connect(self) -> bool:
+        """
+        Connect to the sidecar
+
+        Returns:
+            bool: True if the sidecar answered
+        """
+        self.connected = await self.check_connection()
+        if self.connected:
+            logger.info("Connected to ledger sidecar at %s", self.socket_path)
+        else:
+            logger.error("Ledger sidecar at %s is not reachable", self.socket_path)
+        return self.connected
+
+    async def disconnect(self):
+        """Close the sidecar connection"""
+        self.connected = False
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            self._reader_task = None
+        self._fail_pending(ConnectionError("Ledger sidecar connection closed"))
+
+    async def _ensure_connection(self):
+        """Open the socket if it is not open"""
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._writer is not None and not self._writer.is_closing():
+                return
+            if self._reader_task is not None:
+                # Let the old connection fail its pending calls first
+                self._reader_task.cancel()
+                await asyncio.gather(self._reader_task, return_exceptions=True)
+            self._reader, self._writer = await asyncio.open_unix_connection(self.socket_path)
+            self._reader_task = asyncio.create_task(self._read_responses(self._reader))
+
+    async def _read_responses(self, reader: asyncio.StreamReader):
+        """Resolve pending calls as their responses arrive"""
+        try:
+            while True:
+                request_id, message_type, payload = await read_frame(reader)
+                future = self._pending.pop(request_id, None)
+                if future is None or future.done():
+                    continue
+                if message_type == ERROR:
+                    future.set_exception(LedgerSidecarError(payload["type"], payload["message"]))
+                else:
+                    future.set_result(payload)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            self.connected = False
+            self._fail_pending(ConnectionError("Ledger sidecar connection lost"))
+
+    def _fail_pending(self, error: Exception):
+        """Fail every call still waiting for a response"""
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    async def _request(self, operation: str, **kwargs) -> Any:
+        """
+        Send one call and wait for its result
+
+        Args:
+            operation: Ledger operation name
+            **kwargs: Operation arguments
+
+        Returns:
+            Operation result
+        """
+        await self._ensure_connection()
+        request_id = next(self._request_ids) & 0xFFFFFFFF
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            call = {"op": operation, "kwargs": kwargs}
+            traceparent = current_traceparent()
+            if traceparent:
+                call["traceparent"] = traceparent
+            self._writer.write(encode_frame(request_id, CALL, call))
+            await self._writer.drain()
+            return await future
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def query_contract(self, contract_id: str, vendor_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Query contract through the sidecar"""
+        return await self._request("query_contract", contract_id=contract_id, vendor_id=vendor_id)
+
+    async def create_contract(self, **kwargs) -> Optional[str]:
+        """Create contract through the sidecar"""
+        return await self._request("create_contract", **kwargs)
+
+    async def verify_contract(self, **kwargs) -> Optional[str]:
+        """Verify contract through the sidecar"""
+        return await self._request("verify_contract", **kwargs)
+
+    async def submit_contract(self, **kwargs) -> Optional[str]:
+        """Submit contract through the sidecar"""
+        return await self._request("submit_contract", **kwargs)
+
+    async def record_payment(self, **kwargs) -> Optional[str]:
+        """Record payment through the sidecar"""
+        return await self._request("record_payment", **kwargs)
+
+    async def get_contract_history(self, contract_id: str, vendor_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get contract history through the sidecar"""
+        return await self._request("get_contract_history", contract_id=contract_id, vendor_id=vendor_id)
+
+    async def anchor_root(self, **kwargs) -> Optional[str]:
+        """Anchor a Merkle root through the sidecar"""
+        return await self._request("anchor_root", **kwargs)
+
+    async def query_anchor(self, root_hash: str) -> Optional[Dict[str, Any]]:
+        """Query an anchored Merkle root through the sidecar"""
+        return await self._request("query_anchor", root_hash=root_hash)
+
+    async def check_connection(self) -> bool:
+        """
+        Check the sidecar and its Fabric connections
+
+        Returns:
+            bool: True if the sidecar reports every channel connected
+        """
+        try:
+            status = await self._request("status")
+        except Exception:
+            return False
+        self._channels = status["channels"]
+        self._lanes = status["lanes"]
+        return status["connected"]
+
+    def channel_status(self) -> List[Dict[str, Any]]:
+        """Channel status from the sidecar's last health check"""
+        return self._channels
+
+    def lane_status(self) -> Dict[str, Any]:
+        """Lane counters from the sidecar's last health check"""
+        return self._lanes
+
+
+def main():
+    """Run the ledger sidecar with the gateway's Fabric settings"""
+    from .config import settings
+    from .fabric_client import build_fabric_client
+
+    parser = argparse.ArgumentParser(description="VendorChain ledger sidecar")
+    parser.add_argument("--socket", default=settings.ledger_sidecar_socket or "/tmp/vendorchain-ledger.sock")
+    args = parser.parse_args()
+
+    configure_logging(settings.log_level, settings.log_json, settings.log_format, settings.log_sample_rates)
+    if settings.tracing_enabled:
+        start_tracing(settings.tracing_export_path, "vendorchain-ledger-sidecar", settings.tracing_sample_rate)
+
+    async def serve():
+        stopped = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stopped.set)
+
+        sidecar = LedgerSidecar(build_fabric_client(), args.socket)
+        await sidecar.start()
+        try:
+            await stopped.wait()
+        finally:
+            await sidecar.stop()
+
+    asyncio.run(serve())
+    stop_tracing()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Block-cutting simulator for the stand-in ledger
+
+Models the parts of a Fabric transaction flow that dominate latency and
+throughput: endorsement, block cutting by the orderer (batch timeout and
+max message count), per-block validation and MVCC read-conflict
+detection at commit. Latencies are drawn from configurable distributions
+so batching and concurrency settings can be tuned against realistic
+behaviour without a Fabric network.
+"""
+
+import asyncio
+import logging
+import math
+import random
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from .ledger_state import LedgerStateBackend
+
+logger = logging.getLogger(__name__)
+
+VALID = "VALID"
+MVCC_READ_CONFLICT = "MVCC_READ_CONFLICT"
+
+
+def parse_distribution(spec: str, rng: Optional[random.Random] = None) -> Callable[[], float]:
+    """
+    Build a latency sampler from a distribution spec
+
+    Supported specs (all values in seconds):
+        "fixed:0.05", "uniform:0.02,0.08", "normal:0.05,0.01",
+        "lognormal:0.05,0.5" (median, sigma), "exponential:0.05" (mean)
+
+    Args:
+        spec: Distribution spec
+        rng: Random generator, for reproducible runs
+
+    Returns:
+        Function returning a non-negative sample
+
+    Raises:
+        ValueError: If the spec is malformed
+    """
+    rng = rng or random.Random()
+    kind, _, params = spec.partition(":")
+    try:
+        values = [float(value) for value in params.split(",") if value.strip()]
+    except ValueError:
+        raise ValueError(f"Invalid latency distribution: {spec}")
+
+    samplers = {
+        ("fixed", 1): lambda: values[0],
+        ("uniform", 2): lambda: rng.uniform(values[0], values[1]),
+        ("normal", 2): lambda: max(0.0, rng.gauss(values[0], values[1])),
+        ("lognormal", 2): lambda: rng.lognormvariate(math.log(values[0]), values[1]),
+        ("exponential", 1): lambda: rng.expovariate(1.0 / values[0]) if values[0] > 0 else 0.0
+    }
+    sampler = samplers.get((kind.strip().lower(), len(values)))
+    if sampler is None:
+        raise ValueError(f"Invalid latency distribution: {spec}")
+    return sampler
+
+
+@dataclass
+class LatencyProfile:
+    """Timing and batching parameters of the simulated network"""
+    endorsement_latency: str = "lognormal:0.03,0.4"
+    query_latency: str = "uniform:0.005,0.02"
+    batch_timeout: float = 2.0  # seconds, Fabric orderer default
+    max_message_count: int = 10  # transactions per block, Fabric orderer default
+    block_validation_cost: float = 0.005  # seconds per block
+    tx_validation_cost: float = 0.001  # seconds per transaction
+    seed: Optional[int] = None
+
+
+@dataclass
+class SimulatedTransaction:
+    """A write waiting to be ordered and committed"""
+    state: LedgerStateBackend
+    key: str
+    read_version: Optional[int]
+    apply: Callable[[Optional[Dict[str, Any]]], Optional[Dict[str, Any]]]
+    result: asyncio.Future = field(repr=False)
+
+
+def state_version(value: Optional[Dict[str, Any]]) -> Optional[int]:
+    """Committed version of a state value, None if the key does not exist"""
+    if value is None:
+        return None
+    return value.get("version", 0)
+
+
+class LedgerSimulator:
+    """
+    Simulated endorse-order-validate pipeline for one channel
+
+    Transactions read state at endorsement and record the version they
+    saw. The orderer cuts a block when max_message_count transactions are
+    pending or batch_timeout has passed since the first one. Blocks are
+    committed strictly in order while the next block is being cut; a
+    transaction whose read version changed before its commit is marked
+    MVCC_READ_CONFLICT and its write is discarded.
+    """
+
+    def __init__(self, profile: LatencyProfile):
+        """
+        Initialize simulator
+
+        Args:
+            profile: Latency and batching parameters
+        """
+        self.profile = profile
+        rng = random.Random(profile.seed)
+        self._endorsement_latency = parse_distribution(profile.endorsement_latency, rng)
+        self._query_latency = parse_distribution(profile.query_latency, rng)
+        self._pending: List[SimulatedTransaction] = []
+        self._batch_timer: Optional[asyncio.Task] = None
+        self._last_commit: Optional[asyncio.Task] = None
+        self.block_height = 0
+        self.transactions = 0
+        self.mvcc_conflicts = 0
+
+    async def query(self):
+        """Wait for a simulated peer query"""
+        await asyncio.sleep(self._query_latency())
+
+    async def submit(
+        self,
+        state: LedgerStateBackend,
+        key: str,
+        read_value: Optional[Dict[str, Any]],
+        apply: Callable[[Optional[Dict[str, Any]]], Optional[Dict[str, Any]]]
+    ) -> str:
+        """
+        Endorse, order and commit a write to one key
+
+        Args:
+            state: State backend holding the key
+            key: Key written by the transaction
+            read_value: Value the transaction read before endorsement
+            apply: Function producing the new value from the committed one
+
+        Returns:
+            Validation code (VALID or MVCC_READ_CONFLICT)
+        """
+        await asyncio.sleep(self._endorsement_latency())
+
+        tx = SimulatedTransaction(
+            state=state,
+            key=key,
+            read_version=state_version(read_value),
+            apply=apply,
+            result=asyncio.get_running_loop().create_future()
+        )
+        self._pending.append(tx)
+
+        if len(self._pending) >= self.profile.max_message_count:
+            self._cut_block()
+        elif self._batch_timer is None:
+            self._batch_timer = asyncio.create_task(self._batch_timeout())
+
+        return await tx.result
+
+    async def _batch_timeout(self):
+        """Cut a partial block once the batch timeout expires"""
+        await asyncio.sleep(self.profile.batch_timeout)
+        self._batch_timer = None
+        self._cut_block()
+
+    def _cut_block(self):
+        """Hand the pending transactions to the committer as one block"""
+        if self._batch_timer is not None and self._batch_timer is not asyncio.current_task():
+            self._batch_timer.cancel()
+        self._batch_timer = None
+
+        block, self._pending = self._pending, []
+        if block:
+            self._last_commit = asyncio.create_task(self._commit_block(block, self._last_commit))
+
+    async def _commit_block(self, block: List[SimulatedTransaction], previous: Optional[asyncio.Task]):
+        """Validate and commit a block after the previous one"""
+        if previous is not None and not previous.done():
+            await previous
+
+        await asyncio.sleep(
+            self.profile.block_validation_cost + self.profile.tx_validation_cost * len(block)
+        )
+        self.block_height += 1
+
+        for tx in block:
+            try:
+                committed = await tx.state.update_async(tx.key, self._validated(tx))
+                code = VALID if committed is not None else MVCC_READ_CONFLICT
+            except Exception as e:
+                if not tx.result.done():
+                    tx.result.set_exception(e)
+                continue
+
+            self.transactions += 1
+            if code == MVCC_READ_CONFLICT:
+                self.mvcc_conflicts += 1
+                logger.debug("MVCC read conflict on %s in block %s", tx.key, self.block_height)
+            if not tx.result.done():
+                tx.result.set_result(code)
+
+        if self._last_commit is asyncio.current_task():
+            self._last_commit = None
+
+    @staticmethod
+    def _validated(tx: SimulatedTransaction) -> Callable[[Optional[Dict[str, Any]]], Optional[Dict[str, Any]]]:
+        """Wrap a transaction's write with the MVCC version check"""
+        def apply(current):
+            if state_version(current) != tx.read_version:
+                return None
+            value = tx.apply(current)
+            if value is not None:
+                value["version"] = (tx.read_version or 0) + 1
+            return value
+        return apply
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Block and conflict counters for health reporting"""
+        return {
+            "block_height": self.block_height,
+            "transactions": self.transactions,
+            "mvcc_conflicts": self.mvcc_conflicts,
+            "pending": len(self._pending),
+            "avg_block_size": round(self.transactions / self.block_height, 2) if self.block_height else 0.0
+        }
@@ -0,0 +1,624 @@
+"""
+State backends for the stand-in ledger held by the mock FabricClient
+
+The in-memory backend keeps state per process. With several uvicorn
+workers every worker would see a different ledger, so the SQLite backend
+stores the state in one WAL-mode database file shared by all processes
+on the host. WAL lets readers run concurrently with the single writer,
+and read-modify-write updates run under BEGIN IMMEDIATE so concurrent
+transitions of the same contract are serialized.
+
+The snapshot backend is for a single process holding a large state: it
+survives restarts through snapshots plus an append-only log, compacts
+them in a background thread, and keeps only recently used contracts
+decoded in memory.
+
+The SQLite and snapshot backends block on disk I/O and on locks held by
+other threads or processes, so async callers use the *_async wrappers,
+which run them in a worker thread.
+"""
+
+import asyncio
+import copy
+import fcntl
+import json
+import logging
+import mmap
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Update functions return the new value, or None to leave the key unchanged
+Mutator = Callable[[Optional[Dict[str, Any]]], Optional[Dict[str, Any]]]
+
+
+class LedgerStateBackend:
+    """
+    Key-value store for one namespace of stand-in ledger state
+
+    Values are JSON-compatible dicts. Callers get copies, so changes
+    only take effect through put() or update().
+    """
+
+    # Whether calls can block; async wrappers then run them in a worker thread
+    blocking = True
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the value stored under a key
+
+        Args:
+            key: State key
+
+        Returns:
+            Stored value, None if the key does not exist
+        """
+        raise NotImplementedError
+
+    def put(self, key: str, value: Dict[str, Any]):
+        """
+        Store a value under a key
+
+        Args:
+            key: State key
+            value: JSON-compatible value
+        """
+        raise NotImplementedError
+
+    def update(self, key: str, mutate: Mutator) -> Optional[Dict[str, Any]]:
+        """
+        Atomically read, change and write back a value
+
+        Args:
+            key: State key
+            mutate: Function given the current value (or None), returning
+                the new value or None to abort
+
+        Returns:
+            The stored new value, None if the update was aborted
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release resources held by the backend"""
+
+    async def get_async(self, key: str) -> Optional[Dict[str, Any]]:
+        """get() without blocking the event loop"""
+        if not self.blocking:
+            return self.get(key)
+        return await asyncio.to_thread(self.get, key)
+
+    async def put_async(self, key: str, value: Dict[str, Any]):
+        """put() without blocking the event loop"""
+        if not self.blocking:
+            return self.put(key, value)
+        await asyncio.to_thread(self.put, key, value)
+
+    async def update_async(self, key: str, mutate: Mutator) -> Optional[Dict[str, Any]]:
+        """update() without blocking the event loop; mutate runs in the worker thread"""
+        if not self.blocking:
+            return self.update(key, mutate)
+        return await asyncio.to_thread(self.update, key, mutate)
+
+    async def close_async(self):
+        """close() without blocking the event loop"""
+        if not self.blocking:
+            return self.close()
+        await asyncio.to_thread(self.close)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+
+class MemoryStateBackend(LedgerStateBackend):
+    """Per-process in-memory state (the original MVP behaviour)"""
+
+    blocking = False
+
+    def __init__(self):
+        self._data: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self._data.get(key)
+        return copy.deepcopy(value) if value is not None else None
+
+    def put(self, key: str, value: Dict[str, Any]):
+        with self._lock:
+            self._data[key] = copy.deepcopy(value)
+
+    def update(self, key: str, mutate: Mutator) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            current = self._data.get(key)
+            value = mutate(copy.deepcopy(current) if current is not None else None)
+            if value is not None:
+                self._data[key] = copy.deepcopy(value)
+            return value
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+
+
+class SQLiteStateBackend(LedgerStateBackend):
+    """
+    State shared across processes through a SQLite database in WAL mode
+
+    Several namespaces (channels, anchors) share one file and one table.
+    """
+
+    def __init__(self, path: str, namespace: str, mmap_size: int = 256 * 1024 * 1024, busy_timeout: float = 5.0):
+        """
+        Initialize SQLite backend
+
+        Args:
+            path: Database file, shared by every worker process
+            namespace: Namespace of the keys held by this backend
+            mmap_size: Bytes of the database file to memory-map for reads
+            busy_timeout: Seconds to wait for another writer's lock
+        """
+        self.path = path
+        self.namespace = namespace
+        self.mmap_size = mmap_size
+        self.busy_timeout = busy_timeout
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database on first use"""
+        if self._conn is None:
+            conn = sqlite3.connect(
+                self.path,
+                timeout=self.busy_timeout,
+                isolation_level=None,
+                check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ledger_state ("
+                "namespace TEXT NOT NULL, "
+                "key TEXT NOT NULL, "
+                "value TEXT NOT NULL, "
+                "PRIMARY KEY (namespace, key)"
+                ") WITHOUT ROWID"
+            )
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT value FROM ledger_state WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, value: Dict[str, Any]):
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO ledger_state (namespace, key, value) VALUES (?, ?, ?)",
+                (self.namespace, key, json.dumps(value))
+            )
+
+    def update(self, key: str, mutate: Mutator) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT value FROM ledger_state WHERE namespace = ? AND key = ?",
+                    (self.namespace, key)
+                ).fetchone()
+                value = mutate(json.loads(row[0]) if row else None)
+                if value is not None:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO ledger_state (namespace, key, value) VALUES (?, ?, ?)",
+                        (self.namespace, key, json.dumps(value))
+                    )
+                conn.execute("COMMIT")
+                return value
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class SnapshotStateBackend(LedgerStateBackend):
+    """
+    Single-process state persisted as snapshot plus write-ahead log
+
+    Every write is appended to the log as a "key<TAB>json" line. Once
+    snapshot_every writes have accumulated, the log is frozen, new writes
+    go to the next generation's log, and a background thread compacts
+    the snapshot and the frozen log into a new snapshot generation that
+    is swapped in under the lock. Writers never wait for compaction. On
+    startup the snapshot is memory-mapped and only its key index is
+    loaded, then every later log is replayed; values are decoded on first
+    access, so restart time depends on the number of keys rather than the
+    size of the state. At most cache_size decoded values stay in memory,
+    the least recently used are dropped and re-read from the snapshot or
+    log on demand.
+
+    The key indexes of the snapshot and logs are plain dicts holding every
+    key, about 150 bytes per key, so memory still grows with the number of
+    keys even though values are not held.
+    """
+
+    def __init__(self, path: str, namespace: str, cache_size: int = 10000, snapshot_every: int = 10000):
+        """
+        Initialize snapshot backend
+
+        Args:
+            path: Base directory; the namespace gets a subdirectory
+            namespace: Namespace of the keys held by this backend
+            cache_size: Maximum decoded values kept in memory
+            snapshot_every: Log records that trigger a compacted snapshot
+        """
+        self.directory = os.path.join(path, namespace)
+        self.cache_size = cache_size
+        self.snapshot_every = snapshot_every
+        self._lock = threading.RLock()
+        self._compacted = threading.Condition(self._lock)
+        self._compacting = False
+        self._opened = False
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Key -> (offset, length) of the JSON value in the snapshot or log
+        self._snapshot_index: Dict[str, Tuple[int, int]] = {}
+        self._wal_index: Dict[str, Tuple[int, int]] = {}
+        # (generation, file, index) of logs waiting for compaction, oldest first
+        self._frozen: List[Tuple[int, Any, Dict[str, Tuple[int, int]]]] = []
+        self._snapshot_file = None
+        self._snapshot_map: Optional[mmap.mmap] = None
+        self._snapshot_generation = 0
+        self._wal = None
+        self._wal_size = 0
+        self._wal_records = 0
+        self._generation = 0
+        self._lock_file = None
+
+    def _file(self, kind: str, generation: int) -> str:
+        """Path of a snapshot or log file for a generation"""
+        names = {
+            "data": f"snapshot-{generation:08d}.data",
+            "index": f"snapshot-{generation:08d}.index",
+            "wal": f"wal-{generation:08d}.log"
+        }
+        return os.path.join(self.directory, names[kind])
+
+    def _open(self):
+        """Load the current snapshot and replay the logs on first use"""
+        if self._opened:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock_file = open(os.path.join(self.directory, "LOCK"), "a")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lock_file.close()
+            raise RuntimeError(f"Ledger state in {self.directory} is in use by another process")
+
+        current = os.path.join(self.directory, "CURRENT")
+        if os.path.exists(current):
+            with open(current) as f:
+                self._snapshot_generation = int(f.read().strip())
+
+        index_path = self._file("index", self._snapshot_generation)
+        if os.path.exists(index_path):
+            with open(index_path) as f:
+                self._snapshot_index = json.load(f)
+            self._map_snapshot(self._file("data", self._snapshot_generation))
+
+        # Logs after the snapshot's own are left by a compaction that did not finish
+        generation = self._snapshot_generation
+        replayed = 0
+        while True:
+            wal = open(self._file("wal", generation), "a+b")
+            index, size, records = self._replay_wal(wal)
+            replayed += records
+            if not os.path.exists(self._file("wal", generation + 1)):
+                break
+            self._frozen.append((generation, wal, index))
+            generation += 1
+        self._generation = generation
+        self._wal, self._wal_index, self._wal_size, self._wal_records = wal, index, size, records
+        self._opened = True
+        logger.info(
+            "Loaded ledger state %s: generation %s, %s snapshot keys, %s log records",
+            self.directory, self._snapshot_generation, len(self._snapshot_index), replayed
+        )
+
+    def _map_snapshot(self, data_path: str):
+        """Memory-map a snapshot data file"""
+        self._snapshot_file = open(data_path, "rb")
+        if os.path.getsize(data_path) > 0:
+            self._snapshot_map = mmap.mmap(self._snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @staticmethod
+    def _replay_wal(wal) -> Tuple[Dict[str, Tuple[int, int]], int, int]:
+        """
+        Index the records of a log
+
+        Returns:
+            Key index, size in bytes and number of records
+        """
+        wal.seek(0)
+        index = {}
+        offset = 0
+        records = 0
+        for line in wal:
+            if not line.endswith(b"\n"):
+                # Torn final write from a crash; drop it
+                wal.truncate(offset)
+                break
+            key, _, value = line.partition(b"\t")
+            index[key.decode()] = (offset + len(key) + 1, len(value) - 1)
+            offset += len(line)
+            records += 1
+        return index, offset, records
+
+    @staticmethod
+    def _read_layers(key: str, snapshot_index, snapshot_map, frozen) -> Optional[bytes]:
+        """Read the encoded latest value of a key from frozen logs and a snapshot"""
+        for _, wal, index in reversed(frozen):
+            location = index.get(key)
+            if location is not None:
+                return os.pread(wal.fileno(), location[1], location[0])
+        location = snapshot_index.get(key)
+        if location is not None:
+            return snapshot_map[location[0]:location[0] + location[1]]
+        return None
+
+    def _read_raw(self, key: str) -> Optional[bytes]:
+        """Read the encoded latest value of a key"""
+        location = self._wal_index.get(key)
+        if location is not None:
+            return os.pread(self._wal.fileno(), location[1], location[0])
+        return self._read_layers(key, self._snapshot_index, self._snapshot_map, self._frozen)
+
+    def _remember(self, key: str, value: Dict[str, Any]):
+        """Keep a decoded value, evicting the least recently used"""
+        self._cache[key] = value
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._open()
+            value = self._cache.get(key)
+            if value is not None:
+                self._cache.move_to_end(key)
+            else:
+                raw = self._read_raw(key)
+                if raw is None:
+                    return None
+                value = json.loads(raw)
+                self._remember(key, value)
+            return copy.deepcopy(value)
+
+    def put(self, key: str, value: Dict[str, Any]):
+        if "\t" in key or "\n" in key:
+            raise ValueError(f"Invalid ledger state key: {key!r}")
+
+        with self._lock:
+            self._open()
+            encoded_key = key.encode()
+            data = json.dumps(value, separators=(",", ":")).encode()
+            self._wal.write(encoded_key + b"\t" + data + b"\n")
+            self._wal.flush()
+
+            self._wal_index[key] = (self._wal_size + len(encoded_key) + 1, len(data))
+            self._wal_size += len(encoded_key) + len(data) + 2
+            self._wal_records += 1
+            self._remember(key, copy.deepcopy(value))
+
+            if self._wal_records >= self.snapshot_every and not self._compacting:
+                threading.Thread(
+                    target=self._compact_in_background,
+                    args=self._rotate(),
+                    name=f"ledger-state-compaction-{self._generation}",
+                    daemon=True
+                ).start()
+
+    def update(self, key: str, mutate: Mutator) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            value = mutate(self.get(key))
+            if value is not None:
+                self.put(key, value)
+            return value
+
+    def snapshot(self):
+        """Compact the current state into a new snapshot generation, waiting for it"""
+        with self._lock:
+            layers = self._rotate()
+        self._compact(*layers)
+
+    def _wait_for_compaction(self):
+        """Block until a running compaction has been swapped in"""
+        with self._lock:
+            while self._compacting:
+                self._compacted.wait()
+
+    def _rotate(self) -> Tuple[int, Dict[str, Tuple[int, int]], Optional[mmap.mmap], List[Any]]:
+        """
+        Freeze the log for compaction and start the next generation's
+
+        Called with the lock held; waits for a running compaction first.
+
+        Returns:
+            Generation of the new snapshot, and the snapshot index, map
+            and frozen logs it is compacted from
+        """
+        self._wait_for_compaction()
+        self._open()
+        self._frozen.append((self._generation, self._wal, self._wal_index))
+        self._generation += 1
+        self._wal = open(self._file("wal", self._generation), "a+b")
+        self._wal_index = {}
+        self._wal_size = 0
+        self._wal_records = 0
+        self._compacting = True
+        return self._generation, self._snapshot_index, self._snapshot_map, list(self._frozen)
+
+    def _compact_in_background(self, *layers):
+        try:
+            self._compact(*layers)
+        except Exception:
+            # The frozen logs stay readable and are compacted with the next snapshot
+            logger.exception("Failed to compact ledger state %s", self.directory)
+
+    def _compact(self, generation: int, snapshot_index, snapshot_map, frozen):
+        """
+        Write a snapshot from frozen files and swap it in
+
+        The frozen snapshot and logs are never written to again, so they
+        are read without the lock while writers append to the new log.
+        """
+        try:
+            keys = set(snapshot_index)
+            for _, _, index in frozen:
+                keys.update(index)
+
+            index = {}
+            offset = 0
+            with open(self._file("data", generation), "wb") as out:
+                for key in keys:
+                    raw = self._read_layers(key, snapshot_index, snapshot_map, frozen)
+                    encoded_key = key.encode()
+                    out.write(encoded_key + b"\t" + raw + b"\n")
+                    index[key] = (offset + len(encoded_key) + 1, len(raw))
+                    offset += len(encoded_key) + len(raw) + 2
+                out.flush()
+                os.fsync(out.fileno())
+            with open(self._file("index", generation), "w") as out:
+                json.dump(index, out, separators=(",", ":"))
+                out.flush()
+                os.fsync(out.fileno())
+
+            with self._lock:
+                self._install(generation, index, frozen)
+        finally:
+            with self._lock:
+                self._compacting = False
+                self._compacted.notify_all()
+
+    def _install(self, generation: int, index: Dict[str, Tuple[int, int]], frozen):
+        """Switch to a written snapshot and drop the files it replaces; called with the lock held"""
+        # Switch generations atomically, then drop the old files
+        current = os.path.join(self.directory, "CURRENT")
+        with open(current + ".tmp", "w") as out:
+            out.write(str(generation))
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(current + ".tmp", current)
+
+        previous = self._snapshot_generation
+        self._close_snapshot()
+        for _, wal, _ in frozen:
+            wal.close()
+        self._frozen = self._frozen[len(frozen):]
+        obsolete = [self._file("data", previous), self._file("index", previous)]
+        obsolete += [self._file("wal", wal_generation) for wal_generation, _, _ in frozen]
+        for path in obsolete:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+        self._snapshot_generation = generation
+        self._snapshot_index = index
+        self._map_snapshot(self._file("data", generation))
+        logger.info(
+            "Compacted ledger state %s into generation %s (%s keys)",
+            self.directory, generation, len(index)
+        )
+
+    def _close_snapshot(self):
+        """Close the snapshot map"""
+        if self._snapshot_map is not None:
+            self._snapshot_map.close()
+            self._snapshot_map = None
+        if self._snapshot_file is not None:
+            self._snapshot_file.close()
+            self._snapshot_file = None
+
+    def _close_files(self):
+        """Close the snapshot map and logs"""
+        self._close_snapshot()
+        for _, wal, _ in self._frozen:
+            wal.close()
+        self._frozen = []
+        if self._wal is not None:
+            self._wal.close()
+            self._wal = None
+
+    def close(self):
+        """Compact pending log records and release the state directory"""
+        with self._lock:
+            if not self._opened:
+                return
+            self._wait_for_compaction()
+            if self._wal_records or self._frozen:
+                self.snapshot()
+            self._close_files()
+            self._lock_file.close()
+            self._lock_file = None
+            self._cache.clear()
+            self._snapshot_index = {}
+            self._wal_index = {}
+            self._opened = False
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            self._open()
+            return (
+                key in self._cache or key in self._wal_index or key in self._snapshot_index
+                or any(key in index for _, _, index in self._frozen)
+            )
+
+
+def create_state_backend(
+    backend: str,
+    namespace: str,
+    path: Optional[str] = None,
+    cache_size: int = 10000,
+    snapshot_every: int = 10000
+) -> LedgerStateBackend:
+    """
+    Create a state backend by name
+
+    Args:
+        backend: "memory", "sqlite" or "snapshot"
+        namespace: Namespace of the keys held by the backend
+        path: Database file for sqlite, base directory for snapshot
+        cache_size: Decoded values kept in memory by the snapshot backend
+        snapshot_every: Log records between snapshots of the snapshot backend
+
+    Returns:
+        LedgerStateBackend instance
+
+    Raises:
+        ValueError: If the backend name is unknown or a path is missing
+    """
+    if backend == "memory":
+        return MemoryStateBackend()
+    if backend == "sqlite":
+        if not path:
+            raise ValueError("The sqlite ledger state backend requires a path")
+        return SQLiteStateBackend(path, namespace)
+    if backend == "snapshot":
+        if not path:
+            raise ValueError("The snapshot ledger state backend requires a path")
+        return SnapshotStateBackend(path, namespace, cache_size=cache_size, snapshot_every=snapshot_every)
+    raise ValueError(f"Unknown ledger state backend: {backend}")
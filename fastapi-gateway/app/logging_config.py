@@ -0,0 +1,293 @@
+"""
+Structured logging off the request path
+
+The root logger gets a single QueueHandler. Calling ``logger.info(...)``
+on a request only runs the filters below and appends the record to an
+in-memory queue; a QueueListener thread does the message interpolation,
+JSON serialization and the write to stderr.
+
+Every record carries the request context it was logged in:
+``request_id`` (the X-Request-ID header, or a generated one), ``route``
+(the route template) and, for the access line, ``latency_ms`` and
+``status``. The active trace ID is added when tracing is on.
+
+High-volume info logs can be sampled per logger with a setting such as
+``app.routers.contracts=0.1,app.access=0.05``. The rate applies to the
+named logger and its children, at INFO and below; warnings and errors are
+always kept.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+try:
+    from pythonjsonlogger import jsonlogger
+except ImportError:
+    jsonlogger = None
+
+from .metrics import RouteTemplates
+from .tracing import current_span
+
+logger = logging.getLogger(__name__)
+access_logger = logging.getLogger("app.access")
+
+JSON_FORMAT = "%(asctime)s %(levelname)s %(name)s %(message)s"
+JSON_RENAMES = {"asctime": "timestamp", "levelname": "level", "name": "logger"}
+# Attributes of every LogRecord; anything else on a record is an extra field
+RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_request_id: ContextVar[Optional[str]] = ContextVar("vendorchain_request_id", default=None)
+_request_scope: ContextVar[Optional[dict]] = ContextVar("vendorchain_request_scope", default=None)
+_route_templates = RouteTemplates()
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def current_request_id() -> Optional[str]:
+    """ID of the request being handled, if any"""
+    return _request_id.get()
+
+
+def parse_sample_rates(value: str) -> Dict[str, float]:
+    """
+    Parse per-logger sampling rates
+
+    Args:
+        value: Comma-separated ``logger=rate`` pairs
+
+    Returns:
+        Rate per logger name, clamped to [0, 1]
+    """
+    rates = {}
+    for item in value.split(","):
+        name, _, rate = item.partition("=")
+        if not name.strip() or not rate.strip():
+            continue
+        try:
+            rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+
+class RequestContextFilter(logging.Filter):
+    """Adds request_id, route and trace_id to every record"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = _request_id.get()
+        if not hasattr(record, "route"):
+            scope = _request_scope.get()
+            record.route = _route_templates(scope) if scope is not None else None
+        span = current_span()
+        if span is not None and not hasattr(record, "trace_id"):
+            record.trace_id = span.trace_id
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a share of INFO-and-below records per logger"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._resolved: Dict[str, float] = {}
+
+    def rate_for(self, name: str) -> float:
+        """Sampling rate of a logger, inherited from the closest configured parent"""
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate = 1.0
+            candidate = name
+            while candidate:
+                if candidate in self.rates:
+                    rate = self.rates[candidate]
+                    break
+                candidate = candidate.rpartition(".")[0]
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO or not self.rates:
+            return True
+        rate = self.rate_for(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread
+
+    The stock handler formats the message before queueing it so records can
+    be pickled across processes. The queue here is in-process, so the
+    record is queued as-is and interpolated on the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class StdlibJsonFormatter(logging.Formatter):
+    """JSON formatter used when python-json-logger is not installed"""
+
+    def __init__(self):
+        super().__init__(JSON_FORMAT)
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = {"message": record.getMessage()}
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES:
+                fields[key] = value
+        if record.exc_info:
+            fields["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            fields["stack_info"] = self.formatStack(record.stack_info)
+        fields[JSON_RENAMES["asctime"]] = self.formatTime(record)
+        fields[JSON_RENAMES["levelname"]] = record.levelname
+        fields[JSON_RENAMES["name"]] = record.name
+        # Context fields outside a request are noise
+        for key in ("request_id", "route"):
+            if fields.get(key) is None:
+                fields.pop(key, None)
+        return json.dumps(fields, default=str, ensure_ascii=False)
+
+
+if jsonlogger is not None:
+    class JsonFormatter(jsonlogger.JsonFormatter):
+        """JSON formatter with ``timestamp``, ``level`` and ``logger`` keys"""
+
+        def __init__(self):
+            super().__init__(JSON_FORMAT, rename_fields=JSON_RENAMES, json_ensure_ascii=False)
+
+        def add_fields(self, log_record, record, message_dict):
+            super().add_fields(log_record, record, message_dict)
+            # Context fields outside a request are noise
+            for key in ("request_id", "route"):
+                if log_record.get(key) is None:
+                    log_record.pop(key, None)
+else:
+    JsonFormatter = StdlibJsonFormatter
+
+
+def configure_logging(
+    level: str = "INFO",
+    json_format: bool = True,
+    text_format: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    sample_rates: str = ""
+) -> logging.handlers.QueueListener:
+    """
+    Route all logging through a queue drained by a background thread
+
+    Calling it again replaces the handler installed by the earlier call.
+
+    Args:
+        level: Root log level name
+        json_format: One JSON object per line instead of text
+        text_format: Format used when json_format is off
+        sample_rates: Per-logger sampling, ``logger=rate`` pairs
+
+    Returns:
+        Running QueueListener
+    """
+    global _listener
+
+    stop_logging()
+
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter() if json_format else logging.Formatter(text_format))
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    handler = DeferredQueueHandler(log_queue)
+    handler.addFilter(SamplingFilter(parse_sample_rates(sample_rates)))
+    handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        if isinstance(existing, DeferredQueueHandler):
+            root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(getattr(logging, level.upper(), logging.INFO))
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+class RequestContextMiddleware:
+    """
+    ASGI middleware binding a request ID to everything logged for a request
+
+    Takes the ID from X-Request-ID or generates one, echoes it in the
+    response, and writes one access line with route, status and latency.
+    """
+
+    def __init__(self, app, access_log: bool = True):
+        """
+        Initialize middleware
+
+        Args:
+            app: ASGI application
+            access_log: Log one line per request
+        """
+        self.app = app
+        self.access_log = access_log
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers") or ():
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        status = 500
+
+        async def send_with_request_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-request-id", request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        id_token = _request_id.set(request_id)
+        scope_token = _request_scope.set(scope)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            if self.access_log and access_logger.isEnabledFor(logging.INFO):
+                access_logger.info(
+                    "%s %s %s",
+                    scope["method"], scope["path"], status,
+                    extra={
+                        "status": status,
+                        "latency_ms": round((time.perf_counter() - started) * 1000, 3)
+                    }
+                )
+            _request_scope.reset(scope_token)
+            _request_id.reset(id_token)
@@ -0,0 +1,194 @@
+"""
+Event loop lag monitor with a blocking-call watchdog
+
+A monitor task sleeps for a fixed interval and measures how late it wakes
+up; the delay is the time the loop spent running something else without
+yielding, exported as the vendorchain_event_loop_lag_seconds histogram.
+
+Lag is only known once the loop is free again, too late to see what
+blocked it. A watchdog thread therefore checks the monitor's heartbeat
+and, when it is overdue by more than the threshold, captures the event
+loop thread's stack while the blocking call is still running. Recent
+stalls with their stacks are kept for the admin endpoint.
+"""
+
+import asyncio
+import collections
+import logging
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from .metrics import counter, histogram
+
+logger = logging.getLogger(__name__)
+
+EVENT_LOOP_LAG = histogram(
+    "vendorchain_event_loop_lag_seconds",
+    "Delay between when the loop monitor should have run and when it ran",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+EVENT_LOOP_STALLS = counter(
+    "vendorchain_event_loop_stalls_total",
+    "Times the event loop was blocked for longer than the stall threshold"
+)
+
+
+class LoopStall:
+    """One period in which the event loop did not yield"""
+
+    def __init__(self, stack: List[str]):
+        self.detected_at = datetime.utcnow()
+        self.stack = stack
+        self.duration_seconds: Optional[float] = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "detected_at": self.detected_at.isoformat(),
+            "duration_seconds": self.duration_seconds,
+            "stack": self.stack
+        }
+
+
+class LoopLagMonitor:
+    """Measures scheduling delay and captures stacks of blocking calls"""
+
+    def __init__(self, interval: float = 0.05, threshold: float = 0.1, history: int = 50):
+        """
+        Initialize monitor
+
+        Args:
+            interval: Seconds between lag measurements
+            threshold: Lag in seconds treated as a stall
+            history: Recent stalls kept
+        """
+        self.interval = interval
+        self.threshold = threshold
+        self.max_lag = 0.0
+        self._stalls: Deque[LoopStall] = collections.deque(maxlen=history)
+        self._current_stall: Optional[LoopStall] = None
+        self._lock = threading.Lock()
+        self._last_beat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Start the monitor task and the watchdog thread"""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._run())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info("Event loop monitor started, stall threshold %ss", self.threshold)
+
+    async def stop(self):
+        """Stop the monitor task and the watchdog thread"""
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=self.interval * 4 + 1)
+            self._watchdog = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self._last_beat = time.monotonic()
+            self.record(lag)
+
+    def record(self, lag: float):
+        """
+        Record one lag measurement
+
+        Args:
+            lag: Seconds the monitor woke up late
+        """
+        EVENT_LOOP_LAG.observe(lag)
+        self.max_lag = max(self.max_lag, lag)
+        with self._lock:
+            stall, self._current_stall = self._current_stall, None
+            if stall is not None:
+                stall.duration_seconds = round(lag, 4)
+            if lag < self.threshold:
+                return
+            if stall is None:
+                # Too short for the watchdog to catch it in the act
+                stall = LoopStall([])
+                stall.duration_seconds = round(lag, 4)
+                self._stalls.append(stall)
+
+        EVENT_LOOP_STALLS.inc()
+        where = stall.stack[-1].strip().splitlines()[0] if stall.stack else "unknown location"
+        logger.warning("Event loop blocked for %.0fms at %s", lag * 1000, where)
+
+    def _watch(self):
+        """Capture the loop thread's stack while it is blocked"""
+        while not self._stopped.wait(self.interval / 2):
+            overdue = time.monotonic() - self._last_beat - self.interval
+            if overdue < self.threshold:
+                continue
+            with self._lock:
+                if self._current_stall is not None:
+                    continue
+                frame = sys._current_frames().get(self._loop_thread_id)
+                stack = [line.rstrip() for line in traceback.format_stack(frame)] if frame is not None else []
+                del frame
+                self._current_stall = LoopStall(stack)
+                self._stalls.append(self._current_stall)
+
+    def stalls(self) -> List[Dict[str, Any]]:
+        """Recent stalls, newest first"""
+        with self._lock:
+            return [stall.snapshot() for stall in reversed(self._stalls)]
+
+
+# Global loop monitor instance
+_loop_monitor: Optional[LoopLagMonitor] = None
+
+
+def start_loop_monitor() -> LoopLagMonitor:
+    """
+    Start the event loop monitor
+
+    Returns:
+        Running LoopLagMonitor
+    """
+    global _loop_monitor
+
+    if _loop_monitor is None:
+        from .config import settings
+
+        _loop_monitor = LoopLagMonitor(
+            interval=settings.loop_monitor_interval,
+            threshold=settings.loop_stall_threshold,
+            history=settings.loop_stall_history
+        )
+        _loop_monitor.start()
+    return _loop_monitor
+
+
+def get_loop_monitor() -> Optional[LoopLagMonitor]:
+    """Running loop monitor, None when disabled"""
+    return _loop_monitor
+
+
+async def stop_loop_monitor():
+    """Stop the event loop monitor"""
+    global _loop_monitor
+
+    if _loop_monitor is not None:
+        await _loop_monitor.stop()
+        _loop_monitor = None
@@ -3,7 +3,7 @@ VendorChain MVP FastAPI Gateway
 Main application entry point
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import uvicorn
@@ -11,16 +11,30 @@ import logging
 from typing import Dict, Any
 
 from .config import settings
-from .database import init_database
-from .fabric_client import get_fabric_client, close_fabric_client
+from .database import start_pool_liveness_checker, stop_pool_liveness_checker
+from .fabric_client import close_fabric_client
+from .startup import warm_up
+from .ledger_queue import start_ledger_worker, stop_ledger_worker
+from .anchoring import anchoring_enabled, start_merkle_anchorer, stop_merkle_anchorer
+from .metrics import MetricsMiddleware
+from .compression import CompressionMiddleware
+from .tracing import TracingMiddleware, start_tracing, stop_tracing
+from .profiling import ProfilingMiddleware
+from .loop_monitor import start_loop_monitor, stop_loop_monitor
+from .health_prober import get_health_prober, start_health_prober, stop_health_prober
+from .logging_config import RequestContextMiddleware, configure_logging
+from .replicas import ConsistencyMiddleware, start_replica_router, stop_replica_router
+from .rate_limit import RateLimitMiddleware, create_rate_limit_backend, get_load_monitor, stop_load_monitor
 
 # Import routers
-from .routers import vendors, contracts, workflow, health
+from .routers import vendors, contracts, workflow, health, ledger_operations, metrics, admin
 
-# Configure logging
-logging.basicConfig(
-    level=getattr(logging, settings.log_level),
-    format=settings.log_format
+# Configure logging; records are formatted and written on a background thread
+configure_logging(
+    level=settings.log_level,
+    json_format=settings.log_json,
+    text_format=settings.log_format,
+    sample_rates=settings.log_sample_rates
 )
 logger = logging.getLogger(__name__)
 
@@ -33,31 +47,86 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting VendorChain FastAPI Gateway...")
     
-    # Initialize database
-    try:
-        init_database()
-        logger.info("Database initialized successfully")
-    except Exception as e:
-        logger.error(f"Failed to initialize database: {str(e)}")
+    # Export spans for requests, SQL statements and ledger calls
+    if settings.tracing_enabled:
+        start_tracing(
+            settings.tracing_export_path,
+            settings.tracing_service_name,
+            settings.tracing_sample_rate
+        )
+    
+    # Measure event loop lag and catch blocking calls
+    if settings.loop_monitor_enabled:
+        start_loop_monitor()
+    
+    # Check the schema version and pre-warm database and Fabric connections
+    await warm_up()
+    
+    # Ping idle pooled connections in the background instead of on every checkout
+    start_pool_liveness_checker()
     
-    # Initialize Fabric SDK connection
+    # Route reads to caught-up replicas, if any are configured
     try:
-        fabric_client = await get_fabric_client()
-        logger.info("Fabric client initialized successfully")
+        start_replica_router()
     except Exception as e:
-        logger.error(f"Failed to initialize Fabric client: {str(e)}")
+        logger.error("Failed to start read replica routing: %s", e)
+    
+    # Start deferred ledger operation worker
+    if settings.ledger_worker_enabled:
+        start_ledger_worker()
+    
+    # Sample DB pool wait and ledger queue depth for load shedding
+    if settings.load_shed_enabled:
+        get_load_monitor().start()
+    
+    # Start Merkle anchoring of contract changes
+    if anchoring_enabled():
+        start_merkle_anchorer()
+    
+    # Probe dependencies in the background; health endpoints serve the cached result
+    start_health_prober()
     
     yield
     
     # Shutdown
     logger.info("Shutting down VendorChain FastAPI Gateway...")
     
+    # Stop health probing
+    await stop_health_prober()
+    
+    # Stop load sampling
+    await stop_load_monitor()
+    
+    # Stop deferred ledger operation worker
+    try:
+        await stop_ledger_worker()
+    except Exception as e:
+        logger.error("Error stopping ledger worker: %s", e)
+    
+    # Stop Merkle anchorer, anchoring the last window
+    try:
+        await stop_merkle_anchorer()
+    except Exception as e:
+        logger.error("Error stopping Merkle anchorer: %s", e)
+    
     # Close Fabric SDK connection
     try:
         await close_fabric_client()
         logger.info("Fabric client closed successfully")
     except Exception as e:
-        logger.error(f"Error closing Fabric client: {str(e)}")
+        logger.error("Error closing Fabric client: %s", e)
+    
+    # Send reads back to the primary and close replica pools
+    stop_replica_router()
+    
+    # Stop pool liveness checks
+    stop_pool_liveness_checker()
+    
+    # Stop event loop monitor
+    await stop_loop_monitor()
+    
+    # Flush remaining spans
+    stop_tracing()
 
 
 # Create FastAPI application
@@ -77,11 +146,64 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large JSON responses such as contract lists
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_minimum_size,
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality
+    )
+
+# Profile requests sent with X-Profile or picked by the sampling rate
+if settings.profiling_enabled:
+    app.add_middleware(
+        ProfilingMiddleware,
+        sample_rate=settings.profiling_sample_rate,
+        interval=settings.profiling_interval
+    )
+
+# Limit each client's request rate and shed batch traffic while overloaded
+if settings.rate_limit_enabled or settings.load_shed_enabled:
+    app.add_middleware(
+        RateLimitMiddleware,
+        requests=settings.rate_limit_requests,
+        period=settings.rate_limit_period,
+        batch_requests=settings.rate_limit_batch_requests,
+        batch_api_keys={key.strip() for key in settings.rate_limit_batch_api_keys.split(",") if key.strip()},
+        api_key_header=settings.api_key_header,
+        backend=create_rate_limit_backend(settings.rate_limit_backend, settings.rate_limit_path),
+        load_monitor=get_load_monitor() if settings.load_shed_enabled else None,
+        retry_after=settings.load_shed_retry_after,
+        rate_limit=settings.rate_limit_enabled,
+        # In-memory buckets are per worker, so each enforces its share
+        share=1.0 if settings.rate_limit_backend == "sqlite" else 1 / max(1, settings.web_concurrency)
+    )
+
+# Record per-route latency for /metrics
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
+# Return a consistency token from requests that commit, for read-your-writes on replicas
+if settings.database_replica_urls:
+    app.add_middleware(ConsistencyMiddleware)
+
+# Bind a request ID to every log record and write one access line per request
+app.add_middleware(RequestContextMiddleware, access_log=settings.access_log_enabled)
+
+# Continue the caller's W3C trace context; added last so its span covers the other middleware
+if settings.tracing_enabled:
+    app.add_middleware(TracingMiddleware)
+
 # Include routers
+if settings.metrics_enabled:
+    app.include_router(metrics.router)
 app.include_router(health.router)
 app.include_router(vendors.router)
 app.include_router(contracts.router)
 app.include_router(workflow.router)
+app.include_router(ledger_operations.router)
+app.include_router(admin.router)
 
 
 @app.get("/")
@@ -95,50 +217,54 @@ async def root() -> Dict[str, str]:
 
 
 @app.get("/health")
-async def health_check() -> Dict[str, str]:
-    """Health check endpoint for container health monitoring"""
-    try:
-        # TODO: Add database connectivity check
-        # TODO: Add Fabric network connectivity check
-        
-        return {
-            "status": "healthy",
-            "service": "vendorchain-fastapi-gateway",
-            "timestamp": "2025-08-19T10:00:00Z"
-        }
-    except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
-        raise HTTPException(status_code=503, detail="Service unhealthy")
+async def health_check(response: Response) -> Dict[str, Any]:
+    """Dependency-aware health status; container liveness uses /api/v1/health/live"""
+    state = await get_health_prober().current()
+    if state["status"] == "unhealthy":
+        response.status_code = 503
+    return {
+        "status": state["status"],
+        "service": "vendorchain-fastapi-gateway",
+        "timestamp": state["checked_at"].isoformat() + "Z",
+        "database": "connected" if state["database"]["ok"] else "disconnected",
+        "blockchain": "connected" if state["blockchain"]["ok"] else "disconnected"
+    }
+
+
+@app.get("/ready")
+async def readiness_check(response: Response) -> Dict[str, Any]:
+    """Readiness check endpoint for container orchestration"""
+    state = await get_health_prober().current()
+    if not state["ready"]:
+        response.status_code = 503
+    return {
+        "ready": state["ready"],
+        "checks": {
+            "database": state["database"]["ok"],
+            "blockchain": state["blockchain"]["ok"]
+        },
+        "timestamp": state["checked_at"].isoformat() + "Z"
+    }
 
 
 @app.get("/health/database")
-async def database_health() -> Dict[str, str]:
+async def database_health(response: Response) -> Dict[str, str]:
     """Database connectivity health check"""
-    try:
-        # TODO: Implement actual database connectivity check
-        # For now, return a placeholder response
-        return {
-            "database": "connected",
-            "status": "healthy"
-        }
-    except Exception as e:
-        logger.error(f"Database health check failed: {str(e)}")
-        raise HTTPException(status_code=503, detail="Database unhealthy")
+    state = await get_health_prober().current()
+    if not state["database"]["ok"]:
+        response.status_code = 503
+        return {"database": "disconnected", "status": "unhealthy"}
+    return {"database": "connected", "status": "healthy"}
 
 
 @app.get("/health/fabric")
-async def fabric_health() -> Dict[str, str]:
+async def fabric_health(response: Response) -> Dict[str, str]:
     """Fabric network connectivity health check"""
-    try:
-        # TODO: Implement actual Fabric connectivity check
-        # For now, return a placeholder response
-        return {
-            "fabric": "connected",
-            "status": "healthy"
-        }
-    except Exception as e:
-        logger.error(f"Fabric health check failed: {str(e)}")
-        raise HTTPException(status_code=503, detail="Fabric network unhealthy")
+    state = await get_health_prober().current()
+    if not state["blockchain"]["ok"]:
+        response.status_code = 503
+        return {"fabric": "disconnected", "status": "unhealthy"}
+    return {"fabric": "connected", "status": "healthy"}
 
 
 if __name__ == "__main__":
@@ -0,0 +1,127 @@
+"""
+Merkle tree construction and inclusion proofs for batched anchoring
+
+Leaves and interior nodes are hashed with distinct prefixes (as in
+RFC 6962) so an interior node can never be passed off as a leaf. An odd
+node at the end of a level is promoted unchanged rather than paired
+with a copy of itself.
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, List
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+def canonical_json(data: Any) -> bytes:
+    """
+    Serialize data deterministically
+
+    Args:
+        data: JSON-compatible data
+
+    Returns:
+        UTF-8 encoded JSON with sorted keys and no whitespace
+    """
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), default=str).encode()
+
+
+def leaf_hash(data: Any) -> str:
+    """
+    Hash a record as a Merkle leaf
+
+    Args:
+        data: JSON-compatible record
+
+    Returns:
+        Hex-encoded leaf hash
+    """
+    return hashlib.sha256(LEAF_PREFIX + canonical_json(data)).hexdigest()
+
+
+def node_hash(left: str, right: str) -> str:
+    """Hash two hex-encoded child hashes into their parent"""
+    return hashlib.sha256(NODE_PREFIX + bytes.fromhex(left) + bytes.fromhex(right)).hexdigest()
+
+
+def build_tree(leaves: List[str]) -> List[List[str]]:
+    """
+    Build all levels of a Merkle tree
+
+    Args:
+        leaves: Hex-encoded leaf hashes
+
+    Returns:
+        Levels from leaves (index 0) up to the root level
+
+    Raises:
+        ValueError: If there are no leaves
+    """
+    if not leaves:
+        raise ValueError("Cannot build a Merkle tree without leaves")
+
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parent = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parent.append(level[-1])
+        levels.append(parent)
+    return levels
+
+
+def merkle_root(levels: List[List[str]]) -> str:
+    """Get the root hash of a tree built by build_tree"""
+    return levels[-1][0]
+
+
+def inclusion_proof(levels: List[List[str]], index: int) -> List[Dict[str, str]]:
+    """
+    Build the inclusion proof for a leaf
+
+    Args:
+        levels: Tree levels from build_tree
+        index: Leaf index
+
+    Returns:
+        Sibling hashes from the leaf upwards, each with the side it sits on
+
+    Raises:
+        IndexError: If the index is outside the tree
+    """
+    if not 0 <= index < len(levels[0]):
+        raise IndexError(f"Leaf index {index} outside tree of {len(levels[0])} leaves")
+
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append({
+                "hash": level[sibling],
+                "position": "left" if sibling < index else "right"
+            })
+        index //= 2
+    return proof
+
+
+def verify_proof(leaf: str, proof: List[Dict[str, str]], root: str) -> bool:
+    """
+    Check an inclusion proof against a root
+
+    Args:
+        leaf: Hex-encoded leaf hash
+        proof: Proof from inclusion_proof
+        root: Hex-encoded root hash
+
+    Returns:
+        bool: True if the leaf is included under the root
+    """
+    current = leaf
+    for step in proof:
+        if step["position"] == "left":
+            current = node_hash(step["hash"], current)
+        else:
+            current = node_hash(current, step["hash"])
+    return current == root
@@ -0,0 +1,433 @@
+"""
+Prometheus metrics with lock-free recording
+
+Counters and histograms are written to per-thread shards: each thread
+(the event loop and every threadpool worker) only ever updates its own
+dictionary, so recording never takes a lock and never contends. Shards
+are summed when /metrics is scraped, and the shards of threads that have
+exited are folded into one retired total then. Gauges are set from the
+event loop at scrape time.
+
+The text exposition format (version 0.0.4) is rendered directly, so the
+gateway needs no metrics client library.
+"""
+
+import bisect
+import math
+import threading
+import time
+import weakref
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value"""
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    """Escape a label value"""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """Format a label set, empty if there are no labels"""
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    """Base class holding name, help text and label names"""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}"
+        ]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class _Sharded(_Metric):
+    """Metric whose values live in one dictionary per recording thread"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._local = threading.local()
+        # Live shards with their owning thread
+        self._shards: List[Tuple[weakref.ref, Dict[LabelValues, object]]] = []
+        # Totals of shards whose thread has exited
+        self._retired: Dict[LabelValues, object] = {}
+        self._register_lock = threading.Lock()
+
+    def _shard(self) -> Dict[LabelValues, object]:
+        """This thread's shard; the lock is only taken the first time"""
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            with self._register_lock:
+                self._shards.append((weakref.ref(threading.current_thread()), values))
+            return values
+
+    def _merge(self, into: Dict[LabelValues, object], shard: Dict[LabelValues, object]):
+        """Add a shard's values into a total, replacing rather than mutating its values"""
+        raise NotImplementedError
+
+    def _snapshots(self) -> Iterable[Dict[LabelValues, object]]:
+        with self._register_lock:
+            live = []
+            for owner, shard in self._shards:
+                thread = owner()
+                if thread is None or not thread.is_alive():
+                    # Nothing writes to an exited thread's shard any more
+                    self._merge(self._retired, shard)
+                else:
+                    live.append((owner, shard))
+            self._shards = live
+            retired = self._retired.copy()
+        # dict.copy() is atomic, so a shard being written is never iterated
+        return [retired] + [shard.copy() for _, shard in live]
+
+
+class Counter(_Sharded):
+    """Monotonically increasing counter"""
+
+    type_name = "counter"
+
+    def inc(self, *labelvalues: str, amount: float = 1.0):
+        """
+        Increment the counter
+
+        Args:
+            *labelvalues: One value per label name, in order
+            amount: Amount to add
+        """
+        values = self._shard()
+        values[labelvalues] = values.get(labelvalues, 0.0) + amount
+
+    def _merge(self, into: Dict[LabelValues, float], shard: Dict[LabelValues, float]):
+        for labels, value in shard.items():
+            into[labels] = into.get(labels, 0.0) + value
+
+    def value(self, *labelvalues: str) -> float:
+        """Total across all threads"""
+        return sum(shard.get(labelvalues, 0.0) for shard in self._snapshots())
+
+    def render(self) -> List[str]:
+        totals: Dict[LabelValues, float] = {}
+        for shard in self._snapshots():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0.0) + value
+        lines = self._header()
+        for labels in sorted(totals):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(totals[labels])}")
+        return lines
+
+
+class Histogram(_Sharded):
+    """Histogram with fixed upper bounds"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labelvalues: str):
+        """
+        Record one observation
+
+        Args:
+            value: Observed value
+            *labelvalues: One value per label name, in order
+        """
+        values = self._shard()
+        state = values.get(labelvalues)
+        if state is None:
+            # Per-bucket counts (the last is +Inf), then sum and count
+            state = values[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-2] += value
+        state[-1] += 1
+
+    def _merge(self, into: Dict[LabelValues, List[float]], shard: Dict[LabelValues, List[float]]):
+        for labels, state in shard.items():
+            total = into.get(labels)
+            into[labels] = list(state) if total is None else [a + b for a, b in zip(total, state)]
+
+    def count(self, *labelvalues: str) -> int:
+        """Number of observations across all threads"""
+        return sum(shard[labelvalues][-1] for shard in self._snapshots() if labelvalues in shard)
+
+    def render(self) -> List[str]:
+        totals: Dict[LabelValues, List[float]] = {}
+        for shard in self._snapshots():
+            for labels, state in shard.items():
+                # Copy before summing; the owning thread may be updating it
+                state = list(state)
+                total = totals.setdefault(labels, [0] * len(state))
+                for index, value in enumerate(state):
+                    total[index] += value
+
+        lines = self._header()
+        names = self.labelnames + ("le",)
+        for labels in sorted(totals):
+            state = totals[labels]
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), state):
+                cumulative += count
+                bucket_labels = _format_labels(names, labels + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{label_text} {_format_value(state[-1])}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Current value, set from the event loop"""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, *labelvalues: str):
+        """Set the value for a label set"""
+        self._values[labelvalues] = value
+
+    def inc(self, *labelvalues: str, amount: float = 1.0):
+        """Add to the value for a label set"""
+        self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def dec(self, *labelvalues: str, amount: float = 1.0):
+        """Subtract from the value for a label set"""
+        self.inc(*labelvalues, amount=-amount)
+
+    def clear(self):
+        """Drop all label sets, e.g. before re-collecting"""
+        self._values = {}
+
+    def value(self, *labelvalues: str) -> float:
+        return self._values.get(labelvalues, 0.0)
+
+    def render(self) -> List[str]:
+        values = dict(self._values)
+        lines = self._header()
+        for labels in sorted(values):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(values[labels])}")
+        return lines
+
+
+class Registry:
+    """Metrics rendered by /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Add a metric; registering the same name twice returns the first"""
+        return self._metrics.setdefault(metric.name, metric)
+
+    def render(self) -> str:
+        """Render every metric in the text exposition format"""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    """Create and register a counter"""
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_BUCKETS
+) -> Histogram:
+    """Create and register a histogram"""
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    """Create and register a gauge"""
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+# HTTP
+HTTP_REQUEST_DURATION = histogram(
+    "vendorchain_http_request_duration_seconds",
+    "HTTP request latency by route template and status",
+    ("method", "route", "status")
+)
+HTTP_REQUESTS_IN_PROGRESS = gauge(
+    "vendorchain_http_requests_in_progress",
+    "HTTP requests currently being served"
+)
+
+# Database pool
+DB_POOL_WAIT = histogram(
+    "vendorchain_db_pool_wait_seconds",
+    "Time spent waiting for a pooled database connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+)
+DB_POOL_TIMEOUTS = counter(
+    "vendorchain_db_pool_timeouts_total",
+    "Checkouts that gave up waiting for a pooled connection"
+)
+DB_POOL_CONNECTIONS = gauge(
+    "vendorchain_db_pool_connections",
+    "Pooled database connections by state",
+    ("state",)
+)
+DB_POOL_SATURATION = gauge(
+    "vendorchain_db_pool_saturation_ratio",
+    "Checked-out connections as a share of pool size plus overflow"
+)
+DB_POOL_PEAK_SATURATION = gauge(
+    "vendorchain_db_pool_peak_saturation_ratio",
+    "Highest saturation seen by a checkout since the previous scrape"
+)
+DB_POOL_LIVENESS_CHECKS = counter(
+    "vendorchain_db_pool_liveness_checks_total",
+    "Background pings of idle pooled connections by result",
+    ("result",)
+)
+
+# Ledger
+LEDGER_CALL_DURATION = histogram(
+    "vendorchain_ledger_call_duration_seconds",
+    "Ledger call latency by operation, including circuit breaker rejections",
+    ("operation",)
+)
+LEDGER_CALL_ERRORS = counter(
+    "vendorchain_ledger_call_errors_total",
+    "Failed ledger calls by operation and error type",
+    ("operation", "error")
+)
+LEDGER_CALL_REJECTED = counter(
+    "vendorchain_ledger_call_rejected_total",
+    "Ledger calls that returned no transaction ID",
+    ("operation",)
+)
+LEDGER_BREAKER_STATE = gauge(
+    "vendorchain_ledger_breaker_open",
+    "Circuit breaker state by operation (0 closed, 0.5 half-open, 1 open)",
+    ("operation",)
+)
+
+# Caches and queues
+CACHE_ENTRIES = gauge(
+    "vendorchain_cache_entries",
+    "Entries held by in-process caches",
+    ("cache",)
+)
+LEDGER_LANES = gauge(
+    "vendorchain_ledger_lanes",
+    "Per-contract execution lane counters (see KeyedExecutor.snapshot)",
+    ("stat",)
+)
+LEDGER_OPERATION_WAITERS = gauge(
+    "vendorchain_ledger_operation_waiters",
+    "Operations with clients long-polling for their completion"
+)
+LEDGER_QUEUE_OPERATIONS = gauge(
+    "vendorchain_ledger_queue_operations",
+    "Deferred ledger operations by status",
+    ("status",)
+)
+LEDGER_QUEUE_OLDEST_AGE = gauge(
+    "vendorchain_ledger_queue_oldest_pending_age_seconds",
+    "Age of the oldest pending or running ledger operation"
+)
+
+
+class RouteTemplates:
+    """
+    Maps a handled request to the template of its route
+
+    Requests are labelled by template (``/api/v1/contracts/{contract_id}``),
+    not the raw path, so label cardinality stays bounded. Requests that
+    match no route are ``unmatched``.
+    """
+
+    def __init__(self):
+        self._templates: Dict[Any, str] = {}
+
+    def __call__(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        template = self._templates.get(endpoint)
+        if template is None:
+            # The router records the endpoint in the scope, not the route
+            self._templates = {
+                getattr(route, "endpoint", None): route.path
+                for route in getattr(scope.get("app"), "routes", [])
+            }
+            template = self._templates.get(endpoint, "unmatched")
+        return template
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency per route template"""
+
+    def __init__(self, app):
+        self.app = app
+        self._route = RouteTemplates()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_PROGRESS.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_PROGRESS.dec()
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started, scope["method"], self._route(scope), str(status[0])
+            )
@@ -131,4 +131,78 @@ class APIMetadata(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
-    contract = relationship("Contract", back_populates="api_metadata")
\ No newline at end of file
+    contract = relationship("Contract", back_populates="api_metadata")
+
+class LedgerOperationStatus(str, enum.Enum):
+    """Ledger operation status enumeration"""
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    DEAD_LETTER = "DEAD_LETTER"
+
+
+class LedgerOperation(Base):
+    """Ledger operation model (work queue for deferred and retried blockchain writes)"""
+    __tablename__ = "vendor_contract_ledger_operation"
+    
+    id = Column(String(36), primary_key=True)
+    operation = Column(String(50), nullable=False)
+    contract_id = Column(Integer, ForeignKey("vendor_contract_management_contract.id", ondelete="SET NULL"), index=True)
+    workflow_log_id = Column(Integer, ForeignKey("vendor_contract_management_workflow_log.id", ondelete="SET NULL"))
+    payload = Column(JSON, nullable=False)
+    status = Column(Enum(LedgerOperationStatus, native_enum=False, length=20), nullable=False, default=LedgerOperationStatus.PENDING, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), index=True)
+    locked_until = Column(DateTime(timezone=True))
+    blockchain_tx_id = Column(String(255))
+    error_message = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    completed_at = Column(DateTime(timezone=True))
+    
+    # Relationships
+    contract = relationship("Contract")
+    workflow_log = relationship("WorkflowLog")
+
+
+class MerkleAnchorStatus(str, enum.Enum):
+    """Merkle anchor status enumeration"""
+    PENDING = "PENDING"
+    ANCHORED = "ANCHORED"
+
+
+class MerkleAnchor(Base):
+    """Merkle anchor model (one committed root per anchoring window)"""
+    __tablename__ = "vendor_contract_merkle_anchor"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    root_hash = Column(String(64), nullable=False, index=True)
+    leaf_count = Column(Integer, nullable=False)
+    status = Column(Enum(MerkleAnchorStatus, native_enum=False, length=20), nullable=False, default=MerkleAnchorStatus.PENDING, index=True)
+    blockchain_tx_id = Column(String(255))
+    window_start = Column(DateTime(timezone=True))
+    window_end = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    anchored_at = Column(DateTime(timezone=True))
+    locked_until = Column(DateTime(timezone=True))  # anchorer lease while the root is written
+    
+    # Relationships
+    leaves = relationship("MerkleLeaf", back_populates="anchor")
+
+
+class MerkleLeaf(Base):
+    """Merkle leaf model (canonical hash of one contract change)"""
+    __tablename__ = "vendor_contract_merkle_leaf"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    contract_id = Column(Integer, ForeignKey("vendor_contract_management_contract.id", ondelete="CASCADE"), nullable=False, index=True)
+    anchor_id = Column(Integer, ForeignKey("vendor_contract_merkle_anchor.id"), index=True)
+    action = Column(String(50), nullable=False)
+    leaf_hash = Column(String(64), nullable=False)
+    leaf_index = Column(Integer)
+    proof = Column(JSON)  # Sibling hashes from the leaf to the root, stored at seal time
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    contract = relationship("Contract")
+    anchor = relationship("MerkleAnchor", back_populates="leaves")
@@ -0,0 +1,262 @@
+"""
+On-demand statistical profiling of single requests
+
+A request is profiled when it carries ``X-Profile`` with the admin token,
+or when it is picked by the sampling rate. One sampler thread wakes every
+``interval`` seconds while any profile is active and records, for each
+profiled request:
+
+- the event loop thread's full stack while the request's task is running
+  (this includes blocking calls made from async routes), and
+- the task's suspended coroutine stack, ending in ``[await]``, while it
+  waits on I/O or the threadpool,
+
+so the samples add up to the request's wall-clock time. Stacks are kept
+in collapsed ("folded") format, one ``frame;frame;frame count`` line per
+stack, which flamegraph.pl, inferno and speedscope read directly.
+
+Unprofiled requests pay one header lookup, plus one random() call when a
+sampling rate is set.
+"""
+
+import asyncio
+import collections
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .logging_config import current_request_id
+from .metrics import RouteTemplates
+from .security import admin_token_valid
+
+logger = logging.getLogger(__name__)
+
+AWAIT_FRAME = "[await]"
+MAX_STACK_DEPTH = 128
+
+
+def _frame_label(code) -> str:
+    """Flamegraph label of a code object"""
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _thread_stack(frame) -> List[str]:
+    """Labels of a thread's frames, outermost first"""
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+def _task_stack(task: asyncio.Task) -> List[str]:
+    """Labels of a suspended task's coroutine chain, outermost first"""
+    labels = []
+    coroutine = task.get_coro()
+    while coroutine is not None and len(labels) < MAX_STACK_DEPTH:
+        code = getattr(coroutine, "cr_code", None) or getattr(coroutine, "gi_code", None)
+        if code is None:
+            break
+        labels.append(_frame_label(code))
+        coroutine = getattr(coroutine, "cr_await", None) or getattr(coroutine, "gi_yieldfrom", None)
+    labels.append(AWAIT_FRAME)
+    return labels
+
+
+class RequestProfile:
+    """Samples collected for one request"""
+
+    def __init__(self, request_id: str, method: str, path: str, trigger: str):
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.trigger = trigger
+        self.route: Optional[str] = None
+        self.status: Optional[int] = None
+        self.started_at = datetime.utcnow()
+        self.duration_ms: Optional[float] = None
+        self.samples = 0
+        self.stacks: Dict[str, int] = collections.Counter()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def sample(self, frames: Dict[int, Any]):
+        """Record one sample; called from the sampler thread"""
+        task = self._task
+        if task is None or task.done():
+            return
+        try:
+            running = asyncio.current_task(self._loop) is task
+        except RuntimeError:
+            return
+        if running:
+            stack = _thread_stack(frames.get(self._thread_id))
+        else:
+            stack = _task_stack(task)
+        if stack:
+            self.stacks[";".join(stack)] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        """Collapsed stacks, heaviest first"""
+        return "\n".join(
+            f"{stack} {count}"
+            for stack, count in sorted(self.stacks.items(), key=lambda item: item[1], reverse=True)
+        ) + "\n"
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "request_id": self.request_id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "trigger": self.trigger,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": self.duration_ms,
+            "samples": self.samples
+        }
+
+
+class Sampler:
+    """One thread sampling every active profile, idle while there are none"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self._active: Dict[str, RequestProfile] = {}
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self, profile: RequestProfile):
+        """Begin sampling a profile for the calling task"""
+        profile._loop = asyncio.get_running_loop()
+        profile._thread_id = threading.get_ident()
+        profile._task = asyncio.current_task()
+        with self._lock:
+            self._active[profile.request_id] = profile
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def stop(self, profile: RequestProfile):
+        """Stop sampling a profile"""
+        with self._lock:
+            self._active.pop(profile.request_id, None)
+        profile._task = None
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            with self._lock:
+                profiles = list(self._active.values())
+                if not profiles:
+                    self._wakeup.clear()
+                    continue
+            frames = sys._current_frames()
+            for profile in profiles:
+                try:
+                    profile.sample(frames)
+                except Exception as e:
+                    logger.debug("Profiler sample failed: %s", e)
+            del frames
+            time.sleep(self.interval)
+
+
+class ProfileStore:
+    """Most recent finished profiles, keyed by request ID"""
+
+    def __init__(self, max_profiles: int = 50):
+        self._profiles: "collections.OrderedDict[str, RequestProfile]" = collections.OrderedDict()
+        self.max_profiles = max_profiles
+
+    def add(self, profile: RequestProfile):
+        self._profiles[profile.request_id] = profile
+        self._profiles.move_to_end(profile.request_id)
+        while len(self._profiles) > self.max_profiles:
+            self._profiles.popitem(last=False)
+
+    def get(self, request_id: str) -> Optional[RequestProfile]:
+        return self._profiles.get(request_id)
+
+    def recent(self) -> List[RequestProfile]:
+        """Profiles, newest first"""
+        return list(reversed(self._profiles.values()))
+
+
+# Recent profiles served by the admin endpoint
+profile_store = ProfileStore()
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling requests on demand"""
+
+    def __init__(self, app, sample_rate: float = 0.0, interval: float = 0.005, store: Optional[ProfileStore] = None):
+        """
+        Initialize middleware
+
+        Args:
+            app: ASGI application
+            sample_rate: Share of requests profiled without the X-Profile header
+            interval: Seconds between samples
+            store: Where finished profiles are kept, the shared store by default
+        """
+        self.app = app
+        self.sample_rate = sample_rate
+        self.sampler = Sampler(interval)
+        self.store = store if store is not None else profile_store
+        self._route = RouteTemplates()
+
+    def _trigger(self, scope) -> Optional[str]:
+        """Why the request is profiled, None if it is not"""
+        for name, value in scope.get("headers") or ():
+            if name == b"x-profile":
+                return "header" if admin_token_valid(value.decode("latin-1")) else None
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        trigger = self._trigger(scope) if scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        request_id = (
+            current_request_id()
+            or headers.get(b"x-request-id", b"").decode("latin-1")[:64]
+            or uuid.uuid4().hex
+        )
+        profile = RequestProfile(request_id, scope["method"], scope["path"], trigger)
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        started = time.perf_counter()
+        self.sampler.start(profile)
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            self.sampler.stop(profile)
+            profile.duration_ms = round((time.perf_counter() - started) * 1000, 3)
+            profile.route = self._route(scope)
+            self.store.add(profile)
+            logger.info(
+                "Profiled %s %s (%s): %sms, %s samples, id %s",
+                profile.method, profile.path, trigger, profile.duration_ms, profile.samples, request_id
+            )
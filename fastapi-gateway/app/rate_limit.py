@@ -0,0 +1,409 @@
+"""
+Token-bucket rate limiting and priority admission control
+
+Every ``/api/`` request is charged to a client, identified by its API key
+or, without one, its address. Each client has one token bucket per
+priority class:
+
+- interactive: the default, for Odoo users
+  (``rate_limit_requests`` per ``rate_limit_period``)
+- batch: API keys listed in ``rate_limit_batch_api_keys``, or any request
+  sent with ``X-Priority: batch`` (``rate_limit_batch_requests`` per period)
+
+A bucket holds up to one period's worth of requests and refills
+continuously, so short bursts pass and sustained overuse gets 429 with
+``Retry-After`` set to when the next token is due.
+
+Admission control sheds batch requests with 503 and ``Retry-After`` while
+the smoothed DB pool checkout wait or the ledger queue depth is above its
+threshold. Interactive traffic is only rate limited, never shed. The load
+signals are refreshed by a background task, so admitting a request costs
+a dictionary lookup and some arithmetic.
+
+Buckets live in memory by default, where each worker enforces its share of
+the limits. The sqlite backend keeps them in a file shared by all workers
+on the host, for exact limits; it is called from a worker thread, as it may
+wait for another worker's lock, and forgets buckets once they have refilled.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+
+from .metrics import counter
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+RATE_LIMITED = counter(
+    "vendorchain_rate_limited_total",
+    "Requests rejected by the rate limiter by priority class",
+    ("priority",)
+)
+LOAD_SHED = counter(
+    "vendorchain_load_shed_total",
+    "Batch requests shed while the gateway was overloaded by reason",
+    ("reason",)
+)
+
+
+class TokenBucket:
+    """Continuously refilling token bucket"""
+
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, capacity: float, now: float):
+        self.tokens = capacity
+        self.updated = now
+
+    def take(self, capacity: float, rate: float, now: float) -> float:
+        """
+        Take one token
+
+        Args:
+            capacity: Most tokens the bucket holds
+            rate: Tokens added per second
+            now: Current monotonic time
+
+        Returns:
+            0 if a token was taken, otherwise seconds until one is available
+        """
+        self.tokens = min(capacity, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / rate
+
+
+class MemoryRateLimitBackend:
+    """Buckets in this process; only touched from the event loop thread"""
+
+    # take() never waits, so it runs on the event loop
+    blocking = False
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def take(self, key: str, capacity: float, rate: float) -> float:
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_keys:
+                self._prune(now, rate)
+            bucket = self._buckets[key] = TokenBucket(capacity, now)
+        return bucket.take(capacity, rate, now)
+
+    def _prune(self, now: float, rate: float):
+        """Forget clients idle long enough for their bucket to have refilled"""
+        idle = {key for key, bucket in self._buckets.items() if (now - bucket.updated) * rate >= 1}
+        for key in idle or list(self._buckets)[: self.max_keys // 10]:
+            del self._buckets[key]
+
+
+class SQLiteRateLimitBackend:
+    """Buckets in a SQLite file shared by every worker on the host"""
+
+    # take() may wait for another worker's lock, so it runs in a thread
+    blocking = True
+
+    def __init__(self, path: str, busy_timeout: float = 1.0, prune_interval: float = 60.0):
+        """
+        Initialize SQLite backend
+
+        Args:
+            path: Database file, shared by every worker process
+            busy_timeout: Seconds to wait for another worker's lock
+            prune_interval: Seconds between sweeps of refilled buckets
+        """
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.prune_interval = prune_interval
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._pruned_at = time.time()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database on first use"""
+        if self._conn is None:
+            conn = sqlite3.connect(
+                self.path,
+                timeout=self.busy_timeout,
+                isolation_level=None,
+                check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit ("
+                "key TEXT PRIMARY KEY, "
+                "tokens REAL NOT NULL, "
+                "updated REAL NOT NULL, "
+                "full_at REAL NOT NULL DEFAULT 0"
+                ") WITHOUT ROWID"
+            )
+            try:
+                # Files created before buckets were pruned
+                conn.execute("ALTER TABLE rate_limit ADD COLUMN full_at REAL NOT NULL DEFAULT 0")
+            except sqlite3.OperationalError:
+                pass
+            self._conn = conn
+        return self._conn
+
+    def take(self, key: str, capacity: float, rate: float) -> float:
+        # Wall-clock time: monotonic clocks are not comparable across processes
+        now = time.time()
+        # API keys are not stored in the clear
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT tokens, updated FROM rate_limit WHERE key = ?", (digest,)
+                ).fetchone()
+                bucket = TokenBucket(capacity, now)
+                if row is not None:
+                    bucket.tokens, bucket.updated = row[0], min(row[1], now)
+                wait = bucket.take(capacity, rate, now)
+                conn.execute(
+                    "INSERT OR REPLACE INTO rate_limit (key, tokens, updated, full_at) VALUES (?, ?, ?, ?)",
+                    (digest, bucket.tokens, bucket.updated, now + (capacity - bucket.tokens) / rate)
+                )
+                if now - self._pruned_at >= self.prune_interval:
+                    # A refilled bucket is the same as a missing one
+                    conn.execute("DELETE FROM rate_limit WHERE full_at <= ?", (now,))
+                    self._pruned_at = now
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return wait
+
+
+def create_rate_limit_backend(backend: str, path: Optional[str] = None):
+    """
+    Create a bucket backend by name
+
+    Args:
+        backend: "memory" or "sqlite"
+        path: Database file for sqlite
+
+    Returns:
+        Backend instance
+
+    Raises:
+        ValueError: If the backend name is unknown or a path is missing
+    """
+    if backend == "memory":
+        return MemoryRateLimitBackend()
+    if backend == "sqlite":
+        if not path:
+            raise ValueError("The sqlite rate limit backend requires a path")
+        return SQLiteRateLimitBackend(path)
+    raise ValueError(f"Unknown rate limit backend: {backend}")
+
+
+class LoadMonitor:
+    """Background task sampling the load signals used for shedding"""
+
+    def __init__(self, pool_wait_threshold: float, queue_depth_threshold: int, interval: float = 1.0):
+        """
+        Initialize monitor
+
+        Args:
+            pool_wait_threshold: Smoothed DB pool checkout wait, in seconds, that sheds batch traffic
+            queue_depth_threshold: Pending and running ledger operations that shed batch traffic
+            interval: Seconds between samples
+        """
+        self.pool_wait_threshold = pool_wait_threshold
+        self.queue_depth_threshold = queue_depth_threshold
+        self.interval = interval
+        self.pool_wait = 0.0
+        self.queue_depth = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def overload_reason(self) -> Optional[str]:
+        """Why the gateway is overloaded, None if it is not"""
+        if self.pool_wait >= self.pool_wait_threshold:
+            return "db_pool_wait"
+        if self.queue_depth >= self.queue_depth_threshold:
+            return "ledger_queue_depth"
+        return None
+
+    async def sample(self):
+        """Read the current load signals"""
+        from .config import settings
+        from .database import engine
+
+        self.pool_wait = getattr(engine.pool, "wait_ewma", 0.0)
+        if settings.ledger_worker_enabled:
+            self.queue_depth = await asyncio.to_thread(_ledger_queue_depth)
+
+    def start(self):
+        """Start sampling"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop sampling"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.sample()
+            except Exception as e:
+                logger.warning("Load sample failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+
+def _ledger_queue_depth() -> int:
+    """Pending and running ledger operations"""
+    from .database import SessionLocal
+    from .ledger_queue import get_queue_stats
+
+    db = SessionLocal()
+    try:
+        return get_queue_stats(db)["depth"]
+    finally:
+        db.close()
+
+
+class RateLimitMiddleware:
+    """ASGI middleware enforcing per-client limits and shedding batch traffic under load"""
+
+    def __init__(
+        self,
+        app,
+        requests: int = 100,
+        period: float = 60,
+        batch_requests: int = 20,
+        batch_api_keys: Optional[Set[str]] = None,
+        api_key_header: str = "X-API-Key",
+        backend=None,
+        load_monitor: Optional[LoadMonitor] = None,
+        retry_after: int = 5,
+        rate_limit: bool = True,
+        share: float = 1.0
+    ):
+        """
+        Initialize middleware
+
+        Args:
+            app: ASGI application
+            requests: Interactive requests per period and client
+            period: Period in seconds
+            batch_requests: Batch requests per period and client
+            batch_api_keys: API keys whose traffic is batch
+            api_key_header: Header carrying the client's API key
+            backend: Bucket backend, in-memory by default
+            load_monitor: Load signals for shedding; None never sheds
+            retry_after: Retry-After seconds of shed requests
+            rate_limit: Enforce the limits; off leaves only shedding
+            share: Share of the limits this process enforces
+        """
+        self.app = app
+        self.limits: Dict[str, Tuple[float, float]] = {
+            INTERACTIVE: (max(1.0, requests * share), max(1.0, requests * share) / period),
+            BATCH: (max(1.0, batch_requests * share), max(1.0, batch_requests * share) / period)
+        }
+        self.batch_api_keys = batch_api_keys or set()
+        self.api_key_header = api_key_header.lower().encode("latin-1")
+        self.backend = backend if backend is not None else MemoryRateLimitBackend()
+        self.load_monitor = load_monitor
+        self.retry_after = retry_after
+        self.rate_limit = rate_limit
+
+    def _classify(self, scope) -> Tuple[str, str]:
+        """Client key and priority class of a request"""
+        api_key = None
+        priority = INTERACTIVE
+        for name, value in scope.get("headers") or ():
+            if name == self.api_key_header:
+                api_key = value.decode("latin-1")
+            elif name == b"x-priority" and value.lower() == b"batch":
+                priority = BATCH
+        if api_key is not None:
+            if api_key in self.batch_api_keys:
+                priority = BATCH
+            return f"key:{api_key}", priority
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}", priority
+
+    async def _reject(self, send, status: int, detail: str, retry_after: float):
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode())
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith("/api/"):
+            await self.app(scope, receive, send)
+            return
+
+        client, priority = self._classify(scope)
+
+        if priority == BATCH and self.load_monitor is not None:
+            reason = self.load_monitor.overload_reason()
+            if reason is not None:
+                LOAD_SHED.inc(reason)
+                await self._reject(send, 503, "Gateway overloaded, retry later", self.retry_after)
+                return
+
+        if self.rate_limit:
+            capacity, rate = self.limits[priority]
+            if self.backend.blocking:
+                wait = await asyncio.to_thread(self.backend.take, f"{priority}:{client}", capacity, rate)
+            else:
+                wait = self.backend.take(f"{priority}:{client}", capacity, rate)
+            if wait > 0:
+                RATE_LIMITED.inc(priority)
+                await self._reject(send, 429, "Rate limit exceeded", wait)
+                return
+
+        await self.app(scope, receive, send)
+
+
+# Global load monitor instance
+_load_monitor: Optional[LoadMonitor] = None
+
+
+def get_load_monitor() -> LoadMonitor:
+    """Shared load monitor, created on first use and started with the app"""
+    global _load_monitor
+
+    if _load_monitor is None:
+        from .config import settings
+
+        _load_monitor = LoadMonitor(
+            settings.load_shed_pool_wait,
+            settings.load_shed_queue_depth,
+            settings.load_shed_check_interval
+        )
+    return _load_monitor
+
+
+async def stop_load_monitor():
+    """Stop sampling load signals"""
+    if _load_monitor is not None:
+        await _load_monitor.stop()
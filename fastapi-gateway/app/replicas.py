@@ -0,0 +1,347 @@
+"""
+Read-replica routing with read-your-writes consistency tokens
+
+Endpoints that only read take their session from ``get_read_db``, which
+hands out a session on a streaming replica when one is configured and
+caught up, and on the primary otherwise. Writes keep using ``get_db``.
+
+A request that commits on the primary gets an ``X-Consistency-Token``
+response header holding the primary's WAL position after the commit and
+a short expiry. A client that sends the token back on its next reads is
+routed to a replica only once that replica has replayed past the
+position, and to the primary before that, so it always sees its own
+writes, however far behind the replicas fall. Replicas whose replay lag
+exceeds the configured maximum are skipped for all reads.
+
+Replica replay positions are refreshed by a background thread, so
+routing a read costs no extra round trip. Without PostgreSQL (no WAL
+positions) a token simply pins reads to the primary until it expires;
+the expiry only applies to such tokens.
+"""
+
+import itertools
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Generator, List, Optional, Tuple
+
+from fastapi import Header
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session, sessionmaker
+
+from .config import settings
+from .database import InstrumentedQueuePool, SessionLocal, engine, pool_sizing
+from .metrics import counter, gauge
+
+logger = logging.getLogger(__name__)
+
+CONSISTENCY_HEADER = "X-Consistency-Token"
+
+DB_READS = counter(
+    "vendorchain_db_reads_total",
+    "Read-only sessions by the server they were routed to",
+    ("target",)
+)
+DB_REPLICA_LAG = gauge(
+    "vendorchain_db_replica_lag_seconds",
+    "Replay lag of each read replica, as of its last check",
+    ("replica",)
+)
+
+# Per-request holder for the token issued after a commit, set by ConsistencyMiddleware
+_issued_token: ContextVar[Optional[Dict[str, Optional[str]]]] = ContextVar(
+    "vendorchain_consistency_token", default=None
+)
+
+
+def parse_lsn(value: Optional[str]) -> Optional[int]:
+    """
+    Parse a PostgreSQL WAL position
+
+    Args:
+        value: Position as ``hi/lo`` hex, e.g. ``16/B374D848``
+
+    Returns:
+        Position as an integer, None if missing or malformed
+    """
+    if not value:
+        return None
+    high, _, low = value.partition("/")
+    try:
+        return (int(high, 16) << 32) | int(low, 16)
+    except ValueError:
+        return None
+
+
+def encode_token(lsn: Optional[int], expires_at: float) -> str:
+    """Consistency token for a commit at ``lsn``, valid until ``expires_at``"""
+    return f"{lsn if lsn is not None else ''}@{expires_at:.3f}"
+
+
+def decode_token(token: Optional[str]) -> Tuple[Optional[int], float]:
+    """
+    Decode a consistency token
+
+    A malformed token decodes as expired, so it routes like no token.
+
+    Returns:
+        Tuple of (WAL position or None, expiry as Unix time)
+    """
+    if not token:
+        return None, 0.0
+    lsn, _, expires_at = token.partition("@")
+    try:
+        return (int(lsn) if lsn else None), float(expires_at)
+    except ValueError:
+        return None, 0.0
+
+
+class Replica:
+    """One read replica, its session factory and its last replay state"""
+
+    def __init__(self, url: str):
+        self.engine = create_engine(
+            url,
+            poolclass=InstrumentedQueuePool,
+            pool_size=pool_sizing.pool_size,
+            max_overflow=pool_sizing.max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            echo=settings.debug
+        )
+        self.name = self.engine.url.host or self.engine.url.database or url
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.healthy = False
+        self.replay_lsn: Optional[int] = None
+        self.lag_seconds: Optional[float] = None
+        self.checked_at: Optional[float] = None
+
+    def check(self):
+        """Refresh health, replay position and lag"""
+        try:
+            with self.engine.connect() as connection:
+                if connection.dialect.name == "postgresql":
+                    # The last replayed transaction ages while the primary is idle,
+                    # so a replica that has replayed all it received has no lag
+                    row = connection.execute(text(
+                        "SELECT pg_last_wal_replay_lsn()::text, "
+                        "CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+                    )).one()
+                    self.replay_lsn = parse_lsn(row[0])
+                    self.lag_seconds = float(row[1])
+                else:
+                    connection.execute(text("SELECT 1"))
+                    self.lag_seconds = 0.0
+            self.healthy = True
+            DB_REPLICA_LAG.set(self.lag_seconds, self.name)
+        except Exception as e:
+            if self.healthy:
+                logger.warning("Read replica %s is unavailable: %s", self.name, e)
+            self.healthy = False
+        self.checked_at = time.time()
+
+    def usable(self, lsn: Optional[int], max_lag: float) -> bool:
+        """Whether reads needing WAL position ``lsn`` may use this replica"""
+        if not self.healthy or self.lag_seconds is None or self.lag_seconds > max_lag:
+            return False
+        if lsn is None:
+            return True
+        return self.replay_lsn is not None and self.replay_lsn >= lsn
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag_seconds,
+            "checked_at": self.checked_at
+        }
+
+
+class ReplicaRouter:
+    """Chooses the server for each read-only session"""
+
+    def __init__(
+        self,
+        urls: List[str],
+        check_interval: float = 1.0,
+        max_lag: float = 30.0,
+        consistency_window: float = 5.0
+    ):
+        """
+        Initialize router
+
+        Args:
+            urls: Replica database URLs
+            check_interval: Seconds between replica state refreshes
+            max_lag: Replay lag in seconds above which a replica gets no reads
+            consistency_window: Seconds a consistency token without a WAL
+                position pins reads to the primary
+        """
+        self.replicas = [Replica(url) for url in urls]
+        self.check_interval = check_interval
+        self.max_lag = max_lag
+        self.consistency_window = consistency_window
+        self._next = itertools.cycle(range(len(self.replicas)))
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Check replicas once, then keep checking in the background"""
+        if self._thread is not None:
+            return
+        for replica in self.replicas:
+            replica.check()
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="db-replica-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop checking and close replica pools"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        for replica in self.replicas:
+            replica.engine.dispose()
+
+    def _run(self):
+        while not self._stopped.wait(self.check_interval):
+            for replica in self.replicas:
+                replica.check()
+
+    def choose(self, token: Optional[str] = None) -> Optional[Replica]:
+        """
+        Replica for a read, None to read from the primary
+
+        Args:
+            token: Consistency token sent by the client, if any
+
+        Returns:
+            Usable replica, round-robin, or None
+        """
+        lsn, expires_at = decode_token(token)
+        if lsn is None and expires_at > time.time():
+            # No WAL position to compare against: the primary until the token expires
+            return None
+        # A WAL position never expires: a replica lagging past the window must still be skipped
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[next(self._next)]
+            if replica.usable(lsn, self.max_lag):
+                return replica
+        return None
+
+    def issue_token(self) -> str:
+        """Consistency token for what the primary has committed so far"""
+        lsn = None
+        if engine.dialect.name == "postgresql":
+            with engine.connect() as connection:
+                lsn = parse_lsn(connection.execute(text("SELECT pg_current_wal_lsn()::text")).scalar())
+        return encode_token(lsn, time.time() + self.consistency_window)
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [replica.snapshot() for replica in self.replicas]
+
+
+def _after_commit(session: Session):
+    """Issue a consistency token when a request commits on the primary"""
+    holder = _issued_token.get()
+    if holder is None or _router is None:
+        return
+    try:
+        holder["token"] = _router.issue_token()
+    except Exception as e:
+        logger.warning("Could not issue consistency token: %s", e)
+
+
+event.listen(SessionLocal, "after_commit", _after_commit)
+
+
+class ConsistencyMiddleware:
+    """ASGI middleware returning the consistency token of a request's writes"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _router is None:
+            await self.app(scope, receive, send)
+            return
+
+        holder: Dict[str, Optional[str]] = {"token": None}
+
+        async def send_with_token(message):
+            if message["type"] == "http.response.start" and holder["token"]:
+                message["headers"] = list(message.get("headers", [])) + [
+                    (CONSISTENCY_HEADER.lower().encode("latin-1"), holder["token"].encode("latin-1"))
+                ]
+            await send(message)
+
+        token = _issued_token.set(holder)
+        try:
+            await self.app(scope, receive, send_with_token)
+        finally:
+            _issued_token.reset(token)
+
+
+def get_read_db(
+    x_consistency_token: Optional[str] = Header(None)
+) -> Generator[Session, None, None]:
+    """
+    Dependency to get a session for reads.
+    Uses a caught-up replica when one is available, the primary otherwise.
+    """
+    replica = _router.choose(x_consistency_token) if _router is not None else None
+    if replica is None:
+        DB_READS.inc("primary")
+        db = SessionLocal()
+    else:
+        DB_READS.inc("replica")
+        db = replica.session_factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# Global replica router instance
+_router: Optional[ReplicaRouter] = None
+
+
+def start_replica_router() -> Optional[ReplicaRouter]:
+    """
+    Start routing reads to the configured replicas
+
+    Returns:
+        Running ReplicaRouter, None when no replica is configured
+    """
+    global _router
+
+    urls = [url.strip() for url in settings.database_replica_urls.split(",") if url.strip()]
+    if not urls:
+        return None
+    if _router is None:
+        router = ReplicaRouter(
+            urls,
+            check_interval=settings.db_replica_check_interval,
+            max_lag=settings.db_replica_max_lag,
+            consistency_window=settings.db_consistency_window
+        )
+        router.start()
+        _router = router
+        logger.info("Routing reads to %s replicas", len(urls))
+    return _router
+
+
+def get_replica_router() -> Optional[ReplicaRouter]:
+    """Running replica router, None when reads go to the primary"""
+    return _router
+
+
+def stop_replica_router():
+    """Stop routing reads to replicas"""
+    global _router
+
+    if _router is not None:
+        router, _router = _router, None
+        router.stop()
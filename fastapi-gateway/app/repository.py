@@ -0,0 +1,158 @@
+"""
+Cached statements for the hot-path contract and vendor lookups
+
+Looking a contract up by ``contract_id`` or a vendor by ``vendor_id``
+makes up most of the gateway's traffic. Built through ``db.query()``,
+each lookup constructs the statement, walks it to compute its cache key
+and only then finds the compiled SQL in the engine's cache.
+
+Here every lookup is a ``lambda_stmt``: SQLAlchemy builds and analyzes
+the statement the first time a lambda runs, then keys later calls on the
+lambda's code alone and pulls the lookup value out of its closure as a
+bound parameter. Routers call these functions instead of repeating the
+queries.
+
+Creates are single ``INSERT ... ON CONFLICT DO NOTHING RETURNING``
+statements: the unique constraint detects duplicates, so concurrent
+creates of one ID cannot both pass a pre-check, and the returned row
+needs no refresh.
+"""
+
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import lambda_stmt, literal, literal_column, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session, aliased
+
+from .etags import version_columns
+from .models import Contract, Vendor
+
+# Dialects with INSERT ... ON CONFLICT DO NOTHING
+CONFLICT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def find_contract(db: Session, contract_id: str) -> Optional[Contract]:
+    """
+    Contract with the given business ID
+
+    Args:
+        db: Database session
+        contract_id: Contract identifier
+
+    Returns:
+        Contract, None if there is none
+    """
+    stmt = lambda_stmt(lambda: select(Contract).where(Contract.contract_id == contract_id).limit(1))
+    return db.scalars(stmt).first()
+
+
+def find_vendor(db: Session, vendor_id: str) -> Optional[Vendor]:
+    """
+    Vendor with the given business ID
+
+    Args:
+        db: Database session
+        vendor_id: Vendor identifier
+
+    Returns:
+        Vendor, None if there is none
+    """
+    stmt = lambda_stmt(lambda: select(Vendor).where(Vendor.vendor_id == vendor_id).limit(1))
+    return db.scalars(stmt).first()
+
+
+def find_contract_versions(db: Session, contract_id: str) -> Optional[Row]:
+    """Version columns of a contract and its vendor, for If-None-Match checks"""
+    versions = version_columns(db, Contract, Vendor)
+    stmt = lambda_stmt(
+        lambda: select(*versions).select_from(Contract).join(Vendor)
+        .where(Contract.contract_id == contract_id).limit(1)
+    )
+    return db.execute(stmt).first()
+
+
+def find_contract_with_versions(db: Session, contract_id: str) -> Optional[Row]:
+    """Contract followed by the version columns of it and its vendor"""
+    versions = version_columns(db, Contract, Vendor)
+    stmt = lambda_stmt(
+        lambda: select(Contract, *versions).join(Vendor)
+        .where(Contract.contract_id == contract_id).limit(1)
+    )
+    return db.execute(stmt).first()
+
+
+def find_vendor_versions(db: Session, vendor_id: str) -> Optional[Row]:
+    """Version columns of a vendor, for If-None-Match checks"""
+    versions = version_columns(db, Vendor)
+    stmt = lambda_stmt(lambda: select(*versions).where(Vendor.vendor_id == vendor_id).limit(1))
+    return db.execute(stmt).first()
+
+
+def find_vendor_with_versions(db: Session, vendor_id: str) -> Optional[Row]:
+    """Vendor followed by its version columns"""
+    versions = version_columns(db, Vendor)
+    stmt = lambda_stmt(lambda: select(Vendor, *versions).where(Vendor.vendor_id == vendor_id).limit(1))
+    return db.execute(stmt).first()
+
+
+def _conflict_insert(db: Session, model):
+    dialect = db.get_bind().dialect.name
+    if dialect not in CONFLICT_INSERTS:
+        raise NotImplementedError(f"INSERT ... ON CONFLICT is not supported on {dialect}")
+    return CONFLICT_INSERTS[dialect](model)
+
+
+def insert_vendor(db: Session, values: Dict[str, Any]) -> Optional[Vendor]:
+    """
+    Insert a vendor unless its vendor_id is taken, in one statement
+
+    Args:
+        db: Database session
+        values: Vendor column values
+
+    Returns:
+        New vendor with server defaults loaded, None if the vendor_id exists
+    """
+    stmt = (
+        _conflict_insert(db, Vendor)
+        .values(**values)
+        .on_conflict_do_nothing(index_elements=[Vendor.vendor_id])
+        .returning(Vendor)
+    )
+    return db.scalars(stmt).first()
+
+
+def insert_contract(db: Session, vendor_id: str, values: Dict[str, Any]) -> Optional[Tuple[Contract, str]]:
+    """
+    Insert a contract for a vendor unless its contract_id is taken, in one statement
+
+    The vendor's internal ID is selected by the INSERT itself and its name
+    comes back with the new row.
+
+    Args:
+        db: Database session
+        vendor_id: Business ID of the contract's vendor
+        values: Contract column values other than vendor_id
+
+    Returns:
+        New contract and vendor name, None if the vendor does not exist or
+        the contract_id is taken
+    """
+    columns = Contract.__table__.c
+    source = select(
+        Vendor.id,
+        *(literal(value, columns[name].type) for name, value in values.items())
+    ).where(Vendor.vendor_id == vendor_id)
+    owner = aliased(Vendor, name="owner")
+    vendor_name = select(owner.name).where(
+        owner.id == literal_column(f"{Contract.__tablename__}.vendor_id")
+    ).scalar_subquery()
+    stmt = (
+        _conflict_insert(db, Contract)
+        .from_select(["vendor_id", *values], source)
+        .on_conflict_do_nothing(index_elements=[Contract.contract_id])
+        .returning(Contract, vendor_name)
+    )
+    row = db.execute(stmt).first()
+    return (row[0], row[1]) if row is not None else None
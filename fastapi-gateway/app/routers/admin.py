@@ -0,0 +1,86 @@
+"""
+Operator diagnostics API endpoints
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from typing import Any, Dict, List
+import logging
+
+from ..security import require_admin
+from ..slow_queries import get_slow_query_log
+from ..profiling import profile_store
+from ..loop_monitor import get_loop_monitor
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/api/v1/admin",
+    tags=["admin"],
+    dependencies=[Depends(require_admin)]
+)
+
+
+@router.get("/slow-queries")
+async def list_slow_queries(
+    limit: int = Query(20, ge=1, le=500),
+    order_by: str = Query("total_ms", pattern="^(total_ms|max_ms|mean_ms|slow_calls)$")
+) -> Dict[str, Any]:
+    """
+    Slowest statement fingerprints by cumulative time
+    """
+    slow_query_log = get_slow_query_log()
+    if slow_query_log is None:
+        raise HTTPException(status_code=404, detail="Slow query log is not enabled")
+    
+    return {
+        "threshold_ms": slow_query_log.threshold_ms,
+        "explain_supported": slow_query_log.explain_supported,
+        "fingerprints": slow_query_log.top(limit, order_by)
+    }
+
+
+@router.delete("/slow-queries", status_code=204)
+async def reset_slow_queries():
+    """
+    Forget recorded slow statements
+    """
+    slow_query_log = get_slow_query_log()
+    if slow_query_log is None:
+        raise HTTPException(status_code=404, detail="Slow query log is not enabled")
+    slow_query_log.reset()
+
+
+@router.get("/profiles")
+async def list_profiles() -> List[Dict[str, Any]]:
+    """
+    Recent request profiles, newest first
+    """
+    return [profile.summary() for profile in profile_store.recent()]
+
+
+@router.get("/profiles/{request_id}", response_class=PlainTextResponse)
+async def get_profile(request_id: str) -> str:
+    """
+    Collapsed stacks of one profiled request, for flamegraph.pl or speedscope
+    """
+    profile = profile_store.get(request_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"No profile for request {request_id}")
+    return profile.folded()
+
+
+@router.get("/loop-stalls")
+async def list_loop_stalls() -> Dict[str, Any]:
+    """
+    Recent event loop stalls with the stack that blocked the loop
+    """
+    loop_monitor = get_loop_monitor()
+    if loop_monitor is None:
+        raise HTTPException(status_code=404, detail="Event loop monitor is not enabled")
+    
+    return {
+        "threshold_seconds": loop_monitor.threshold,
+        "max_lag_seconds": round(loop_monitor.max_lag, 4),
+        "stalls": loop_monitor.stalls()
+    }
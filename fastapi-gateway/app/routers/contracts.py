@@ -2,19 +2,28 @@
 Contract management API endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Header, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import logging
 from datetime import datetime
 
 from ..database import get_db
+from ..replicas import get_read_db
+from ..etags import version_columns, compute_etag, etag_matches, not_modified
 from ..models import Contract, Vendor, WorkflowLog, ContractStatus
+from ..repository import (
+    find_contract, find_contract_versions, find_contract_with_versions, find_vendor, insert_contract
+)
 from ..schemas import (
     ContractCreate, ContractUpdate, ContractResponse,
-    PaymentRecord, WorkflowLogResponse
+    PaymentRecord, WorkflowLogResponse, ContractProofResponse
+)
+from ..ledger_queue import (
+    wants_async, enqueue_ledger_operation, sync_ledger_operation,
+    accepted_response, notify_ledger_worker
 )
-from ..fabric_client import get_fabric_client
+from ..anchoring import anchoring_enabled, record_contract_change, get_contract_proof
 
 logger = logging.getLogger(__name__)
 
@@ -27,48 +36,42 @@ router = APIRouter(
 @router.post("/", response_model=ContractResponse)
 async def create_contract(
     contract: ContractCreate,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    prefer: Optional[str] = Header(None)
 ) -> ContractResponse:
     """
     Create a new contract
+    Send "Prefer: respond-async" to defer the ledger write and get 202 Accepted
     """
     try:
-        # Verify vendor exists
-        vendor = db.query(Vendor).filter(
-            Vendor.vendor_id == contract.vendor_id
-        ).first()
-        
-        if not vendor:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Vendor {contract.vendor_id} not found"
-            )
-        
-        # Check if contract ID already exists
-        existing_contract = db.query(Contract).filter(
-            Contract.contract_id == contract.contract_id
-        ).first()
-        
-        if existing_contract:
+        # Insert with the internal vendor ID resolved by the same statement,
+        # unless the contract ID exists; the unique constraint decides
+        inserted = insert_contract(db, contract.vendor_id, {
+            "contract_id": contract.contract_id,
+            "contract_type": contract.contract_type,
+            "description": contract.description,
+            "total_value": contract.total_value,
+            # remaining_amount is a generated column, don't set it
+            "expiry_date": contract.expiry_date,
+            "created_by": contract.created_by,
+            "document_hash": contract.document_hash,
+            "status": ContractStatus.CREATED,
+            "payment_history": []
+        })
+        
+        if inserted is None:
+            # Nothing inserted: either the vendor is missing or the contract exists
+            if find_vendor(db, contract.vendor_id) is None:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Vendor {contract.vendor_id} not found"
+                )
             raise HTTPException(
                 status_code=400,
                 detail=f"Contract {contract.contract_id} already exists"
             )
         
-        # Create contract in database
-        db_contract = Contract(
-            contract_id=contract.contract_id,
-            vendor_id=vendor.id,  # Use internal vendor ID
-            contract_type=contract.contract_type,
-            description=contract.description,
-            total_value=contract.total_value,
-            # remaining_amount is a generated column, don't set it
-            expiry_date=contract.expiry_date,
-            created_by=contract.created_by,
-            document_hash=contract.document_hash,
-            status=ContractStatus.CREATED,
-            payment_history=[]
-        )
+        db_contract, vendor_name = inserted
         
         # Create initial workflow log
         workflow_log = WorkflowLog(
@@ -76,41 +79,51 @@ async def create_contract(
             action="CREATE",
             to_status=ContractStatus.CREATED,
             performed_by=contract.created_by,
-            notes=f"Contract created for vendor {vendor.name}"
+            notes=f"Contract created for vendor {vendor_name}"
         )
         
-        db.add(db_contract)
         db.add(workflow_log)
         
-        # Sync with blockchain
-        try:
-            fabric_client = await get_fabric_client()
-            tx_id = await fabric_client.create_contract(
-                contract_id=contract.contract_id,
-                vendor_id=contract.vendor_id,
-                contract_data={
-                    "type": contract.contract_type.value,
-                    "value": contract.total_value,
-                    "expiry": contract.expiry_date.isoformat()
-                },
-                created_by=contract.created_by
+        ledger_kwargs = {
+            "contract_id": contract.contract_id,
+            "vendor_id": contract.vendor_id,
+            "contract_data": {
+                "type": contract.contract_type.value,
+                "value": contract.total_value,
+                "expiry": contract.expiry_date.isoformat()
+            },
+            "created_by": contract.created_by
+        }
+        
+        if wants_async(prefer):
+            # Defer blockchain sync to the ledger operation worker
+            ledger_operation = enqueue_ledger_operation(
+                db, "create_contract", ledger_kwargs,
+                contract=db_contract, workflow_log=workflow_log
             )
+            db.commit()
+            notify_ledger_worker()
             
-            if tx_id:
-                db_contract.blockchain_tx_id = tx_id
-                workflow_log.blockchain_tx_id = tx_id
-        except Exception as e:
-            logger.warning(f"Failed to sync contract to blockchain: {str(e)}")
+            logger.info("Created contract: %s (ledger write deferred)", contract.contract_id)
+            return accepted_response(ledger_operation)
         
-        db.commit()
-        db.refresh(db_contract)
+        # Sync with blockchain, queueing a retry if the ledger call fails
+        tx_id = await sync_ledger_operation(
+            db, "create_contract", ledger_kwargs,
+            contract=db_contract, workflow_log=workflow_log
+        )
+        
+        if tx_id:
+            db_contract.blockchain_tx_id = tx_id
+            workflow_log.blockchain_tx_id = tx_id
         
-        # Prepare response with vendor name
+        # Prepare response with vendor name; the inserted row is complete,
+        # so it is built before commit expires it instead of refreshing after
         response = ContractResponse(
             id=db_contract.id,
             contract_id=db_contract.contract_id,
             vendor_id=db_contract.vendor_id,
-            vendor_name=vendor.name,
+            vendor_name=vendor_name,
             contract_type=db_contract.contract_type,
             status=db_contract.status,
             description=db_contract.description,
@@ -130,27 +143,32 @@ async def create_contract(
             updated_at=db_contract.updated_at
         )
         
-        logger.info(f"Created contract: {contract.contract_id}")
+        db.commit()
+        
+        logger.info("Created contract: %s", contract.contract_id)
         return response
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to create contract: {str(e)}")
+        logger.error("Failed to create contract: %s", e)
         db.rollback()
         raise HTTPException(status_code=500, detail="Failed to create contract")
 
 
 @router.get("/", response_model=List[ContractResponse])
 async def list_contracts(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     status: Optional[ContractStatus] = None,
     vendor_id: Optional[str] = None,
-    db: Session = Depends(get_db)
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db)
 ) -> List[ContractResponse]:
     """
     List all contracts with optional filtering
+    Answers 304 when the If-None-Match ETag still matches the page
     """
     try:
         query = db.query(Contract).join(Vendor)
@@ -161,11 +179,21 @@ async def list_contracts(
         if vendor_id:
             query = query.filter(Vendor.vendor_id == vendor_id)
         
-        contracts = query.offset(skip).limit(limit).all()
+        # Stable order, so a page and its ETag cover the same rows
+        query = query.order_by(Contract.id)
+        versions = version_columns(db, Contract, Vendor)
+        
+        if if_none_match:
+            etag = compute_etag(query.with_entities(*versions).offset(skip).limit(limit).all())
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag, if_none_match)
+        
+        rows = query.add_columns(*versions).offset(skip).limit(limit).all()
+        response.headers["ETag"] = compute_etag(row[1:] for row in rows)
         
         # Prepare responses with vendor names
         responses = []
-        for contract in contracts:
+        for contract, *_ in rows:
             responses.append(ContractResponse(
                 id=contract.id,
                 contract_id=contract.contract_id,
@@ -193,29 +221,40 @@ async def list_contracts(
         return responses
         
     except Exception as e:
-        logger.error(f"Failed to list contracts: {str(e)}")
+        logger.error("Failed to list contracts: %s", e)
         raise HTTPException(status_code=500, detail="Failed to retrieve contracts")
 
 
 @router.get("/{contract_id}", response_model=ContractResponse)
 async def get_contract(
     contract_id: str,
-    db: Session = Depends(get_db)
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db)
 ) -> ContractResponse:
     """
     Get contract by ID
+    Answers 304 when the If-None-Match ETag still matches the contract
     """
     try:
-        contract = db.query(Contract).join(Vendor).filter(
-            Contract.contract_id == contract_id
-        ).first()
+        if if_none_match:
+            version = find_contract_versions(db, contract_id)
+            if version is not None:
+                etag = compute_etag([version])
+                if etag_matches(if_none_match, etag):
+                    return not_modified(etag, if_none_match)
         
-        if not contract:
+        row = find_contract_with_versions(db, contract_id)
+        
+        if not row:
             raise HTTPException(
                 status_code=404,
                 detail=f"Contract {contract_id} not found"
             )
         
+        contract = row[0]
+        response.headers["ETag"] = compute_etag([row[1:]])
+        
         response = ContractResponse(
             id=contract.id,
             contract_id=contract.contract_id,
@@ -245,7 +284,7 @@ async def get_contract(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to get contract {contract_id}: {str(e)}")
+        logger.error("Failed to get contract %s: %s", contract_id, e)
         raise HTTPException(status_code=500, detail="Failed to retrieve contract")
 
 
@@ -259,9 +298,7 @@ async def update_contract(
     Update contract information (limited fields)
     """
     try:
-        contract = db.query(Contract).filter(
-            Contract.contract_id == contract_id
-        ).first()
+        contract = find_contract(db, contract_id)
         
         if not contract:
             raise HTTPException(
@@ -278,6 +315,8 @@ async def update_contract(
                 # remaining_amount is a generated column, it will update automatically when total_value changes
         
         contract.updated_at = datetime.utcnow()
+        if anchoring_enabled():
+            record_contract_change(db, contract, "UPDATE")
         db.commit()
         db.refresh(contract)
         
@@ -306,13 +345,13 @@ async def update_contract(
             updated_at=contract.updated_at
         )
         
-        logger.info(f"Updated contract: {contract_id}")
+        logger.info("Updated contract: %s", contract_id)
         return response
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to update contract {contract_id}: {str(e)}")
+        logger.error("Failed to update contract %s: %s", contract_id, e)
         db.rollback()
         raise HTTPException(status_code=500, detail="Failed to update contract")
 
@@ -326,9 +365,7 @@ async def delete_contract(
     Delete a contract (only if in CREATED status)
     """
     try:
-        contract = db.query(Contract).filter(
-            Contract.contract_id == contract_id
-        ).first()
+        contract = find_contract(db, contract_id)
         
         if not contract:
             raise HTTPException(
@@ -346,7 +383,7 @@ async def delete_contract(
         db.delete(contract)
         db.commit()
         
-        logger.info(f"Deleted contract: {contract_id}")
+        logger.info("Deleted contract: %s", contract_id)
         return {
             "message": f"Contract {contract_id} deleted successfully"
         }
@@ -354,7 +391,7 @@ async def delete_contract(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to delete contract {contract_id}: {str(e)}")
+        logger.error("Failed to delete contract %s: %s", contract_id, e)
         db.rollback()
         raise HTTPException(status_code=500, detail="Failed to delete contract")
 
@@ -363,15 +400,15 @@ async def delete_contract(
 async def record_payment(
     contract_id: str,
     payment: PaymentRecord,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    prefer: Optional[str] = Header(None)
 ) -> dict:
     """
     Record a payment for a contract
+    Send "Prefer: respond-async" to defer the ledger write and get 202 Accepted
     """
     try:
-        contract = db.query(Contract).filter(
-            Contract.contract_id == contract_id
-        ).first()
+        contract = find_contract(db, contract_id)
         
         if not contract:
             raise HTTPException(
@@ -396,23 +433,36 @@ async def record_payment(
         }
         contract.payment_history.append(payment_entry)
         
-        # Sync with blockchain
-        try:
-            fabric_client = await get_fabric_client()
-            tx_id = await fabric_client.record_payment(
-                contract_id=contract_id,
-                payment_data=payment_entry
+        ledger_kwargs = {
+            "contract_id": contract_id,
+            "payment_data": dict(payment_entry),
+            "vendor_id": contract.vendor.vendor_id
+        }
+        
+        if wants_async(prefer):
+            # Defer blockchain sync to the ledger operation worker
+            ledger_operation = enqueue_ledger_operation(
+                db, "record_payment", ledger_kwargs, contract=contract
             )
+            contract.updated_at = datetime.utcnow()
+            db.commit()
+            notify_ledger_worker()
             
-            if tx_id:
-                payment_entry["blockchain_tx_id"] = tx_id
-        except Exception as e:
-            logger.warning(f"Failed to sync payment to blockchain: {str(e)}")
+            logger.info("Recorded payment for contract: %s (ledger write deferred)", contract_id)
+            return accepted_response(ledger_operation)
+        
+        # Sync with blockchain, queueing a retry if the ledger call fails
+        tx_id = await sync_ledger_operation(
+            db, "record_payment", ledger_kwargs, contract=contract
+        )
+        
+        if tx_id:
+            payment_entry["blockchain_tx_id"] = tx_id
         
         contract.updated_at = datetime.utcnow()
         db.commit()
         
-        logger.info(f"Recorded payment for contract: {contract_id}")
+        logger.info("Recorded payment for contract: %s", contract_id)
         return {
             "message": "Payment recorded successfully",
             "paid_amount": contract.paid_amount,
@@ -423,7 +473,7 @@ async def record_payment(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to record payment for contract {contract_id}: {str(e)}")
+        logger.error("Failed to record payment for contract %s: %s", contract_id, e)
         db.rollback()
         raise HTTPException(status_code=500, detail="Failed to record payment")
 
@@ -431,15 +481,13 @@ async def record_payment(
 @router.get("/{contract_id}/workflow-logs", response_model=List[WorkflowLogResponse])
 async def get_workflow_logs(
     contract_id: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ) -> List[WorkflowLogResponse]:
     """
     Get workflow logs for a contract
     """
     try:
-        contract = db.query(Contract).filter(
-            Contract.contract_id == contract_id
-        ).first()
+        contract = find_contract(db, contract_id)
         
         if not contract:
             raise HTTPException(
@@ -456,5 +504,43 @@ async def get_workflow_logs(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to get workflow logs for contract {contract_id}: {str(e)}")
-        raise HTTPException(status_code=500, detail="Failed to retrieve workflow logs")
\ No newline at end of file
+        logger.error("Failed to get workflow logs for contract %s: %s", contract_id, e)
+        raise HTTPException(status_code=500, detail="Failed to retrieve workflow logs")
+
+
+@router.get("/{contract_id}/proof", response_model=ContractProofResponse)
+async def get_contract_proof_endpoint(
+    contract_id: str,
+    db: Session = Depends(get_read_db)
+) -> ContractProofResponse:
+    """
+    Get the Merkle inclusion proof for a contract's latest anchored change
+    
+    The proof can be checked locally against the root committed on the
+    ledger. matches_current_state is False if the stored contract no
+    longer hashes to the anchored leaf; pending_changes counts newer
+    changes that are not anchored yet.
+    """
+    try:
+        contract = find_contract(db, contract_id)
+        
+        if not contract:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Contract {contract_id} not found"
+            )
+        
+        proof = get_contract_proof(db, contract)
+        if proof is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No anchored changes for contract {contract_id}"
+            )
+        
+        return proof
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Failed to get proof for contract %s: %s", contract_id, e)
+        raise HTTPException(status_code=500, detail="Failed to retrieve contract proof")
@@ -2,17 +2,13 @@
 Health check and readiness API endpoints
 """
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import text
-from typing import Dict, Any
+from fastapi import APIRouter, Response
 from datetime import datetime
 import logging
 
-from ..database import get_db, check_database_connection
-from ..fabric_client import get_fabric_client
+from ..health_prober import get_health_prober, UNHEALTHY
+from ..circuit_breaker import CircuitState
 from ..schemas import HealthStatus, ReadinessCheck
-from ..config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -23,22 +19,36 @@ router = APIRouter(
 
 
 @router.get("/", response_model=HealthStatus)
-async def health_check() -> HealthStatus:
+async def health_check(response: Response) -> HealthStatus:
     """
-    Basic health check endpoint
+    Aggregate health of the gateway and its dependencies
+    Served from the background prober's cached state
     """
+    state = await get_health_prober().current()
+    if state["status"] == UNHEALTHY:
+        response.status_code = 503
     return HealthStatus(
-        status="healthy",
+        status=state["status"],
         service="vendorchain-api-gateway",
-        timestamp=datetime.utcnow()
+        timestamp=state["checked_at"],
+        database="connected" if state["database"]["ok"] else "disconnected",
+        blockchain="connected" if state["blockchain"]["ok"] else "disconnected"
     )
 
 
 @router.get("/live", response_model=HealthStatus)
-async def liveness_probe() -> HealthStatus:
+async def liveness_probe(response: Response) -> HealthStatus:
     """
     Kubernetes liveness probe endpoint
+    Fails only when the event loop has stopped refreshing the health state
     """
+    if get_health_prober().stale():
+        response.status_code = 503
+        return HealthStatus(
+            status="stalled",
+            service="vendorchain-api-gateway",
+            timestamp=datetime.utcnow()
+        )
     return HealthStatus(
         status="alive",
         service="vendorchain-api-gateway",
@@ -47,106 +57,79 @@ async def liveness_probe() -> HealthStatus:
 
 
 @router.get("/ready", response_model=ReadinessCheck)
-async def readiness_probe(db: Session = Depends(get_db)) -> ReadinessCheck:
+async def readiness_probe(response: Response) -> ReadinessCheck:
     """
     Kubernetes readiness probe endpoint
-    Checks database and blockchain connectivity
+    Database and blockchain connectivity from the cached probe
     """
-    checks = {
-        "database": False,
-        "blockchain": False
-    }
-    
-    # Check database
-    try:
-        db.execute(text("SELECT 1"))
-        checks["database"] = True
-    except Exception as e:
-        logger.error(f"Database readiness check failed: {str(e)}")
-    
-    # Check blockchain
-    try:
-        fabric_client = await get_fabric_client()
-        if await fabric_client.check_connection():
-            checks["blockchain"] = True
-    except Exception as e:
-        logger.error(f"Blockchain readiness check failed: {str(e)}")
-    
-    # Service is ready if all checks pass
-    ready = all(checks.values())
-    
+    state = await get_health_prober().current()
+    if not state["ready"]:
+        response.status_code = 503
     return ReadinessCheck(
-        ready=ready,
-        checks=checks,
-        timestamp=datetime.utcnow()
+        ready=state["ready"],
+        checks={
+            "database": state["database"]["ok"],
+            "blockchain": state["blockchain"]["ok"]
+        },
+        timestamp=state["checked_at"]
     )
 
 
 @router.get("/database", response_model=HealthStatus)
-async def database_health(db: Session = Depends(get_db)) -> HealthStatus:
+async def database_health() -> HealthStatus:
     """
     Database connectivity health check
     """
-    try:
-        # Execute a simple query
-        result = db.execute(text("SELECT version()")).fetchone()
-        
-        return HealthStatus(
-            status="healthy",
-            service="database",
-            database="connected",
-            timestamp=datetime.utcnow(),
-            details={
-                "version": result[0] if result else None,
-                "pool_size": settings.db_pool_size
-            }
-        )
-    except Exception as e:
-        logger.error(f"Database health check failed: {str(e)}")
-        return HealthStatus(
-            status="unhealthy",
-            service="database",
-            database="disconnected",
-            timestamp=datetime.utcnow(),
-            details={"error": str(e)}
-        )
+    state = await get_health_prober().current()
+    check = state["database"]
+    return HealthStatus(
+        status="healthy" if check["ok"] else "unhealthy",
+        service="database",
+        database="connected" if check["ok"] else "disconnected",
+        timestamp=state["checked_at"],
+        details=check["details"]
+    )
 
 
 @router.get("/blockchain", response_model=HealthStatus)
 async def blockchain_health() -> HealthStatus:
     """
     Blockchain connectivity health check
+    Includes circuit breaker state for each ledger operation
     """
-    try:
-        fabric_client = await get_fabric_client()
-        connected = await fabric_client.check_connection()
-        
-        if connected:
-            return HealthStatus(
-                status="healthy",
-                service="blockchain",
-                blockchain="connected",
-                timestamp=datetime.utcnow(),
-                details={
-                    "peer": settings.fabric_peer_endpoint,
-                    "channel": settings.fabric_channel_name,
-                    "chaincode": settings.fabric_chaincode_name
-                }
-            )
-        else:
-            return HealthStatus(
-                status="unhealthy",
-                service="blockchain",
-                blockchain="disconnected",
-                timestamp=datetime.utcnow(),
-                details={"error": "Connection check failed"}
-            )
-    except Exception as e:
-        logger.error(f"Blockchain health check failed: {str(e)}")
-        return HealthStatus(
-            status="unhealthy",
-            service="blockchain",
-            blockchain="error",
-            timestamp=datetime.utcnow(),
-            details={"error": str(e)}
-        )
\ No newline at end of file
+    state = await get_health_prober().current()
+    check = state["blockchain"]
+    if not check["ok"]:
+        status = "unhealthy"
+    elif any(
+        breaker["state"] != CircuitState.CLOSED.value
+        for breaker in check["details"]["circuit_breakers"].values()
+    ):
+        status = "degraded"
+    else:
+        status = "healthy"
+    return HealthStatus(
+        status=status,
+        service="blockchain",
+        blockchain="connected" if check["ok"] else "disconnected",
+        timestamp=state["checked_at"],
+        details=check["details"]
+    )
+
+
+@router.get("/ledger-queue", response_model=HealthStatus)
+async def ledger_queue_health() -> HealthStatus:
+    """
+    Ledger operation backlog health check
+    """
+    state = await get_health_prober().current()
+    check = state["ledger_queue"]
+    if check is None:
+        return HealthStatus(status="disabled", service="ledger-queue", timestamp=state["checked_at"])
+    backlog = check["ok"] and check["details"]["depth"] > get_health_prober().backlog_threshold
+    return HealthStatus(
+        status="unhealthy" if not check["ok"] else ("degraded" if backlog else "healthy"),
+        service="ledger-queue",
+        timestamp=state["checked_at"],
+        details=check["details"]
+    )
@@ -0,0 +1,151 @@
+"""
+Ledger operation status API endpoints
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import datetime
+import asyncio
+import logging
+
+from ..database import get_db
+from ..replicas import get_read_db
+from ..models import LedgerOperation, LedgerOperationStatus
+from ..schemas import LedgerOperationResponse, LedgerQueueStats
+from ..ledger_queue import (
+    TERMINAL_STATUSES, wait_for_ledger_operation, get_queue_stats, notify_ledger_worker
+)
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/api/v1/ledger-operations",
+    tags=["ledger-operations"]
+)
+
+
+@router.get("/", response_model=List[LedgerOperationResponse])
+async def list_ledger_operations(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    status: Optional[LedgerOperationStatus] = None,
+    db: Session = Depends(get_read_db)
+) -> List[LedgerOperationResponse]:
+    """
+    List ledger operations, oldest first, with optional status filtering
+    """
+    try:
+        query = db.query(LedgerOperation)
+        
+        if status:
+            query = query.filter(LedgerOperation.status == status)
+        
+        return query.order_by(LedgerOperation.created_at).offset(skip).limit(limit).all()
+        
+    except Exception as e:
+        logger.error("Failed to list ledger operations: %s", e)
+        raise HTTPException(status_code=500, detail="Failed to retrieve ledger operations")
+
+
+@router.get("/stats", response_model=LedgerQueueStats)
+async def ledger_queue_stats(db: Session = Depends(get_db)) -> LedgerQueueStats:
+    """
+    Ledger queue depth and age of the oldest pending operation
+    """
+    try:
+        return LedgerQueueStats(**get_queue_stats(db))
+    except Exception as e:
+        logger.error("Failed to get ledger queue stats: %s", e)
+        raise HTTPException(status_code=500, detail="Failed to retrieve ledger queue stats")
+
+
+@router.get("/{operation_id}", response_model=LedgerOperationResponse)
+async def get_ledger_operation(
+    operation_id: str,
+    wait: float = Query(0, ge=0, le=settings.ledger_operation_max_wait),
+    # Long-polls for commits made moments ago, so always on the primary
+    db: Session = Depends(get_db)
+) -> LedgerOperationResponse:
+    """
+    Get ledger operation status
+    Pass wait=<seconds> to long-poll until the operation completes
+    """
+    try:
+        ledger_operation = db.query(LedgerOperation).filter(
+            LedgerOperation.id == operation_id
+        ).first()
+
+        if not ledger_operation:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Ledger operation {operation_id} not found"
+            )
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait
+        while ledger_operation.status not in TERMINAL_STATUSES:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+
+            # Release the pooled connection while waiting
+            db.rollback()
+            await wait_for_ledger_operation(
+                operation_id,
+                min(remaining, settings.ledger_worker_poll_interval)
+            )
+            db.refresh(ledger_operation)
+
+        return ledger_operation
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Failed to get ledger operation %s: %s", operation_id, e)
+        raise HTTPException(status_code=500, detail="Failed to retrieve ledger operation")
+
+
+@router.post("/{operation_id}/retry", response_model=LedgerOperationResponse)
+async def retry_ledger_operation(
+    operation_id: str,
+    db: Session = Depends(get_db)
+) -> LedgerOperationResponse:
+    """
+    Requeue a dead-lettered ledger operation
+    """
+    try:
+        ledger_operation = db.query(LedgerOperation).filter(
+            LedgerOperation.id == operation_id
+        ).first()
+        
+        if not ledger_operation:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Ledger operation {operation_id} not found"
+            )
+        
+        if ledger_operation.status != LedgerOperationStatus.DEAD_LETTER:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Only dead-lettered operations can be retried. Current status: {ledger_operation.status.value}"
+            )
+        
+        ledger_operation.status = LedgerOperationStatus.PENDING
+        ledger_operation.attempts = 0
+        ledger_operation.next_attempt_at = datetime.utcnow()
+        ledger_operation.completed_at = None
+        db.commit()
+        db.refresh(ledger_operation)
+        notify_ledger_worker()
+        
+        logger.info("Requeued ledger operation: %s", operation_id)
+        return ledger_operation
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Failed to retry ledger operation %s: %s", operation_id, e)
+        db.rollback()
+        raise HTTPException(status_code=500, detail="Failed to retry ledger operation")
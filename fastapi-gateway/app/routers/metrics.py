@@ -0,0 +1,85 @@
+"""
+Prometheus metrics endpoint
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import Response
+import asyncio
+import logging
+
+from ..database import SessionLocal, get_pool_status, reset_peak_saturation
+from ..fabric_client import get_fabric_client
+from ..circuit_breaker import get_circuit_breakers, CircuitState
+from ..ledger_queue import get_queue_stats, get_waiter_count
+from ..metrics import (
+    REGISTRY, CONTENT_TYPE, DB_POOL_CONNECTIONS, DB_POOL_SATURATION, DB_POOL_PEAK_SATURATION,
+    LEDGER_BREAKER_STATE, CACHE_ENTRIES,
+    LEDGER_LANES, LEDGER_OPERATION_WAITERS, LEDGER_QUEUE_OPERATIONS, LEDGER_QUEUE_OLDEST_AGE
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["metrics"])
+
+BREAKER_STATE_VALUES = {
+    CircuitState.CLOSED: 0.0,
+    CircuitState.HALF_OPEN: 0.5,
+    CircuitState.OPEN: 1.0
+}
+
+
+async def collect_process_gauges():
+    """Refresh gauges read from in-process state"""
+    pool = get_pool_status()
+    for state in ("size", "checked_in", "checked_out", "overflow", "capacity"):
+        if state in pool:
+            DB_POOL_CONNECTIONS.set(pool[state], state)
+    if "saturation" in pool:
+        DB_POOL_SATURATION.set(pool["saturation"])
+        DB_POOL_PEAK_SATURATION.set(pool.get("peak_saturation", pool["saturation"]))
+        reset_peak_saturation()
+    
+    for name, breaker in get_circuit_breakers().items():
+        LEDGER_BREAKER_STATE.set(BREAKER_STATE_VALUES[breaker.state], name)
+    
+    LEDGER_OPERATION_WAITERS.set(get_waiter_count())
+    
+    client = await get_fabric_client()
+    # The sidecar client keeps no routing cache of its own
+    if hasattr(client, "cache_status"):
+        for cache, entries in client.cache_status().items():
+            CACHE_ENTRIES.set(entries, cache)
+    for stat, value in client.lane_status().items():
+        LEDGER_LANES.set(value, stat)
+
+
+def collect_queue_gauges():
+    """Refresh ledger queue gauges from the database"""
+    db = SessionLocal()
+    try:
+        stats = get_queue_stats(db)
+    finally:
+        db.close()
+    
+    for status, count in stats.items():
+        if status not in ("depth", "oldest_pending_age_seconds"):
+            LEDGER_QUEUE_OPERATIONS.set(count, status)
+    LEDGER_QUEUE_OLDEST_AGE.set(stats["oldest_pending_age_seconds"] or 0.0)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """
+    Metrics in the Prometheus text exposition format
+    """
+    try:
+        await collect_process_gauges()
+    except Exception as e:
+        logger.error("Failed to collect process metrics: %s", e)
+    try:
+        await asyncio.to_thread(collect_queue_gauges)
+    except Exception as e:
+        logger.error("Failed to collect ledger queue metrics: %s", e)
+    
+    # Passed as a header; media_type would append a second charset
+    return Response(content=REGISTRY.render(), headers={"Content-Type": CONTENT_TYPE})
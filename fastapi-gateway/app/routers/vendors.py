@@ -2,13 +2,16 @@
 Vendor management API endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Header, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import logging
 
 from ..database import get_db
+from ..replicas import get_read_db
+from ..etags import version_columns, compute_etag, etag_matches, not_modified
 from ..models import Vendor, VendorStatus
+from ..repository import find_vendor, find_vendor_versions, find_vendor_with_versions, insert_vendor
 from ..schemas import VendorCreate, VendorUpdate, VendorResponse
 
 logger = logging.getLogger(__name__)
@@ -28,43 +31,42 @@ async def create_vendor(
     Create a new vendor
     """
     try:
-        # Check if vendor ID already exists
-        existing_vendor = db.query(Vendor).filter(
-            Vendor.vendor_id == vendor.vendor_id
-        ).first()
+        # Insert unless the vendor ID exists; the unique constraint decides
+        db_vendor = insert_vendor(db, vendor.dict())
         
-        if existing_vendor:
+        if db_vendor is None:
             raise HTTPException(
                 status_code=400,
                 detail=f"Vendor with ID {vendor.vendor_id} already exists"
             )
         
-        # Create new vendor
-        db_vendor = Vendor(**vendor.dict())
-        db.add(db_vendor)
+        # The returned row is complete, so the response needs no refresh after commit
+        response = VendorResponse.model_validate(db_vendor)
         db.commit()
-        db.refresh(db_vendor)
         
-        logger.info(f"Created vendor: {vendor.vendor_id}")
-        return db_vendor
+        logger.info("Created vendor: %s", vendor.vendor_id)
+        return response
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to create vendor: {str(e)}")
+        logger.error("Failed to create vendor: %s", e)
         db.rollback()
         raise HTTPException(status_code=500, detail="Failed to create vendor")
 
 
 @router.get("/", response_model=List[VendorResponse])
 async def list_vendors(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     status: Optional[VendorStatus] = None,
-    db: Session = Depends(get_db)
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db)
 ) -> List[VendorResponse]:
     """
     List all vendors with optional filtering
+    Answers 304 when the If-None-Match ETag still matches the page
     """
     try:
         query = db.query(Vendor)
@@ -72,39 +74,58 @@ async def list_vendors(
         if status:
             query = query.filter(Vendor.status == status)
         
-        vendors = query.offset(skip).limit(limit).all()
-        return vendors
+        # Stable order, so a page and its ETag cover the same rows
+        query = query.order_by(Vendor.id)
+        versions = version_columns(db, Vendor)
+        
+        if if_none_match:
+            etag = compute_etag(query.with_entities(*versions).offset(skip).limit(limit).all())
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag, if_none_match)
+        
+        rows = query.add_columns(*versions).offset(skip).limit(limit).all()
+        response.headers["ETag"] = compute_etag(row[1:] for row in rows)
+        return [row[0] for row in rows]
         
     except Exception as e:
-        logger.error(f"Failed to list vendors: {str(e)}")
+        logger.error("Failed to list vendors: %s", e)
         raise HTTPException(status_code=500, detail="Failed to retrieve vendors")
 
 
 @router.get("/{vendor_id}", response_model=VendorResponse)
 async def get_vendor(
     vendor_id: str,
-    db: Session = Depends(get_db)
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db)
 ) -> VendorResponse:
     """
     Get vendor by ID
+    Answers 304 when the If-None-Match ETag still matches the vendor
     """
     try:
-        vendor = db.query(Vendor).filter(
-            Vendor.vendor_id == vendor_id
-        ).first()
+        if if_none_match:
+            version = find_vendor_versions(db, vendor_id)
+            if version is not None:
+                etag = compute_etag([version])
+                if etag_matches(if_none_match, etag):
+                    return not_modified(etag, if_none_match)
         
-        if not vendor:
+        row = find_vendor_with_versions(db, vendor_id)
+        
+        if not row:
             raise HTTPException(
                 status_code=404,
                 detail=f"Vendor {vendor_id} not found"
             )
         
-        return vendor
+        response.headers["ETag"] = compute_etag([row[1:]])
+        return row[0]
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to get vendor {vendor_id}: {str(e)}")
+        logger.error("Failed to get vendor %s: %s", vendor_id, e)
         raise HTTPException(status_code=500, detail="Failed to retrieve vendor")
 
 
@@ -118,9 +139,7 @@ async def update_vendor(
     Update vendor information
     """
     try:
-        vendor = db.query(Vendor).filter(
-            Vendor.vendor_id == vendor_id
-        ).first()
+        vendor = find_vendor(db, vendor_id)
         
         if not vendor:
             raise HTTPException(
@@ -136,13 +155,13 @@ async def update_vendor(
         db.commit()
         db.refresh(vendor)
         
-        logger.info(f"Updated vendor: {vendor_id}")
+        logger.info("Updated vendor: %s", vendor_id)
         return vendor
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to update vendor {vendor_id}: {str(e)}")
+        logger.error("Failed to update vendor %s: %s", vendor_id, e)
         db.rollback()
         raise HTTPException(status_code=500, detail="Failed to update vendor")
 
@@ -156,9 +175,7 @@ async def delete_vendor(
     Delete a vendor (soft delete by setting status to INACTIVE)
     """
     try:
-        vendor = db.query(Vendor).filter(
-            Vendor.vendor_id == vendor_id
-        ).first()
+        vendor = find_vendor(db, vendor_id)
         
         if not vendor:
             raise HTTPException(
@@ -172,7 +189,7 @@ async def delete_vendor(
             vendor.status = VendorStatus.INACTIVE
             db.commit()
             
-            logger.info(f"Soft deleted vendor: {vendor_id}")
+            logger.info("Soft deleted vendor: %s", vendor_id)
             return {
                 "message": f"Vendor {vendor_id} deactivated (has existing contracts)",
                 "status": "inactive"
@@ -182,7 +199,7 @@ async def delete_vendor(
             db.delete(vendor)
             db.commit()
             
-            logger.info(f"Deleted vendor: {vendor_id}")
+            logger.info("Deleted vendor: %s", vendor_id)
             return {
                 "message": f"Vendor {vendor_id} deleted successfully",
                 "status": "deleted"
@@ -191,6 +208,6 @@ async def delete_vendor(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to delete vendor {vendor_id}: {str(e)}")
+        logger.error("Failed to delete vendor %s: %s", vendor_id, e)
         db.rollback()
         raise HTTPException(status_code=500, detail="Failed to delete vendor")
\ No newline at end of file
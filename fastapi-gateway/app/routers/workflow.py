@@ -2,18 +2,23 @@
 Contract workflow transition API endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Header
 from sqlalchemy.orm import Session
+from typing import Optional
 import logging
 from datetime import datetime
 
 from ..database import get_db
-from ..models import Contract, WorkflowLog, ContractStatus
+from ..models import WorkflowLog, ContractStatus
+from ..repository import find_contract
 from ..schemas import (
     VerifyContractRequest, SubmitContractRequest,
     ContractResponse, APIResponse
 )
-from ..fabric_client import get_fabric_client
+from ..ledger_queue import (
+    wants_async, enqueue_ledger_operation, sync_ledger_operation,
+    accepted_response, notify_ledger_worker
+)
 
 logger = logging.getLogger(__name__)
 
@@ -27,16 +32,16 @@ router = APIRouter(
 async def verify_contract(
     contract_id: str,
     request: VerifyContractRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    prefer: Optional[str] = Header(None)
 ) -> ContractResponse:
     """
     Verify a contract (transition from CREATED to VERIFIED)
+    Send "Prefer: respond-async" to defer the ledger write and get 202 Accepted
     """
     try:
         # Get contract
-        contract = db.query(Contract).filter(
-            Contract.contract_id == contract_id
-        ).first()
+        contract = find_contract(db, contract_id)
         
         if not contract:
             raise HTTPException(
@@ -67,19 +72,37 @@ async def verify_contract(
             notes=request.notes
         )
         
-        # Sync with blockchain
-        try:
-            fabric_client = await get_fabric_client()
-            tx_id = await fabric_client.verify_contract(
-                contract_id=contract_id,
-                verified_by=request.verified_by,
-                notes=request.notes
+        ledger_kwargs = {
+            "contract_id": contract_id,
+            "verified_by": request.verified_by,
+            "notes": request.notes,
+            "vendor_id": contract.vendor.vendor_id
+        }
+        
+        if wants_async(prefer):
+            # Defer blockchain sync to the ledger operation worker
+            db.add(workflow_log)
+            ledger_operation = enqueue_ledger_operation(
+                db, "verify_contract", ledger_kwargs,
+                contract=contract, workflow_log=workflow_log
             )
+            db.commit()
+            notify_ledger_worker()
             
-            if tx_id:
-                workflow_log.blockchain_tx_id = tx_id
-        except Exception as e:
-            logger.warning(f"Failed to sync verification to blockchain: {str(e)}")
+            logger.info(
+                "Contract %s verified by %s (ledger write deferred)",
+                contract_id, request.verified_by
+            )
+            return accepted_response(ledger_operation)
+        
+        # Sync with blockchain, queueing a retry if the ledger call fails
+        tx_id = await sync_ledger_operation(
+            db, "verify_contract", ledger_kwargs,
+            contract=contract, workflow_log=workflow_log
+        )
+        
+        if tx_id:
+            workflow_log.blockchain_tx_id = tx_id
         
         db.add(workflow_log)
         db.commit()
@@ -110,13 +133,13 @@ async def verify_contract(
             updated_at=contract.updated_at
         )
         
-        logger.info(f"Contract {contract_id} verified by {request.verified_by}")
+        logger.info("Contract %s verified by %s", contract_id, request.verified_by)
         return response
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to verify contract {contract_id}: {str(e)}")
+        logger.error("Failed to verify contract %s: %s", contract_id, e)
         db.rollback()
         raise HTTPException(status_code=500, detail="Failed to verify contract")
 
@@ -125,16 +148,16 @@ async def verify_contract(
 async def submit_contract(
     contract_id: str,
     request: SubmitContractRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    prefer: Optional[str] = Header(None)
 ) -> ContractResponse:
     """
     Submit a contract (transition from VERIFIED to SUBMITTED)
+    Send "Prefer: respond-async" to defer the ledger write and get 202 Accepted
     """
     try:
         # Get contract
-        contract = db.query(Contract).filter(
-            Contract.contract_id == contract_id
-        ).first()
+        contract = find_contract(db, contract_id)
         
         if not contract:
             raise HTTPException(
@@ -165,19 +188,37 @@ async def submit_contract(
             notes=request.notes
         )
         
-        # Sync with blockchain
-        try:
-            fabric_client = await get_fabric_client()
-            tx_id = await fabric_client.submit_contract(
-                contract_id=contract_id,
-                submitted_by=request.submitted_by,
-                notes=request.notes
+        ledger_kwargs = {
+            "contract_id": contract_id,
+            "submitted_by": request.submitted_by,
+            "notes": request.notes,
+            "vendor_id": contract.vendor.vendor_id
+        }
+        
+        if wants_async(prefer):
+            # Defer blockchain sync to the ledger operation worker
+            db.add(workflow_log)
+            ledger_operation = enqueue_ledger_operation(
+                db, "submit_contract", ledger_kwargs,
+                contract=contract, workflow_log=workflow_log
             )
+            db.commit()
+            notify_ledger_worker()
             
-            if tx_id:
-                workflow_log.blockchain_tx_id = tx_id
-        except Exception as e:
-            logger.warning(f"Failed to sync submission to blockchain: {str(e)}")
+            logger.info(
+                "Contract %s submitted by %s (ledger write deferred)",
+                contract_id, request.submitted_by
+            )
+            return accepted_response(ledger_operation)
+        
+        # Sync with blockchain, queueing a retry if the ledger call fails
+        tx_id = await sync_ledger_operation(
+            db, "submit_contract", ledger_kwargs,
+            contract=contract, workflow_log=workflow_log
+        )
+        
+        if tx_id:
+            workflow_log.blockchain_tx_id = tx_id
         
         db.add(workflow_log)
         db.commit()
@@ -208,13 +249,13 @@ async def submit_contract(
             updated_at=contract.updated_at
         )
         
-        logger.info(f"Contract {contract_id} submitted by {request.submitted_by}")
+        logger.info("Contract %s submitted by %s", contract_id, request.submitted_by)
         return response
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to submit contract {contract_id}: {str(e)}")
+        logger.error("Failed to submit contract %s: %s", contract_id, e)
         db.rollback()
         raise HTTPException(status_code=500, detail="Failed to submit contract")
 
@@ -229,9 +270,7 @@ async def expire_contract(
     """
     try:
         # Get contract
-        contract = db.query(Contract).filter(
-            Contract.contract_id == contract_id
-        ).first()
+        contract = find_contract(db, contract_id)
         
         if not contract:
             raise HTTPException(
@@ -273,7 +312,7 @@ async def expire_contract(
         db.add(workflow_log)
         db.commit()
         
-        logger.info(f"Contract {contract_id} marked as expired")
+        logger.info("Contract %s marked as expired", contract_id)
         return APIResponse(
             success=True,
             message="Contract marked as expired",
@@ -287,7 +326,7 @@ async def expire_contract(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to expire contract {contract_id}: {str(e)}")
+        logger.error("Failed to expire contract %s: %s", contract_id, e)
         db.rollback()
         raise HTTPException(status_code=500, detail="Failed to expire contract")
 
@@ -304,9 +343,7 @@ async def terminate_contract(
     """
     try:
         # Get contract
-        contract = db.query(Contract).filter(
-            Contract.contract_id == contract_id
-        ).first()
+        contract = find_contract(db, contract_id)
         
         if not contract:
             raise HTTPException(
@@ -340,7 +377,7 @@ async def terminate_contract(
         db.add(workflow_log)
         db.commit()
         
-        logger.info(f"Contract {contract_id} terminated by {terminated_by}")
+        logger.info("Contract %s terminated by %s", contract_id, terminated_by)
         return APIResponse(
             success=True,
             message="Contract terminated successfully",
@@ -355,6 +392,6 @@ async def terminate_contract(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to terminate contract {contract_id}: {str(e)}")
+        logger.error("Failed to terminate contract %s: %s", contract_id, e)
         db.rollback()
         raise HTTPException(status_code=500, detail="Failed to terminate contract")
\ No newline at end of file
@@ -221,4 +221,59 @@ class WebhookEvent(BaseModel):
     event: str
     contract_id: Optional[str] = None
     data: Dict[str, Any]
-    timestamp: datetime = Field(default_factory=datetime.now)
\ No newline at end of file
+    timestamp: datetime = Field(default_factory=datetime.now)
+
+# Ledger Operation Schemas
+class LedgerOperationStatusEnum(str, Enum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    DEAD_LETTER = "DEAD_LETTER"
+
+
+class LedgerOperationResponse(BaseModel):
+    id: str
+    operation: str
+    status: LedgerOperationStatusEnum
+    contract_id: Optional[int] = None
+    attempts: int = 0
+    next_attempt_at: Optional[datetime] = None
+    blockchain_tx_id: Optional[str] = None
+    error_message: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class LedgerQueueStats(BaseModel):
+    depth: int
+    pending: int
+    running: int
+    dead_letter: int
+    oldest_pending_age_seconds: Optional[float] = None
+    timestamp: datetime = Field(default_factory=datetime.now)
+
+
+# Merkle Anchoring Schemas
+class MerkleProofStep(BaseModel):
+    hash: str
+    position: str  # side of the sibling: "left" or "right"
+
+
+class ContractProofResponse(BaseModel):
+    contract_id: str
+    action: str
+    leaf_hash: str
+    leaf_index: int
+    proof: List[MerkleProofStep]
+    root_hash: str
+    leaf_count: int
+    blockchain_tx_id: Optional[str] = None
+    anchored_at: Optional[datetime] = None
+    verified: bool
+    current_hash: str
+    matches_current_state: bool
+    pending_changes: int = 0
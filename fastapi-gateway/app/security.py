@@ -0,0 +1,31 @@
+"""
+Authorization for operator-only endpoints
+"""
+
+import secrets
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+from .config import settings
+
+
+def admin_token_valid(token: Optional[str]) -> bool:
+    """
+    Check an admin token; admin access is disabled while none is configured
+
+    Args:
+        token: Token sent by the client
+
+    Returns:
+        bool: True if the token matches the configured admin token
+    """
+    if not settings.admin_token or not token:
+        return False
+    return secrets.compare_digest(token.encode(), settings.admin_token.encode())
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Dependency rejecting requests without a valid X-Admin-Token header"""
+    if not admin_token_valid(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
@@ -0,0 +1,366 @@
+"""
+Slow query capture with background EXPLAIN sampling
+
+Hooks SQLAlchemy engine events to time every statement. Statements over
+the threshold are grouped by a normalized fingerprint (literals and bind
+placeholders replaced, IN lists collapsed) with their cumulative time and
+the shape of their bind parameters - names and types, never values.
+
+For PostgreSQL, a sample of slow SELECTs is re-run under
+``EXPLAIN (ANALYZE, BUFFERS)`` on a background thread, inside a
+transaction that is rolled back, so the plan that made a query slow is
+kept next to its fingerprint.
+"""
+
+import hashlib
+import json
+import logging
+import queue
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDERS = re.compile(r"%\(\w+\)s|%s|(?<![:\w]):\w+|\$\d+|\?")
+_NUMBERS = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_IN_LISTS = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.I)
+_VALUES_LISTS = re.compile(r"\bVALUES\s*\([^()]*\)(?:\s*,\s*\([^()]*\))*", re.I)
+_WHITESPACE = re.compile(r"\s+")
+
+# Statements that are safe to re-run under EXPLAIN ANALYZE
+_READ_ONLY = re.compile(r"^\s*(SELECT|WITH)\b", re.I)
+_DATA_MODIFYING = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE)\b|\bFOR\s+(NO\s+KEY\s+)?UPDATE\b", re.I)
+
+
+def normalize_statement(statement: str) -> str:
+    """
+    Reduce a statement to its fingerprint text
+
+    Args:
+        statement: SQL as sent to the driver
+
+    Returns:
+        Statement with literals and placeholders as ``?`` and lists collapsed
+    """
+    text = _COMMENTS.sub(" ", statement)
+    text = _STRINGS.sub("?", text)
+    text = _PLACEHOLDERS.sub("?", text)
+    text = _NUMBERS.sub("?", text)
+    text = _IN_LISTS.sub("IN (...)", text)
+    text = _VALUES_LISTS.sub("VALUES (...)", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def fingerprint_id(normalized: str) -> str:
+    """Short stable ID of a normalized statement"""
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+
+def parameter_shape(parameters: Any, executemany: bool = False) -> Any:
+    """
+    Describe bind parameters by name and type without their values
+
+    Args:
+        parameters: Parameters as passed to the cursor
+        executemany: Whether parameters is a sequence of parameter sets
+
+    Returns:
+        JSON-compatible description of the parameters
+    """
+    if executemany and isinstance(parameters, (list, tuple)):
+        first = parameter_shape(parameters[0]) if parameters else None
+        return {"rows": len(parameters), "each": first}
+
+    def describe(value: Any) -> str:
+        if isinstance(value, (list, tuple, set)):
+            return f"{type(value).__name__}[{len(value)}]"
+        return type(value).__name__
+
+    if isinstance(parameters, dict):
+        return {name: describe(value) for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [describe(value) for value in parameters]
+    return None
+
+
+def summarize_plan(plan: Any) -> Dict[str, Any]:
+    """
+    Extract the headline numbers from an EXPLAIN (FORMAT JSON) result
+
+    Args:
+        plan: Decoded JSON plan
+
+    Returns:
+        Root node type, timings and buffer counts
+    """
+    root = plan[0] if isinstance(plan, list) else plan
+    node = root.get("Plan", {})
+    return {
+        "node_type": node.get("Node Type"),
+        "planning_ms": root.get("Planning Time"),
+        "execution_ms": root.get("Execution Time"),
+        "rows": node.get("Actual Rows"),
+        "shared_hit_blocks": node.get("Shared Hit Blocks"),
+        "shared_read_blocks": node.get("Shared Read Blocks")
+    }
+
+
+class QueryFingerprint:
+    """Accumulated slow executions of one normalized statement"""
+
+    __slots__ = (
+        "id", "statement", "calls", "total_ms", "max_ms", "parameter_shape",
+        "first_seen", "last_seen", "last_explained", "explain"
+    )
+
+    def __init__(self, fingerprint: str, statement: str):
+        self.id = fingerprint
+        self.statement = statement
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.parameter_shape: Any = None
+        self.first_seen = datetime.utcnow()
+        self.last_seen = self.first_seen
+        self.last_explained = 0.0
+        self.explain: Optional[Dict[str, Any]] = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "fingerprint": self.id,
+            "statement": self.statement,
+            "slow_calls": self.calls,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "parameter_shape": self.parameter_shape,
+            "first_seen": self.first_seen.isoformat(),
+            "last_seen": self.last_seen.isoformat(),
+            "explain": self.explain
+        }
+
+
+class SlowQueryLog:
+    """
+    Statement timer and slow query aggregator for one engine
+
+    Timing every statement costs two perf_counter calls; only statements
+    over the threshold take the lock and are fingerprinted.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        threshold_ms: float = 200.0,
+        explain_sample_rate: float = 0.1,
+        explain_interval: float = 300.0,
+        explain_timeout_ms: int = 10000,
+        max_fingerprints: int = 500
+    ):
+        """
+        Initialize slow query log
+
+        Args:
+            engine: Engine whose statements are timed
+            threshold_ms: Statements slower than this are recorded
+            explain_sample_rate: Share of slow SELECTs queued for EXPLAIN ANALYZE
+            explain_interval: Minimum seconds between EXPLAINs of one fingerprint
+            explain_timeout_ms: statement_timeout for each EXPLAIN ANALYZE
+            max_fingerprints: Fingerprints kept; the least total time is evicted
+        """
+        self.engine = engine
+        self.threshold_ms = threshold_ms
+        self.explain_sample_rate = explain_sample_rate
+        self.explain_interval = explain_interval
+        self.explain_timeout_ms = explain_timeout_ms
+        self.max_fingerprints = max_fingerprints
+        self.explain_supported = engine.dialect.name == "postgresql"
+        self._fingerprints: Dict[str, QueryFingerprint] = {}
+        self._lock = threading.Lock()
+        self._explain_queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=100)
+        self._explain_thread: Optional[threading.Thread] = None
+
+    def install(self):
+        """Attach to the engine's events and start the EXPLAIN thread"""
+        event.listen(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(self.engine, "after_cursor_execute", self._after_cursor_execute)
+        if self.explain_supported and self.explain_sample_rate > 0:
+            self._explain_thread = threading.Thread(target=self._explain_worker, name="slow-query-explain", daemon=True)
+            self._explain_thread.start()
+        logger.info("Recording statements slower than %sms", self.threshold_ms)
+
+    def uninstall(self):
+        """Detach from the engine and stop the EXPLAIN thread"""
+        event.remove(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        event.remove(self.engine, "after_cursor_execute", self._after_cursor_execute)
+        if self._explain_thread is not None:
+            self._explain_queue.put(None)
+            self._explain_thread.join(timeout=self.explain_timeout_ms / 1000 + 5)
+            self._explain_thread = None
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._slow_query_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_slow_query_started", None)
+        if started is None:
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms >= self.threshold_ms and not conn.info.get("slow_query_explain"):
+            self.record(statement, parameters, executemany, elapsed_ms)
+
+    def record(self, statement: str, parameters: Any, executemany: bool, elapsed_ms: float):
+        """
+        Add one slow execution
+
+        Args:
+            statement: SQL as sent to the driver
+            parameters: Bind parameters
+            executemany: Whether parameters is a sequence of parameter sets
+            elapsed_ms: Execution time in milliseconds
+        """
+        normalized = normalize_statement(statement)
+        fingerprint = fingerprint_id(normalized)
+        explain = False
+        with self._lock:
+            entry = self._fingerprints.get(fingerprint)
+            if entry is None:
+                if len(self._fingerprints) >= self.max_fingerprints:
+                    evicted = min(self._fingerprints.values(), key=lambda item: item.total_ms)
+                    del self._fingerprints[evicted.id]
+                entry = self._fingerprints[fingerprint] = QueryFingerprint(fingerprint, normalized)
+            entry.calls += 1
+            entry.total_ms += elapsed_ms
+            entry.max_ms = max(entry.max_ms, elapsed_ms)
+            entry.parameter_shape = parameter_shape(parameters, executemany)
+            entry.last_seen = datetime.utcnow()
+
+            now = time.monotonic()
+            if (
+                self._explain_thread is not None
+                and not executemany
+                and _READ_ONLY.match(statement) and not _DATA_MODIFYING.search(statement)
+                and now - entry.last_explained >= self.explain_interval
+                and random.random() < self.explain_sample_rate
+            ):
+                entry.last_explained = now
+                explain = True
+
+        if explain:
+            try:
+                self._explain_queue.put_nowait((fingerprint, statement, parameters))
+            except queue.Full:
+                pass
+
+    def _explain_worker(self):
+        while True:
+            item = self._explain_queue.get()
+            if item is None:
+                return
+            fingerprint, statement, parameters = item
+            try:
+                result = self.explain(statement, parameters)
+            except Exception as e:
+                result = {"error": f"{e.__class__.__name__}: {e}"}
+            result["captured_at"] = datetime.utcnow().isoformat()
+            with self._lock:
+                entry = self._fingerprints.get(fingerprint)
+                if entry is not None:
+                    entry.explain = result
+
+    def explain(self, statement: str, parameters: Any) -> Dict[str, Any]:
+        """
+        Run EXPLAIN (ANALYZE, BUFFERS) for a statement and roll it back
+
+        Args:
+            statement: SQL as sent to the driver
+            parameters: Bind parameters of the slow execution
+
+        Returns:
+            Plan summary and full JSON plan
+        """
+        with self.engine.connect() as connection:
+            # Keeps the EXPLAIN itself out of the slow query log
+            connection.info["slow_query_explain"] = True
+            try:
+                transaction = connection.begin()
+                try:
+                    connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(self.explain_timeout_ms)}")
+                    rows = connection.exec_driver_sql(
+                        f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters
+                    ).fetchall()
+                finally:
+                    transaction.rollback()
+            finally:
+                connection.info.pop("slow_query_explain", None)
+
+        plan = rows[0][0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return {"summary": summarize_plan(plan), "plan": plan}
+
+    def top(self, limit: int = 20, order_by: str = "total_ms") -> List[Dict[str, Any]]:
+        """
+        Slowest fingerprints
+
+        Args:
+            limit: Number of fingerprints
+            order_by: "total_ms", "max_ms", "mean_ms" or "slow_calls"
+
+        Returns:
+            Fingerprint snapshots, worst first
+        """
+        with self._lock:
+            snapshots = [entry.snapshot() for entry in self._fingerprints.values()]
+        snapshots.sort(key=lambda item: item[order_by], reverse=True)
+        return snapshots[:limit]
+
+    def reset(self):
+        """Forget all fingerprints"""
+        with self._lock:
+            self._fingerprints = {}
+
+
+# Slow query log of the application engine, when enabled
+_slow_query_log: Optional[SlowQueryLog] = None
+
+
+def install_slow_query_log(engine: Engine) -> SlowQueryLog:
+    """
+    Start recording slow statements on an engine
+
+    Args:
+        engine: Application engine
+
+    Returns:
+        Installed SlowQueryLog
+    """
+    global _slow_query_log
+
+    if _slow_query_log is None:
+        from .config import settings
+
+        _slow_query_log = SlowQueryLog(
+            engine,
+            threshold_ms=settings.slow_query_threshold_ms,
+            explain_sample_rate=settings.slow_query_explain_sample_rate,
+            explain_interval=settings.slow_query_explain_interval,
+            max_fingerprints=settings.slow_query_max_fingerprints
+        )
+        _slow_query_log.install()
+    return _slow_query_log
+
+
+def get_slow_query_log() -> Optional[SlowQueryLog]:
+    """Installed slow query log, None when disabled"""
+    return _slow_query_log
@@ -0,0 +1,505 @@
+"""
+Distributed tracing with W3C trace context
+
+Incoming ``traceparent`` headers (sent by the Odoo addon) continue the
+caller's trace; the gateway adds a server span per request, a span per
+SQL statement and a span per ledger call, and forwards ``traceparent``
+to the Fabric stand-in. Finished spans are batched by a background
+thread and appended as OTLP/JSON lines (one ExportTraceServiceRequest
+per line, the OpenTelemetry Collector file exporter format), so they can
+be replayed into any OTLP collector.
+
+Print one request hop by hop from any number of export files:
+    python -m app.tracing /tmp/vendorchain-traces.jsonl --trace <trace id>
+"""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .metrics import RouteTemplates
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_PATTERN = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# OTLP span kinds
+INTERNAL = 1
+SERVER = 2
+CLIENT = 3
+
+# OTLP status codes
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+MAX_STATEMENT_LENGTH = 2000
+
+
+class Span:
+    """One timed operation in a trace"""
+
+    __slots__ = (
+        "trace_id", "span_id", "parent_span_id", "name", "kind", "sampled",
+        "start_ns", "end_ns", "attributes", "status", "status_message"
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_span_id: Optional[str],
+        sampled: bool,
+        kind: int = INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None
+    ):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_span_id = parent_span_id
+        self.name = name
+        self.kind = kind
+        self.sampled = sampled
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = STATUS_UNSET
+        self.status_message = ""
+
+    @property
+    def traceparent(self) -> str:
+        """W3C traceparent header naming this span as the parent"""
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def set_error(self, error: BaseException):
+        """Mark the span as failed"""
+        self.status = STATUS_ERROR
+        self.status_message = f"{error.__class__.__name__}: {error}"
+
+    def end(self):
+        """Finish the span and hand it to the exporter"""
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            if self.sampled and _exporter is not None:
+                _exporter.export(self)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """OTLP/JSON representation"""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": {"code": self.status}
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        return span
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Encode attributes as OTLP key/value pairs"""
+    encoded = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        encoded.append({"key": key, "value": typed})
+    return encoded
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """
+    Parse a W3C traceparent header
+
+    Args:
+        value: Header value
+
+    Returns:
+        Trace ID, parent span ID and sampled flag, or None if invalid
+    """
+    if not value:
+        return None
+    match = TRACEPARENT_PATTERN.match(value.strip().lower())
+    if match is None:
+        return None
+    trace_id, parent_id, flags = match.groups()
+    if trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+
+class FileSpanExporter:
+    """Background thread appending batches of spans as OTLP/JSON lines"""
+
+    def __init__(self, path: str, service_name: str, batch_size: int = 512, flush_interval: float = 1.0):
+        """
+        Initialize exporter
+
+        Args:
+            path: File to append to
+            service_name: service.name resource attribute
+            batch_size: Spans per written line at most
+            flush_interval: Seconds between writes of a partial batch
+        """
+        self.path = path
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(maxsize=batch_size * 64)
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start the writer thread"""
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Write the remaining spans and stop the writer thread"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def export(self, span: Span):
+        """Queue a finished span; spans are dropped rather than blocking requests"""
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        batch: List[Span] = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                span = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                span = False
+            if span is None:
+                self._write(batch)
+                return
+            if span:
+                batch.append(span)
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._write(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _write(self, spans: List[Span]):
+        if not spans:
+            return
+        request = {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": self.service_name})},
+                "scopeSpans": [{
+                    "scope": {"name": "vendorchain"},
+                    "spans": [span.to_otlp() for span in spans]
+                }]
+            }]
+        }
+        try:
+            with open(self.path, "a") as export_file:
+                export_file.write(json.dumps(request, separators=(",", ":")) + "\n")
+        except OSError as e:
+            logger.error("Failed to export %s spans to %s: %s", len(spans), self.path, e)
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+_exporter: Optional[FileSpanExporter] = None
+_sample_rate = 1.0
+
+
+def tracing_enabled() -> bool:
+    """Whether spans are being recorded"""
+    return _exporter is not None
+
+
+def current_span() -> Optional[Span]:
+    """Span of the running operation, if any"""
+    return _current_span.get()
+
+
+def current_traceparent() -> Optional[str]:
+    """traceparent header to send with outgoing calls, if inside a trace"""
+    span = _current_span.get()
+    return span.traceparent if span is not None else None
+
+
+@contextmanager
+def start_span(
+    name: str,
+    kind: int = INTERNAL,
+    attributes: Optional[Dict[str, Any]] = None,
+    traceparent: Optional[str] = None
+) -> Iterator[Optional[Span]]:
+    """
+    Run a block inside a new span
+
+    The span is a child of the current span, or of ``traceparent`` when
+    given. Without either it starts a new trace, sampled at the configured
+    rate. Yields None when tracing is disabled.
+
+    Args:
+        name: Span name
+        kind: INTERNAL, SERVER or CLIENT
+        attributes: Initial span attributes
+        traceparent: Incoming W3C traceparent header
+    """
+    if _exporter is None:
+        yield None
+        return
+
+    parent = parse_traceparent(traceparent)
+    if parent is not None:
+        trace_id, parent_id, sampled = parent
+    else:
+        current = _current_span.get()
+        if current is not None:
+            trace_id, parent_id, sampled = current.trace_id, current.span_id, current.sampled
+        else:
+            trace_id, parent_id, sampled = os.urandom(16).hex(), None, random.random() < _sample_rate
+
+    span = Span(name, trace_id, parent_id, sampled, kind, attributes)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.set_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end()
+
+
+class TracingMiddleware:
+    """ASGI middleware opening a server span per request"""
+
+    def __init__(self, app):
+        self.app = app
+        self._route = RouteTemplates()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _exporter is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        traceparent = headers.get(b"traceparent", b"").decode("latin-1")
+        attributes = {"http.method": scope["method"], "http.target": scope["path"]}
+
+        with start_span(scope["method"], SERVER, attributes, traceparent=traceparent) as span:
+            async def send_with_trace(message):
+                if message["type"] == "http.response.start":
+                    span.attributes["http.status_code"] = message["status"]
+                    # Lets the caller find this request's trace
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"traceresponse", span.traceparent.encode("latin-1"))
+                    ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_trace)
+            finally:
+                route = self._route(scope)
+                span.name = f"{scope['method']} {route}"
+                span.attributes["http.route"] = route
+                if span.attributes.get("http.status_code", 500) >= 500:
+                    span.status = STATUS_ERROR
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Open a span for a SQL statement run inside a trace"""
+    parent = _current_span.get()
+    if parent is None or context is None:
+        return
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+    span = Span(f"db {operation}", parent.trace_id, parent.span_id, parent.sampled, CLIENT, {
+        "db.system": conn.dialect.name,
+        "db.operation": operation,
+        "db.statement": statement[:MAX_STATEMENT_LENGTH]
+    })
+    if executemany:
+        span.attributes["db.executemany"] = True
+    context._trace_span = span
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    span = getattr(context, "_trace_span", None)
+    if span is not None:
+        if cursor is not None and cursor.rowcount is not None and cursor.rowcount >= 0:
+            span.attributes["db.rows"] = cursor.rowcount
+        span.end()
+
+
+def _handle_error(exception_context):
+    context = exception_context.execution_context
+    span = getattr(context, "_trace_span", None) if context is not None else None
+    if span is not None:
+        span.set_error(exception_context.original_exception)
+        span.end()
+
+
+def instrument_sqlalchemy():
+    """Trace statements on every SQLAlchemy engine"""
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    for name, listener in (
+        ("before_cursor_execute", _before_cursor_execute),
+        ("after_cursor_execute", _after_cursor_execute),
+        ("handle_error", _handle_error)
+    ):
+        if not event.contains(Engine, name, listener):
+            event.listen(Engine, name, listener)
+
+
+def start_tracing(path: str, service_name: str, sample_rate: float = 1.0) -> FileSpanExporter:
+    """
+    Start recording and exporting spans
+
+    Args:
+        path: OTLP/JSON lines file to append to
+        service_name: service.name resource attribute
+        sample_rate: Share of new traces recorded; incoming sampled flags win
+
+    Returns:
+        Running exporter
+    """
+    global _exporter, _sample_rate
+
+    if _exporter is None:
+        _sample_rate = sample_rate
+        _exporter = FileSpanExporter(path, service_name)
+        _exporter.start()
+        instrument_sqlalchemy()
+        logger.info("Exporting traces to %s", path)
+    return _exporter
+
+
+def stop_tracing():
+    """Flush remaining spans and stop recording"""
+    global _exporter
+
+    exporter, _exporter = _exporter, None
+    if exporter is not None:
+        exporter.stop()
+        if exporter.dropped:
+            logger.warning("Dropped %s spans while the export queue was full", exporter.dropped)
+
+
+def load_spans(paths: List[str]) -> List[Dict[str, Any]]:
+    """
+    Read spans from OTLP/JSON lines files
+
+    Args:
+        paths: Export files, e.g. from Odoo, the gateway and the stand-in
+
+    Returns:
+        Spans with a "service" key added
+    """
+    spans = []
+    for path in paths:
+        with open(path) as export_file:
+            for line in export_file:
+                if not line.strip():
+                    continue
+                for resource_spans in json.loads(line).get("resourceSpans", []):
+                    service = next(
+                        (
+                            attribute["value"].get("stringValue")
+                            for attribute in resource_spans.get("resource", {}).get("attributes", [])
+                            if attribute["key"] == "service.name"
+                        ),
+                        "unknown"
+                    )
+                    for scope_spans in resource_spans.get("scopeSpans", []):
+                        for span in scope_spans.get("spans", []):
+                            spans.append({**span, "service": service})
+    return spans
+
+
+def format_trace(spans: List[Dict[str, Any]], trace_id: str) -> List[str]:
+    """
+    Render one trace as an indented tree with per-hop durations
+
+    Args:
+        spans: Spans from load_spans
+        trace_id: Trace to render
+
+    Returns:
+        One line per span
+    """
+    spans = [span for span in spans if span["traceId"] == trace_id]
+    span_ids = {span["spanId"] for span in spans}
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for span in spans:
+        parent = span.get("parentSpanId")
+        children.setdefault(parent if parent in span_ids else None, []).append(span)
+    if not spans:
+        return []
+    trace_start = min(int(span["startTimeUnixNano"]) for span in spans)
+
+    lines = []
+
+    def render(span: Dict[str, Any], depth: int):
+        start = int(span["startTimeUnixNano"])
+        duration_ms = (int(span["endTimeUnixNano"]) - start) / 1e6
+        offset_ms = (start - trace_start) / 1e6
+        error = " ERROR" if span.get("status", {}).get("code") == STATUS_ERROR else ""
+        lines.append(
+            f"{offset_ms:9.1f}ms {duration_ms:9.1f}ms  {'  ' * depth}{span['name']} [{span['service']}]{error}"
+        )
+        for child in sorted(children.get(span["spanId"], []), key=lambda s: int(s["startTimeUnixNano"])):
+            render(child, depth + 1)
+
+    for root in sorted(children.get(None, []), key=lambda s: int(s["startTimeUnixNano"])):
+        render(root, 0)
+    return lines
+
+
+def main():
+    """Print traces from OTLP/JSON lines export files"""
+    parser = argparse.ArgumentParser(description="Show VendorChain traces hop by hop")
+    parser.add_argument("paths", nargs="+", help="OTLP/JSON lines export files")
+    parser.add_argument("--trace", help="Trace ID; defaults to the slowest traces")
+    parser.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args()
+
+    spans = load_spans(args.paths)
+    if args.trace:
+        trace_ids = [args.trace.lower()]
+    else:
+        durations: Dict[str, int] = {}
+        for span in spans:
+            if not span.get("parentSpanId"):
+                duration = int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])
+                durations[span["traceId"]] = max(durations.get(span["traceId"], 0), duration)
+        trace_ids = sorted(durations, key=durations.get, reverse=True)[:args.limit]
+
+    for trace_id in trace_ids:
+        print(f"trace {trace_id}")
+        print("\n".join(format_trace(spans, trace_id)))
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Shared pytest fixtures
+"""
+
+import socket
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+from app import database
+from app.fabric_standin import start_standin_process, wait_until_ready
+
+
+def free_port() -> int:
+    """Pick an unused local TCP port"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def memory_engine():
+    """In-memory SQLite database with all tables, one connection shared across threads"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    database.Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db_session(memory_engine):
+    """Bind the session factory to the in-memory database"""
+    database.SessionLocal.configure(bind=memory_engine)
+
+    db = database.SessionLocal()
+    yield db
+    db.close()
+    database.SessionLocal.configure(bind=database.engine)
+
+
+@pytest.fixture(scope="session")
+def fabric_standin():
+    """Standalone Fabric stand-in service running as a local process"""
+    port = free_port()
+    process = start_standin_process(
+        port, "--seed", "1", "--log-level", "warning",
+        cwd=str(Path(__file__).resolve().parent.parent)
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        if not wait_until_ready(url):
+            pytest.fail("Fabric stand-in did not start")
+        yield url
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
@@ -0,0 +1,126 @@
+"""
+Test suite for ledger circuit breakers
+"""
+
+import asyncio
+import pytest
+
+from app.circuit_breaker import (
+    CircuitBreaker, CircuitState, CircuitOpenError, LedgerTimeoutError, ledger_deadline
+)
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def succeed():
+    return "tx"
+
+
+async def fail():
+    raise RuntimeError("peer unavailable")
+
+
+class TestCircuitBreaker:
+    """Test circuit breaker state transitions"""
+
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+
+    @pytest.fixture
+    def breaker(self, clock):
+        return CircuitBreaker(
+            "create_contract",
+            failure_threshold=2,
+            reset_timeout=10.0,
+            min_timeout=0.01,
+            max_timeout=0.2,
+            clock=clock
+        )
+
+    @pytest.mark.asyncio
+    async def test_opens_after_consecutive_failures(self, breaker):
+        """Circuit opens once the failure threshold is reached"""
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                await breaker.call(fail)
+
+        assert breaker.state == CircuitState.OPEN
+        with pytest.raises(CircuitOpenError):
+            await breaker.call(succeed)
+        assert breaker.snapshot()["total_rejected"] == 1
+
+    @pytest.mark.asyncio
+    async def test_half_open_probe_closes_circuit(self, breaker, clock):
+        """A successful probe after the reset timeout closes the circuit"""
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                await breaker.call(fail)
+
+        clock.now += 10.0
+        assert breaker.state == CircuitState.HALF_OPEN
+        assert await breaker.call(succeed) == "tx"
+        assert breaker.state == CircuitState.CLOSED
+
+    @pytest.mark.asyncio
+    async def test_failed_probe_reopens_circuit(self, breaker, clock):
+        """A failed probe reopens the circuit immediately"""
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                await breaker.call(fail)
+
+        clock.now += 10.0
+        with pytest.raises(RuntimeError):
+            await breaker.call(fail)
+        assert breaker.state == CircuitState.OPEN
+        assert breaker.retry_after() == pytest.approx(10.0)
+
+    @pytest.mark.asyncio
+    async def test_slow_call_times_out(self, breaker):
+        """Calls exceeding the deadline raise and count as failures"""
+        async def slow():
+            await asyncio.sleep(1)
+
+        with pytest.raises(LedgerTimeoutError):
+            await breaker.call(slow)
+        assert breaker.snapshot()["total_timeouts"] == 1
+
+    @pytest.mark.asyncio
+    async def test_queued_call_times_only_the_ledger(self, breaker):
+        """Waiting for capacity before a queued call reaches the ledger is not timed"""
+        lane = asyncio.Lock()
+
+        async def queued(delay):
+            async with lane:
+                return await ledger_deadline(asyncio.sleep(delay, result="tx"))
+
+        async with lane:
+            call = asyncio.ensure_future(breaker.call(queued, 0, queued=True))
+            await asyncio.sleep(0.3)
+        assert await call == "tx"
+
+        with pytest.raises(LedgerTimeoutError):
+            await breaker.call(queued, 1, queued=True)
+        snapshot = breaker.snapshot()
+        assert snapshot["total_timeouts"] == 1
+        assert snapshot["consecutive_failures"] == 1
+
+    def test_timeout_adapts_to_latency(self, breaker):
+        """Deadline follows observed latency within bounds"""
+        assert breaker.timeout == 0.2
+
+        for _ in range(20):
+            breaker._record_success(0.005)
+        assert breaker.timeout == pytest.approx(0.01)
+
+        for _ in range(20):
+            breaker._record_success(0.04)
+        assert 0.04 < breaker.timeout <= 0.2
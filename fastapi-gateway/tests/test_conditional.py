@@ -0,0 +1,191 @@
+"""
+Test suite for ETags, conditional GETs and response compression
+"""
+
+from datetime import date, datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app.compression import CompressionMiddleware, accepted_encoding
+from app.etags import compute_etag, etag_matches
+from app.main import app as gateway_app
+from app.models import Contract, ContractType, Vendor
+from app.replicas import get_read_db
+
+
+@pytest.fixture
+def session_factory(memory_engine):
+    factory = sessionmaker(bind=memory_engine)
+
+    def override():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    gateway_app.dependency_overrides[get_read_db] = override
+    yield factory
+    gateway_app.dependency_overrides.pop(get_read_db, None)
+
+
+def add_contract(factory, contract_id: str):
+    db = factory()
+    vendor = db.query(Vendor).filter(Vendor.vendor_id == "V1").first()
+    if vendor is None:
+        vendor = Vendor(vendor_id="V1", name="Acme", contact_email="a@example.com")
+        db.add(vendor)
+        db.flush()
+    db.add(Contract(
+        contract_id=contract_id, vendor_id=vendor.id, contract_type=ContractType.SERVICE,
+        total_value=100, paid_amount=0, expiry_date=date(2030, 1, 1), created_by="tester",
+        payment_history=[]
+    ))
+    db.commit()
+    db.close()
+
+
+class TestEtagMatching:
+    """Test entity tag comparison"""
+
+    def test_weak_and_encoded_tags_match(self):
+        """If-None-Match uses weak comparison and ignores encoding suffixes"""
+        etag = compute_etag([(1, "2026-01-01", None)])
+        assert etag_matches(etag, etag)
+        assert etag_matches(f"W/{etag}", etag)
+        assert etag_matches(f'"other", {etag[:-1]}-gzip"', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('"other"', etag)
+        assert not etag_matches(None, etag)
+
+    def test_tag_follows_versions(self):
+        """Any changed version column changes the tag"""
+        assert compute_etag([(1, "a", None)]) != compute_etag([(1, "b", None)])
+        assert compute_etag([(1, "a", None)]) != compute_etag([(1, "a", None), (2, "a", None)])
+
+
+class TestConditionalGet:
+    """Test 304 responses from contract and vendor reads"""
+
+    def test_contract_not_modified(self, session_factory):
+        """A matching ETag gets 304 with no body"""
+        add_contract(session_factory, "C1")
+        client = TestClient(gateway_app)
+
+        first = client.get("/api/v1/contracts/C1")
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+
+        second = client.get("/api/v1/contracts/C1", headers={"If-None-Match": etag})
+        assert second.status_code == 304
+        assert second.content == b""
+        assert second.headers["etag"] == etag
+
+    def test_contract_change_invalidates_tag(self, session_factory):
+        """An update gives the contract a new ETag"""
+        add_contract(session_factory, "C1")
+        client = TestClient(gateway_app)
+        etag = client.get("/api/v1/contracts/C1").headers["etag"]
+
+        db = session_factory()
+        contract = db.query(Contract).filter(Contract.contract_id == "C1").one()
+        contract.paid_amount = 10
+        contract.updated_at = datetime(2030, 1, 1)
+        db.commit()
+        db.close()
+
+        response = client.get("/api/v1/contracts/C1", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+
+    def test_list_tag_covers_page(self, session_factory):
+        """Adding a contract changes the list ETag"""
+        add_contract(session_factory, "C1")
+        client = TestClient(gateway_app)
+        etag = client.get("/api/v1/contracts/").headers["etag"]
+        assert client.get("/api/v1/contracts/", headers={"If-None-Match": etag}).status_code == 304
+
+        add_contract(session_factory, "C2")
+        response = client.get("/api/v1/contracts/", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert [c["contract_id"] for c in response.json()] == ["C1", "C2"]
+
+    def test_vendor_not_modified(self, session_factory):
+        """Vendor reads and lists answer 304 too"""
+        add_contract(session_factory, "C1")
+        client = TestClient(gateway_app)
+        for path in ("/api/v1/vendors/V1", "/api/v1/vendors/"):
+            etag = client.get(path).headers["etag"]
+            assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+
+
+class TestCompression:
+    """Test compression above the size threshold"""
+
+    def compressed_app(self) -> FastAPI:
+        app = FastAPI()
+        app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+        @app.get("/large")
+        async def large():
+            return {"payment_history": ["payment"] * 100}
+
+        @app.get("/small")
+        async def small():
+            return {"ok": True}
+
+        return app
+
+    def test_large_json_is_gzipped(self):
+        """Large bodies are compressed for clients accepting gzip"""
+        client = TestClient(self.compressed_app())
+        response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.json() == {"payment_history": ["payment"] * 100}
+
+    def test_small_or_unaccepted_bodies_are_not_compressed(self):
+        """Small responses and clients without gzip get identity bodies"""
+        client = TestClient(self.compressed_app())
+        assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+        assert "content-encoding" not in client.get("/large", headers={"Accept-Encoding": "identity"}).headers
+
+    def test_etag_gets_encoding_suffix(self, session_factory):
+        """Compressed representations carry their own strong tag"""
+        for index in range(5):
+            add_contract(session_factory, f"C{index}")
+        client = TestClient(gateway_app)
+        plain = client.get("/api/v1/contracts/", headers={"Accept-Encoding": "identity"})
+        encoded = client.get("/api/v1/contracts/", headers={"Accept-Encoding": "gzip"})
+        assert encoded.headers["content-encoding"] == "gzip"
+        assert encoded.headers["etag"] == plain.headers["etag"][:-1] + '-gzip"'
+        response = client.get("/api/v1/contracts/", headers={"If-None-Match": encoded.headers["etag"]})
+        assert response.status_code == 304
+
+    def test_not_modified_keeps_encoding_suffix(self, session_factory):
+        """A 304 for a gzip copy carries the same suffixed tag as its 200"""
+        for index in range(5):
+            add_contract(session_factory, f"C{index}")
+        client = TestClient(gateway_app)
+        encoded = client.get("/api/v1/contracts/", headers={"Accept-Encoding": "gzip"})
+        etag = encoded.headers["etag"]
+        assert etag.endswith('-gzip"')
+
+        response = client.get(
+            "/api/v1/contracts/", headers={"Accept-Encoding": "gzip", "If-None-Match": etag}
+        )
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert response.headers["vary"] == "Accept-Encoding"
+
+        response = client.get("/api/v1/contracts/", headers={"If-None-Match": "W/" + etag})
+        assert response.headers["etag"] == etag
+
+    def test_accepted_encoding(self):
+        """Brotli is preferred when available, q=0 excludes a coding"""
+        assert accepted_encoding("gzip, deflate, br", brotli_available=True) == "br"
+        assert accepted_encoding("gzip, deflate, br", brotli_available=False) == "gzip"
+        assert accepted_encoding("gzip;q=0, br", brotli_available=False) is None
@@ -0,0 +1,82 @@
+"""
+Test suite for database pool sizing and background liveness checks
+"""
+
+from sqlalchemy import create_engine, text
+
+from app.database import InstrumentedQueuePool, PoolLivenessChecker, size_pool
+
+
+def sqlite_engine(tmp_path, pool_size=3):
+    return create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=pool_size,
+        max_overflow=0
+    )
+
+
+class TestPoolSizing:
+    """Test splitting the connection budget between workers"""
+
+    def test_single_worker_keeps_configured_pool(self):
+        """A budget larger than the configured pool does not grow it"""
+        sizing = size_pool(budget=100, workers=1, pool_size=20, max_overflow=40)
+        assert (sizing.pool_size, sizing.max_overflow) == (20, 40)
+
+    def test_workers_stay_within_budget(self):
+        """All workers at full overflow never exceed the budget"""
+        for workers in (1, 2, 3, 4, 8, 16):
+            sizing = size_pool(budget=90, workers=workers, pool_size=20, max_overflow=40)
+            assert (sizing.pool_size + sizing.max_overflow) * workers <= 90
+            assert sizing.pool_size >= 1
+
+    def test_overflow_shrinks_before_pool_size(self):
+        """Persistent connections are kept while burst capacity is cut"""
+        sizing = size_pool(budget=100, workers=4, pool_size=20, max_overflow=40)
+        assert (sizing.pool_size, sizing.max_overflow) == (20, 5)
+
+    def test_tiny_budget_still_gives_one_connection(self):
+        """Every worker gets at least one connection"""
+        sizing = size_pool(budget=2, workers=8, pool_size=20, max_overflow=40)
+        assert (sizing.pool_size, sizing.max_overflow) == (1, 0)
+
+
+class TestPoolLivenessChecker:
+    """Test background pings of idle connections"""
+
+    def test_healthy_idle_connections_are_kept(self, tmp_path):
+        """Each idle connection is pinged once and kept"""
+        engine = sqlite_engine(tmp_path)
+        connections = [engine.connect() for _ in range(3)]
+        for connection in connections:
+            connection.close()
+
+        checker = PoolLivenessChecker(engine.pool)
+        assert checker.check_idle() == 0
+        assert checker.checked == 3
+        assert engine.pool.checkedin() == 3
+
+    def test_dead_connection_is_invalidated(self, tmp_path):
+        """A connection the server dropped is replaced before a request gets it"""
+        engine = sqlite_engine(tmp_path, pool_size=1)
+        with engine.connect() as connection:
+            dead = connection.connection.dbapi_connection
+        dead.close()
+
+        checker = PoolLivenessChecker(engine.pool)
+        assert checker.check_idle() == 1
+        assert checker.snapshot()["invalidated"] == 1
+
+        with engine.connect() as connection:
+            assert connection.connection.dbapi_connection is not dead
+            assert connection.execute(text("SELECT 1")).scalar() == 1
+
+    def test_peak_checked_out_is_tracked(self, tmp_path):
+        """The pool records its highest concurrent checkout count"""
+        engine = sqlite_engine(tmp_path)
+        first = engine.connect()
+        second = engine.connect()
+        first.close()
+        second.close()
+        assert engine.pool.peak_checked_out == 2
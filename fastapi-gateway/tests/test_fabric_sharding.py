@@ -0,0 +1,77 @@
+"""
+Test suite for channel-sharded Fabric client routing
+"""
+
+import pytest
+
+from app.fabric_client import FabricClient, ShardedFabricClient, parse_channels
+
+
+@pytest.fixture
+def sharded_client():
+    """Sharded client over three mock channels"""
+    clients = [
+        FabricClient({"channel_name": f"vendorcontract{index}"})
+        for index in range(3)
+    ]
+    return ShardedFabricClient(clients, max_concurrency=4)
+
+
+def owner_of(client: ShardedFabricClient, contract_id: str):
+    """Channel names whose state holds the contract"""
+    return [
+        channel.channel_name for channel in client.clients
+        if contract_id in channel._blockchain_state
+    ]
+
+
+class TestChannelRouting:
+    """Test stable vendor hashing and contract routing"""
+
+    def test_shard_index_is_stable_and_spread(self):
+        """The same vendor always maps to the same channel"""
+        indexes = [ShardedFabricClient.shard_index(f"VENDOR{n:03d}", 3) for n in range(300)]
+        assert indexes == [ShardedFabricClient.shard_index(f"VENDOR{n:03d}", 3) for n in range(300)]
+        assert {0, 1, 2} == set(indexes)
+        assert min(indexes.count(index) for index in range(3)) > 60
+
+    def test_parse_channels(self):
+        """Entries without a chaincode fall back to the default"""
+        assert parse_channels("ch0, ch1:cc-b", "vendor-contract") == [
+            {"channel_name": "ch0", "chaincode_name": "vendor-contract"},
+            {"channel_name": "ch1", "chaincode_name": "cc-b"}
+        ]
+
+    @pytest.mark.asyncio
+    async def test_contract_lifecycle_stays_on_vendor_channel(self, sharded_client):
+        """Create, verify and pay all land on the vendor's channel"""
+        await sharded_client.connect()
+        expected = sharded_client.client_for_vendor("VENDOR001").channel_name
+
+        assert await sharded_client.create_contract(
+            contract_id="CONTRACT001",
+            vendor_id="VENDOR001",
+            contract_data={"type": "SERVICE"},
+            created_by="tester"
+        )
+        assert await sharded_client.verify_contract(
+            contract_id="CONTRACT001", verified_by="tester", vendor_id="VENDOR001"
+        )
+        assert await sharded_client.record_payment(
+            contract_id="CONTRACT001", payment_data={"amount": 10}
+        )
+        assert owner_of(sharded_client, "CONTRACT001") == [expected]
+
+    @pytest.mark.asyncio
+    async def test_query_scatters_when_vendor_unknown(self, sharded_client):
+        """Lookups without a vendor find the contract on any channel"""
+        await sharded_client.clients[2].create_contract(
+            contract_id="CONTRACT002",
+            vendor_id="VENDOR002",
+            contract_data={},
+            created_by="tester"
+        )
+
+        contract = await sharded_client.query_contract("CONTRACT002")
+        assert contract["vendorId"] == "VENDOR002"
+        assert await sharded_client.query_contract("MISSING") is None
@@ -0,0 +1,124 @@
+"""
+Test suite for the standalone Fabric stand-in service
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.fabric_client import RemoteFabricClient
+from app.fabric_standin import create_app
+
+
+@pytest.fixture
+def faults(fabric_standin):
+    """Reset fault injection after each test"""
+    yield lambda **config: httpx.put(f"{fabric_standin}/faults", json=config).raise_for_status()
+    httpx.put(f"{fabric_standin}/faults", json={}).raise_for_status()
+
+
+def remote_client(url: str) -> RemoteFabricClient:
+    """Remote client for the default channel"""
+    return RemoteFabricClient({"standin_url": url, "standin_timeout": 5.0})
+
+
+class TestRemoteFabricClient:
+    """Test the FabricClient interface over the stand-in service"""
+
+    @pytest.mark.asyncio
+    async def test_contract_lifecycle(self, fabric_standin):
+        """Writes commit on the stand-in and are visible to queries"""
+        client = remote_client(fabric_standin)
+        assert await client.connect()
+
+        assert await client.create_contract("STANDIN001", "VENDOR001", {"type": "SERVICE"}, "tester")
+        assert await client.verify_contract("STANDIN001", "verifier")
+        assert await client.record_payment("STANDIN001", {"amount": 10})
+
+        contract = await client.query_contract("STANDIN001")
+        assert contract["status"] == "VERIFIED"
+        assert [entry["action"] for entry in await client.get_contract_history("STANDIN001")] == [
+            "CREATE", "VERIFY", "PAYMENT"
+        ]
+        await client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_rejected_transaction_returns_none(self, fabric_standin):
+        """Invalid transitions are rejections, not errors"""
+        client = remote_client(fabric_standin)
+        await client.connect()
+
+        assert await client.submit_contract("STANDIN-MISSING", "tester") is None
+        assert await client.query_contract("STANDIN-MISSING") is None
+        await client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_clients_share_one_ledger(self, fabric_standin):
+        """Separate gateway processes see the same stand-in state"""
+        first, second = remote_client(fabric_standin), remote_client(fabric_standin)
+        await first.connect()
+        await second.connect()
+
+        assert await first.create_contract("STANDIN002", "VENDOR001", {}, "tester")
+        assert await second.verify_contract("STANDIN002", "verifier")
+        await first.disconnect()
+        await second.disconnect()
+
+
+class TestChannelClients:
+    """Test per-channel clients of the stand-in"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_first_calls_share_client(self):
+        """Writes racing to open a channel all land on the same ledger"""
+        transport = httpx.ASGITransport(app=create_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://standin") as http:
+            async def create(contract_id: str):
+                response = await http.post(
+                    "/channels/race/chaincodes/vendor-contract/submit",
+                    json={"function": "createContract", "args": {
+                        "contract_id": contract_id, "vendor_id": "VENDOR001",
+                        "contract_data": {}, "created_by": "tester"
+                    }}
+                )
+                response.raise_for_status()
+
+            await asyncio.gather(*(create(f"RACE{index}") for index in range(5)))
+            for index in range(5):
+                response = await http.post(
+                    "/channels/race/chaincodes/vendor-contract/evaluate",
+                    json={"function": "queryContract", "args": {"contract_id": f"RACE{index}"}}
+                )
+                assert response.json()["result"] is not None
+
+
+class TestFaultInjection:
+    """Test latency and failure injection"""
+
+    @pytest.mark.asyncio
+    async def test_injected_errors_raise(self, fabric_standin, faults):
+        """Injected failures surface as errors for the circuit breaker"""
+        faults(error_rate=1.0, functions=["createContract"])
+        client = remote_client(fabric_standin)
+        await client.connect()
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.create_contract("STANDIN003", "VENDOR001", {}, "tester")
+        assert await client.query_contract("STANDIN003") is None
+        await client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_injected_timeout(self, fabric_standin, faults):
+        """Hanging calls exceed the client timeout"""
+        faults(timeout_rate=1.0, hang_seconds=2.0)
+        client = RemoteFabricClient({"standin_url": fabric_standin, "standin_timeout": 0.5})
+
+        with pytest.raises(httpx.TimeoutException):
+            await client.query_contract("STANDIN004")
+        await client.disconnect()
+
+    def test_invalid_latency_spec_rejected(self, fabric_standin, faults):
+        """Malformed distributions are refused"""
+        response = httpx.put(f"{fabric_standin}/faults", json={"extra_latency": "gamma:1"})
+        assert response.status_code == 422
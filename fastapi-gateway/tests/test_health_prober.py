@@ -0,0 +1,125 @@
+"""
+Test suite for the cached background health prober
+"""
+
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import health_prober
+from app.health_prober import DEGRADED, HEALTHY, UNHEALTHY, HealthProber
+from app.main import app as gateway_app
+
+
+class Dependencies:
+    """Stand-in dependency checks counting how often they run"""
+
+    def __init__(self, database_ok=True, blockchain_ok=True, depth=0, database_delay=0.0):
+        self.database_ok = database_ok
+        self.blockchain_ok = blockchain_ok
+        self.depth = depth
+        self.database_delay = database_delay
+        self.database_calls = 0
+
+    def install(self, monkeypatch):
+        monkeypatch.setattr(health_prober, "_check_database", self.check_database)
+        monkeypatch.setattr(health_prober, "_check_ledger_queue", self.check_ledger_queue)
+        monkeypatch.setattr(HealthProber, "_check_blockchain", self.check_blockchain)
+
+    def check_database(self):
+        self.database_calls += 1
+        time.sleep(self.database_delay)
+        if not self.database_ok:
+            raise ConnectionError("connection refused")
+        return {"version": "PostgreSQL 15"}
+
+    def check_ledger_queue(self):
+        return {"depth": self.depth}
+
+    async def check_blockchain(self):
+        if not self.blockchain_ok:
+            raise ConnectionError("Connection check failed")
+        return {"circuit_breakers": {}}
+
+
+class TestHealthProber:
+    """Test probing and aggregation"""
+
+    @pytest.mark.asyncio
+    async def test_all_dependencies_up(self, monkeypatch):
+        """Healthy and ready when every check passes"""
+        Dependencies().install(monkeypatch)
+        state = await HealthProber().probe()
+        assert state["status"] == HEALTHY
+        assert state["ready"] is True
+        assert state["database"]["details"] == {"version": "PostgreSQL 15"}
+
+    @pytest.mark.asyncio
+    async def test_database_down_is_unhealthy(self, monkeypatch):
+        """A failed database check makes the gateway unhealthy and not ready"""
+        Dependencies(database_ok=False).install(monkeypatch)
+        state = await HealthProber().probe()
+        assert state["status"] == UNHEALTHY
+        assert state["ready"] is False
+        assert state["database"]["details"]["error"] == "connection refused"
+
+    @pytest.mark.asyncio
+    async def test_slow_check_times_out(self, monkeypatch):
+        """A check slower than the timeout counts as failed"""
+        Dependencies(database_delay=0.3).install(monkeypatch)
+        state = await HealthProber(timeout=0.05).probe()
+        assert state["database"]["ok"] is False
+        assert "Timed out" in state["database"]["details"]["error"]
+
+    @pytest.mark.asyncio
+    async def test_queue_backlog_is_degraded(self, monkeypatch):
+        """A ledger queue deeper than the threshold degrades health"""
+        Dependencies(depth=50).install(monkeypatch)
+        state = await HealthProber(backlog_threshold=10).probe()
+        assert state["status"] == DEGRADED
+        assert state["ready"] is True
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_probe(self, monkeypatch):
+        """Requests arriving together wait for a single probe"""
+        dependencies = Dependencies(database_delay=0.05)
+        dependencies.install(monkeypatch)
+        prober = HealthProber(interval=60)
+        states = await asyncio.gather(*(prober.current() for _ in range(20)))
+        assert dependencies.database_calls == 1
+        assert all(state is states[0] for state in states)
+
+
+class TestHealthEndpoints:
+    """Test endpoints serving the cached state"""
+
+    def test_probes_do_not_touch_the_database(self, monkeypatch):
+        """Repeated probes reuse the cached state"""
+        dependencies = Dependencies()
+        dependencies.install(monkeypatch)
+        monkeypatch.setattr(health_prober, "_health_prober", HealthProber(interval=60))
+        client = TestClient(gateway_app)
+
+        for path in ("/health", "/ready", "/api/v1/health/", "/api/v1/health/ready", "/api/v1/health/database"):
+            for _ in range(5):
+                assert client.get(path).status_code == 200
+        assert dependencies.database_calls == 1
+
+        body = client.get("/health").json()
+        assert body["status"] == HEALTHY
+        assert body["database"] == "connected"
+        assert not body["timestamp"].startswith("2025")
+
+    def test_not_ready_returns_503(self, monkeypatch):
+        """Orchestrators see a failing status code when a dependency is down"""
+        Dependencies(blockchain_ok=False).install(monkeypatch)
+        monkeypatch.setattr(health_prober, "_health_prober", HealthProber(interval=60))
+        client = TestClient(gateway_app)
+
+        response = client.get("/api/v1/health/ready")
+        assert response.status_code == 503
+        assert response.json()["checks"] == {"database": True, "blockchain": False}
+        assert client.get("/health").status_code == 503
+        assert client.get("/api/v1/health/live").status_code == 200
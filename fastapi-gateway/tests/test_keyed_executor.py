@@ -0,0 +1,122 @@
+"""
+Test suite for per-contract ordered execution lanes
+"""
+
+import asyncio
+
+import pytest
+
+from app.fabric_client import FabricClient, ShardedFabricClient
+from app.keyed_executor import KeyedExecutor
+
+
+class TestKeyedExecutor:
+    """Test ordering and parallelism of keyed lanes"""
+
+    @pytest.mark.asyncio
+    async def test_same_key_runs_in_submission_order(self):
+        """Operations on one key never overlap and keep their order"""
+        executor = KeyedExecutor()
+        events = []
+
+        async def operation(n):
+            events.append(("start", n))
+            await asyncio.sleep(0.01)
+            events.append(("end", n))
+            return n
+
+        results = await asyncio.gather(*(executor.run("C1", operation, n) for n in range(5)))
+
+        assert results == list(range(5))
+        assert events == [(kind, n) for n in range(5) for kind in ("start", "end")]
+        assert executor.snapshot()["max_depth"] == 5
+        assert executor.snapshot()["active_lanes"] == 0
+
+    @pytest.mark.asyncio
+    async def test_different_keys_run_in_parallel(self):
+        """Operations on different keys overlap"""
+        executor = KeyedExecutor()
+        running = []
+        peak = []
+
+        async def operation():
+            running.append(1)
+            peak.append(len(running))
+            await asyncio.sleep(0.02)
+            running.pop()
+
+        await asyncio.gather(*(executor.run(f"C{n}", operation) for n in range(10)))
+
+        assert max(peak) == 10
+        assert executor.snapshot()["queued"] == 0
+
+    @pytest.mark.asyncio
+    async def test_failure_releases_lane(self):
+        """An exception does not block later operations on the key"""
+        executor = KeyedExecutor()
+
+        async def fail():
+            raise RuntimeError("endorsement failed")
+
+        async def succeed():
+            return "ok"
+
+        with pytest.raises(RuntimeError):
+            await executor.run("C1", fail)
+        assert await executor.run("C1", succeed) == "ok"
+
+
+class TestOrderedLedgerWrites:
+    """Test lanes and conflict retries in the sharded client"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_writes_to_one_contract(self):
+        """Concurrent payments on one contract all commit"""
+        client = ShardedFabricClient([FabricClient({})])
+        await client.connect()
+        assert await client.create_contract(
+            contract_id="LANE001", vendor_id="VENDOR001", contract_data={}, created_by="tester"
+        )
+
+        tx_ids = await asyncio.gather(*(
+            client.record_payment(contract_id="LANE001", payment_data={"amount": n}, vendor_id="VENDOR001")
+            for n in range(5)
+        ))
+
+        assert all(tx_ids)
+        history = await client.get_contract_history("LANE001", vendor_id="VENDOR001")
+        assert [entry["action"] for entry in history].count("PAYMENT") == 5
+        assert client.lane_status()["max_depth"] == 5
+        await client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_conflicting_write_is_retried(self):
+        """A write that lost a conflict is attempted again"""
+        channel = FabricClient({})
+        client = ShardedFabricClient([channel], conflict_retries=1)
+        await client.connect()
+        assert await client.create_contract(
+            contract_id="LANE002", vendor_id="VENDOR001", contract_data={}, created_by="tester"
+        )
+
+        # The first commit loses to a concurrent writer
+        write = channel._write
+        attempts = []
+
+        async def conflict_once(key, read_value, apply):
+            attempts.append(key)
+            if len(attempts) == 1:
+                channel.conflicts += 1
+                channel._conflicted_keys.add(key)
+                return False
+            return await write(key, read_value, apply)
+
+        channel._write = conflict_once
+        assert await client.verify_contract(contract_id="LANE002", verified_by="tester", vendor_id="VENDOR001")
+
+        lanes = client.lane_status()
+        assert len(attempts) == 2
+        assert lanes["conflicts"] == 1
+        assert lanes["conflict_retries"] == 1
+        assert lanes["conflicts_exhausted"] == 0
+        await client.disconnect()
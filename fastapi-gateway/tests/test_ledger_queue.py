@@ -0,0 +1,337 @@
+"""
+Test suite for the ledger operation work queue
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+from datetime import date, datetime, timedelta
+
+from app import database
+from app.circuit_breaker import CircuitOpenError
+from app.config import settings
+from app.database import get_db
+from app.fabric_client import FabricClient
+from app.main import app as gateway_app
+from app.models import Vendor, Contract, LedgerOperation, LedgerOperationStatus
+from app.ledger_queue import (
+    LedgerOperationWorker, enqueue_ledger_operation, get_queue_stats, sync_ledger_operation,
+    get_waiter_count, _notify_completion
+)
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    """Make failed operations due again at once"""
+    monkeypatch.setattr(settings, "ledger_retry_base_delay", 0.0)
+
+
+@pytest.fixture
+def contract(db_session):
+    """Persisted sample contract"""
+    vendor = Vendor(vendor_id="VENDOR001", name="Acme", contact_email="a@acme.com")
+    contract = Contract(
+        contract_id="CONTRACT001",
+        vendor=vendor,
+        contract_type="SERVICE",
+        total_value=1000,
+        paid_amount=0,
+        expiry_date=date.today() + timedelta(days=30),
+        created_by="tester",
+        payment_history=[]
+    )
+    db_session.add(contract)
+    db_session.commit()
+    return contract
+
+
+@pytest.fixture
+def client(db_session):
+    """Async client for the gateway, with requests served from the test database"""
+    def override():
+        db = database.SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    gateway_app.dependency_overrides[get_db] = override
+    yield httpx.AsyncClient(transport=httpx.ASGITransport(app=gateway_app), base_url="http://test")
+    gateway_app.dependency_overrides.pop(get_db, None)
+
+
+def ledger_stub(monkeypatch, results):
+    """Replace ledger calls with a scripted sequence of results"""
+    calls = []
+
+    async def call_ledger(operation, **kwargs):
+        calls.append(operation)
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    monkeypatch.setattr("app.fabric_client.call_ledger", call_ledger)
+    return calls
+
+
+class TestLedgerOperationWorker:
+    """Test claiming, retrying and dead-lettering"""
+
+    @pytest.mark.asyncio
+    async def test_success_applies_tx_id(self, monkeypatch, db_session, contract):
+        """A successful operation writes the tx id back to the contract"""
+        ledger_stub(monkeypatch, ["tx-1"])
+        enqueue_ledger_operation(db_session, "create_contract", {}, contract=contract)
+        db_session.commit()
+
+        worker = LedgerOperationWorker(max_attempts=3)
+        assert await worker.process_next()
+        assert not await worker.process_next()
+
+        db_session.expire_all()
+        assert contract.blockchain_tx_id == "tx-1"
+        assert db_session.query(LedgerOperation).one().status == LedgerOperationStatus.SUCCEEDED
+
+    @pytest.mark.asyncio
+    async def test_failures_are_retried_then_dead_lettered(self, monkeypatch, db_session, contract):
+        """Failed attempts are rescheduled until max_attempts is reached"""
+        ledger_stub(monkeypatch, [RuntimeError("peer down"), None])
+        enqueue_ledger_operation(db_session, "create_contract", {}, contract=contract)
+        db_session.commit()
+
+        worker = LedgerOperationWorker(max_attempts=2)
+        assert await worker.process_next()
+        db_session.expire_all()
+        ledger_operation = db_session.query(LedgerOperation).one()
+        assert ledger_operation.status == LedgerOperationStatus.PENDING
+        assert ledger_operation.error_message == "peer down"
+
+        assert await worker.process_next()
+        db_session.expire_all()
+        assert ledger_operation.status == LedgerOperationStatus.DEAD_LETTER
+        assert ledger_operation.attempts == 2
+        assert get_queue_stats(db_session)["dead_letter"] == 1
+
+    @pytest.mark.asyncio
+    async def test_operations_for_a_contract_run_in_order(self, monkeypatch, db_session, contract):
+        """A newer operation waits while an older one for the contract is active"""
+        calls = ledger_stub(monkeypatch, [RuntimeError("peer down"), "tx-1", "tx-2"])
+        enqueue_ledger_operation(db_session, "create_contract", {}, contract=contract)
+        enqueue_ledger_operation(db_session, "verify_contract", {}, contract=contract)
+        db_session.commit()
+
+        worker = LedgerOperationWorker(max_attempts=3)
+        while await worker.process_next():
+            pass
+
+        assert calls == ["create_contract", "create_contract", "verify_contract"]
+
+    @pytest.mark.asyncio
+    async def test_expired_lease_is_reclaimed(self, monkeypatch, db_session, contract):
+        """Operations left RUNNING by a dead worker are claimed again"""
+        ledger_stub(monkeypatch, ["tx-1"])
+        ledger_operation = enqueue_ledger_operation(db_session, "create_contract", {}, contract=contract)
+        ledger_operation.status = LedgerOperationStatus.RUNNING
+        ledger_operation.locked_until = datetime.utcnow() - timedelta(seconds=1)
+        db_session.commit()
+
+        assert await LedgerOperationWorker().process_next()
+        db_session.expire_all()
+        assert ledger_operation.status == LedgerOperationStatus.SUCCEEDED
+
+
+    @pytest.mark.asyncio
+    async def test_rejection_is_not_retried(self, monkeypatch, db_session, contract):
+        """An operation the ledger rejected is dead-lettered on its first attempt"""
+        calls = ledger_stub(monkeypatch, [None, None])
+        enqueue_ledger_operation(db_session, "verify_contract", {}, contract=contract)
+        db_session.commit()
+
+        assert await LedgerOperationWorker(max_attempts=3).process_next()
+        db_session.expire_all()
+        ledger_operation = db_session.query(LedgerOperation).one()
+        assert ledger_operation.status == LedgerOperationStatus.DEAD_LETTER
+        assert ledger_operation.attempts == 1
+
+        assert await sync_ledger_operation(db_session, "submit_contract", {}, contract=contract) is None
+        db_session.commit()
+        assert get_queue_stats(db_session)["dead_letter"] == 2
+        assert calls == ["verify_contract", "submit_contract"]
+
+    @pytest.mark.asyncio
+    async def test_breaker_rejection_keeps_attempts(self, monkeypatch, db_session, contract):
+        """Calls refused by an open breaker wait for it without using up attempts"""
+        open_error = CircuitOpenError("fabric", 30.0)
+        calls = ledger_stub(monkeypatch, [open_error, open_error])
+        assert await sync_ledger_operation(db_session, "verify_contract", {}, contract=contract) is None
+        db_session.commit()
+
+        ledger_operation = db_session.query(LedgerOperation).one()
+        assert ledger_operation.status == LedgerOperationStatus.PENDING
+        assert ledger_operation.attempts == 0
+        assert ledger_operation.next_attempt_at >= datetime.utcnow() + timedelta(seconds=29)
+
+        ledger_operation.next_attempt_at = datetime.utcnow()
+        db_session.commit()
+        assert await LedgerOperationWorker(max_attempts=1).process_next()
+        db_session.expire_all()
+        ledger_operation = db_session.query(LedgerOperation).one()
+        assert ledger_operation.status == LedgerOperationStatus.PENDING
+        assert ledger_operation.attempts == 0
+        assert ledger_operation.locked_until is None
+        assert ledger_operation.next_attempt_at >= datetime.utcnow() + timedelta(seconds=29)
+        assert calls == ["verify_contract", "verify_contract"]
+
+    @pytest.mark.asyncio
+    async def test_stale_outcome_is_dropped(self, monkeypatch, db_session, contract):
+        """A worker whose lease was reclaimed cannot overwrite the newer attempt"""
+        ledger_operation = enqueue_ledger_operation(db_session, "create_contract", {}, contract=contract)
+        db_session.commit()
+
+        stale = LedgerOperationWorker()
+        claimed = stale._claim_next()
+        db_session.expire_all()
+        ledger_operation.locked_until = datetime.utcnow() - timedelta(seconds=1)
+        db_session.commit()
+        reclaimed = LedgerOperationWorker()._claim_next()
+        assert reclaimed["attempts"] == claimed["attempts"] + 1
+
+        assert not stale._complete(claimed["id"], claimed["attempts"], "tx-stale", None)
+        db_session.expire_all()
+        assert ledger_operation.status == LedgerOperationStatus.RUNNING
+        assert ledger_operation.blockchain_tx_id is None
+        assert contract.blockchain_tx_id is None
+
+
+class TestIdempotentRetries:
+    """Test that retrying a write that already committed does not repeat it"""
+
+    @pytest.mark.asyncio
+    async def test_retry_reuses_the_key_of_the_failed_call(self, monkeypatch, db_session, contract):
+        """The queued retry of a synchronous call carries the key that call used"""
+        keys = []
+
+        async def call_ledger(operation, **kwargs):
+            keys.append(kwargs["idempotency_key"])
+            raise TimeoutError()
+
+        monkeypatch.setattr("app.fabric_client.call_ledger", call_ledger)
+        payload = {"contract_id": "C1", "payment_data": {}}
+        await sync_ledger_operation(db_session, "record_payment", payload, contract=contract)
+        db_session.commit()
+
+        ledger_operation = db_session.query(LedgerOperation).one()
+        assert ledger_operation.payload["idempotency_key"] == keys[0] == ledger_operation.id
+        assert await LedgerOperationWorker().process_next()
+        assert keys[1] == keys[0]
+
+    @pytest.mark.asyncio
+    async def test_replayed_writes_return_the_committed_tx(self):
+        """A replayed payment is recorded once, a replayed transition is not rejected"""
+        client = FabricClient({})
+        await client.create_contract("C1", "V1", {}, "tester", idempotency_key="create")
+        assert await client.create_contract("C1", "V1", {}, "tester", idempotency_key="create")
+
+        payment = await client.record_payment("C1", {"amount": 10}, idempotency_key="pay")
+        assert await client.record_payment("C1", {"amount": 10}, idempotency_key="pay") == payment
+        assert len((await client.query_contract("C1"))["payments"]) == 1
+
+        verified = await client.verify_contract("C1", "verifier", idempotency_key="verify")
+        assert await client.verify_contract("C1", "verifier", idempotency_key="verify") == verified
+        assert await client.verify_contract("C1", "verifier", idempotency_key="other") == verified
+        assert await client.verify_contract("C1", "verifier") is None
+
+
+class TestLedgerOperationEndpoints:
+    """Test deferred writes and the operation status endpoint"""
+
+    CONTRACT = {
+        "contract_id": "CONTRACT002", "vendor_id": "VENDOR001", "contract_type": "SERVICE",
+        "total_value": 500, "expiry_date": "2031-01-01", "created_by": "tester"
+    }
+
+    @pytest.mark.asyncio
+    async def test_prefer_async_returns_accepted(self, monkeypatch, client, contract):
+        """Prefer: respond-async queues the ledger write and points at its status"""
+        calls = ledger_stub(monkeypatch, [])
+        async with client:
+            response = await client.post(
+                "/api/v1/contracts/", json=self.CONTRACT, headers={"Prefer": "respond-async"}
+            )
+            assert response.status_code == 202
+            assert response.headers["Preference-Applied"] == "respond-async"
+            assert response.headers["Location"] == f"/api/v1/ledger-operations/{response.json()['id']}"
+            assert response.json()["status"] == "PENDING"
+
+            status = await client.get(response.headers["Location"])
+            assert status.status_code == 200
+            assert status.json()["operation"] == "create_contract"
+        assert calls == []
+
+    @pytest.mark.asyncio
+    async def test_without_prefer_writes_synchronously(self, monkeypatch, db_session, client, contract):
+        """Without Prefer the ledger is called before the response"""
+        calls = ledger_stub(monkeypatch, ["tx-sync"])
+        async with client:
+            response = await client.post("/api/v1/contracts/", json=self.CONTRACT)
+        assert response.status_code == 200
+        assert response.json()["blockchain_tx_id"] == "tx-sync"
+        assert calls == ["create_contract"]
+        assert db_session.query(LedgerOperation).count() == 0
+
+    @pytest.mark.asyncio
+    async def test_status_follows_operation(self, monkeypatch, db_session, client, contract):
+        """Polling reports PENDING, then SUCCEEDED or DEAD_LETTER"""
+        ledger_stub(monkeypatch, ["tx-1", RuntimeError("peer down")])
+        succeeded = enqueue_ledger_operation(db_session, "create_contract", {}, contract=contract)
+        db_session.commit()
+        url = f"/api/v1/ledger-operations/{succeeded.id}"
+
+        worker = LedgerOperationWorker(max_attempts=1)
+        async with client:
+            assert (await client.get(url)).json()["status"] == "PENDING"
+            assert await worker.process_next()
+            body = (await client.get(url)).json()
+            assert body["status"] == "SUCCEEDED"
+            assert body["blockchain_tx_id"] == "tx-1"
+
+            failed = enqueue_ledger_operation(db_session, "verify_contract", {}, contract=contract)
+            db_session.commit()
+            assert await worker.process_next()
+            body = (await client.get(f"/api/v1/ledger-operations/{failed.id}")).json()
+            assert body["status"] == "DEAD_LETTER"
+            assert body["error_message"] == "peer down"
+
+    @pytest.mark.asyncio
+    async def test_unknown_operation(self, client):
+        """An unknown ID is a 404, with or without waiting"""
+        async with client:
+            assert (await client.get("/api/v1/ledger-operations/missing")).status_code == 404
+            assert (await client.get("/api/v1/ledger-operations/missing?wait=5")).status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_long_poll_wakes_on_completion(self, monkeypatch, db_session, client, contract):
+        """A waiting request returns as soon as the operation completes, not at its timeout"""
+        monkeypatch.setattr(settings, "ledger_worker_poll_interval", 30.0)
+        ledger_operation = enqueue_ledger_operation(db_session, "create_contract", {}, contract=contract)
+        db_session.commit()
+
+        async with client:
+            started = time.perf_counter()
+            poll = asyncio.create_task(
+                client.get(f"/api/v1/ledger-operations/{ledger_operation.id}?wait=20")
+            )
+            while get_waiter_count() == 0:
+                await asyncio.sleep(0.01)
+
+            ledger_operation.status = LedgerOperationStatus.SUCCEEDED
+            db_session.commit()
+            _notify_completion(ledger_operation.id)
+            response = await poll
+
+        assert response.json()["status"] == "SUCCEEDED"
+        assert time.perf_counter() - started < 5
+        assert get_waiter_count() == 0
@@ -0,0 +1,105 @@
+"""
+Test suite for the ledger sidecar and its Unix socket protocol
+"""
+
+import asyncio
+import tempfile
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import pytest
+
+from app.fabric_client import FabricClient, ShardedFabricClient
+from app.ledger_sidecar import (
+    CALL, HEADER, LedgerSidecar, LedgerSidecarError, SidecarFabricClient, encode_frame, read_frame
+)
+
+
+@asynccontextmanager
+async def running_sidecar():
+    """Sidecar over two mock channels on a temporary socket"""
+    # Unix socket paths are limited to about 100 characters
+    with tempfile.TemporaryDirectory(prefix="vc-") as directory:
+        client = ShardedFabricClient([
+            FabricClient({"channel_name": f"vendorcontract{index}"}) for index in range(2)
+        ])
+        sidecar = LedgerSidecar(client, str(Path(directory) / "ledger.sock"))
+        await sidecar.start()
+        try:
+            yield sidecar
+        finally:
+            await sidecar.stop()
+
+
+class TestFraming:
+    """Test the binary frame format"""
+
+    @pytest.mark.asyncio
+    async def test_frame_roundtrip(self):
+        """Frames decode to the request ID, type and payload sent"""
+        async with running_sidecar() as sidecar:
+            frame = encode_frame(7, CALL, {"op": "status"})
+            reader = asyncio.StreamReader()
+            reader.feed_data(frame)
+
+            assert len(frame) == HEADER.size + len(b'{"op":"status"}')
+            assert await read_frame(reader) == (7, CALL, {"op": "status"})
+
+
+class TestLedgerSidecar:
+    """Test workers sharing one ledger client through the sidecar"""
+
+    @pytest.mark.asyncio
+    async def test_workers_share_ledger_state(self):
+        """A contract created by one worker is verified by another"""
+        async with running_sidecar() as sidecar:
+            first, second = SidecarFabricClient(sidecar.socket_path), SidecarFabricClient(sidecar.socket_path)
+            assert await first.connect()
+            assert await second.connect()
+            assert [channel["channel"] for channel in first.channel_status()] == ["vendorcontract0", "vendorcontract1"]
+
+            assert await first.create_contract(
+                contract_id="SIDECAR001", vendor_id="VENDOR001", contract_data={}, created_by="tester"
+            )
+            assert await second.verify_contract(contract_id="SIDECAR001", verified_by="tester", vendor_id="VENDOR001")
+            assert (await second.query_contract("SIDECAR001"))["status"] == "VERIFIED"
+            await first.disconnect()
+            await second.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_multiplex_one_connection(self):
+        """Many in-flight calls share a connection and get their own results"""
+        async with running_sidecar() as sidecar:
+            client = SidecarFabricClient(sidecar.socket_path)
+            tx_ids = await asyncio.gather(*(
+                client.create_contract(
+                    contract_id=f"SIDECAR1{n:02d}", vendor_id=f"VENDOR{n}", contract_data={}, created_by="tester"
+                )
+                for n in range(20)
+            ))
+
+            assert all(tx_ids)
+            assert len(sidecar._connections) == 1
+            contracts = await asyncio.gather(*(client.query_contract(f"SIDECAR1{n:02d}") for n in range(20)))
+            assert [contract["vendorId"] for contract in contracts] == [f"VENDOR{n}" for n in range(20)]
+            await client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_errors_are_forwarded(self):
+        """Exceptions inside the sidecar are raised in the worker"""
+        async with running_sidecar() as sidecar:
+            client = SidecarFabricClient(sidecar.socket_path)
+
+            with pytest.raises(LedgerSidecarError) as error:
+                await client.create_contract(contract_id="SIDECAR002")
+            assert error.value.error_type == "TypeError"
+            await client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_unreachable_sidecar(self):
+        """A missing socket reports the ledger as disconnected"""
+        client = SidecarFabricClient("/tmp/vc-missing-ledger.sock")
+
+        assert not await client.connect()
+        with pytest.raises(OSError):
+            await client.query_contract("SIDECAR003")
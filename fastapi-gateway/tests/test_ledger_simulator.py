@@ -0,0 +1,113 @@
+"""
+Test suite for the block-cutting ledger simulator
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.fabric_client import FabricClient
+from app.ledger_simulator import (
+    MVCC_READ_CONFLICT, VALID, LatencyProfile, LedgerSimulator, parse_distribution
+)
+from app.ledger_state import MemoryStateBackend
+
+
+def fast_profile(**overrides) -> LatencyProfile:
+    """Profile with negligible latencies unless overridden"""
+    values = {
+        "endorsement_latency": "fixed:0",
+        "query_latency": "fixed:0",
+        "batch_timeout": 0.05,
+        "max_message_count": 3,
+        "block_validation_cost": 0.0,
+        "tx_validation_cost": 0.0,
+        "seed": 1
+    }
+    values.update(overrides)
+    return LatencyProfile(**values)
+
+
+def put_value(value):
+    """Transaction write that stores a fresh value"""
+    return lambda current: {"value": value}
+
+
+class TestDistributions:
+    """Test latency distribution specs"""
+
+    @pytest.mark.parametrize("spec", [
+        "fixed:0.05", "uniform:0.01,0.02", "normal:0.05,0.01",
+        "lognormal:0.05,0.5", "exponential:0.05"
+    ])
+    def test_samples_are_non_negative(self, spec):
+        """Every supported distribution yields usable delays"""
+        sample = parse_distribution(spec)
+        assert all(sample() >= 0 for _ in range(100))
+
+    @pytest.mark.parametrize("spec", ["gamma:1,2", "uniform:0.1", "fixed:abc"])
+    def test_invalid_spec_rejected(self, spec):
+        """Unknown kinds and wrong parameter counts are errors"""
+        with pytest.raises(ValueError):
+            parse_distribution(spec)
+
+
+class TestBlockCutting:
+    """Test batching and MVCC validation"""
+
+    @pytest.mark.asyncio
+    async def test_full_batch_cuts_block(self):
+        """max_message_count transactions form one block without waiting for the timeout"""
+        simulator = LedgerSimulator(fast_profile(batch_timeout=10.0))
+        state = MemoryStateBackend()
+
+        started = time.monotonic()
+        codes = await asyncio.gather(*(
+            simulator.submit(state, f"key{n}", None, put_value(n)) for n in range(3)
+        ))
+
+        assert codes == [VALID] * 3
+        assert simulator.block_height == 1
+        assert time.monotonic() - started < 1.0
+
+    @pytest.mark.asyncio
+    async def test_batch_timeout_cuts_partial_block(self):
+        """A lone transaction is committed once the batch timeout expires"""
+        simulator = LedgerSimulator(fast_profile())
+        state = MemoryStateBackend()
+
+        assert await simulator.submit(state, "key", None, put_value(1)) == VALID
+        assert state.get("key") == {"value": 1, "version": 1}
+        assert simulator.snapshot()["block_height"] == 1
+
+    @pytest.mark.asyncio
+    async def test_conflicting_writes_in_one_block(self):
+        """Only the first of two writes endorsed against the same version commits"""
+        simulator = LedgerSimulator(fast_profile(max_message_count=2))
+        state = MemoryStateBackend()
+        state.put("key", {"value": 0})
+        read_value = state.get("key")
+
+        codes = await asyncio.gather(
+            simulator.submit(state, "key", read_value, put_value(1)),
+            simulator.submit(state, "key", read_value, put_value(2))
+        )
+
+        assert codes == [VALID, MVCC_READ_CONFLICT]
+        assert state.get("key")["value"] == 1
+        assert simulator.mvcc_conflicts == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_verifications_conflict(self):
+        """Only one of two concurrent verifications of a contract succeeds"""
+        client = FabricClient({"simulator": fast_profile()})
+        assert await client.create_contract("C1", "V1", {}, "tester")
+
+        results = await asyncio.gather(
+            client.verify_contract("C1", "first"),
+            client.verify_contract("C1", "second")
+        )
+
+        assert len([tx_id for tx_id in results if tx_id]) == 1
+        assert client.simulator_status()["mvcc_conflicts"] == 1
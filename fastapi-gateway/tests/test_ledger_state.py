@@ -0,0 +1,202 @@
+"""
+Test suite for the stand-in ledger state backends
+"""
+
+import asyncio
+import multiprocessing
+import sqlite3
+import threading
+
+import pytest
+
+from app.fabric_client import FabricClient
+from app.ledger_state import (
+    MemoryStateBackend, SQLiteStateBackend, SnapshotStateBackend, create_state_backend
+)
+
+
+def append_entries(path: str, count: int):
+    """Append to a shared list from a separate process"""
+    backend = SQLiteStateBackend(path, "test")
+
+    def apply(value):
+        value["entries"].append(len(value["entries"]))
+        return value
+
+    for _ in range(count):
+        backend.update("counter", apply)
+    backend.close()
+
+
+@pytest.fixture(params=["memory", "sqlite", "snapshot"])
+def backend(request, tmp_path):
+    """Each backend kind over a fresh store"""
+    backend = create_state_backend(request.param, "test", str(tmp_path / "state.db"), snapshot_every=2)
+    yield backend
+    backend.close()
+
+
+class TestStateBackends:
+    """Test the key-value contract shared by all backends"""
+
+    def test_put_get_returns_copies(self, backend):
+        """Mutating a returned value does not change the store"""
+        backend.put("C1", {"status": "CREATED"})
+        value = backend.get("C1")
+        value["status"] = "VERIFIED"
+
+        assert backend.get("C1") == {"status": "CREATED"}
+        assert "C1" in backend
+        assert "C2" not in backend
+
+    def test_aborted_update_leaves_value(self, backend):
+        """An update returning None writes nothing"""
+        backend.put("C1", {"status": "CREATED"})
+
+        assert backend.update("C1", lambda value: None) is None
+        assert backend.get("C1") == {"status": "CREATED"}
+
+    def test_unknown_backend_rejected(self):
+        """Only memory and sqlite backends exist"""
+        with pytest.raises(ValueError):
+            create_state_backend("lmdb", "test")
+
+
+class TestSharedState:
+    """Test state shared between worker processes"""
+
+    def test_concurrent_updates_across_processes(self, tmp_path):
+        """Read-modify-write updates from several processes are not lost"""
+        path = str(tmp_path / "state.db")
+        SQLiteStateBackend(path, "test").put("counter", {"entries": []})
+
+        workers = [
+            multiprocessing.get_context("spawn").Process(target=append_entries, args=(path, 50))
+            for _ in range(3)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=60)
+
+        assert SQLiteStateBackend(path, "test").get("counter")["entries"] == list(range(150))
+
+    @pytest.mark.asyncio
+    async def test_clients_share_contract_lifecycle(self, tmp_path):
+        """A contract created through one client can be verified through another"""
+        config = {"state_backend": "sqlite", "state_path": str(tmp_path / "state.db")}
+        first, second = FabricClient(config), FabricClient(config)
+
+        assert await first.create_contract("C1", "V1", {}, "tester")
+        assert await second.verify_contract("C1", "verifier")
+        assert not await first.verify_contract("C1", "verifier")
+        assert (await first.query_contract("C1"))["status"] == "VERIFIED"
+
+    @pytest.mark.asyncio
+    async def test_locked_update_leaves_loop_running(self, tmp_path):
+        """An update waiting for another writer's lock does not stall the event loop"""
+        path = str(tmp_path / "state.db")
+        backend = SQLiteStateBackend(path, "test")
+        backend.put("C1", {"n": 1})
+        writer = sqlite3.connect(path, isolation_level=None)
+        writer.execute("BEGIN IMMEDIATE")
+
+        update = asyncio.create_task(backend.update_async("C1", lambda value: {"n": value["n"] + 1}))
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+        assert not update.done()
+
+        writer.execute("COMMIT")
+        writer.close()
+        assert await update == {"n": 2}
+        backend.close()
+
+    def test_memory_backend_is_per_instance(self):
+        """The memory backend keeps the original per-process behaviour"""
+        MemoryStateBackend().put("C1", {})
+        assert "C1" not in MemoryStateBackend()
+
+
+class TestSnapshotBackend:
+    """Test snapshot compaction, restart and eviction"""
+
+    def test_restart_recovers_snapshot_and_log(self, tmp_path):
+        """State written before and after a snapshot survives a restart"""
+        backend = SnapshotStateBackend(str(tmp_path), "test", snapshot_every=3)
+        for n in range(5):
+            backend.put(f"C{n}", {"n": n})
+        backend.update("C0", lambda value: {**value, "status": "VERIFIED"})
+        backend._wait_for_compaction()
+        # Simulate a crash: release files without the closing snapshot
+        backend._close_files()
+        backend._lock_file.close()
+
+        restarted = SnapshotStateBackend(str(tmp_path), "test")
+        assert [restarted.get(f"C{n}")["n"] for n in range(5)] == list(range(5))
+        assert restarted.get("C0")["status"] == "VERIFIED"
+        restarted.close()
+
+    def test_torn_log_record_is_dropped(self, tmp_path):
+        """A partial final log line from a crash is ignored"""
+        backend = SnapshotStateBackend(str(tmp_path), "test")
+        backend.put("C1", {"n": 1})
+        backend._wal.write(b'C2\t{"n":')
+        backend._close_files()
+        backend._lock_file.close()
+
+        restarted = SnapshotStateBackend(str(tmp_path), "test")
+        assert restarted.get("C1") == {"n": 1}
+        assert "C2" not in restarted
+        restarted.put("C3", {"n": 3})
+        assert restarted.get("C3") == {"n": 3}
+        restarted.close()
+
+    def test_cache_is_bounded(self, tmp_path):
+        """Cold values are evicted from memory and read back from disk"""
+        backend = SnapshotStateBackend(str(tmp_path), "test", cache_size=10, snapshot_every=25)
+        for n in range(100):
+            backend.put(f"C{n}", {"payments": [n] * 10})
+
+        assert len(backend._cache) == 10
+        assert backend.get("C3") == {"payments": [3] * 10}
+        assert backend.get("C99") == {"payments": [99] * 10}
+        backend.close()
+
+    def test_writes_continue_during_compaction(self, tmp_path):
+        """Compaction runs off the writing thread, and a crash before its swap loses nothing"""
+        backend = SnapshotStateBackend(str(tmp_path), "test", snapshot_every=3)
+        crashed = threading.Event()
+        # The compaction never finishes before the crash
+        backend._compact = lambda *layers: crashed.wait(5)
+        for n in range(5):
+            backend.put(f"C{n}", {"n": n})
+        assert backend._compacting
+        backend.put("C0", {"n": 10})
+        assert backend.get("C1") == {"n": 1}
+        assert backend.get("C0") == {"n": 10}
+
+        # Crash before the new snapshot is swapped in
+        backend._close_files()
+        backend._lock_file.close()
+        restarted = SnapshotStateBackend(str(tmp_path), "test", snapshot_every=3)
+        crashed.set()
+        assert [restarted.get(f"C{n}")["n"] for n in range(5)] == [10, 1, 2, 3, 4]
+        restarted.close()
+
+        backend = SnapshotStateBackend(str(tmp_path), "test", snapshot_every=3)
+        for n in range(7):
+            backend.put(f"D{n}", {"n": n})
+        backend._wait_for_compaction()
+        assert backend._frozen == []
+        assert backend.get("C0") == {"n": 10}
+        assert [backend.get(f"D{n}")["n"] for n in range(7)] == list(range(7))
+        backend.close()
+
+    def test_directory_is_exclusive(self, tmp_path):
+        """A second process cannot open the same state directory"""
+        backend = SnapshotStateBackend(str(tmp_path), "test")
+        backend.put("C1", {})
+
+        with pytest.raises(RuntimeError):
+            SnapshotStateBackend(str(tmp_path), "test").get("C1")
+        backend.close()
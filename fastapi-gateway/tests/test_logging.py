@@ -0,0 +1,153 @@
+"""
+Test suite for structured queue-based logging
+"""
+
+import io
+import json
+import logging
+import queue
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.logging_config import (
+    DeferredQueueHandler,
+    JsonFormatter,
+    StdlibJsonFormatter,
+    RequestContextFilter,
+    RequestContextMiddleware,
+    SamplingFilter,
+    parse_sample_rates
+)
+
+
+def captured_logger(name: str):
+    """Logger whose records are queued through the context filter, and the queue"""
+    records = queue.SimpleQueue()
+    handler = DeferredQueueHandler(records)
+    handler.addFilter(RequestContextFilter())
+    log = logging.getLogger(name)
+    log.handlers = [handler]
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    return log, records
+
+
+def drain(records: queue.SimpleQueue):
+    items = []
+    while not records.empty():
+        items.append(records.get_nowait())
+    return items
+
+
+class TestSampling:
+    """Test per-logger sampling rates"""
+
+    def test_parse_sample_rates(self):
+        """Pairs are parsed, clamped, and malformed ones skipped"""
+        rates = parse_sample_rates("app.access=0.1, app.routers=2,broken,app.x=abc")
+        assert rates == {"app.access": 0.1, "app.routers": 1.0}
+
+    def test_rate_is_inherited_from_parent_logger(self):
+        """A child logger uses the closest configured parent's rate"""
+        sampling = SamplingFilter({"app": 0.5, "app.routers.contracts": 0.0})
+        assert sampling.rate_for("app.routers.contracts") == 0.0
+        assert sampling.rate_for("app.routers.vendors") == 0.5
+        assert sampling.rate_for("uvicorn") == 1.0
+
+    def test_warnings_are_never_sampled(self):
+        """Only INFO and below are dropped"""
+        sampling = SamplingFilter({"app": 0.0})
+        info = logging.LogRecord("app.x", logging.INFO, __file__, 1, "hello", None, None)
+        warning = logging.LogRecord("app.x", logging.WARNING, __file__, 1, "careful", None, None)
+        assert sampling.filter(info) is False
+        assert sampling.filter(warning) is True
+
+
+class TestQueueHandler:
+    """Test deferred formatting and JSON output"""
+
+    def test_message_is_formatted_by_the_listener(self):
+        """Records are queued with their arguments, not a formatted message"""
+        log, records = captured_logger("test.logging.deferred")
+        log.info("Created contract %s", "CONTRACT-1")
+
+        record, = drain(records)
+        assert record.msg == "Created contract %s"
+        assert record.args == ("CONTRACT-1",)
+
+        stream = io.StringIO()
+        output = logging.StreamHandler(stream)
+        output.setFormatter(JsonFormatter())
+        output.handle(record)
+        line = json.loads(stream.getvalue())
+        assert line["message"] == "Created contract CONTRACT-1"
+        assert line["level"] == "INFO"
+        assert line["logger"] == "test.logging.deferred"
+        assert "request_id" not in line
+
+    def test_stdlib_formatter_matches(self):
+        """Without python-json-logger, lines carry the same fields"""
+        record = logging.makeLogRecord({
+            "name": "test.logging.stdlib", "levelno": logging.INFO, "levelname": "INFO",
+            "msg": "Paid %s", "args": ("C1",), "latency_ms": 1.5, "request_id": None
+        })
+        lines = []
+        for formatter in (JsonFormatter(), StdlibJsonFormatter()):
+            stream = io.StringIO()
+            output = logging.StreamHandler(stream)
+            output.setFormatter(formatter)
+            output.handle(record)
+            lines.append(json.loads(stream.getvalue()))
+        assert lines[1]["message"] == "Paid C1"
+        assert lines[1]["latency_ms"] == 1.5
+        assert lines[1].keys() == lines[0].keys()
+
+
+class TestRequestContextMiddleware:
+    """Test request context on log records"""
+
+    def test_records_carry_request_id_route_and_latency(self):
+        """Route logs and the access line share the request ID"""
+        log, records = captured_logger("test.logging.route")
+        access, access_records = captured_logger("app.access")
+
+        app = FastAPI()
+
+        @app.get("/items/{item_id}")
+        def read_item(item_id: str):
+            log.info("Reading item %s", item_id)
+            return {"item_id": item_id}
+
+        app.add_middleware(RequestContextMiddleware)
+        client = TestClient(app)
+        try:
+            response = client.get("/items/42", headers={"X-Request-ID": "req-123"})
+        finally:
+            access.handlers = []
+            access.propagate = True
+
+        assert response.status_code == 200
+        assert response.headers["x-request-id"] == "req-123"
+
+        record, = drain(records)
+        assert record.request_id == "req-123"
+        assert record.route == "/items/{item_id}"
+
+        line, = drain(access_records)
+        assert line.request_id == "req-123"
+        assert line.status == 200
+        assert line.latency_ms >= 0
+        assert line.getMessage() == "GET /items/42 200"
+
+    def test_request_id_is_generated(self):
+        """Requests without X-Request-ID get one"""
+        app = FastAPI()
+
+        @app.get("/ping")
+        def ping():
+            return {"ok": True}
+
+        app.add_middleware(RequestContextMiddleware, access_log=False)
+        response = TestClient(app).get("/ping")
+        assert len(response.headers["x-request-id"]) == 32
@@ -0,0 +1,53 @@
+"""
+Test suite for the event loop lag monitor
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.loop_monitor import EVENT_LOOP_STALLS, LoopLagMonitor
+
+
+def blocking_database_call():
+    """Stand-in for a synchronous Session call inside an async route"""
+    time.sleep(0.3)
+
+
+class TestLoopLagMonitor:
+    """Test lag measurement and stall capture"""
+
+    @pytest.mark.asyncio
+    async def test_blocking_call_is_captured(self):
+        """The watchdog records the stack of the call blocking the loop"""
+        monitor = LoopLagMonitor(interval=0.02, threshold=0.1)
+        stalls_before = EVENT_LOOP_STALLS.value()
+        monitor.start()
+        try:
+            await asyncio.sleep(0.05)
+            blocking_database_call()
+            await asyncio.sleep(0.05)
+        finally:
+            await monitor.stop()
+
+        stalls = monitor.stalls()
+        assert len(stalls) == 1
+        assert stalls[0]["duration_seconds"] >= 0.2
+        assert "blocking_database_call" in stalls[0]["stack"][-1]
+        assert monitor.max_lag >= 0.2
+        assert EVENT_LOOP_STALLS.value() == stalls_before + 1
+
+    @pytest.mark.asyncio
+    async def test_idle_loop_has_no_stalls(self):
+        """Yielding code does not trip the threshold"""
+        monitor = LoopLagMonitor(interval=0.02, threshold=0.1)
+        monitor.start()
+        try:
+            for _ in range(10):
+                await asyncio.sleep(0.01)
+        finally:
+            await monitor.stop()
+
+        assert monitor.stalls() == []
+        assert monitor.max_lag < 0.1
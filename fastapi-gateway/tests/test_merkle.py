@@ -0,0 +1,175 @@
+"""
+Test suite for Merkle trees and batched contract anchoring
+"""
+
+import pytest
+from datetime import date, timedelta
+
+from app.anchoring import MerkleAnchorer, get_contract_proof, record_contract_change
+from app.merkle import build_tree, inclusion_proof, leaf_hash, merkle_root, verify_proof
+from app.models import Vendor, Contract, MerkleAnchor, MerkleAnchorStatus, MerkleLeaf
+
+
+@pytest.fixture
+def contracts(db_session):
+    """Three persisted sample contracts"""
+    vendor = Vendor(vendor_id="VENDOR001", name="Acme", contact_email="a@acme.com")
+    contracts = [
+        Contract(
+            contract_id=f"CONTRACT00{index}",
+            vendor=vendor,
+            contract_type="SERVICE",
+            total_value=1000,
+            paid_amount=0,
+            expiry_date=date.today() + timedelta(days=30),
+            created_by="tester",
+            payment_history=[]
+        )
+        for index in range(3)
+    ]
+    db_session.add_all(contracts)
+    db_session.commit()
+    return contracts
+
+
+class TestMerkleTree:
+    """Test tree construction and proof verification"""
+
+    @pytest.mark.parametrize("count", [1, 2, 3, 5, 8])
+    def test_every_leaf_proves_against_root(self, count):
+        """Proofs verify for each leaf, including odd-sized levels"""
+        leaves = [leaf_hash({"n": n}) for n in range(count)]
+        levels = build_tree(leaves)
+        root = merkle_root(levels)
+
+        for index, leaf in enumerate(leaves):
+            assert verify_proof(leaf, inclusion_proof(levels, index), root)
+
+    def test_tampered_leaf_fails(self):
+        """A modified record does not verify against the original root"""
+        levels = build_tree([leaf_hash({"n": n}) for n in range(4)])
+        proof = inclusion_proof(levels, 2)
+
+        assert not verify_proof(leaf_hash({"n": 99}), proof, merkle_root(levels))
+
+    def test_leaf_hash_is_key_order_independent(self):
+        """Canonical serialization ignores dict ordering"""
+        assert leaf_hash({"a": 1, "b": 2}) == leaf_hash({"b": 2, "a": 1})
+
+    def test_empty_tree_rejected(self):
+        """A tree needs at least one leaf"""
+        with pytest.raises(ValueError):
+            build_tree([])
+
+
+class TestMerkleAnchorer:
+    """Test sealing windows and serving contract proofs"""
+
+    @pytest.mark.asyncio
+    async def test_window_anchors_single_root(self, monkeypatch, db_session, contracts):
+        """All changes in a window are committed with one ledger call"""
+        calls = []
+
+        async def call_ledger(operation, **kwargs):
+            calls.append((operation, kwargs["leaf_count"]))
+            return "tx-root"
+
+        monkeypatch.setattr("app.fabric_client.call_ledger", call_ledger)
+        for contract in contracts:
+            record_contract_change(db_session, contract, "CREATE")
+        db_session.commit()
+
+        assert len(await MerkleAnchorer().anchor_window()) == 1
+        assert calls == [("anchor_root", 3)]
+
+        db_session.expire_all()
+        proof = get_contract_proof(db_session, contracts[1])
+        assert proof["verified"]
+        assert proof["matches_current_state"]
+        assert proof["blockchain_tx_id"] == "tx-root"
+        assert proof["pending_changes"] == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_root_is_retried(self, monkeypatch, db_session, contracts):
+        """A root that could not be committed stays pending for the next window"""
+        results = [RuntimeError("orderer down"), "tx-root"]
+
+        async def call_ledger(operation, **kwargs):
+            result = results.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        monkeypatch.setattr("app.fabric_client.call_ledger", call_ledger)
+        record_contract_change(db_session, contracts[0], "CREATE")
+        db_session.commit()
+
+        anchorer = MerkleAnchorer()
+        assert await anchorer.anchor_window() == []
+        assert len(await anchorer.anchor_window()) == 1
+
+        db_session.expire_all()
+        anchor = db_session.query(MerkleAnchor).one()
+        assert anchor.status == MerkleAnchorStatus.ANCHORED
+
+    @pytest.mark.asyncio
+    async def test_proof_detects_changed_contract(self, monkeypatch, db_session, contracts):
+        """Editing the stored contract after anchoring is reported"""
+        async def call_ledger(operation, **kwargs):
+            return "tx-root"
+
+        monkeypatch.setattr("app.fabric_client.call_ledger", call_ledger)
+        record_contract_change(db_session, contracts[0], "CREATE")
+        db_session.commit()
+        await MerkleAnchorer().anchor_window()
+
+        db_session.expire_all()
+        contracts[0].total_value = 5000
+        db_session.commit()
+
+        proof = get_contract_proof(db_session, contracts[0])
+        assert proof["verified"]
+        assert not proof["matches_current_state"]
+
+    @pytest.mark.asyncio
+    async def test_leaves_store_their_proofs(self, monkeypatch, db_session, contracts):
+        """Sealing stores each leaf's sibling path instead of the whole tree"""
+        async def call_ledger(operation, **kwargs):
+            return "tx-root"
+
+        monkeypatch.setattr("app.fabric_client.call_ledger", call_ledger)
+        for contract in contracts:
+            record_contract_change(db_session, contract, "CREATE")
+        db_session.commit()
+        await MerkleAnchorer().anchor_window()
+
+        db_session.expire_all()
+        anchor = db_session.query(MerkleAnchor).one()
+        for leaf in db_session.query(MerkleLeaf).all():
+            assert verify_proof(leaf.leaf_hash, leaf.proof, anchor.root_hash)
+
+    @pytest.mark.asyncio
+    async def test_leased_root_is_anchored_once(self, monkeypatch, db_session, contracts):
+        """A root claimed by one anchorer is skipped by the others until its lease expires"""
+        calls = []
+
+        async def call_ledger(operation, **kwargs):
+            calls.append(operation)
+            return "tx-root"
+
+        monkeypatch.setattr("app.fabric_client.call_ledger", call_ledger)
+        record_contract_change(db_session, contracts[0], "CREATE")
+        db_session.commit()
+
+        first, second = MerkleAnchorer(), MerkleAnchorer()
+        first._seal_window()
+        claimed = first._claim_pending_anchors()
+        assert len(claimed) == 1
+        assert await second.anchor_window() == []
+        assert calls == []
+
+        first._mark_anchored(claimed[0]["id"], "tx-root")
+        db_session.expire_all()
+        anchor = db_session.query(MerkleAnchor).one()
+        assert anchor.status == MerkleAnchorStatus.ANCHORED
+        assert anchor.locked_until is None
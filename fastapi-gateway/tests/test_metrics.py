@@ -0,0 +1,98 @@
+"""
+Test suite for Prometheus metrics
+"""
+
+import threading
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.metrics import Counter, Gauge, Histogram, MetricsMiddleware, HTTP_REQUEST_DURATION
+
+
+class TestMetricTypes:
+    """Test recording and text exposition"""
+
+    def test_counter_sums_thread_shards(self):
+        """Increments from many threads are all counted"""
+        counter = Counter("test_events_total", "Events", ("kind",))
+
+        def record():
+            for _ in range(10000):
+                counter.inc("a")
+
+        threads = [threading.Thread(target=record) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert counter.value("a") == 80000
+        assert 'test_events_total{kind="a"} 80000' in counter.render()
+
+    def test_exited_thread_shards_are_retired(self):
+        """Shards of finished threads are folded into one total without losing counts"""
+        counter = Counter("test_jobs_total", "Jobs")
+        histogram = Histogram("test_job_seconds", "Job time", buckets=(1.0,))
+
+        def record():
+            counter.inc()
+            histogram.observe(0.5)
+
+        for _ in range(5):
+            thread = threading.Thread(target=record)
+            thread.start()
+            thread.join()
+
+        assert counter.value() == 5
+        assert histogram.count() == 5
+        assert counter._shards == [] and histogram._shards == []
+
+        record()
+        assert counter.value() == 6
+        assert 'test_job_seconds_count 6' in histogram.render()
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Bucket counts include every smaller bucket"""
+        histogram = Histogram("test_latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            histogram.observe(value, "/x")
+
+        lines = histogram.render()
+        assert '# TYPE test_latency_seconds histogram' in lines
+        assert 'test_latency_seconds_bucket{route="/x",le="0.1"} 1' in lines
+        assert 'test_latency_seconds_bucket{route="/x",le="1"} 3' in lines
+        assert 'test_latency_seconds_bucket{route="/x",le="+Inf"} 4' in lines
+        assert 'test_latency_seconds_sum{route="/x"} 6.05' in lines
+        assert 'test_latency_seconds_count{route="/x"} 4' in lines
+
+    def test_gauge_label_escaping(self):
+        """Label values are escaped"""
+        gauge = Gauge("test_entries", "Entries", ("cache",))
+        gauge.set(3, 'say "hi"')
+
+        assert 'test_entries{cache="say \\"hi\\""} 3' in gauge.render()
+
+
+class TestMetricsMiddleware:
+    """Test per-route request latency"""
+
+    def test_routes_are_labelled_by_template(self):
+        """Requests are grouped by route template and status"""
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/items/{item_id}")
+        async def get_item(item_id: int):
+            return {"id": item_id}
+
+        client = TestClient(app)
+        before = HTTP_REQUEST_DURATION.count("GET", "/items/{item_id}", "200")
+        for item_id in range(3):
+            assert client.get(f"/items/{item_id}").status_code == 200
+        client.get("/items/abc")
+        client.get("/missing")
+
+        assert HTTP_REQUEST_DURATION.count("GET", "/items/{item_id}", "200") == before + 3
+        assert HTTP_REQUEST_DURATION.count("GET", "/items/{item_id}", "422") >= 1
+        assert HTTP_REQUEST_DURATION.count("GET", "unmatched", "404") >= 1
@@ -0,0 +1,121 @@
+"""
+Test suite for on-demand request profiling
+"""
+
+import asyncio
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app as gateway_app
+from app.profiling import AWAIT_FRAME, ProfileStore, ProfilingMiddleware
+
+
+def blocking_work():
+    """Stand-in for a synchronous call made from an async route"""
+    time.sleep(0.05)
+
+
+def profiled_app(store: ProfileStore, sample_rate: float = 0.0) -> FastAPI:
+    """App with one slow route behind the profiling middleware"""
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, sample_rate=sample_rate, interval=0.001, store=store)
+
+    @app.get("/slow")
+    async def slow():
+        blocking_work()
+        return {}
+
+    @app.get("/waiting")
+    async def waiting():
+        await asyncio.sleep(0.05)
+        return {}
+
+    return app
+
+
+class TestProfilingMiddleware:
+    """Test when and what the middleware profiles"""
+
+    def test_authorized_header_profiles_request(self, monkeypatch):
+        """X-Profile with the admin token records the blocking call"""
+        monkeypatch.setattr(settings, "admin_token", "secret")
+        store = ProfileStore()
+        client = TestClient(profiled_app(store))
+
+        response = client.get("/slow", headers={"X-Profile": "secret", "X-Request-ID": "req-1"})
+
+        assert response.headers["x-profile-id"] == "req-1"
+        profile = store.get("req-1")
+        assert profile.route == "/slow"
+        assert profile.status == 200
+        assert profile.samples > 0
+        folded = profile.folded()
+        assert "blocking_work (test_profiling.py" in folded
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in folded.strip().splitlines())
+
+    def test_awaits_are_sampled_as_suspended_stacks(self):
+        """Time spent awaiting is attributed to the awaiting coroutine"""
+        store = ProfileStore()
+        client = TestClient(profiled_app(store, sample_rate=1.0))
+
+        client.get("/waiting", headers={"X-Request-ID": "req-2"})
+
+        folded = store.get("req-2").folded()
+        assert any(
+            "waiting (test_profiling.py" in line and AWAIT_FRAME in line
+            for line in folded.splitlines()
+        )
+
+    def test_unauthorized_requests_are_not_profiled(self, monkeypatch):
+        """Requests without a valid token pass through untouched"""
+        monkeypatch.setattr(settings, "admin_token", "secret")
+        store = ProfileStore()
+        client = TestClient(profiled_app(store))
+
+        response = client.get("/slow", headers={"X-Profile": "guess"})
+        client.get("/slow")
+
+        assert "x-profile-id" not in response.headers
+        assert store.recent() == []
+
+    def test_sampling_rate_profiles_without_header(self):
+        """A sampling rate of 1 profiles every request"""
+        store = ProfileStore()
+        client = TestClient(profiled_app(store, sample_rate=1.0))
+
+        client.get("/slow")
+
+        assert store.recent()[0].trigger == "sampled"
+
+    def test_store_keeps_most_recent(self):
+        """Old profiles are evicted first"""
+        store = ProfileStore(max_profiles=2)
+        client = TestClient(profiled_app(store, sample_rate=1.0))
+
+        for n in range(3):
+            client.get("/slow", headers={"X-Request-ID": f"req-{n}"})
+
+        assert [profile.request_id for profile in store.recent()] == ["req-2", "req-1"]
+
+
+class TestProfileEndpoints:
+    """Test the admin profile endpoints"""
+
+    def test_profile_listing_and_download(self, monkeypatch):
+        """Profiles are listed and served as folded stacks"""
+        monkeypatch.setattr(settings, "admin_token", "secret")
+        client = TestClient(gateway_app)
+        headers = {"X-Admin-Token": "secret"}
+
+        client.get("/api/v1/health/live", headers={"X-Profile": "secret", "X-Request-ID": "live-1"})
+        listing = client.get("/api/v1/admin/profiles", headers=headers).json()
+        folded = client.get("/api/v1/admin/profiles/live-1", headers=headers)
+
+        assert listing[0]["request_id"] == "live-1"
+        assert listing[0]["route"] == "/api/v1/health/live"
+        assert folded.status_code == 200
+        assert client.get("/api/v1/admin/profiles/missing", headers=headers).status_code == 404
+        assert folded.headers["content-type"].startswith("text/plain")
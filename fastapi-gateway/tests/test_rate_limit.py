@@ -0,0 +1,155 @@
+"""
+Test suite for rate limiting and load shedding
+"""
+
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.rate_limit import (
+    LoadMonitor,
+    MemoryRateLimitBackend,
+    RateLimitMiddleware,
+    SQLiteRateLimitBackend,
+    TokenBucket
+)
+
+
+def limited_app(**kwargs) -> FastAPI:
+    """App with one API route behind the rate limiter"""
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, **kwargs)
+
+    @app.get("/api/v1/contracts/")
+    async def list_contracts():
+        return []
+
+    @app.get("/health")
+    async def health():
+        return {}
+
+    return app
+
+
+class TestTokenBucket:
+    """Test bucket arithmetic"""
+
+    def test_burst_then_refill(self):
+        """A full bucket admits a burst, then one request per refill interval"""
+        bucket = TokenBucket(capacity=3, now=0.0)
+        assert [bucket.take(3, 1.0, 0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert bucket.take(3, 1.0, 0.0) == 1.0
+        assert bucket.take(3, 1.0, 0.5) == 0.5
+        assert bucket.take(3, 1.0, 1.0) == 0.0
+
+    def test_sqlite_backend_is_shared(self, tmp_path):
+        """Two backends on one file draw from the same buckets"""
+        path = str(tmp_path / "limits.db")
+        first = SQLiteRateLimitBackend(path)
+        second = SQLiteRateLimitBackend(path)
+        assert first.take("client", 2, 0.001) == 0.0
+        assert second.take("client", 2, 0.001) == 0.0
+        assert first.take("client", 2, 0.001) > 0
+
+
+    def test_sqlite_backend_prunes_refilled_buckets(self, tmp_path):
+        """Buckets that have refilled are deleted on the next sweep"""
+        backend = SQLiteRateLimitBackend(str(tmp_path / "limits.db"), prune_interval=0)
+        backend.take("idle", 2, 1e9)
+        backend.take("busy", 2, 0.001)
+        backend.take("busy", 2, 0.001)
+
+        rows = backend._connection().execute("SELECT COUNT(*) FROM rate_limit").fetchone()[0]
+        assert rows == 1
+        assert backend.take("busy", 2, 0.001) > 0
+
+
+class TestRateLimitMiddleware:
+    """Test per-client limits and priority classes"""
+
+    def test_client_over_limit_gets_429(self):
+        """Requests beyond the limit are rejected with Retry-After"""
+        client = TestClient(limited_app(requests=2, period=60))
+        assert client.get("/api/v1/contracts/").status_code == 200
+        assert client.get("/api/v1/contracts/").status_code == 200
+
+        response = client.get("/api/v1/contracts/")
+        assert response.status_code == 429
+        assert response.json() == {"detail": "Rate limit exceeded"}
+        assert int(response.headers["retry-after"]) == 30
+
+    def test_limits_are_per_api_key(self):
+        """One client's overuse does not limit another"""
+        client = TestClient(limited_app(requests=1, period=60))
+        assert client.get("/api/v1/contracts/", headers={"X-API-Key": "bulk"}).status_code == 200
+        assert client.get("/api/v1/contracts/", headers={"X-API-Key": "bulk"}).status_code == 429
+        assert client.get("/api/v1/contracts/", headers={"X-API-Key": "odoo"}).status_code == 200
+
+    def test_batch_keys_use_batch_limit(self):
+        """Batch traffic has its own, smaller bucket"""
+        client = TestClient(limited_app(requests=100, period=60, batch_requests=1, batch_api_keys={"bulk"}))
+        headers = {"X-API-Key": "bulk"}
+        assert client.get("/api/v1/contracts/", headers=headers).status_code == 200
+        assert client.get("/api/v1/contracts/", headers=headers).status_code == 429
+        # Interactive requests of the same key are limited separately
+        assert client.get("/api/v1/contracts/", headers={"X-API-Key": "odoo"}).status_code == 200
+
+    def test_non_api_paths_are_not_limited(self):
+        """Health checks are never rate limited"""
+        client = TestClient(limited_app(requests=1, period=60))
+        assert all(client.get("/health").status_code == 200 for _ in range(5))
+
+    def test_backend_is_pluggable(self):
+        """The middleware draws from the backend it is given"""
+        backend = MemoryRateLimitBackend()
+        client = TestClient(limited_app(requests=1, period=60, backend=backend))
+        client.get("/api/v1/contracts/")
+        assert len(backend._buckets) == 1
+
+    def test_sqlite_backend_runs_off_the_loop(self, tmp_path, monkeypatch):
+        """The blocking sqlite backend is called from a worker thread, not the event loop"""
+        backend = SQLiteRateLimitBackend(str(tmp_path / "limits.db"))
+        on_loop = []
+        take = backend.take
+
+        def recording_take(*args):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(True)
+            except RuntimeError:
+                on_loop.append(False)
+            return take(*args)
+
+        monkeypatch.setattr(backend, "take", recording_take)
+        client = TestClient(limited_app(requests=1, period=60, backend=backend))
+        assert client.get("/api/v1/contracts/").status_code == 200
+        assert client.get("/api/v1/contracts/").status_code == 429
+        assert on_loop == [False, False]
+
+
+class TestLoadShedding:
+    """Test admission control under load"""
+
+    def test_batch_is_shed_while_overloaded(self):
+        """Batch requests get 503 while the pool wait is high; interactive ones pass"""
+        monitor = LoadMonitor(pool_wait_threshold=0.1, queue_depth_threshold=1000)
+        client = TestClient(limited_app(load_monitor=monitor, rate_limit=False, retry_after=7))
+
+        monitor.pool_wait = 0.5
+        response = client.get("/api/v1/contracts/", headers={"X-Priority": "batch"})
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "7"
+        assert client.get("/api/v1/contracts/").status_code == 200
+
+        monitor.pool_wait = 0.0
+        assert client.get("/api/v1/contracts/", headers={"X-Priority": "batch"}).status_code == 200
+
+    def test_overload_reasons(self):
+        """Either signal over its threshold overloads the gateway"""
+        monitor = LoadMonitor(pool_wait_threshold=0.1, queue_depth_threshold=10)
+        assert monitor.overload_reason() is None
+        monitor.queue_depth = 10
+        assert monitor.overload_reason() == "ledger_queue_depth"
+        monitor.pool_wait = 0.2
+        assert monitor.overload_reason() == "db_pool_wait"
@@ -0,0 +1,134 @@
+"""
+Test suite for read-replica routing and consistency tokens
+"""
+
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app import replicas
+from app.database import SessionLocal
+from app.replicas import (
+    ConsistencyMiddleware,
+    ReplicaRouter,
+    decode_token,
+    encode_token,
+    parse_lsn
+)
+
+
+def replica_router(tmp_path, count=1, window=5.0):
+    router = ReplicaRouter(
+        [f"sqlite:///{tmp_path / f'replica{i}.db'}" for i in range(count)],
+        consistency_window=window
+    )
+    for replica in router.replicas:
+        replica.check()
+    return router
+
+
+class TestConsistencyToken:
+    """Test token and WAL position encoding"""
+
+    def test_parse_lsn(self):
+        """WAL positions compare in commit order"""
+        assert parse_lsn("0/16B3748") == 0x16B3748
+        assert parse_lsn("16/B374D848") > parse_lsn("15/FFFFFFFF")
+        assert parse_lsn("garbage") is None
+        assert parse_lsn(None) is None
+
+    def test_token_round_trip(self):
+        """Tokens decode to what they were issued with"""
+        assert decode_token(encode_token(1234, 1700000000.5)) == (1234, 1700000000.5)
+        assert decode_token(encode_token(None, 1700000000.5)) == (None, 1700000000.5)
+
+    def test_malformed_token_is_expired(self):
+        """A bad token routes like no token"""
+        assert decode_token("not-a-token") == (None, 0.0)
+        assert decode_token(None) == (None, 0.0)
+
+
+class TestReplicaRouter:
+    """Test choosing the server for a read"""
+
+    def test_reads_without_token_use_replica(self, tmp_path):
+        """Plain reads go to a healthy replica"""
+        router = replica_router(tmp_path)
+        assert router.choose() is router.replicas[0]
+
+    def test_token_pins_reads_until_replica_catches_up(self, tmp_path):
+        """A replica behind the client's last write is skipped"""
+        router = replica_router(tmp_path)
+        replica = router.replicas[0]
+        token = encode_token(500, time.time() + 5)
+
+        replica.replay_lsn = 400
+        assert router.choose(token) is None
+        replica.replay_lsn = 500
+        assert router.choose(token) is replica
+
+    def test_token_position_outlives_expiry(self, tmp_path):
+        """An expired token still keeps reads off a replica that has not replayed the write"""
+        router = replica_router(tmp_path)
+        replica = router.replicas[0]
+        token = encode_token(500, time.time() - 1)
+
+        replica.replay_lsn = 400
+        assert router.choose(token) is None
+        replica.replay_lsn = 500
+        assert router.choose(token) is replica
+
+    def test_token_without_position_pins_until_expiry(self, tmp_path):
+        """Without WAL positions the token keeps reads on the primary"""
+        router = replica_router(tmp_path)
+        assert router.choose(encode_token(None, time.time() + 5)) is None
+        assert router.choose(encode_token(None, time.time() - 1)) is router.replicas[0]
+
+    def test_lagging_or_down_replicas_are_skipped(self, tmp_path):
+        """Replicas beyond the lag limit or failing checks get no reads"""
+        router = replica_router(tmp_path, count=2)
+        first, second = router.replicas
+        first.lag_seconds = router.max_lag + 1
+        second.healthy = False
+        assert router.choose() is None
+
+        second.healthy = True
+        assert all(router.choose() is second for _ in range(4))
+
+
+class TestConsistencyMiddleware:
+    """Test issuing tokens from committing requests"""
+
+    def test_committing_request_returns_token(self, tmp_path, monkeypatch):
+        """Writes get a token, reads do not"""
+        primary = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+        monkeypatch.setattr(replicas, "engine", primary)
+        monkeypatch.setattr(replicas, "_router", replica_router(tmp_path))
+
+        app = FastAPI()
+
+        @app.post("/write")
+        def write():
+            db = SessionLocal(bind=primary)
+            try:
+                db.execute(text("CREATE TABLE IF NOT EXISTS t (x INTEGER)"))
+                db.execute(text("INSERT INTO t VALUES (1)"))
+                db.commit()
+            finally:
+                db.close()
+            return {}
+
+        @app.get("/read")
+        def read():
+            return {}
+
+        app.add_middleware(ConsistencyMiddleware)
+        client = TestClient(app)
+
+        token = client.post("/write").headers["x-consistency-token"]
+        lsn, expires_at = decode_token(token)
+        assert lsn is None
+        assert expires_at > time.time()
+        assert "x-consistency-token" not in client.get("/read").headers
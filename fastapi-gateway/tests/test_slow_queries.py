@@ -0,0 +1,100 @@
+"""
+Test suite for slow query capture
+"""
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app import slow_queries
+from app.config import settings
+from app.main import app
+from app.slow_queries import SlowQueryLog, normalize_statement, parameter_shape
+
+
+class TestFingerprints:
+    """Test statement normalization"""
+
+    def test_literals_and_placeholders_are_normalized(self):
+        """Statements differing only in values share a fingerprint"""
+        first = normalize_statement("SELECT * FROM contracts WHERE id = 5 AND status = 'ACTIVE'")
+        second = normalize_statement("SELECT *  FROM contracts\n WHERE id = %(id_1)s AND status = %(status_1)s")
+
+        assert first == second == "SELECT * FROM contracts WHERE id = ? AND status = ?"
+
+    def test_lists_are_collapsed(self):
+        """IN and VALUES lists of any length normalize the same"""
+        assert normalize_statement("SELECT 1 FROM t WHERE id IN (1, 2, 3)") == "SELECT ? FROM t WHERE id IN (...)"
+        assert normalize_statement("INSERT INTO t (a, b) VALUES (?, ?), (?, ?)") == "INSERT INTO t (a, b) VALUES (...)"
+
+    def test_casts_and_identifiers_are_kept(self):
+        """Postgres casts and digits inside names are not literals"""
+        assert normalize_statement("SELECT col1::text FROM t2 LIMIT 10") == "SELECT col1::text FROM t2 LIMIT ?"
+
+    def test_parameter_shape_hides_values(self):
+        """Only names and types are recorded"""
+        assert parameter_shape({"vendor_id": "V1", "ids": [1, 2], "limit": 10}) == {
+            "vendor_id": "str", "ids": "list[2]", "limit": "int"
+        }
+        assert parameter_shape([(1, "a"), (2, "b")], executemany=True) == {"rows": 2, "each": ["int", "str"]}
+
+
+class TestSlowQueryLog:
+    """Test recording through engine events"""
+
+    def test_slow_statements_are_aggregated(self):
+        """Executions over the threshold accumulate per fingerprint"""
+        engine = create_engine("sqlite://")
+        log = SlowQueryLog(engine, threshold_ms=0.0)
+        log.install()
+        try:
+            with engine.connect() as connection:
+                for value in (1, 2, 3):
+                    connection.execute(text("SELECT :value + 1"), {"value": value})
+                connection.execute(text("SELECT 'x'"))
+        finally:
+            log.uninstall()
+
+        top = log.top()
+        assert top[0]["slow_calls"] == 3
+        assert top[0]["statement"] == "SELECT ? + ?"
+        assert top[0]["parameter_shape"] == ["int"]
+        assert top[0]["total_ms"] >= top[0]["max_ms"]
+        assert not log.explain_supported
+
+    def test_fast_statements_are_ignored(self):
+        """Statements under the threshold are not recorded"""
+        engine = create_engine("sqlite://")
+        log = SlowQueryLog(engine, threshold_ms=60000.0)
+        log.install()
+        try:
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+        finally:
+            log.uninstall()
+
+        assert log.top() == []
+
+
+class TestAdminEndpoint:
+    """Test the slow query admin endpoint"""
+
+    def test_requires_admin_token(self, monkeypatch):
+        """Requests without the configured token are refused"""
+        monkeypatch.setattr(settings, "admin_token", "secret")
+        client = TestClient(app)
+
+        assert client.get("/api/v1/admin/slow-queries").status_code == 403
+        assert client.get("/api/v1/admin/slow-queries", headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+    def test_lists_fingerprints(self, monkeypatch):
+        """The endpoint serves the installed log's top fingerprints"""
+        monkeypatch.setattr(settings, "admin_token", "secret")
+        log = SlowQueryLog(create_engine("sqlite://"), threshold_ms=0.0)
+        log.record("SELECT * FROM contracts OFFSET 500", None, False, 120.0)
+        monkeypatch.setattr(slow_queries, "_slow_query_log", log)
+
+        response = TestClient(app).get("/api/v1/admin/slow-queries", headers={"X-Admin-Token": "secret"})
+
+        assert response.status_code == 200
+        assert response.json()["fingerprints"][0]["statement"] == "SELECT * FROM contracts OFFSET ?"
+        assert response.json()["fingerprints"][0]["total_ms"] == 120.0
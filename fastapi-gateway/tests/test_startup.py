@@ -0,0 +1,132 @@
+"""
+Test suite for the startup schema check, pre-warming and startup budget
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from app import database, health_prober
+from app.config import settings
+from app.database import InstrumentedQueuePool, SchemaVersionError, check_schema_version, prewarm_pool
+from app.repository import find_contract
+from app.startup import prewarm_statements
+
+GATEWAY_DIR = Path(__file__).resolve().parent.parent
+
+# Imports the application and runs its lifespan startup in a fresh interpreter
+STARTUP_BENCHMARK = """
+import json, time
+started = time.perf_counter()
+from fastapi.testclient import TestClient
+from app.main import app
+imported = time.perf_counter() - started
+with TestClient(app):
+    ready = time.perf_counter() - started
+print(json.dumps({"import": imported, "ready": ready}))
+"""
+
+
+@pytest.fixture
+def engine(monkeypatch, tmp_path):
+    primary = database.engine
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'gateway.db'}",
+        connect_args={"check_same_thread": False},
+        poolclass=InstrumentedQueuePool,
+        pool_size=3,
+        max_overflow=0
+    )
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "_schema_status", None)
+    database.SessionLocal.configure(bind=engine)
+    yield engine
+    database.SessionLocal.configure(bind=primary)
+    engine.dispose()
+
+
+def migrate(engine, version: int):
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE schema_version (version INTEGER PRIMARY KEY, description TEXT)"))
+        connection.execute(text("INSERT INTO schema_version VALUES (:version, 'test')"), {"version": version})
+
+
+class TestSchemaCheck:
+    """Test the schema version check replacing create_all"""
+
+    def test_current_schema_skips_create_all(self, engine):
+        """A migrated database is only read, never altered"""
+        migrate(engine, database.SCHEMA_VERSION)
+        status = check_schema_version(auto_create=True)
+        assert status["ok"] is True
+        assert status["version"] == database.SCHEMA_VERSION
+        assert status["created"] is False
+        assert inspect(engine).get_table_names() == ["schema_version"]
+
+    def test_old_schema_fails_readiness(self, engine):
+        """An outdated schema raises and makes the database check fail"""
+        migrate(engine, database.SCHEMA_VERSION - 1)
+        with pytest.raises(SchemaVersionError):
+            check_schema_version(auto_create=True)
+        with pytest.raises(RuntimeError, match="apply-migrations"):
+            health_prober._check_database()
+
+    def test_unmigrated_database(self, engine):
+        """Development databases get create_all, others are refused"""
+        with pytest.raises(SchemaVersionError):
+            check_schema_version(auto_create=False)
+        status = check_schema_version(auto_create=True)
+        assert status["created"] is True
+        assert "vendor_contract_management_contract" in inspect(engine).get_table_names()
+
+
+class TestPrewarm:
+    """Test pre-warming before the first request"""
+
+    def test_pool_is_filled(self, engine):
+        """Pre-warmed connections wait idle in the pool, capped at its size"""
+        assert prewarm_pool(10) == 3
+        assert engine.pool.checkedin() == 3
+        assert engine.pool.checkedout() == 0
+
+    def test_statements_are_cached(self, engine):
+        """Hot-path lookups are compiled once, before any request"""
+        check_schema_version(auto_create=True)
+        prewarm_statements()
+        cached = len(engine._compiled_cache)
+        assert cached >= 6
+
+        db = database.SessionLocal()
+        try:
+            assert find_contract(db, "C1") is None
+        finally:
+            db.close()
+        assert len(engine._compiled_cache) == cached
+
+
+class TestStartupBudget:
+    """Benchmark cold start against the startup budget"""
+
+    def test_cold_start_within_budget(self, tmp_path):
+        """A fresh worker imports, checks the schema, warms up and reports ready in budget"""
+        env = dict(os.environ)
+        env.update({
+            "PYTHONPATH": str(GATEWAY_DIR),
+            "DATABASE_URL": f"sqlite:///{tmp_path / 'gateway.db'}",
+            "DB_SCHEMA_AUTO_CREATE": "true",
+            "TRACING_EXPORT_PATH": str(tmp_path / "traces.jsonl"),
+            "RATE_LIMIT_PATH": str(tmp_path / "rate-limit.db")
+        })
+        env.pop("FABRIC_STANDIN_URL", None)
+        result = subprocess.run(
+            [sys.executable, "-c", STARTUP_BENCHMARK],
+            cwd=tmp_path, env=env, capture_output=True, text=True, timeout=120
+        )
+        assert result.returncode == 0, result.stderr
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        assert timings["ready"] < settings.startup_budget_seconds, timings
@@ -0,0 +1,95 @@
+"""
+Test suite for W3C trace context propagation and span export
+"""
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.tracing import (
+    TracingMiddleware, format_trace, load_spans, parse_traceparent, start_span, start_tracing, stop_tracing
+)
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+class TestTraceparent:
+    """Test W3C traceparent parsing"""
+
+    def test_valid_header(self):
+        """Trace ID, parent ID and sampled flag are extracted"""
+        assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01") == (TRACE_ID, PARENT_ID, True)
+        assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-00") == (TRACE_ID, PARENT_ID, False)
+
+    def test_invalid_headers(self):
+        """Malformed and all-zero IDs start a new trace"""
+        assert parse_traceparent(None) is None
+        assert parse_traceparent("garbage") is None
+        assert parse_traceparent(f"00-{'0' * 32}-{PARENT_ID}-01") is None
+        assert parse_traceparent(f"00-{TRACE_ID}-{'0' * 16}-01") is None
+
+    def test_disabled_tracing_yields_no_span(self):
+        """Spans cost nothing when tracing is off"""
+        with start_span("noop") as span:
+            assert span is None
+
+
+class TestRequestTracing:
+    """Test spans recorded for one request"""
+
+    def test_request_continues_caller_trace(self, tmp_path):
+        """Server, SQL and ledger spans join the caller's trace"""
+        engine = create_engine("sqlite://")
+        app = FastAPI()
+        app.add_middleware(TracingMiddleware)
+
+        @app.get("/contracts/{contract_id}")
+        async def get_contract(contract_id: str):
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+            with start_span("ledger query_contract"):
+                pass
+            return {"id": contract_id}
+
+        path = tmp_path / "traces.jsonl"
+        start_tracing(str(path), "test-gateway")
+        try:
+            response = TestClient(app).get(
+                "/contracts/C1", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"}
+            )
+        finally:
+            stop_tracing()
+
+        assert response.status_code == 200
+        assert parse_traceparent(response.headers["traceresponse"])[0] == TRACE_ID
+
+        spans = {span["name"]: span for span in load_spans([str(path)])}
+        server = spans["GET /contracts/{contract_id}"]
+        assert server["traceId"] == TRACE_ID
+        assert server["parentSpanId"] == PARENT_ID
+        assert spans["db SELECT"]["parentSpanId"] == server["spanId"]
+        assert spans["ledger query_contract"]["parentSpanId"] == server["spanId"]
+        assert all(span["service"] == "test-gateway" for span in spans.values())
+
+        lines = format_trace(list(spans.values()), TRACE_ID)
+        assert len(lines) == 3
+        assert "GET /contracts/{contract_id}" in lines[0]
+
+    def test_unsampled_trace_is_not_exported(self, tmp_path):
+        """The caller's sampling decision is honoured"""
+        app = FastAPI()
+        app.add_middleware(TracingMiddleware)
+
+        @app.get("/ping")
+        async def ping():
+            return {}
+
+        path = tmp_path / "traces.jsonl"
+        start_tracing(str(path), "test-gateway")
+        try:
+            TestClient(app).get("/ping", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-00"})
+        finally:
+            stop_tracing()
+
+        assert not path.exists()
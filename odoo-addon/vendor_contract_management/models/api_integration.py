@@ -6,8 +6,13 @@ import json
 import logging
 from datetime import datetime
 
+from .. import tracing
+
 _logger = logging.getLogger(__name__)
 
+# Last consistency token from a gateway write, sent back so later reads see it
+_consistency_token = {}
+
 
 class VendorContractAPI(models.TransientModel):
     _name = 'vendor.contract.api'
@@ -43,6 +48,13 @@ class VendorContractAPI(models.TransientModel):
         }
         if self.api_key:
             headers['X-API-Key'] = self.api_key
+        # Continue the current trace in the gateway
+        traceparent = tracing.current_traceparent()
+        if traceparent:
+            headers['traceparent'] = traceparent
+        token = _consistency_token.get(self.api_base_url)
+        if token:
+            headers['X-Consistency-Token'] = token
         return headers
 
     def _make_request(self, method, endpoint, data=None):
@@ -51,6 +63,18 @@ class VendorContractAPI(models.TransientModel):
         if not self.api_base_url:
             self.api_base_url = 'http://fastapi-gateway:8000/api/v1'
         url = f"{self.api_base_url}/{endpoint}"
+        
+        attributes = {'http.method': method, 'http.url': url}
+        with tracing.span(f"{method} {endpoint.split('/')[0]}", tracing.CLIENT, attributes) as request_span:
+            result = self._send_request(method, url, data)
+            if result.get('status_code'):
+                request_span['attributes']['http.status_code'] = result['status_code']
+            if not result.get('success'):
+                request_span['status'] = {'code': tracing.STATUS_ERROR, 'message': result.get('error', '')[:200]}
+            return result
+
+    def _send_request(self, method, url, data=None):
+        """Send API request and normalize the response"""
         headers = self._get_headers()
         
         try:
@@ -67,6 +91,10 @@ class VendorContractAPI(models.TransientModel):
             else:
                 return {'success': False, 'error': f'Unsupported method: {method}'}
             
+            # Reads may be served by a replica; the token keeps them behind our own writes
+            if response.headers.get('X-Consistency-Token'):
+                _consistency_token[self.api_base_url] = response.headers['X-Consistency-Token']
+            
             if response.status_code in [200, 201]:
                 return {
                     'success': True,
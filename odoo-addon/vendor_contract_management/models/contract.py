@@ -6,6 +6,8 @@ from datetime import datetime, timedelta
 import json
 import logging
 
+from .. import tracing
+
 _logger = logging.getLogger(__name__)
 
 
@@ -217,6 +219,11 @@ class VendorContract(models.Model):
     @api.model
     def create(self, vals):
         """Override create to generate contract ID and sync with blockchain"""
+        with tracing.span('VendorContract.create'):
+            return self._create_traced(vals)
+
+    def _create_traced(self, vals):
+        """Create contract, sync it to the blockchain and log the workflow"""
         if vals.get('contract_id', _('New')) == _('New'):
             vals['contract_id'] = self.env['ir.sequence'].next_by_code('vendor.contract') or _('New')
         
@@ -298,6 +305,14 @@ class VendorContract(models.Model):
 
     def _sync_to_blockchain(self, action='create'):
         """Sync contract to blockchain via API"""
+        for contract in self:
+            with tracing.span('VendorContract._sync_to_blockchain', attributes={
+                'contract.id': contract.contract_id, 'contract.action': action
+            }):
+                contract._sync_one_to_blockchain(action)
+
+    def _sync_one_to_blockchain(self, action):
+        """Sync one contract action to blockchain via API"""
         for contract in self:
             try:
                 # Generate a mock transaction ID for demonstration
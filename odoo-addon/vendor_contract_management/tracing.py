@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+W3C trace context for calls from Odoo to the FastAPI gateway
+
+Spans opened inside another span join its trace, so a contract save
+(create -> blockchain sync -> gateway call) shows up as a single trace
+next to the gateway's own spans. Every gateway call carries the
+``traceparent`` header of the span that made it.
+
+Spans are appended as OTLP/JSON lines to the file named by the
+VENDORCHAIN_TRACE_FILE environment variable; without it only the header
+is propagated, so the gateway still links its spans to one trace.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current_span = ContextVar('vendorchain_current_span', default=None)
+_write_lock = threading.Lock()
+
+SERVICE_NAME = 'vendorchain-odoo'
+INTERNAL = 1
+CLIENT = 3
+STATUS_ERROR = 2
+
+
+def current_traceparent():
+    """traceparent header for the current span, if any"""
+    span = _current_span.get()
+    if span is None:
+        return None
+    return f"00-{span['traceId']}-{span['spanId']}-01"
+
+
+@contextmanager
+def span(name, kind=INTERNAL, attributes=None):
+    """Run a block inside a span, a child of the current one if any"""
+    parent = _current_span.get()
+    current = {
+        'traceId': parent['traceId'] if parent else os.urandom(16).hex(),
+        'spanId': os.urandom(8).hex(),
+        'name': name,
+        'kind': kind,
+        'startTimeUnixNano': str(time.time_ns()),
+        'attributes': dict(attributes or {}),
+        'status': {'code': 0},
+    }
+    if parent:
+        current['parentSpanId'] = parent['spanId']
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current['status'] = {'code': STATUS_ERROR, 'message': f"{e.__class__.__name__}: {e}"}
+        raise
+    finally:
+        _current_span.reset(token)
+        current['endTimeUnixNano'] = str(time.time_ns())
+        _export(current)
+
+
+def _export(finished):
+    """Append a finished span to the trace file"""
+    path = os.environ.get('VENDORCHAIN_TRACE_FILE')
+    if not path:
+        return
+    finished = dict(finished)
+    finished['attributes'] = [
+        {'key': key, 'value': {'intValue': str(value)} if isinstance(value, int) else {'stringValue': str(value)}}
+        for key, value in finished['attributes'].items()
+    ]
+    request = {
+        'resourceSpans': [{
+            'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': SERVICE_NAME}}]},
+            'scopeSpans': [{'scope': {'name': 'vendorchain'}, 'spans': [finished]}],
+        }]
+    }
+    line = json.dumps(request, separators=(',', ':')) + '\n'
+    try:
+        with _write_lock, open(path, 'a') as trace_file:
+            trace_file.write(line)
+    except OSError:
+        pass
@@ -0,0 +1,32 @@
+-- Migration: 002_ledger_operations.sql
+-- Description: Outbox table for deferred ledger operations
+-- Date: 2026-10-19
+-- Version: 2
+
+CREATE TABLE IF NOT EXISTS vendor_contract_ledger_operation (
+    id VARCHAR(36) PRIMARY KEY,
+    operation VARCHAR(50) NOT NULL,
+    contract_id INTEGER,
+    workflow_log_id INTEGER,
+    payload JSONB NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'PENDING',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    blockchain_tx_id VARCHAR(255),
+    error_message TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    completed_at TIMESTAMP WITH TIME ZONE,
+    
+    CONSTRAINT fk_ledger_operation_contract FOREIGN KEY (contract_id)
+        REFERENCES vendor_contract_management_contract(id) ON DELETE SET NULL,
+    CONSTRAINT fk_ledger_operation_workflow_log FOREIGN KEY (workflow_log_id)
+        REFERENCES vendor_contract_management_workflow_log(id) ON DELETE SET NULL,
+    CONSTRAINT valid_ledger_operation_status CHECK (status IN ('PENDING', 'RUNNING', 'SUCCEEDED', 'FAILED'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_ledger_operation_status ON vendor_contract_ledger_operation(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_ledger_operation_contract_id ON vendor_contract_ledger_operation(contract_id);
+
+INSERT INTO schema_version (version, description)
+VALUES (2, 'Deferred ledger operations')
+ON CONFLICT (version) DO NOTHING;
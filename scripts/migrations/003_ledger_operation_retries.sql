@@ -0,0 +1,20 @@
+-- Migration: 003_ledger_operation_retries.sql
+-- Description: Retry scheduling, worker leases and dead-lettering for ledger operations
+-- Date: 2026-10-19
+-- Version: 3
+
+ALTER TABLE vendor_contract_ledger_operation
+    ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    ADD COLUMN IF NOT EXISTS locked_until TIMESTAMP WITH TIME ZONE;
+
+UPDATE vendor_contract_ledger_operation SET status = 'DEAD_LETTER' WHERE status = 'FAILED';
+
+ALTER TABLE vendor_contract_ledger_operation DROP CONSTRAINT IF EXISTS valid_ledger_operation_status;
+ALTER TABLE vendor_contract_ledger_operation ADD CONSTRAINT valid_ledger_operation_status
+    CHECK (status IN ('PENDING', 'RUNNING', 'SUCCEEDED', 'DEAD_LETTER'));
+
+CREATE INDEX IF NOT EXISTS idx_ledger_operation_due ON vendor_contract_ledger_operation(status, next_attempt_at);
+
+INSERT INTO schema_version (version, description)
+VALUES (3, 'Ledger operation retries and dead-lettering')
+ON CONFLICT (version) DO NOTHING;
@@ -0,0 +1,41 @@
+-- Migration: 004_merkle_anchoring.sql
+-- Description: Merkle-batched anchoring of contract changes with inclusion proofs
+-- Date: 2026-10-19
+-- Version: 4
+
+CREATE TABLE IF NOT EXISTS vendor_contract_merkle_anchor (
+    id SERIAL PRIMARY KEY,
+    root_hash VARCHAR(64) NOT NULL,
+    leaf_count INTEGER NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'PENDING',
+    blockchain_tx_id VARCHAR(255),
+    window_start TIMESTAMP WITH TIME ZONE,
+    window_end TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    anchored_at TIMESTAMP WITH TIME ZONE,
+    -- Anchorer lease while the root is written to the ledger
+    locked_until TIMESTAMP WITH TIME ZONE,
+    CONSTRAINT valid_merkle_anchor_status CHECK (status IN ('PENDING', 'ANCHORED'))
+);
+
+CREATE TABLE IF NOT EXISTS vendor_contract_merkle_leaf (
+    id SERIAL PRIMARY KEY,
+    contract_id INTEGER NOT NULL REFERENCES vendor_contract_management_contract(id) ON DELETE CASCADE,
+    anchor_id INTEGER REFERENCES vendor_contract_merkle_anchor(id),
+    action VARCHAR(50) NOT NULL,
+    leaf_hash VARCHAR(64) NOT NULL,
+    leaf_index INTEGER,
+    -- Sibling hashes from the leaf to the root, stored when the window is sealed
+    proof JSONB,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_merkle_anchor_root ON vendor_contract_merkle_anchor(root_hash);
+CREATE INDEX IF NOT EXISTS idx_merkle_anchor_status ON vendor_contract_merkle_anchor(status);
+CREATE INDEX IF NOT EXISTS idx_merkle_leaf_contract ON vendor_contract_merkle_leaf(contract_id);
+CREATE INDEX IF NOT EXISTS idx_merkle_leaf_anchor ON vendor_contract_merkle_leaf(anchor_id);
+CREATE INDEX IF NOT EXISTS idx_merkle_leaf_unsealed ON vendor_contract_merkle_leaf(id) WHERE anchor_id IS NULL;
+
+INSERT INTO schema_version (version, description)
+VALUES (4, 'Merkle-batched anchoring')
+ON CONFLICT (version) DO NOTHING;